@@ -0,0 +1,278 @@
+import os
+import sys
+import time
+import json
+import tempfile
+import argparse
+import cv2 as cv
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                "person_location_detector"))
+
+import autotuning
+import detectors
+import scheduling
+import capture_sources
+from pipeline_benchmark import DEFAULT_DETECTION_MODEL_CONFIGURATION_FILE_PATH, DETECTION_MODEL_BACKENDS, \
+    DETECTION_MODEL_TARGETS, write_synthetic_video, run_pipeline_with_scheduling, create_report
+
+
+def parse_arguments():
+    """
+    Parses command line arguments.
+
+    :return: parsed arguments
+    """
+    argument_parser = argparse.ArgumentParser(
+        description="Autotunes person location detection for this host: the pipeline replays the sample clip in real "
+                    "time with every candidate detection model backend and target, input size, OpenCV threads number "
+                    "and number of camera frames per detected frame, the winner that meets target FPS and latency is "
+                    "cached by CPU model, OpenCV build and detection model files hash and is used by the application "
+                    "at startup.")
+    argument_parser.add_argument("--weights", required=True, help="detection model weights file path")
+    argument_parser.add_argument("--configuration", default=DEFAULT_DETECTION_MODEL_CONFIGURATION_FILE_PATH,
+                                 help="detection model configuration file path (ignored for ONNX model)")
+    argument_parser.add_argument("--video", help="sample clip file path (synthetic clip is generated if omitted)")
+    argument_parser.add_argument("--synthetic-video-frames", type=int, default=150,
+                                 help="number of frames of the synthetic clip")
+    argument_parser.add_argument("--synthetic-video-resolution", default="1280x720",
+                                 help="resolution of the synthetic clip")
+    argument_parser.add_argument("--cameras", type=int, default=1, help="number of cameras that replay the sample clip")
+    argument_parser.add_argument("--target-fps", type=float, default=10.0,
+                                 help="minimum number of camera frames per second (of all cameras) the pipeline keeps "
+                                      "up with (detected and skipped ones)")
+    argument_parser.add_argument("--target-latency", type=float, default=200.0,
+                                 help="maximum p95 latency (in milliseconds) from capture to processing result")
+    argument_parser.add_argument("--backends",
+                                 help="candidate backends and targets, e.g. \"opencv:cpu,cuda:cuda_fp16\" (available "
+                                      "ones of the OpenCV build are used if omitted)")
+    argument_parser.add_argument("--input-sizes", default="320,416,512",
+                                 help="candidate detection model input sizes (multiples of 32)")
+    argument_parser.add_argument("--threads",
+                                 help="candidate OpenCV threads numbers for CPU targets, e.g. \"1,2,4\" (1, half and "
+                                      "all of the available cores if omitted)")
+    argument_parser.add_argument("--detect-every", default="1,2,3",
+                                 help="candidate numbers of camera frames per detected frame")
+    argument_parser.add_argument("--warmup-frames", type=int, default=10,
+                                 help="number of processed frames excluded from measurements")
+    argument_parser.add_argument("--timeout", type=float, default=600,
+                                 help="maximum duration of one candidate run in seconds")
+    argument_parser.add_argument("--cache", default=autotuning.AUTOTUNING_PROFILES_CACHE_FILE_PATH,
+                                 help="autotuning profiles cache file path")
+    argument_parser.add_argument("--output", help="JSON results file path (results are printed if omitted)")
+
+    return argument_parser.parse_args()
+
+
+def get_available_backends_and_targets():
+    """
+    Returns backends and targets that are available in the OpenCV build.
+
+    :return: list of tuples with backend name and target name
+    """
+    backends_and_targets = []
+    for backend_name, backend in sorted(DETECTION_MODEL_BACKENDS.items()):
+        try:
+            available_targets = set(cv.dnn.getAvailableTargets(backend))
+        except (AttributeError, cv.error):
+            available_targets = {cv.dnn.DNN_TARGET_CPU} if backend == cv.dnn.DNN_BACKEND_OPENCV else set()
+        backends_and_targets.extend((backend_name, target_name)
+                                    for target_name, target in sorted(DETECTION_MODEL_TARGETS.items())
+                                    if target in available_targets)
+
+    return backends_and_targets
+
+
+def create_candidate_arguments(arguments, video_file_path, backend_name, target_name, input_size,
+                               detect_every_frames_number):
+    """
+    Creates benchmark arguments of the candidate configuration.
+
+    :param arguments: parsed arguments
+    :param video_file_path: sample clip URI
+    :param backend_name: backend name
+    :param target_name: target name
+    :param input_size: detection model input size
+    :param detect_every_frames_number: number of camera frames per detected frame
+    :return: benchmark arguments
+    """
+    return argparse.Namespace(
+        weights=arguments.weights, configuration=arguments.configuration, video=video_file_path,
+        pacing=capture_sources.REALTIME_PACING, cameras=arguments.cameras, input_size=input_size, batch_size=1,
+        backend=backend_name, target=target_name, runtime=None, person_only_decoding=False,
+        detection_channel=autotuning.create_detection_channel_specification(detect_every_frames_number),
+        results_channel="block:100", scheduling=None, warmup_frames=arguments.warmup_frames,
+        timeout=arguments.timeout)
+
+
+def autotune(arguments, video_file_path, frame_resolution):
+    """
+    Runs pipeline with the candidate configurations. For every backend, target, input size and threads number the
+    numbers of camera frames per detected frame are tried in ascending order until targets are met (the next ones
+    only drop more frames).
+
+    :param arguments: parsed arguments
+    :param video_file_path: sample clip URI
+    :param frame_resolution: resolution of the sample clip frames
+    :return: list of candidate results
+    """
+    if arguments.backends is not None:
+        backends_and_targets = [tuple(backend_and_target.split(":"))
+                                for backend_and_target in arguments.backends.split(",")]
+    else:
+        backends_and_targets = get_available_backends_and_targets()
+    cpu_cores_number = len(scheduling.PROCESS_CPU_CORES or [0])
+    threads_numbers = [int(threads_number) for threads_number in arguments.threads.split(",")] \
+        if arguments.threads is not None else sorted({1, max(1, cpu_cores_number // 2), cpu_cores_number})
+
+    candidate_results = []
+    for backend_name, target_name in backends_and_targets:
+        # OpenCV thread pool is used by CPU target only
+        for threads_number in threads_numbers if target_name == "cpu" else [None]:
+            for input_size in [int(input_size) for input_size in arguments.input_sizes.split(",")]:
+                for detect_every_frames_number in sorted(int(detect_every_frames_number) for detect_every_frames_number
+                                                         in arguments.detect_every.split(",")):
+                    candidate_arguments = create_candidate_arguments(arguments, video_file_path, backend_name,
+                                                                     target_name, input_size,
+                                                                     detect_every_frames_number)
+                    pipeline_scheduling = {scheduling.DETECTION_STAGE: {"threads_number": threads_number,
+                                                                        "cpu_cores": None, "nice": None}}
+                    processed_frames_number, duration, cpu_time, metrics_snapshot = run_pipeline_with_scheduling(
+                        candidate_arguments, video_file_path, frame_resolution, pipeline_scheduling)
+                    report = create_report(candidate_arguments, frame_resolution, processed_frames_number, duration,
+                                           cpu_time, metrics_snapshot)
+                    # Camera frames skipped by sampling are dropped by capture to detection channels
+                    camera_frames_number = sum(channel_summary["items"] + channel_summary["dropped_items"]
+                                               for channel_name, channel_summary in report["channels"].items()
+                                               if channel_name.startswith("capture_to_detection"))
+                    latencies_p95_ms = [camera_latency_ms["p95"]
+                                        for camera_latency_ms in report["cameras_latency_ms"].values()]
+                    candidate_result = {
+                        "backend": backend_name, "target": target_name, "input_size": input_size,
+                        "opencv_threads_number": threads_number,
+                        "detect_every_frames_number": detect_every_frames_number,
+                        "camera_fps": camera_frames_number / duration if duration > 0 else 0.0,
+                        "detection_fps": report["throughput_fps"],
+                        "latency_p95_ms": max(latencies_p95_ms) if len(latencies_p95_ms) > 0 else float("inf"),
+                        "cpu_utilization_cores": report["cpu_utilization_cores"]}
+                    candidate_result["meets_targets"] = processed_frames_number > 0 and \
+                        candidate_result["camera_fps"] >= arguments.target_fps and \
+                        candidate_result["latency_p95_ms"] <= arguments.target_latency
+                    print("%s:%s, input size: %d, threads: %s, detect every %d: %.1f camera FPS (%.1f detected), "
+                          "latency p95: %.1f ms%s" % (
+                              backend_name, target_name, input_size, threads_number, detect_every_frames_number,
+                              candidate_result["camera_fps"], candidate_result["detection_fps"],
+                              candidate_result["latency_p95_ms"],
+                              " (meets targets)" if candidate_result["meets_targets"] else ""))
+                    candidate_results.append(candidate_result)
+                    if candidate_result["meets_targets"]:
+                        break
+
+    return candidate_results
+
+
+def select_winner(candidate_results):
+    """
+    Selects the winner: among candidates that meet targets the most accurate one (the largest input size, the
+    smallest number of camera frames per detected frame) with the lowest latency, otherwise the one that keeps up with
+    the most camera frames.
+
+    :param candidate_results: list of candidate results
+    :return: winner candidate result (None if there are no candidates)
+    """
+    if len(candidate_results) == 0:
+        return None
+
+    meeting_targets_candidate_results = [candidate_result for candidate_result in candidate_results
+                                         if candidate_result["meets_targets"]]
+    if len(meeting_targets_candidate_results) > 0:
+        return min(meeting_targets_candidate_results, key=lambda candidate_result: (
+            -candidate_result["input_size"], candidate_result["detect_every_frames_number"],
+            candidate_result["latency_p95_ms"]))
+
+    return min(candidate_results, key=lambda candidate_result: (-candidate_result["camera_fps"],
+                                                                candidate_result["latency_p95_ms"]))
+
+
+def create_profile(arguments, winner_candidate_result):
+    """
+    Creates autotuning profile of the winner.
+
+    :param arguments: parsed arguments
+    :param winner_candidate_result: winner candidate result
+    :return: autotuning profile
+    """
+    return {
+        "detection_model_backend": DETECTION_MODEL_BACKENDS[winner_candidate_result["backend"]],
+        "detection_model_target": DETECTION_MODEL_TARGETS[winner_candidate_result["target"]],
+        "detection_model_input_size": [winner_candidate_result["input_size"], winner_candidate_result["input_size"]],
+        "opencv_threads_number": winner_candidate_result["opencv_threads_number"],
+        "detect_every_frames_number": winner_candidate_result["detect_every_frames_number"],
+        "backend": winner_candidate_result["backend"],
+        "target": winner_candidate_result["target"],
+        "camera_fps": winner_candidate_result["camera_fps"],
+        "detection_fps": winner_candidate_result["detection_fps"],
+        "latency_p95_ms": winner_candidate_result["latency_p95_ms"],
+        "meets_targets": winner_candidate_result["meets_targets"],
+        "target_fps": arguments.target_fps,
+        "target_latency_ms": arguments.target_latency,
+        "cameras": arguments.cameras,
+        "cpu_model": autotuning.get_cpu_model(),
+        "opencv_version": cv.__version__,
+        "autotuning_time": time.time()
+    }
+
+
+def main():
+    """
+    Script entry point.
+    """
+    arguments = parse_arguments()
+    if detectors.is_onnx_model(arguments.weights):
+        # ONNX model is run without configuration (as by the application), so the profile is saved under its key
+        arguments.configuration = None
+
+    with tempfile.TemporaryDirectory() as temporary_directory_path:
+        video_file_path = arguments.video
+        if video_file_path is None:
+            video_file_path = os.path.join(temporary_directory_path, "synthetic_clip.avi")
+            write_synthetic_video(video_file_path, arguments.synthetic_video_frames, tuple(
+                int(dimension) for dimension in arguments.synthetic_video_resolution.split("x")))
+        # Sample clip is replayed at its FPS as live camera, so frames that detection cannot keep up with are skipped
+        if not video_file_path.startswith(capture_sources.VIDEO_FILE_URI_SCHEME + "://"):
+            video_file_path = capture_sources.create_video_file_uri(video_file_path, capture_sources.REALTIME_PACING)
+
+        video_capture = capture_sources.open_video_capture(video_file_path)
+        if not video_capture.isOpened():
+            sys.exit("Video file %s cannot be opened!" % video_file_path)
+        frame_resolution = (int(video_capture.get(cv.CAP_PROP_FRAME_WIDTH)),
+                            int(video_capture.get(cv.CAP_PROP_FRAME_HEIGHT)))
+        video_capture.release()
+
+        candidate_results = autotune(arguments, video_file_path, frame_resolution)
+
+    winner_candidate_result = select_winner(candidate_results)
+    if winner_candidate_result is None:
+        sys.exit("There are no candidate configurations!")
+
+    profile = create_profile(arguments, winner_candidate_result)
+    autotuning.save_autotuning_profile(arguments.weights, arguments.configuration, profile, arguments.cache)
+    print("Winner: %s:%s, input size: %d, threads: %s, detect every %d (%.1f camera FPS, latency p95: %.1f ms)%s, "
+          "saved to %s" % (profile["backend"], profile["target"], winner_candidate_result["input_size"],
+                           profile["opencv_threads_number"], profile["detect_every_frames_number"],
+                           profile["camera_fps"],
+                           profile["latency_p95_ms"], "" if profile["meets_targets"] else " does not meet targets",
+                           arguments.cache))
+
+    report = {"cpu_model": profile["cpu_model"], "opencv_build": autotuning.get_opencv_build_identity(),
+              "target_fps": arguments.target_fps, "target_latency_ms": arguments.target_latency,
+              "candidates": candidate_results, "profile": profile}
+    if arguments.output is not None:
+        with open(arguments.output, "w") as results_file:
+            json.dump(report, results_file, indent=4)
+    else:
+        print(json.dumps(report, indent=4))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+import os
+import sys
+import time
+import json
+import argparse
+import numpy as np
+import cv2 as cv
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                "person_location_detector"))
+
+import detectors
+
+DEFAULT_DETECTION_MODEL_CONFIGURATION_FILE_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "person_location_detector", "detection_models",
+    "yolov4-tiny-COCO-Person.cfg")
+
+
+def parse_arguments():
+    """
+    Parses command line arguments.
+
+    :return: parsed arguments
+    """
+    argument_parser = argparse.ArgumentParser(
+        description="Measures CPU throughput of batched detection model inference against batch size.")
+    argument_parser.add_argument("--weights", required=True, help="detection model weights file path")
+    argument_parser.add_argument("--configuration", default=DEFAULT_DETECTION_MODEL_CONFIGURATION_FILE_PATH,
+                                 help="detection model configuration file path")
+    argument_parser.add_argument("--input-size", type=int, default=416, help="detection model input size")
+    argument_parser.add_argument("--batch-sizes", default="1,2,3,4,6,8", help="comma separated batch sizes")
+    argument_parser.add_argument("--frame-resolution", default="1280x720", help="resolution of the synthetic frames")
+    argument_parser.add_argument("--warmup-iterations", type=int, default=3, help="number of warmup iterations")
+    argument_parser.add_argument("--iterations", type=int, default=20, help="number of measured iterations")
+    argument_parser.add_argument("--output", help="JSON results file path (results are printed if omitted)")
+
+    return argument_parser.parse_args()
+
+
+def generate_frames(frames_number, frame_resolution):
+    """
+    Generates synthetic frames: smoothed noise, so detection model post-processing has a realistic amount of work.
+
+    :param frames_number: number of frames
+    :param frame_resolution: frame resolution
+    :return: list of frames
+    """
+    random_generator = np.random.default_rng(0)
+    return [cv.GaussianBlur(random_generator.integers(0, 256, (frame_resolution[1], frame_resolution[0], 3),
+                                                      dtype=np.uint8), (31, 31), 0) for _ in range(frames_number)]
+
+
+def measure_batch_size_throughput(detection_model, frames, warmup_iterations, iterations):
+    """
+    Measures throughput and latency of the batched detection for one batch size.
+
+    :param detection_model: batched detection model
+    :param frames: frames of one batch
+    :param warmup_iterations: number of warmup iterations
+    :param iterations: number of measured iterations
+    :return: dictionary with measurement results
+    """
+    for _ in range(warmup_iterations):
+        detection_model.detect_batch(frames, 0.5, 0.4)
+
+    batch_durations = []
+    for _ in range(iterations):
+        start_time = time.perf_counter()
+        detection_model.detect_batch(frames, 0.5, 0.4)
+        batch_durations.append(time.perf_counter() - start_time)
+
+    batch_durations = np.array(batch_durations)
+    return {
+        "batch_size": len(frames),
+        "throughput_fps": len(frames) * iterations / batch_durations.sum(),
+        "batch_latency_ms_p50": float(np.percentile(batch_durations, 50) * 1000),
+        "batch_latency_ms_p95": float(np.percentile(batch_durations, 95) * 1000)
+    }
+
+
+def main():
+    """
+    Script entry point.
+    """
+    arguments = parse_arguments()
+    batch_sizes = [int(batch_size) for batch_size in arguments.batch_sizes.split(",")]
+    frame_resolution = tuple(int(dimension) for dimension in arguments.frame_resolution.split("x"))
+
+    detection_model = detectors.BatchedDetectionModel(arguments.weights, arguments.configuration)
+    detection_model.set_preferable_backend_and_target(cv.dnn.DNN_BACKEND_OPENCV, cv.dnn.DNN_TARGET_CPU)
+    detection_model.set_input_params(1.0 / 255, (arguments.input_size, arguments.input_size))
+
+    frames = generate_frames(max(batch_sizes), frame_resolution)
+
+    results = []
+    for batch_size in batch_sizes:
+        batch_size_results = measure_batch_size_throughput(detection_model, frames[:batch_size],
+                                                           arguments.warmup_iterations, arguments.iterations)
+        print("Batch size: %d, throughput: %.1f FPS, batch latency p50: %.1f ms, p95: %.1f ms" % (
+            batch_size, batch_size_results["throughput_fps"], batch_size_results["batch_latency_ms_p50"],
+            batch_size_results["batch_latency_ms_p95"]))
+        results.append(batch_size_results)
+
+    report = {"opencv_version": cv.__version__, "opencv_threads_number": cv.getNumThreads(),
+              "input_size": arguments.input_size, "frame_resolution": frame_resolution, "results": results}
+    if arguments.output is not None:
+        with open(arguments.output, "w") as results_file:
+            json.dump(report, results_file, indent=4)
+    else:
+        print(json.dumps(report, indent=4))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+import sys
+import json
+import argparse
+
+HIGHER_IS_BETTER_KEYWORDS = ("throughput", "fps")
+LOWER_IS_BETTER_KEYWORDS = ("latency", "_ms", "_us", "cpu_utilization")
+
+
+def parse_arguments():
+    """
+    Parses command line arguments.
+
+    :return: parsed arguments
+    """
+    argument_parser = argparse.ArgumentParser(
+        description="Compares JSON results of two benchmark runs (e.g. previous and current release) and reports "
+                    "regressions.")
+    argument_parser.add_argument("baseline", help="baseline JSON results file path")
+    argument_parser.add_argument("candidate", help="candidate JSON results file path")
+    argument_parser.add_argument("--tolerance", type=float, default=5.0,
+                                 help="relative change (in percents) that is reported as regression")
+
+    return argument_parser.parse_args()
+
+
+def flatten_results(results, key_prefix=""):
+    """
+    Flattens nested benchmark results into numeric values keyed by dot separated paths.
+
+    :param results: benchmark results (dictionaries, lists and values)
+    :param key_prefix: path of the results
+    :return: dictionary where keys are paths and values are numbers
+    """
+    if isinstance(results, dict):
+        items = results.items()
+    elif isinstance(results, list):
+        items = enumerate(results)
+    else:
+        return {key_prefix: results} if isinstance(results, (int, float)) and not isinstance(results, bool) else {}
+
+    flattened_results = {}
+    for key, value in items:
+        flattened_results.update(flatten_results(value, "%s.%s" % (key_prefix, key) if key_prefix else str(key)))
+
+    return flattened_results
+
+
+def get_value_direction(key):
+    """
+    Gets whether the value of the key improves when it grows or when it drops.
+
+    :param key: path of the value
+    :return: 1 if higher value is better, -1 if lower value is better and 0 if value is not compared
+    """
+    last_key = key.split(".")[-1]
+    if last_key == "count":
+        return 0
+    if any(keyword in key for keyword in HIGHER_IS_BETTER_KEYWORDS):
+        return 1
+    if any(keyword in key for keyword in LOWER_IS_BETTER_KEYWORDS):
+        return -1
+
+    return 0
+
+
+def main():
+    """
+    Script entry point.
+    """
+    arguments = parse_arguments()
+    with open(arguments.baseline) as baseline_file:
+        baseline_results = flatten_results(json.load(baseline_file))
+    with open(arguments.candidate) as candidate_file:
+        candidate_results = flatten_results(json.load(candidate_file))
+
+    regressions_number = 0
+    print("%-70s %14s %14s %9s" % ("Value", "Baseline", "Candidate", "Change"))
+    for key in sorted(set(baseline_results) & set(candidate_results)):
+        direction = get_value_direction(key)
+        if direction == 0:
+            continue
+
+        baseline_value, candidate_value = baseline_results[key], candidate_results[key]
+        change = (candidate_value - baseline_value) / abs(baseline_value) * 100 if baseline_value != 0 else 0.0
+        is_regression = change * direction < -arguments.tolerance
+        regressions_number += is_regression
+        print("%-70s %14.3f %14.3f %+8.1f%%%s" % (key, baseline_value, candidate_value, change,
+                                                 "  REGRESSION" if is_regression else ""))
+
+    print("Regressions: %d" % regressions_number)
+    sys.exit(1 if regressions_number > 0 else 0)
+
+
+if __name__ == "__main__":
+    main()
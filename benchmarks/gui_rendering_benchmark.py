@@ -0,0 +1,285 @@
+import os
+import sys
+import time
+import json
+import argparse
+import threading
+import numpy as np
+import cv2 as cv
+
+# Benchmark renders into offscreen buffers, so it runs without display
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt5 import QtWidgets, QtCore
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                "person_location_detector"))
+
+import application_resources  # Registers icons used by the main window
+import widgets
+
+
+class SyntheticResultsEmitterThread(QtCore.QThread):
+    """
+    Thread that emits synthetic "camera frame processed" results at fixed rate as person location detection thread
+    does.
+    """
+
+    camera_frame_processed = QtCore.pyqtSignal(tuple)
+
+    def __init__(self, camera_name, camera_frame, camera_frame_warped, persons_number, fps):
+        """
+        Initializes thread.
+
+        :param camera_name: name of the camera results belong to
+        :param camera_frame: camera frame
+        :param camera_frame_warped: warped camera frame
+        :param persons_number: number of detected persons per frame
+        :param fps: rate of the emitted results
+        """
+        super(SyntheticResultsEmitterThread, self).__init__()
+
+        self.camera_name = camera_name
+        self.camera_frame = camera_frame
+        self.camera_frame_warped = camera_frame_warped
+        self.persons_number = persons_number
+        self.fps = fps
+        self.is_running = False
+        self.emission_times = {}
+        self.emission_times_lock = threading.Lock()
+
+    def run(self):
+        """
+        Runs thread: emits results until it is stopped.
+        """
+        self.is_running = True
+
+        random_generator = np.random.default_rng(0)
+        camera_frame_height, camera_frame_width = self.camera_frame.shape[:2]
+        warped_height, warped_width = self.camera_frame_warped.shape[:2]
+
+        camera_frame_sequence_number = 0
+        next_emission_time = time.perf_counter()
+        while self.is_running:
+            camera_frame_sequence_number += 1
+            bounding_boxes = [[int(random_generator.integers(0, camera_frame_width * 0.9)),
+                               int(random_generator.integers(0, camera_frame_height * 0.5)),
+                               camera_frame_width // 10, camera_frame_height // 2] for _ in range(self.persons_number)]
+            persons_locations = [(float(random_generator.uniform(0, warped_width)),
+                                  float(random_generator.uniform(0, warped_height)))
+                                 for _ in range(self.persons_number)]
+            confidences = [float(random_generator.uniform(0.5, 1.0)) for _ in range(self.persons_number)]
+
+            with self.emission_times_lock:
+                self.emission_times[camera_frame_sequence_number] = time.perf_counter()
+            self.camera_frame_processed.emit((self.camera_name, camera_frame_sequence_number, self.camera_frame,
+                                              self.camera_frame_warped, self.fps, confidences, bounding_boxes,
+                                              persons_locations))
+
+            next_emission_time += 1.0 / self.fps
+            time.sleep(max(next_emission_time - time.perf_counter(), 0))
+
+    def stop(self):
+        """
+        Stops thread.
+        """
+        self.is_running = False
+        self.wait()
+
+
+class RenderingMeasurement(QtCore.QObject):
+    """
+    Measurement of the GUI thread: renders results with the detection widget, measures rendering time, staleness of
+    the rendered frames and event loop lag (delay of the fixed interval timer).
+    """
+
+    def __init__(self, detection_widget, results_emitter_thread, lag_timer_interval_ms):
+        """
+        Initializes measurement.
+
+        :param detection_widget: detection widget that renders results
+        :param results_emitter_thread: synthetic results emitter thread
+        :param lag_timer_interval_ms: interval (in milliseconds) of the event loop lag timer
+        """
+        super(RenderingMeasurement, self).__init__()
+
+        self.detection_widget = detection_widget
+        self.results_emitter_thread = results_emitter_thread
+        self.rendering_durations = []
+        self.stale_frames_number = 0
+        self.rendered_frames_number = 0
+        self.event_loop_lags = []
+        self.lag_timer_interval = lag_timer_interval_ms / 1000
+        self.lag_timer = QtCore.QTimer(self)
+        self.lag_timer.setTimerType(QtCore.Qt.PreciseTimer)
+        self.lag_timer.setInterval(lag_timer_interval_ms)
+        self.lag_timer.timeout.connect(self.lag_timer_timeout)
+        self.last_lag_timer_time = None
+
+    def start(self):
+        """
+        Starts event loop lag timer.
+        """
+        self.last_lag_timer_time = time.perf_counter()
+        self.lag_timer.start()
+
+    @QtCore.pyqtSlot()
+    def lag_timer_timeout(self):
+        current_time = time.perf_counter()
+        self.event_loop_lags.append(max(current_time - self.last_lag_timer_time - self.lag_timer_interval, 0))
+        self.last_lag_timer_time = current_time
+
+    @QtCore.pyqtSlot(tuple)
+    def camera_frame_processed(self, results):
+        camera_frame_sequence_number = results[1]
+        with self.results_emitter_thread.emission_times_lock:
+            # Frame is stale if the next frame had been emitted before rendering started (display shows it late)
+            is_stale = camera_frame_sequence_number + 1 in self.results_emitter_thread.emission_times
+
+        start_time = time.perf_counter()
+        self.detection_widget.camera_frame_processed(results)
+        # Labels are painted right away, so painting is measured together with drawing and scaling
+        self.detection_widget.projection_area_camera_stream_label.repaint()
+        self.detection_widget.location_of_detected_persons_label.repaint()
+        self.rendering_durations.append(time.perf_counter() - start_time)
+        self.rendered_frames_number += 1
+        self.stale_frames_number += is_stale
+
+
+def parse_arguments():
+    """
+    Parses command line arguments.
+
+    :return: parsed arguments
+    """
+    argument_parser = argparse.ArgumentParser(
+        description="Measures GUI thread busy time, event loop lag and dropped frames of the detection results "
+                    "rendering against the camera stream label size.")
+    argument_parser.add_argument("--label-sizes", default="640x360,960x540,1280x720,1920x1080",
+                                 help="comma separated sizes of the camera stream label")
+    argument_parser.add_argument("--camera-resolution", default="1920x1080", help="resolution of the camera frames")
+    argument_parser.add_argument("--projection-area-resolution", default="1280x720",
+                                 help="resolution of the projection area")
+    argument_parser.add_argument("--persons", type=int, default=10, help="number of detected persons per frame")
+    argument_parser.add_argument("--fps", type=float, default=30, help="rate of the results")
+    argument_parser.add_argument("--duration", type=float, default=5, help="duration (in seconds) per label size")
+    argument_parser.add_argument("--output", help="JSON results file path (results are printed if omitted)")
+
+    return argument_parser.parse_args()
+
+
+def summarize_durations(durations):
+    """
+    Summarizes durations in milliseconds.
+
+    :param durations: list of durations (in seconds)
+    :return: dictionary with p50, p95, p99 and maximum durations (in milliseconds)
+    """
+    if len(durations) == 0:
+        return {"p50": 0.0, "p95": 0.0, "p99": 0.0, "max": 0.0}
+
+    p50, p95, p99 = np.percentile(durations, [50, 95, 99]) * 1000
+    return {"p50": float(p50), "p95": float(p95), "p99": float(p99), "max": float(np.max(durations) * 1000)}
+
+
+def measure_label_size(application, detection_widget, camera_frame, camera_frame_warped, label_size, arguments):
+    """
+    Renders synthetic results at fixed rate with the camera stream label of the given size.
+
+    :param application: application
+    :param detection_widget: detection widget
+    :param camera_frame: camera frame
+    :param camera_frame_warped: warped camera frame
+    :param label_size: (width, height) size of the camera stream label
+    :param arguments: parsed arguments
+    :return: dictionary with measurement results
+    """
+    detection_widget.projection_area_camera_stream_label.setFixedSize(*label_size)
+    detection_widget.location_of_detected_persons_label.setFixedSize(label_size[0], label_size[1] // 2)
+    application.processEvents()
+
+    results_emitter_thread = SyntheticResultsEmitterThread(detection_widget.camera_name, camera_frame,
+                                                           camera_frame_warped, arguments.persons, arguments.fps)
+    rendering_measurement = RenderingMeasurement(detection_widget, results_emitter_thread, 5)
+    results_emitter_thread.camera_frame_processed.connect(rendering_measurement.camera_frame_processed)
+
+    start_time = time.perf_counter()
+    start_thread_time = time.thread_time()
+    rendering_measurement.start()
+    results_emitter_thread.start()
+    QtCore.QTimer.singleShot(int(arguments.duration * 1000), application.quit)
+    application.exec_()
+    results_emitter_thread.stop()
+    duration = time.perf_counter() - start_time
+    gui_thread_time = time.thread_time() - start_thread_time
+
+    emitted_frames_number = len(results_emitter_thread.emission_times)
+    # Frames that were emitted but have not been rendered until the end are dropped as well as stale frames
+    dropped_frames_number = rendering_measurement.stale_frames_number + emitted_frames_number - \
+        rendering_measurement.rendered_frames_number
+    results_emitter_thread.camera_frame_processed.disconnect(rendering_measurement.camera_frame_processed)
+    application.processEvents()
+
+    return {"label_size": label_size,
+            "emitted_frames_number": emitted_frames_number,
+            "rendered_frames_number": rendering_measurement.rendered_frames_number,
+            "dropped_frames_number": dropped_frames_number,
+            "dropped_frames_share": dropped_frames_number / emitted_frames_number if emitted_frames_number > 0 else 0.0,
+            "rendering_ms": summarize_durations(rendering_measurement.rendering_durations),
+            "gui_thread_busy_share": gui_thread_time / duration,
+            "rendering_busy_share": sum(rendering_measurement.rendering_durations) / duration,
+            "event_loop_lag_ms": summarize_durations(rendering_measurement.event_loop_lags)}
+
+
+def main():
+    """
+    Script entry point.
+    """
+    arguments = parse_arguments()
+    label_sizes = [tuple(int(dimension) for dimension in label_size.split("x"))
+                   for label_size in arguments.label_sizes.split(",")]
+    camera_resolution = tuple(int(dimension) for dimension in arguments.camera_resolution.split("x"))
+    projection_area_resolution = tuple(int(dimension) for dimension in arguments.projection_area_resolution.split("x"))
+
+    application = QtWidgets.QApplication([])
+    main_window = widgets.MainWindow()
+    main_window.show()
+    detection_widget = main_window.widgets_stacked_widget.widget(0).cameras_tab_widget.widget(0)
+
+    # Detection widget is put into the "detection is running" state without camera and detection model
+    detection_widget.camera_name = "Camera 0"
+    detection_widget.camera_frame_resolution = camera_resolution
+    detection_widget.selected_projection_area_resolution = projection_area_resolution
+    detection_widget.set_detections_drawing_parameters()
+    detection_widget.projection_area_camera_stream_label.show()
+    detection_widget.location_of_detected_persons_label.show()
+
+    random_generator = np.random.default_rng(0)
+    camera_frame = cv.GaussianBlur(random_generator.integers(0, 256, (camera_resolution[1], camera_resolution[0], 3),
+                                                             dtype=np.uint8), (31, 31), 0)
+    camera_frame_warped = cv.resize(camera_frame, projection_area_resolution)
+
+    results = []
+    for label_size in label_sizes:
+        label_size_results = measure_label_size(application, detection_widget, camera_frame, camera_frame_warped,
+                                                label_size, arguments)
+        print("Label size: %dx%d, rendering p50: %.1f ms, p95: %.1f ms, GUI thread busy: %.0f%%, event loop lag p95: "
+              "%.1f ms, dropped frames: %d of %d" % (
+                  label_size[0], label_size[1], label_size_results["rendering_ms"]["p50"],
+                  label_size_results["rendering_ms"]["p95"], label_size_results["gui_thread_busy_share"] * 100,
+                  label_size_results["event_loop_lag_ms"]["p95"], label_size_results["dropped_frames_number"],
+                  label_size_results["emitted_frames_number"]))
+        results.append(label_size_results)
+
+    report = {"qt_platform": application.platformName(), "camera_resolution": camera_resolution,
+              "projection_area_resolution": projection_area_resolution, "persons_number": arguments.persons,
+              "fps": arguments.fps, "results": results}
+    if arguments.output is not None:
+        with open(arguments.output, "w") as results_file:
+            json.dump(report, results_file, indent=4)
+    else:
+        print(json.dumps(report, indent=4))
+
+
+if __name__ == "__main__":
+    main()
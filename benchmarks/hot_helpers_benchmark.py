@@ -0,0 +1,174 @@
+import os
+import sys
+import time
+import json
+import argparse
+import numpy as np
+import cv2 as cv
+
+# Pixmaps need GUI application, so the benchmark runs without display
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt5 import QtWidgets
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                "person_location_detector"))
+
+import helpers
+import services
+import widgets
+
+
+def parse_arguments():
+    """
+    Parses command line arguments.
+
+    :return: parsed arguments
+    """
+    argument_parser = argparse.ArgumentParser(
+        description="Measures per-call cost of the per-frame helpers across camera resolutions, projection area "
+                    "resolutions and persons numbers.")
+    argument_parser.add_argument("--persons-numbers", default="0,1,2,5,10,20,50,100",
+                                 help="comma separated numbers of detected persons per frame")
+    argument_parser.add_argument("--repeats", type=int, default=7, help="number of measurement repeats")
+    argument_parser.add_argument("--min-repeat-duration", type=float, default=0.05,
+                                 help="minimum duration (in seconds) of one measurement repeat")
+    argument_parser.add_argument("--output", help="JSON results file path (results are printed if omitted)")
+
+    return argument_parser.parse_args()
+
+
+def measure_call_time(function, repeats, min_repeat_duration):
+    """
+    Measures time of one function call: every repeat calls function as many times as needed to last at least minimum
+    repeat duration.
+
+    :param function: function without arguments
+    :param repeats: number of measurement repeats
+    :param min_repeat_duration: minimum duration (in seconds) of one measurement repeat
+    :return: dictionary with minimum and median call time (in microseconds)
+    """
+    calls_number = 1
+    while True:
+        start_time = time.perf_counter()
+        for _ in range(calls_number):
+            function()
+        if time.perf_counter() - start_time >= min_repeat_duration:
+            break
+        calls_number *= 2
+
+    calls_times = []
+    for _ in range(repeats):
+        start_time = time.perf_counter()
+        for _ in range(calls_number):
+            function()
+        calls_times.append((time.perf_counter() - start_time) / calls_number * 1000000)
+
+    return {"min_us": float(np.min(calls_times)), "median_us": float(np.median(calls_times))}
+
+
+def create_camera_projection_area(camera_resolution, projection_area_resolution):
+    """
+    Creates camera projection area: floor trapezoid that covers bottom part of the camera frame.
+
+    :param camera_resolution: camera resolution
+    :param projection_area_resolution: projection area resolution
+    :return: camera projection area
+    """
+    width, height = camera_resolution
+    return services.CameraProjectionArea("Camera", [(width * 0.8, height * 0.3), (width, height), (0, height),
+                                                    (width * 0.2, height * 0.3)], projection_area_resolution)
+
+
+def generate_bounding_boxes(persons_number, camera_resolution):
+    """
+    Generates random person-like bounding boxes within the camera frame.
+
+    :param persons_number: number of bounding boxes
+    :param camera_resolution: camera resolution
+    :return: list of [x, y, width, height] bounding boxes
+    """
+    random_generator = np.random.default_rng(persons_number)
+    width, height = camera_resolution
+    return [[int(random_generator.integers(0, width - width // 10)), int(random_generator.integers(0, height // 2)),
+             width // 10, height // 2] for _ in range(persons_number)]
+
+
+def main():
+    """
+    Script entry point.
+    """
+    arguments = parse_arguments()
+    persons_numbers = [int(persons_number) for persons_number in arguments.persons_numbers.split(",")]
+    camera_resolutions = list(widgets.DetectionWidget.CAMERA_RESOLUTIONS.values())
+    projection_area_resolutions = list(widgets.DetectionWidget.PROJECTION_AREA_RESOLUTIONS.values())
+
+    application = QtWidgets.QApplication([])
+    person_location_detection_thread = services.PersonLocationDetectionThread(None, None, 1.0 / 255, (416, 416), 0,
+                                                                              0.5, 0.4)
+    # Private per-frame helpers of the detection thread are reached through their mangled names
+    is_within_projection_area = person_location_detection_thread.\
+        _PersonLocationDetectionThread__is_bounding_box_bottom_edge_center_point_within_projection_area
+    calculate_person_location = person_location_detection_thread.\
+        _PersonLocationDetectionThread__calculate_person_location
+    warp_camera_frame = person_location_detection_thread._PersonLocationDetectionThread__warp_camera_frame_to_process
+
+    def measure(helper_name, function, **parameters):
+        call_time = measure_call_time(function, arguments.repeats, arguments.min_repeat_duration)
+        print("%-45s %-60s median: %10.2f us" % (helper_name, ", ".join(
+            "%s=%s" % (parameter_name, parameter_value) for parameter_name, parameter_value in parameters.items()),
+                                                   call_time["median_us"]))
+        if parameters.get("persons_number", 0) > 0:
+            call_time["median_per_person_us"] = call_time["median_us"] / parameters["persons_number"]
+        results.append(dict(helper=helper_name, **parameters, **call_time))
+
+    results = []
+    for camera_resolution in camera_resolutions:
+        camera_frame = np.random.default_rng(0).integers(0, 256, (camera_resolution[1], camera_resolution[0], 3),
+                                                         dtype=np.uint8)
+        measure("convert_opencv_image_to_pixmap", lambda: helpers.convert_opencv_image_to_pixmap(camera_frame),
+                image_resolution=camera_resolution)
+
+        for projection_area_resolution in projection_area_resolutions:
+            camera_projection_area = create_camera_projection_area(camera_resolution, projection_area_resolution)
+            measure("__warp_camera_frame_to_process",
+                    lambda: warp_camera_frame(camera_projection_area, camera_frame),
+                    camera_resolution=camera_resolution, projection_area_resolution=projection_area_resolution)
+
+            for persons_number in persons_numbers:
+                bounding_boxes = generate_bounding_boxes(persons_number, camera_resolution)
+                bottom_edge_center_points = [is_within_projection_area(camera_projection_area, bounding_box)[0]
+                                             for bounding_box in bounding_boxes]
+                persons_locations = [(point.x, point.y) for point in bottom_edge_center_points]
+                parameters = {"camera_resolution": camera_resolution,
+                              "projection_area_resolution": projection_area_resolution,
+                              "persons_number": persons_number}
+
+                # Per-frame cost: helpers are called once per detected person
+                measure("__is_bounding_box_bottom_edge_center_point_within_projection_area",
+                        lambda: [is_within_projection_area(camera_projection_area, bounding_box)
+                                 for bounding_box in bounding_boxes], **parameters)
+                measure("__calculate_person_location",
+                        lambda: [calculate_person_location(camera_projection_area, point)
+                                 for point in bottom_edge_center_points], **parameters)
+                measure("convert_points_to_another_resolution",
+                        lambda: helpers.convert_points_to_another_resolution(
+                            persons_locations, camera_resolution, projection_area_resolution), **parameters)
+
+    for projection_area_resolution in projection_area_resolutions:
+        camera_frame_warped = np.zeros((projection_area_resolution[1], projection_area_resolution[0], 3), np.uint8)
+        measure("convert_opencv_image_to_pixmap", lambda: helpers.convert_opencv_image_to_pixmap(camera_frame_warped),
+                image_resolution=projection_area_resolution)
+
+    report = {"opencv_threads_number": cv.getNumThreads(), "results": results}
+    if arguments.output is not None:
+        with open(arguments.output, "w") as results_file:
+            json.dump(report, results_file, indent=4)
+    else:
+        print(json.dumps(report, indent=4))
+
+    application.quit()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+import os
+import sys
+import time
+import json
+import argparse
+
+# GUI widgets render into offscreen buffers, so load test runs without display
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt5 import QtWidgets, QtCore
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                "person_location_detector"))
+
+import metrics
+import services
+import widgets
+import channels
+from pipeline_benchmark import summarize_histogram, summarize_channels
+
+
+def parse_arguments():
+    """
+    Parses command line arguments.
+
+    :return: parsed arguments
+    """
+    argument_parser = argparse.ArgumentParser(
+        description="Stresses capture, queueing, detection and (optionally) GUI paths with synthetic cameras and mock "
+                    "detection model, so no camera or detection model weights are needed.")
+    argument_parser.add_argument("--cameras", type=int, default=4, help="number of synthetic cameras")
+    argument_parser.add_argument("--camera-resolution", default="3840x2160", help="resolution of the synthetic cameras")
+    argument_parser.add_argument("--camera-fps", type=float, default=60, help="FPS of the synthetic cameras")
+    argument_parser.add_argument("--persons", type=int, default=10, help="number of persons per synthetic camera")
+    argument_parser.add_argument("--detection-latency", type=float, default=0.02,
+                                 help="simulated latency (in seconds) of the mock detection model forward pass")
+    argument_parser.add_argument("--detection-latency-jitter", type=float, default=0.0,
+                                 help="maximum random deviation (in seconds) of the simulated latency")
+    argument_parser.add_argument("--batch-size", type=int, default=1, help="detection model maximum batch size")
+    argument_parser.add_argument("--detection-channel", default=channels.DEFAULT_DETECTION_CHANNEL_SPECIFICATION,
+                                 help="backpressure policy and capacity of the capture to detection channels, e.g. "
+                                      "drop_oldest:1, drop_newest:2, sample:1:3 or block:1")
+    argument_parser.add_argument("--gui-channel", default=channels.DEFAULT_GUI_CHANNEL_SPECIFICATION,
+                                 help="backpressure policy and capacity of the channels towards GUI")
+    argument_parser.add_argument("--gui", action="store_true", help="render results with detection widgets")
+    argument_parser.add_argument("--duration", type=float, default=10, help="load test duration in seconds")
+    argument_parser.add_argument("--output", help="JSON results file path (results are printed if omitted)")
+
+    return argument_parser.parse_args()
+
+
+def create_detection_widget(camera_service, person_location_detection_service, camera_name, camera_resolution):
+    """
+    Creates detection widget in the "detection is running" state for the camera.
+
+    :param camera_service: camera service
+    :param person_location_detection_service: person location detection service
+    :param camera_name: name of the camera
+    :param camera_resolution: camera resolution
+    :return: detection widget
+    """
+    detection_widget = widgets.DetectionWidget(camera_service, person_location_detection_service)
+    detection_widget.camera_name = camera_name
+    detection_widget.camera_frame_resolution = camera_resolution
+    detection_widget.selected_projection_area_resolution = camera_resolution
+    detection_widget.set_detections_drawing_parameters()
+    detection_widget.projection_area_camera_stream_label.show()
+    detection_widget.location_of_detected_persons_label.show()
+    detection_widget.show()
+
+    return detection_widget
+
+
+def main():
+    """
+    Script entry point.
+    """
+    arguments = parse_arguments()
+    camera_resolution = tuple(int(dimension) for dimension in arguments.camera_resolution.split("x"))
+
+    # Histograms keep every observation, so percentiles are calculated over the whole run
+    metrics.DEFAULT_METRICS_REGISTRY = metrics.MetricsRegistry(histogram_window_size=10 ** 6)
+
+    application = QtWidgets.QApplication([]) if arguments.gui else QtCore.QCoreApplication([])
+    camera_service = services.CameraService()
+    person_location_detection_service = services.PersonLocationDetectionService()
+    camera_names = ["Camera %d" % camera_index for camera_index in range(arguments.cameras)]
+    delivered_frames_numbers = {camera_name: 0 for camera_name in camera_names}
+
+    def camera_frame_processed(results):
+        delivered_frames_numbers[results[0]] += 1
+
+    person_location_detection_service.start_person_location_detection(
+        "mock://?latency=%r&latency_jitter=%r" % (arguments.detection_latency, arguments.detection_latency_jitter),
+        None, 1.0 / 255, (416, 416), 0, 0.5, 0.4, camera_frame_processed, arguments.batch_size,
+        camera_frame_processed_channel_specification=arguments.gui_channel)
+
+    detection_widgets = []
+    projection_area_coordinates = [(camera_resolution[0], 0), camera_resolution, (0, camera_resolution[1]), (0, 0)]
+    for camera_index, camera_name in enumerate(camera_names):
+        camera_frames_to_process = person_location_detection_service.attach_camera(
+            camera_name, projection_area_coordinates, camera_resolution,
+            camera_frames_to_process_channel_specification=arguments.detection_channel)
+        camera_service.start_camera_stream_reading(
+            camera_name, "synthetic://?fps=%r&persons=%d&seed=%d" % (arguments.camera_fps, arguments.persons,
+                                                                     camera_index), camera_resolution,
+            lambda is_successful: None, lambda camera_frame: None, camera_frames_to_process,
+            camera_frame_read_channel_specification=arguments.gui_channel)
+        if arguments.gui:
+            detection_widget = create_detection_widget(camera_service, person_location_detection_service, camera_name,
+                                                       camera_resolution)
+            person_location_detection_service.connect_camera_frame_processed_slot(
+                detection_widget.camera_frame_processed)
+            detection_widgets.append(detection_widget)
+
+    start_time = time.perf_counter()
+    start_cpu_time = time.process_time()
+    QtCore.QTimer.singleShot(int(arguments.duration * 1000), application.quit)
+    application.exec_()
+    duration = time.perf_counter() - start_time
+    cpu_time = time.process_time() - start_cpu_time
+
+    for camera_name in camera_names:
+        camera_service.stop_camera_stream_reading(camera_name)
+    person_location_detection_service.stop_person_location_detection()
+    metrics_snapshot = metrics.DEFAULT_METRICS_REGISTRY.get_snapshot()
+
+    # Processing results can be dropped by the channels towards GUI, so processed frames are counted by their latencies
+    cameras = {camera_name: {"captured_fps": metrics.DEFAULT_METRICS_REGISTRY.get_counter(
+        "camera_frames_total", camera=camera_name) / duration, "processed_fps": 0.0,
+                             "delivered_fps": delivered_frames_numbers[camera_name] / duration}
+               for camera_name in camera_names}
+    stages = {}
+    for histogram in metrics_snapshot["histograms"]:
+        camera_name = histogram["labels"].get("camera", None)
+        if histogram["name"] == "camera_frame_latency_seconds":
+            cameras[camera_name]["latency_ms"] = summarize_histogram(histogram)
+            cameras[camera_name]["processed_fps"] = histogram["count"] / duration
+        elif histogram["name"] == "pipeline_stage_latency_seconds":
+            stage_name = histogram["labels"]["stage"]
+            stages["%s (%s)" % (stage_name, camera_name) if camera_name is not None else stage_name] = \
+                summarize_histogram(histogram)
+
+    report = {"configuration": vars(arguments), "duration_s": duration,
+              "cpu_utilization_cores": cpu_time / duration,
+              "processed_fps": sum(camera["processed_fps"] for camera in cameras.values()),
+              "cameras": cameras, "stages_latency_ms": stages, "channels": summarize_channels(metrics_snapshot)}
+    print("Processed: %.1f FPS, CPU utilization: %.2f cores" % (report["processed_fps"],
+                                                                report["cpu_utilization_cores"]))
+    if arguments.output is not None:
+        with open(arguments.output, "w") as results_file:
+            json.dump(report, results_file, indent=4)
+    else:
+        print(json.dumps(report, indent=4))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+import os
+import sys
+import time
+import json
+import tempfile
+import argparse
+import numpy as np
+import cv2 as cv
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                "person_location_detector"))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "training"))
+
+import detectors
+from batched_inference_benchmark import DEFAULT_DETECTION_MODEL_CONFIGURATION_FILE_PATH, generate_frames, \
+    measure_batch_size_throughput
+
+DARKNET_OPENCV_RUNTIME = "darknet (OpenCV)"
+ONNX_OPENCV_RUNTIME = "onnx (OpenCV)"
+ONNX_ONNX_RUNTIME_RUNTIME = "onnx (ONNX Runtime)"
+
+
+def parse_arguments():
+    """
+    Parses command line arguments.
+
+    :return: parsed arguments
+    """
+    argument_parser = argparse.ArgumentParser(
+        description="Compares CPU load time, throughput and outputs of the Darknet detection model run by OpenCV and "
+                    "its ONNX model run by OpenCV and ONNX Runtime (if it is installed).")
+    argument_parser.add_argument("--weights", required=True, help="Darknet detection model weights file path")
+    argument_parser.add_argument("--configuration", default=DEFAULT_DETECTION_MODEL_CONFIGURATION_FILE_PATH,
+                                 help="Darknet detection model configuration file path")
+    argument_parser.add_argument("--onnx", help="ONNX model file path (Darknet model is converted if omitted, ONNX "
+                                                "needs to be installed)")
+    argument_parser.add_argument("--input-size", type=int, default=416, help="detection model input size")
+    argument_parser.add_argument("--batch-sizes", default="1,2,4", help="comma separated batch sizes")
+    argument_parser.add_argument("--threads", type=int, help="number of OpenCV and ONNX Runtime threads")
+    argument_parser.add_argument("--frame-resolution", default="1280x720", help="resolution of the synthetic frames")
+    argument_parser.add_argument("--warmup-iterations", type=int, default=3, help="number of warmup iterations")
+    argument_parser.add_argument("--iterations", type=int, default=20, help="number of measured iterations")
+    argument_parser.add_argument("--output", help="JSON results file path (results are printed if omitted)")
+
+    return argument_parser.parse_args()
+
+
+def create_detection_model(runtime, arguments, onnx_model_file_path):
+    """
+    Creates batched detection model of the runtime and measures its load time.
+
+    :param runtime: runtime name
+    :param arguments: parsed arguments
+    :param onnx_model_file_path: ONNX model file path
+    :return: tuple with detection model and load time (in seconds)
+    """
+    start_time = time.perf_counter()
+    if runtime == DARKNET_OPENCV_RUNTIME:
+        detection_model = detectors.BatchedDetectionModel(arguments.weights, arguments.configuration)
+    else:
+        detection_model = detectors.BatchedDetectionModel(onnx_model_file_path, None,
+                                                          runtime == ONNX_ONNX_RUNTIME_RUNTIME)
+    detection_model.set_preferable_backend_and_target(cv.dnn.DNN_BACKEND_OPENCV, cv.dnn.DNN_TARGET_CPU)
+    detection_model.set_input_params(1.0 / 255, (arguments.input_size, arguments.input_size))
+
+    return detection_model, time.perf_counter() - start_time
+
+
+def forward_rows(detection_model, frames):
+    """
+    Runs forward pass of the detection model network and returns its region rows.
+
+    :param detection_model: batched detection model
+    :param frames: list of frames
+    :return: region rows (frames, rows, columns)
+    """
+    detection_model.net.setInput(cv.dnn.blobFromImages(frames, detection_model.input_scale,
+                                                       detection_model.input_size))
+    outputs = detection_model.net.forward(detection_model.output_layer_names)
+
+    return np.concatenate([output.reshape(len(frames), -1, output.shape[-1]) for output in outputs], axis=1)
+
+
+def main():
+    """
+    Script entry point.
+    """
+    arguments = parse_arguments()
+    batch_sizes = [int(batch_size) for batch_size in arguments.batch_sizes.split(",")]
+    frame_resolution = tuple(int(dimension) for dimension in arguments.frame_resolution.split("x"))
+    if arguments.threads is not None:
+        cv.setNumThreads(arguments.threads)
+
+    runtimes = [DARKNET_OPENCV_RUNTIME, ONNX_OPENCV_RUNTIME]
+    if detectors.is_onnx_runtime_available():
+        runtimes.append(ONNX_ONNX_RUNTIME_RUNTIME)
+    frames = generate_frames(max(batch_sizes), frame_resolution)
+
+    with tempfile.TemporaryDirectory() as temporary_directory_path:
+        onnx_model_file_path = arguments.onnx
+        if onnx_model_file_path is None:
+            try:
+                import onnx
+                import convert_darknet_to_onnx
+            except ImportError:
+                sys.exit("You need to install ONNX or set ONNX model file path!")
+            onnx_model_file_path = os.path.join(temporary_directory_path, "detection_model.onnx")
+            onnx.save(convert_darknet_to_onnx.convert_darknet_to_onnx(arguments.weights, arguments.configuration,
+                                                                      arguments.input_size), onnx_model_file_path)
+
+        results = {}
+        darknet_rows = None
+        for runtime in runtimes:
+            detection_model, load_time = create_detection_model(runtime, arguments, onnx_model_file_path)
+            # Outputs are compared on the first frame (ONNX model may have fixed batch size, so it is repeated)
+            rows = forward_rows(detection_model, frames[:1] * (detection_model.fixed_batch_size or 1))[0]
+            if runtime == DARKNET_OPENCV_RUNTIME:
+                darknet_rows = rows
+            _, confidences, _ = detection_model.detect(frames[0], 0.5, 0.4)
+
+            batch_sizes_results = []
+            for batch_size in batch_sizes:
+                batch_size_results = measure_batch_size_throughput(detection_model, frames[:batch_size],
+                                                                   arguments.warmup_iterations, arguments.iterations)
+                print("%s, batch size: %d, throughput: %.1f FPS, batch latency p50: %.1f ms, p95: %.1f ms" % (
+                    runtime, batch_size, batch_size_results["throughput_fps"],
+                    batch_size_results["batch_latency_ms_p50"], batch_size_results["batch_latency_ms_p95"]))
+                batch_sizes_results.append(batch_size_results)
+
+            results[runtime] = {
+                "load_time_ms": load_time * 1000,
+                "max_rows_difference": float(np.nanmax(np.abs(rows - darknet_rows))),
+                "detections_number": len(confidences),
+                "results": batch_sizes_results}
+            print("%s, load time: %.1f ms, maximum difference of outputs from Darknet model: %g" % (
+                runtime, results[runtime]["load_time_ms"], results[runtime]["max_rows_difference"]))
+
+    report = {"opencv_version": cv.__version__, "opencv_threads_number": cv.getNumThreads(),
+              "onnx_runtime_version": detectors.onnxruntime.__version__
+              if detectors.is_onnx_runtime_available() else None,
+              "input_size": arguments.input_size, "frame_resolution": frame_resolution, "runtimes": results}
+    if arguments.output is not None:
+        with open(arguments.output, "w") as results_file:
+            json.dump(report, results_file, indent=4)
+    else:
+        print(json.dumps(report, indent=4))
+
+
+if __name__ == "__main__":
+    main()
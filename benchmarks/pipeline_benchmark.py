@@ -0,0 +1,418 @@
+import os
+import sys
+import time
+import json
+import tempfile
+import platform
+import argparse
+import numpy as np
+import cv2 as cv
+from PyQt5 import QtCore
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                "person_location_detector"))
+
+import metrics
+import detectors
+import services
+import channels
+import scheduling
+import capture_sources
+
+DEFAULT_DETECTION_MODEL_CONFIGURATION_FILE_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "person_location_detector", "detection_models",
+    "yolov4-tiny-COCO-Person.cfg")
+
+DETECTION_MODEL_BACKENDS = {"opencv": cv.dnn.DNN_BACKEND_OPENCV, "cuda": cv.dnn.DNN_BACKEND_CUDA}
+DETECTION_MODEL_TARGETS = {"cpu": cv.dnn.DNN_TARGET_CPU, "opencl": cv.dnn.DNN_TARGET_OPENCL,
+                           "opencl_fp16": cv.dnn.DNN_TARGET_OPENCL_FP16, "cuda": cv.dnn.DNN_TARGET_CUDA,
+                           "cuda_fp16": cv.dnn.DNN_TARGET_CUDA_FP16}
+
+
+def parse_arguments():
+    """
+    Parses command line arguments.
+
+    :return: parsed arguments
+    """
+    argument_parser = argparse.ArgumentParser(
+        description="Measures throughput, latency and CPU usage of the whole capture, detection, post-processing and "
+                    "warp pipeline replaying video file (with OpenCV CPU backend by default).")
+    argument_parser.add_argument("--weights", required=True, help="detection model weights file path")
+    argument_parser.add_argument("--configuration", default=DEFAULT_DETECTION_MODEL_CONFIGURATION_FILE_PATH,
+                                 help="detection model configuration file path")
+    argument_parser.add_argument("--video",
+                                 help="video file path or camera source URI, e.g. finite GStreamer pipeline "
+                                      "\"gstreamer://videotestsrc num-buffers=300 ! videoconvert ! appsink\" "
+                                      "(synthetic clip is generated if omitted)")
+    argument_parser.add_argument("--pacing", choices=[capture_sources.FAST_PACING, capture_sources.REALTIME_PACING],
+                                 default=capture_sources.FAST_PACING,
+                                 help="video file pacing: frames are read as fast as possible or at the video FPS")
+    argument_parser.add_argument("--synthetic-video-frames", type=int, default=300,
+                                 help="number of frames of the synthetic clip")
+    argument_parser.add_argument("--synthetic-video-resolution", default="1280x720",
+                                 help="resolution of the synthetic clip")
+    argument_parser.add_argument("--cameras", type=int, default=1,
+                                 help="number of cameras that replay the video file simultaneously")
+    argument_parser.add_argument("--input-size", type=int, default=416, help="detection model input size")
+    argument_parser.add_argument("--batch-size", type=int, default=1, help="detection model maximum batch size")
+    argument_parser.add_argument("--backend", choices=sorted(DETECTION_MODEL_BACKENDS), default="opencv",
+                                 help="OpenCV DNN backend of the detection model")
+    argument_parser.add_argument("--target", choices=sorted(DETECTION_MODEL_TARGETS), default="cpu",
+                                 help="OpenCV DNN target of the detection model")
+    argument_parser.add_argument("--runtime", choices=detectors.DETECTION_MODEL_RUNTIMES,
+                                 help="runtime of the detection model (ONNX model is run by ONNX Runtime on CPU if it "
+                                      "is installed when omitted)")
+    argument_parser.add_argument("--person-only-decoding", action="store_true",
+                                 help="decode detection model outputs only for persons within projection areas")
+    argument_parser.add_argument("--detection-channel", default=channels.DEFAULT_DETECTION_CHANNEL_SPECIFICATION,
+                                 help="backpressure policy and capacity of the capture to detection channels, e.g. "
+                                      "drop_oldest:1 (block:1 processes every frame)")
+    argument_parser.add_argument("--results-channel", default="block:100",
+                                 help="backpressure policy and capacity of the detection results channels (results are "
+                                      "not dropped by default, so every processed frame is counted)")
+    argument_parser.add_argument("--scheduling",
+                                 help="pipeline scheduling specification, e.g. "
+                                      "\"capture:cores=0;detection:threads=3,cores=1-3;gui:cores=0\"")
+    argument_parser.add_argument("--sweep-scheduling", action="store_true",
+                                 help="run the pipeline with every candidate combination of OpenCV threads number, "
+                                      "stage cores and detection nice value and report the best one for the host")
+    argument_parser.add_argument("--warmup-frames", type=int, default=10,
+                                 help="number of processed frames excluded from measurements")
+    argument_parser.add_argument("--timeout", type=float, default=600, help="maximum benchmark duration in seconds")
+    argument_parser.add_argument("--output", help="JSON results file path (results are printed if omitted)")
+
+    return argument_parser.parse_args()
+
+
+def write_synthetic_video(video_file_path, frames_number, frame_resolution, fps=30):
+    """
+    Writes synthetic clip: dark person-like blobs that walk over the smoothed noise background.
+
+    :param video_file_path: video file path (Motion JPEG AVI)
+    :param frames_number: number of frames
+    :param frame_resolution: frame resolution
+    :param fps: FPS of the clip
+    """
+    random_generator = np.random.default_rng(0)
+    background = cv.GaussianBlur(random_generator.integers(0, 256, (frame_resolution[1], frame_resolution[0], 3),
+                                                           dtype=np.uint8), (31, 31), 0)
+    blob_size = (frame_resolution[0] // 20, frame_resolution[1] // 4)
+    blobs_start_points = random_generator.integers(0, frame_resolution[0], (4, 2)) % (
+        frame_resolution[0] - blob_size[0], frame_resolution[1] - blob_size[1])
+
+    video_writer = cv.VideoWriter(video_file_path, cv.VideoWriter_fourcc(*"MJPG"), fps, frame_resolution)
+    for frame_index in range(frames_number):
+        frame = background.copy()
+        for blob_index, (x, y) in enumerate(blobs_start_points):
+            x = (x + frame_index * (blob_index + 2)) % (frame_resolution[0] - blob_size[0])
+            cv.rectangle(frame, (int(x), int(y)), (int(x) + blob_size[0], int(y) + blob_size[1]), (40, 40, 40), -1)
+        video_writer.write(frame)
+    video_writer.release()
+
+
+def summarize_histogram(histogram, unit_scale=1000):
+    """
+    Summarizes histogram of the metrics snapshot.
+
+    :param histogram: histogram dictionary
+    :param unit_scale: scale of the values (seconds are converted to milliseconds by default)
+    :return: dictionary with p50, p95, p99 and mean values and number of observations
+    """
+    return {"p50": histogram["p50"] * unit_scale, "p95": histogram["p95"] * unit_scale,
+            "p99": histogram["p99"] * unit_scale,
+            "mean": histogram["sum"] / histogram["count"] * unit_scale if histogram["count"] > 0 else 0.0,
+            "count": histogram["count"]}
+
+
+def summarize_channels(metrics_snapshot):
+    """
+    Summarizes inter-stage channels counters of the metrics snapshot.
+
+    :param metrics_snapshot: pipeline metrics snapshot
+    :return: dictionary with accepted and dropped items numbers and producer blocked time (in seconds) by channel
+    """
+    counter_keys = {"channel_items_total": "items", "channel_dropped_items_total": "dropped_items",
+                    "channel_blocked_seconds_total": "blocked_time_s"}
+    channels_summary = {}
+    for counter in metrics_snapshot["counters"]:
+        if counter["name"] in counter_keys:
+            channel_name = counter["labels"]["channel"]
+            if "camera" in counter["labels"]:
+                channel_name = "%s (%s)" % (channel_name, counter["labels"]["camera"])
+            channel_summary = channels_summary.setdefault(channel_name, {"items": 0, "dropped_items": 0,
+                                                                         "blocked_time_s": 0.0})
+            channel_summary[counter_keys[counter["name"]]] = counter["value"]
+
+    return channels_summary
+
+
+def run_pipeline(arguments, video_file_path, frame_resolution):
+    """
+    Runs capture and person location detection threads until every camera has replayed the video file.
+
+    :param arguments: parsed arguments
+    :param video_file_path: video file path
+    :param frame_resolution: resolution of the video file frames
+    :return: tuple with number of processed frames, measured duration (in seconds), process CPU time (in seconds) and
+    metrics snapshot
+    """
+    application = QtCore.QCoreApplication.instance() or QtCore.QCoreApplication([])
+
+    camera_service = services.CameraService()
+    person_location_detection_service = services.PersonLocationDetectionService()
+    camera_names = ["Camera %d" % camera_index for camera_index in range(arguments.cameras)]
+    measurement = {"processed_frames_number": 0, "start_time": None, "start_cpu_time": None}
+
+    def camera_frame_processed(results):
+        measurement["processed_frames_number"] += 1
+        if measurement["start_time"] is None and measurement["processed_frames_number"] >= arguments.warmup_frames:
+            # Warmup has finished: measurements start from scratch
+            metrics.DEFAULT_METRICS_REGISTRY.reset()
+            measurement["processed_frames_number"] = 0
+            measurement["start_time"] = time.perf_counter()
+            measurement["start_cpu_time"] = time.process_time()
+
+    person_location_detection_service.start_person_location_detection(
+        arguments.weights, arguments.configuration, 1.0 / 255, (arguments.input_size, arguments.input_size), 0, 0.5,
+        0.4, camera_frame_processed, arguments.batch_size, is_person_only_decoding=arguments.person_only_decoding,
+        detection_model_backend=DETECTION_MODEL_BACKENDS[arguments.backend],
+        detection_model_target=DETECTION_MODEL_TARGETS[arguments.target],
+        camera_frame_processed_channel_specification=arguments.results_channel,
+        detection_model_runtime=arguments.runtime)
+
+    projection_area_coordinates = [(frame_resolution[0], 0), frame_resolution, (0, frame_resolution[1]), (0, 0)]
+    for camera_name in camera_names:
+        camera_frames_to_process = person_location_detection_service.attach_camera(
+            camera_name, projection_area_coordinates, frame_resolution,
+            camera_frames_to_process_channel_specification=arguments.detection_channel)
+        camera_service.start_camera_stream_reading(camera_name, video_file_path, frame_resolution,
+                                                   lambda is_successful: None, lambda camera_frame: None,
+                                                   camera_frames_to_process)
+
+    # Camera stops reading frames once it has replayed the whole video file (its first read fails)
+    timeout_time = time.time() + arguments.timeout
+    while time.time() < timeout_time and not all(
+            metrics.DEFAULT_METRICS_REGISTRY.get_counter("camera_failed_reads_total", camera=camera_name) > 0
+            for camera_name in camera_names):
+        application.processEvents()
+        time.sleep(0.01)
+    application.processEvents()
+
+    duration = time.perf_counter() - measurement["start_time"] if measurement["start_time"] is not None else 0.0
+    cpu_time = time.process_time() - measurement["start_cpu_time"] if measurement["start_time"] is not None else 0.0
+    metrics_snapshot = metrics.DEFAULT_METRICS_REGISTRY.get_snapshot()
+
+    for camera_name in camera_names:
+        if camera_service.is_camera_stream_reading_running(camera_name):
+            camera_service.stop_camera_stream_reading(camera_name)
+    person_location_detection_service.stop_person_location_detection()
+
+    return measurement["processed_frames_number"], duration, cpu_time, metrics_snapshot
+
+
+def run_pipeline_with_scheduling(arguments, video_file_path, frame_resolution, pipeline_scheduling):
+    """
+    Runs pipeline with the scheduling: stage threads apply it when they start and the main thread that collects
+    results is scheduled as GUI stage. Main thread and OpenCV threads number are restored afterwards.
+
+    :param arguments: parsed arguments
+    :param video_file_path: video file path
+    :param frame_resolution: resolution of the video file frames
+    :param pipeline_scheduling: dictionary with stage scheduling by stage (None if scheduling is not changed)
+    :return: tuple with number of processed frames, measured duration (in seconds), process CPU time (in seconds) and
+    metrics snapshot
+    """
+    # Every run is measured from scratch, histograms keep every observation, so percentiles are calculated over the
+    # whole run
+    metrics.DEFAULT_METRICS_REGISTRY = metrics.MetricsRegistry(histogram_window_size=10 ** 6)
+    if pipeline_scheduling is None:
+        return run_pipeline(arguments, video_file_path, frame_resolution)
+
+    default_opencv_threads_number = cv.getNumThreads()
+    scheduling.DEFAULT_PIPELINE_SCHEDULING = pipeline_scheduling
+    scheduling.apply_stage_scheduling(scheduling.GUI_STAGE)
+    try:
+        return run_pipeline(arguments, video_file_path, frame_resolution)
+    finally:
+        scheduling.apply_stage_scheduling(scheduling.GUI_STAGE, {})
+        scheduling.DEFAULT_PIPELINE_SCHEDULING = None
+        cv.setNumThreads(default_opencv_threads_number)
+
+
+def generate_scheduling_candidates(cpu_cores):
+    """
+    Generates candidate pipeline scheduling layouts for the host cores: stages share all cores or detection is
+    isolated from capture and GUI, OpenCV threads number is swept up to the number of detection cores and detection
+    runs with default or lowered priority (capture preempts it, so camera frames are read in time).
+
+    :param cpu_cores: list of the available CPU cores
+    :return: list of dictionaries with stage scheduling by stage
+    """
+    cores_layouts = [{}]
+    if len(cpu_cores) >= 2:
+        cores_layouts.append({scheduling.CAPTURE_STAGE: cpu_cores[:1], scheduling.GUI_STAGE: cpu_cores[:1],
+                              scheduling.DETECTION_STAGE: cpu_cores[1:]})
+    if len(cpu_cores) >= 4:
+        cores_layouts.append({scheduling.CAPTURE_STAGE: cpu_cores[:1], scheduling.GUI_STAGE: cpu_cores[1:2],
+                              scheduling.DETECTION_STAGE: cpu_cores[2:]})
+
+    candidates = []
+    for cores_layout in cores_layouts:
+        detection_cores_number = len(cores_layout.get(scheduling.DETECTION_STAGE, cpu_cores))
+        for threads_number in sorted({1, max(1, detection_cores_number // 2), detection_cores_number}):
+            for detection_nice in (None, 5):
+                candidate = {stage: {"threads_number": None, "cpu_cores": cores_layout.get(stage, None), "nice": None}
+                             for stage in scheduling.STAGES}
+                candidate[scheduling.DETECTION_STAGE]["threads_number"] = threads_number
+                candidate[scheduling.DETECTION_STAGE]["nice"] = detection_nice
+                candidates.append(candidate)
+
+    return candidates
+
+
+def sweep_scheduling(arguments, video_file_path, frame_resolution):
+    """
+    Runs pipeline with every candidate scheduling and picks the best one: the highest throughput, the lowest p95
+    latency if throughputs are equal.
+
+    :param arguments: parsed arguments
+    :param video_file_path: video file path
+    :param frame_resolution: resolution of the video file frames
+    :return: tuple with list of sweep results (scheduling specification, throughput, latency and CPU utilization) and
+    the best result
+    """
+    sweep_results = []
+    for pipeline_scheduling in generate_scheduling_candidates(scheduling.PROCESS_CPU_CORES or [0]):
+        processed_frames_number, duration, cpu_time, metrics_snapshot = run_pipeline_with_scheduling(
+            arguments, video_file_path, frame_resolution, pipeline_scheduling)
+        report = create_report(arguments, frame_resolution, processed_frames_number, duration, cpu_time,
+                               metrics_snapshot)
+        latencies_p95_ms = [camera_latency_ms["p95"] for camera_latency_ms in report["cameras_latency_ms"].values()]
+        sweep_result = {"scheduling": scheduling.format_pipeline_scheduling(pipeline_scheduling),
+                        "throughput_fps": report["throughput_fps"],
+                        "latency_p95_ms": max(latencies_p95_ms) if len(latencies_p95_ms) > 0 else 0.0,
+                        "cpu_utilization_cores": report["cpu_utilization_cores"],
+                        "scheduling_errors": sum(counter["value"] for counter in metrics_snapshot["counters"]
+                                                 if counter["name"] == "stage_scheduling_errors_total")}
+        print("%s: throughput: %.1f FPS, latency p95: %.1f ms" % (
+            sweep_result["scheduling"], sweep_result["throughput_fps"], sweep_result["latency_p95_ms"]))
+        sweep_results.append(sweep_result)
+
+    # Throughputs that differ by less than 0.1 FPS are considered as equal
+    best_sweep_result = min(sweep_results, key=lambda sweep_result: (-round(sweep_result["throughput_fps"], 1),
+                                                                    sweep_result["latency_p95_ms"]))
+
+    return sweep_results, best_sweep_result
+
+
+def create_report(arguments, frame_resolution, processed_frames_number, duration, cpu_time, metrics_snapshot):
+    """
+    Creates benchmark report.
+
+    :param arguments: parsed arguments
+    :param frame_resolution: resolution of the video file frames
+    :param processed_frames_number: number of processed frames
+    :param duration: measured duration (in seconds)
+    :param cpu_time: process CPU time (in seconds)
+    :param metrics_snapshot: pipeline metrics snapshot
+    :return: report dictionary
+    """
+    stages = {}
+    cameras_latency_ms = {}
+    for histogram in metrics_snapshot["histograms"]:
+        if histogram["name"] == "pipeline_stage_latency_seconds":
+            stage_name = histogram["labels"]["stage"]
+            if "camera" in histogram["labels"]:
+                stage_name = "%s (%s)" % (stage_name, histogram["labels"]["camera"])
+            stages[stage_name] = {"latency_ms": summarize_histogram(histogram)}
+        elif histogram["name"] == "camera_frame_latency_seconds":
+            cameras_latency_ms[histogram["labels"]["camera"]] = summarize_histogram(histogram)
+    for counter in metrics_snapshot["counters"]:
+        if counter["name"] == "pipeline_stage_cpu_seconds_total":
+            stage_name = counter["labels"]["stage"]
+            if "camera" in counter["labels"]:
+                stage_name = "%s (%s)" % (stage_name, counter["labels"]["camera"])
+            stages.setdefault(stage_name, {})["cpu_time_s"] = counter["value"]
+
+    return {
+        "opencv_version": cv.__version__,
+        "opencv_threads_number": cv.getNumThreads(),
+        "cpu_count": os.cpu_count(),
+        "platform": platform.platform(),
+        "configuration": {"video": arguments.video, "frame_resolution": frame_resolution,
+                          "cameras": arguments.cameras, "input_size": arguments.input_size,
+                          "batch_size": arguments.batch_size, "backend": arguments.backend,
+                          "target": arguments.target, "runtime": arguments.runtime,
+                          "person_only_decoding": arguments.person_only_decoding,
+                          "warmup_frames": arguments.warmup_frames,
+                          "pacing": arguments.pacing, "detection_channel": arguments.detection_channel,
+                          "results_channel": arguments.results_channel, "scheduling": arguments.scheduling},
+        "processed_frames_number": processed_frames_number,
+        "duration_s": duration,
+        "throughput_fps": processed_frames_number / duration if duration > 0 else 0.0,
+        "cpu_time_s": cpu_time,
+        "cpu_utilization_cores": cpu_time / duration if duration > 0 else 0.0,
+        "cameras_latency_ms": cameras_latency_ms,
+        "stages": stages,
+        "channels": summarize_channels(metrics_snapshot)
+    }
+
+
+def main():
+    """
+    Script entry point.
+    """
+    arguments = parse_arguments()
+
+    with tempfile.TemporaryDirectory() as temporary_directory_path:
+        video_file_path = arguments.video
+        if video_file_path is None:
+            video_file_path = os.path.join(temporary_directory_path, "synthetic_clip.avi")
+            write_synthetic_video(video_file_path, arguments.synthetic_video_frames, tuple(
+                int(dimension) for dimension in arguments.synthetic_video_resolution.split("x")))
+
+        if capture_sources.parse_camera_source(video_file_path)[0] == capture_sources.VIDEO_FILE_SOURCE_TYPE and \
+                not video_file_path.startswith(capture_sources.VIDEO_FILE_URI_SCHEME + "://"):
+            video_file_path = capture_sources.create_video_file_uri(video_file_path, arguments.pacing)
+
+        video_capture = capture_sources.open_video_capture(video_file_path)
+        if not video_capture.isOpened():
+            sys.exit("Video file %s cannot be opened!" % video_file_path)
+        frame_resolution = (int(video_capture.get(cv.CAP_PROP_FRAME_WIDTH)),
+                            int(video_capture.get(cv.CAP_PROP_FRAME_HEIGHT)))
+        video_capture.release()
+
+        if arguments.sweep_scheduling:
+            sweep_results, best_sweep_result = sweep_scheduling(arguments, video_file_path, frame_resolution)
+        else:
+            pipeline_scheduling = scheduling.parse_pipeline_scheduling_specification(arguments.scheduling) \
+                if arguments.scheduling is not None else None
+            processed_frames_number, duration, cpu_time, metrics_snapshot = run_pipeline_with_scheduling(
+                arguments, video_file_path, frame_resolution, pipeline_scheduling)
+
+    if arguments.sweep_scheduling:
+        report = {"opencv_version": cv.__version__, "cpu_count": os.cpu_count(), "platform": platform.platform(),
+                  "scheduling_sweep": sweep_results, "best_scheduling": best_sweep_result}
+        print("Best scheduling: %s (throughput: %.1f FPS, latency p95: %.1f ms), run the application with %s=\"%s\"" %
+              (best_sweep_result["scheduling"], best_sweep_result["throughput_fps"],
+               best_sweep_result["latency_p95_ms"], scheduling.PIPELINE_SCHEDULING_ENVIRONMENT_VARIABLE,
+               best_sweep_result["scheduling"]))
+    else:
+        report = create_report(arguments, frame_resolution, processed_frames_number, duration, cpu_time,
+                               metrics_snapshot)
+        print("Processed frames: %d, throughput: %.1f FPS, CPU utilization: %.2f cores" % (
+            report["processed_frames_number"], report["throughput_fps"], report["cpu_utilization_cores"]))
+        for camera_name, camera_latency_ms in sorted(report["cameras_latency_ms"].items()):
+            print("%s latency p50: %.1f ms, p95: %.1f ms, p99: %.1f ms" % (
+                camera_name, camera_latency_ms["p50"], camera_latency_ms["p95"], camera_latency_ms["p99"]))
+
+    if arguments.output is not None:
+        with open(arguments.output, "w") as results_file:
+            json.dump(report, results_file, indent=4)
+    else:
+        print(json.dumps(report, indent=4))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,264 @@
+import os
+import sys
+import time
+import json
+import argparse
+import numpy as np
+import cv2 as cv
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                "person_location_detector"))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "training"))
+
+import detectors
+from quantize_onnx_model import DATASET_DIRECTORY_NAME, get_dataset_image_file_paths
+
+MATCHING_IOU_THRESHOLD = 0.5
+
+
+def parse_arguments():
+    """
+    Parses command line arguments.
+
+    :return: parsed arguments
+    """
+    argument_parser = argparse.ArgumentParser(
+        description="Compares CPU speed and accuracy of the FP32 ONNX model and its INT8 quantized model (see "
+                    "training/quantize_onnx_model.py) run by ONNX Runtime on the dataset images with YOLO annotations "
+                    "(see training/download_coco_single_class_images.py).")
+    argument_parser.add_argument("--fp32", required=True, help="FP32 ONNX model file path")
+    argument_parser.add_argument("--int8", required=True, help="INT8 ONNX model file path")
+    argument_parser.add_argument("--images", default=DATASET_DIRECTORY_NAME, help="dataset images directory path")
+    argument_parser.add_argument("--evaluation-images", type=int, default=500,
+                                 help="number of evaluation images (evenly taken from the sorted images)")
+    argument_parser.add_argument("--input-size", type=int, default=416,
+                                 help="detection model input size (used if ONNX model input size is dynamic)")
+    argument_parser.add_argument("--person-class-id", type=int, default=0, help="detection model person class ID")
+    argument_parser.add_argument("--confidence-threshold", type=float, default=0.25,
+                                 help="confidence threshold of the detections")
+    argument_parser.add_argument("--nms-threshold", type=float, default=0.4, help="non-maximum suppression threshold")
+    argument_parser.add_argument("--threads", type=int, help="number of ONNX Runtime threads")
+    argument_parser.add_argument("--warmup-iterations", type=int, default=3, help="number of warmup iterations")
+    argument_parser.add_argument("--output", help="JSON results file path (results are printed if omitted)")
+
+    return argument_parser.parse_args()
+
+
+def read_annotation_bounding_boxes(image_file_path, image_resolution, class_id):
+    """
+    Reads bounding boxes of the class from the YOLO annotation file of the image ("class x_center y_center width
+    height" lines relative to the image resolution).
+
+    :param image_file_path: image file path
+    :param image_resolution: resolution of the image
+    :param class_id: annotation class ID
+    :return: array of bounding boxes (left, top, width, height) in pixels
+    """
+    bounding_boxes = []
+    try:
+        with open(os.path.splitext(image_file_path)[0] + ".txt") as annotation_file:
+            for line in annotation_file:
+                values = line.split()
+                if len(values) == 5 and int(values[0]) == class_id:
+                    x_center, y_center, width, height = (float(value) for value in values[1:])
+                    bounding_boxes.append(((x_center - width / 2) * image_resolution[0],
+                                           (y_center - height / 2) * image_resolution[1],
+                                           width * image_resolution[0], height * image_resolution[1]))
+    except OSError:
+        pass
+
+    return np.array(bounding_boxes, dtype=np.float32).reshape(-1, 4)
+
+
+def calculate_ious(bounding_box, bounding_boxes):
+    """
+    Calculates intersections over unions of the bounding box with the bounding boxes.
+
+    :param bounding_box: bounding box (left, top, width, height)
+    :param bounding_boxes: array of bounding boxes (left, top, width, height)
+    :return: array of intersections over unions
+    """
+    intersection_widths = np.clip(np.minimum(bounding_box[0] + bounding_box[2], bounding_boxes[:, 0] +
+                                             bounding_boxes[:, 2]) - np.maximum(bounding_box[0], bounding_boxes[:, 0]),
+                                  0, None)
+    intersection_heights = np.clip(np.minimum(bounding_box[1] + bounding_box[3], bounding_boxes[:, 1] +
+                                              bounding_boxes[:, 3]) - np.maximum(bounding_box[1], bounding_boxes[:, 1]),
+                                   0, None)
+    intersections = intersection_widths * intersection_heights
+    unions = bounding_box[2] * bounding_box[3] + bounding_boxes[:, 2] * bounding_boxes[:, 3] - intersections
+
+    return intersections / np.maximum(unions, 1e-9)
+
+
+def match_detections(confidences, bounding_boxes, reference_bounding_boxes):
+    """
+    Greedily matches detections (in descending confidence order) with reference bounding boxes by intersection over
+    union.
+
+    :param confidences: array of detections confidences
+    :param bounding_boxes: array of detections bounding boxes
+    :param reference_bounding_boxes: array of reference bounding boxes
+    :return: array with whether every detection is matched (in descending confidence order) and sorted confidences
+    """
+    order = np.argsort(-confidences, kind="stable")
+    is_reference_matched = np.zeros(len(reference_bounding_boxes), dtype=bool)
+    is_matched = np.zeros(len(order), dtype=bool)
+    for detection_index, bounding_box in enumerate(bounding_boxes[order]):
+        if len(reference_bounding_boxes) == 0:
+            break
+        ious = np.where(is_reference_matched, 0, calculate_ious(bounding_box, reference_bounding_boxes))
+        reference_index = int(np.argmax(ious))
+        if ious[reference_index] >= MATCHING_IOU_THRESHOLD:
+            is_reference_matched[reference_index] = True
+            is_matched[detection_index] = True
+
+    return is_matched, confidences[order]
+
+
+def calculate_average_precision(is_matched, confidences, references_number):
+    """
+    Calculates average precision (area under the interpolated precision-recall curve, as in Pascal VOC 2010+).
+
+    :param is_matched: array with whether every detection of all images is matched
+    :param confidences: array of detections confidences of all images
+    :param references_number: number of reference bounding boxes of all images
+    :return: average precision (None if there are no reference bounding boxes)
+    """
+    if references_number == 0:
+        return None
+
+    is_matched = is_matched[np.argsort(-confidences, kind="stable")]
+    true_positives = np.cumsum(is_matched)
+    recalls = np.concatenate(([0.0], true_positives / references_number, [1.0]))
+    precisions = np.concatenate(([1.0], true_positives / np.arange(1, len(is_matched) + 1), [0.0]))
+    precisions = np.maximum.accumulate(precisions[::-1])[::-1]
+
+    return float(np.sum((recalls[1:] - recalls[:-1]) * precisions[1:]))
+
+
+def evaluate_detection_model(onnx_model_file_path, arguments, image_file_paths):
+    """
+    Runs detection model by ONNX Runtime on the images and measures its latency, average precision against annotations
+    and collects its detections.
+
+    :param onnx_model_file_path: ONNX model file path
+    :param arguments: parsed arguments
+    :param image_file_paths: list of image file paths
+    :return: tuple with dictionary of evaluation results and list with detections confidences and bounding boxes of
+    every image
+    """
+    start_time = time.perf_counter()
+    detection_model = detectors.BatchedDetectionModel(onnx_model_file_path, None, True)
+    detection_model.set_input_params(1.0 / 255, (arguments.input_size, arguments.input_size))
+    load_time = time.perf_counter() - start_time
+
+    images = [cv.imread(image_file_path) for image_file_path in image_file_paths]
+    for _ in range(arguments.warmup_iterations):
+        detection_model.detect(images[0], arguments.confidence_threshold, arguments.nms_threshold)
+
+    durations = []
+    detections = []
+    is_matched, confidences = [], []
+    references_number = 0
+    for image_file_path, image in zip(image_file_paths, images):
+        start_time = time.perf_counter()
+        class_ids, image_confidences, bounding_boxes = detection_model.detect(
+            image, arguments.confidence_threshold, arguments.nms_threshold)
+        durations.append(time.perf_counter() - start_time)
+
+        is_person = np.asarray(class_ids).reshape(-1) == arguments.person_class_id
+        image_confidences = np.asarray(image_confidences, dtype=np.float32).reshape(-1)[is_person]
+        bounding_boxes = np.asarray(bounding_boxes, dtype=np.float32).reshape(-1, 4)[is_person]
+        detections.append((image_confidences, bounding_boxes))
+
+        reference_bounding_boxes = read_annotation_bounding_boxes(image_file_path, (image.shape[1], image.shape[0]),
+                                                                  arguments.person_class_id)
+        image_is_matched, image_confidences = match_detections(image_confidences, bounding_boxes,
+                                                               reference_bounding_boxes)
+        is_matched.append(image_is_matched)
+        confidences.append(image_confidences)
+        references_number += len(reference_bounding_boxes)
+
+    durations = np.array(durations)
+    is_matched, confidences = np.concatenate(is_matched), np.concatenate(confidences)
+    return {
+        "model": onnx_model_file_path,
+        "model_size_mb": os.path.getsize(onnx_model_file_path) / (1 << 20),
+        "input_size": detection_model.input_size,
+        "load_time_ms": load_time * 1000,
+        "fps": len(durations) / durations.sum(),
+        "latency_ms_p50": float(np.percentile(durations, 50) * 1000),
+        "latency_ms_p95": float(np.percentile(durations, 95) * 1000),
+        "detections_number": int(len(confidences)),
+        "precision": float(is_matched.mean()) if len(is_matched) > 0 else None,
+        "recall": float(is_matched.sum() / references_number) if references_number > 0 else None,
+        "ap50": calculate_average_precision(is_matched, confidences, references_number)
+    }, detections
+
+
+def calculate_detections_agreement(detections, reference_detections):
+    """
+    Calculates agreement of the detections with the reference detections: F1 score of the detections matched with
+    reference ones by intersection over union.
+
+    :param detections: list with detections confidences and bounding boxes of every image
+    :param reference_detections: list with reference detections confidences and bounding boxes of every image
+    :return: agreement (1.0 if there are no detections at all)
+    """
+    matched_number, detections_number, reference_detections_number = 0, 0, 0
+    for (confidences, bounding_boxes), (_, reference_bounding_boxes) in zip(detections, reference_detections):
+        is_matched, _ = match_detections(confidences, bounding_boxes, reference_bounding_boxes)
+        matched_number += int(is_matched.sum())
+        detections_number += len(confidences)
+        reference_detections_number += len(reference_bounding_boxes)
+
+    if detections_number + reference_detections_number == 0:
+        return 1.0
+
+    return 2.0 * matched_number / (detections_number + reference_detections_number)
+
+
+def main():
+    """
+    Script entry point.
+    """
+    arguments = parse_arguments()
+    if not detectors.is_onnx_runtime_available():
+        sys.exit("You need to install ONNX Runtime first!")
+    if arguments.threads is not None:
+        # ONNX Runtime threads number is the OpenCV threads number (see detectors.OnnxRuntimeNet)
+        cv.setNumThreads(arguments.threads)
+
+    image_file_paths = get_dataset_image_file_paths(arguments.images, arguments.evaluation_images)
+    if len(image_file_paths) == 0:
+        sys.exit("You need to download dataset images first!")
+
+    fp32_results, fp32_detections = evaluate_detection_model(arguments.fp32, arguments, image_file_paths)
+    int8_results, int8_detections = evaluate_detection_model(arguments.int8, arguments, image_file_paths)
+    for precision_name, results in (("FP32", fp32_results), ("INT8", int8_results)):
+        print("%s: %.1f FPS, latency p50: %.1f ms, p95: %.1f ms, AP@0.5: %s, size: %.1f MB" % (
+            precision_name, results["fps"], results["latency_ms_p50"], results["latency_ms_p95"],
+            "%.3f" % results["ap50"] if results["ap50"] is not None else "n/a", results["model_size_mb"]))
+
+    comparison = {
+        "speedup": int8_results["fps"] / fp32_results["fps"],
+        "ap50_difference": int8_results["ap50"] - fp32_results["ap50"]
+        if fp32_results["ap50"] is not None and int8_results["ap50"] is not None else None,
+        "detections_agreement": calculate_detections_agreement(int8_detections, fp32_detections)
+    }
+    print("INT8 speedup: %.2fx, agreement of INT8 detections with FP32 ones: %.3f" % (
+        comparison["speedup"], comparison["detections_agreement"]))
+
+    report = {"onnx_runtime_version": detectors.onnxruntime.__version__,
+              "opencv_threads_number": cv.getNumThreads(), "images_number": len(image_file_paths),
+              "confidence_threshold": arguments.confidence_threshold, "nms_threshold": arguments.nms_threshold,
+              "fp32": fp32_results, "int8": int8_results, "comparison": comparison}
+    if arguments.output is not None:
+        with open(arguments.output, "w") as results_file:
+            json.dump(report, results_file, indent=4)
+    else:
+        print(json.dumps(report, indent=4))
+
+
+if __name__ == "__main__":
+    main()
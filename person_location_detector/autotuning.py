@@ -0,0 +1,185 @@
+import os
+import json
+import hashlib
+import platform
+import cv2 as cv
+import channels
+import detectors
+
+AUTOTUNING_PROFILES_CACHE_FILE_PATH = os.path.join(os.path.expanduser("~"), ".cache", "person_location_detector",
+                                                   "autotuning_profiles.json")
+AUTOTUNING_PROFILES_CACHE_VERSION = 1
+
+FILE_HASH_CHUNK_SIZE = 1 << 20
+
+
+def get_cpu_model():
+    """
+    Returns CPU model of the host: board model on devices with device tree (e.g. NVIDIA Jetson Nano), CPU model name
+    from /proc/cpuinfo on Linux and processor name otherwise.
+
+    :return: CPU model
+    """
+    try:
+        with open("/proc/device-tree/model") as device_tree_model_file:
+            return device_tree_model_file.read().strip("\0\n ")
+    except OSError:
+        pass
+
+    try:
+        with open("/proc/cpuinfo") as cpuinfo_file:
+            for line in cpuinfo_file:
+                key, _, value = line.partition(":")
+                if key.strip() in ("model name", "Hardware", "Model"):
+                    return value.strip()
+    except OSError:
+        pass
+
+    return platform.processor() or platform.machine()
+
+
+def get_opencv_build_identity():
+    """
+    Returns identity of the OpenCV build: version and hash of the build information (enabled backends, CPU
+    optimizations, CUDA version, etc.).
+
+    :return: OpenCV build identity
+    """
+    return "%s+%s" % (cv.__version__, hashlib.sha256(cv.getBuildInformation().encode()).hexdigest()[:16])
+
+
+def calculate_file_hash(file_path, file_hashes=None):
+    """
+    Calculates SHA-256 hash of the file. Hashes are cached by file path, size and modification time, so large weights
+    files are not read again.
+
+    :param file_path: file path (mock detection model URI is hashed as it is)
+    :param file_hashes: dictionary with cached file hashes (updated with calculated hash)
+    :return: file hash
+    """
+    if not os.path.isfile(file_path):
+        return hashlib.sha256(file_path.encode()).hexdigest()
+
+    file_stat = os.stat(file_path)
+    absolute_file_path = os.path.abspath(file_path)
+    cached_file_hash = (file_hashes or {}).get(absolute_file_path, None)
+    if cached_file_hash is not None and cached_file_hash["size"] == file_stat.st_size and \
+            cached_file_hash["modification_time"] == file_stat.st_mtime:
+        return cached_file_hash["hash"]
+
+    file_hash = hashlib.sha256()
+    with open(file_path, "rb") as hashed_file:
+        for chunk in iter(lambda: hashed_file.read(FILE_HASH_CHUNK_SIZE), b""):
+            file_hash.update(chunk)
+    if file_hashes is not None:
+        file_hashes[absolute_file_path] = {"size": file_stat.st_size, "modification_time": file_stat.st_mtime,
+                                           "hash": file_hash.hexdigest()}
+
+    return file_hash.hexdigest()
+
+
+def create_profile_key(detection_model_weights_file_path, detection_model_configuration_file_path,
+                       file_hashes=None):
+    """
+    Creates key of the autotuning profile: CPU model, OpenCV build identity and hash of the detection model files.
+    Configuration is not hashed for ONNX model (the whole network is in the model file), so the profile is found
+    whether the model is run with the configuration it has been converted from or without it.
+
+    :param detection_model_weights_file_path: detection model weights file path, ONNX model file path or mock
+    detection model URI
+    :param detection_model_configuration_file_path: detection model configuration file path
+    :param file_hashes: dictionary with cached file hashes
+    :return: profile key
+    """
+    if detectors.is_onnx_model(detection_model_weights_file_path):
+        detection_model_configuration_file_path = None
+
+    model_hash = hashlib.sha256()
+    for file_path in (detection_model_weights_file_path, detection_model_configuration_file_path):
+        if file_path is not None:
+            model_hash.update(calculate_file_hash(file_path, file_hashes).encode())
+
+    return "%s|%s|%s" % (get_cpu_model(), get_opencv_build_identity(), model_hash.hexdigest())
+
+
+def create_detection_channel_specification(detect_every_frames_number):
+    """
+    Creates specification of the capture to detection channel that detects persons on every N-th camera frame.
+
+    :param detect_every_frames_number: number of camera frames per detected frame
+    :return: channel specification
+    """
+    if detect_every_frames_number <= 1:
+        return channels.DEFAULT_DETECTION_CHANNEL_SPECIFICATION
+
+    return "%s:1:%d" % (channels.SAMPLE_POLICY, detect_every_frames_number)
+
+
+def load_autotuning_profiles_cache(cache_file_path=AUTOTUNING_PROFILES_CACHE_FILE_PATH):
+    """
+    Loads autotuning profiles cache (cache of another version or corrupted cache is ignored).
+
+    :param cache_file_path: cache file path
+    :return: dictionary with "profiles" by profile key and "file_hashes" by file path
+    """
+    try:
+        with open(cache_file_path) as cache_file:
+            cache = json.load(cache_file)
+    except (OSError, ValueError):
+        return {"profiles": {}, "file_hashes": {}}
+
+    if not isinstance(cache, dict) or cache.get("version", None) != AUTOTUNING_PROFILES_CACHE_VERSION:
+        return {"profiles": {}, "file_hashes": {}}
+
+    return {"profiles": cache.get("profiles", {}), "file_hashes": cache.get("file_hashes", {})}
+
+
+def save_autotuning_profiles_cache(cache, cache_file_path=AUTOTUNING_PROFILES_CACHE_FILE_PATH):
+    """
+    Saves autotuning profiles cache (cache file is replaced atomically).
+
+    :param cache: dictionary with "profiles" by profile key and "file_hashes" by file path
+    :param cache_file_path: cache file path
+    """
+    os.makedirs(os.path.dirname(cache_file_path), exist_ok=True)
+    temporary_cache_file_path = cache_file_path + ".tmp"
+    with open(temporary_cache_file_path, "w") as cache_file:
+        json.dump(dict(cache, version=AUTOTUNING_PROFILES_CACHE_VERSION), cache_file, indent=4)
+    os.replace(temporary_cache_file_path, cache_file_path)
+
+
+def load_autotuning_profile(detection_model_weights_file_path, detection_model_configuration_file_path,
+                            cache_file_path=AUTOTUNING_PROFILES_CACHE_FILE_PATH):
+    """
+    Loads autotuning profile of the detection model on this host.
+
+    :param detection_model_weights_file_path: detection model weights file path (or mock detection model URI)
+    :param detection_model_configuration_file_path: detection model configuration file path
+    :param cache_file_path: cache file path
+    :return: dictionary with detection model backend, target, input size, OpenCV threads number, number of camera
+    frames per detected frame and measured FPS and latency (None if detection model has not been autotuned on this
+    host)
+    """
+    cache = load_autotuning_profiles_cache(cache_file_path)
+    profile_key = create_profile_key(detection_model_weights_file_path, detection_model_configuration_file_path,
+                                     cache["file_hashes"])
+
+    return cache["profiles"].get(profile_key, None)
+
+
+def save_autotuning_profile(detection_model_weights_file_path, detection_model_configuration_file_path, profile,
+                            cache_file_path=AUTOTUNING_PROFILES_CACHE_FILE_PATH):
+    """
+    Saves autotuning profile of the detection model on this host (hashes of the detection model files are cached, so
+    the profile is loaded without reading them again).
+
+    :param detection_model_weights_file_path: detection model weights file path (or mock detection model URI)
+    :param detection_model_configuration_file_path: detection model configuration file path
+    :param profile: autotuning profile
+    :param cache_file_path: cache file path
+    """
+    cache = load_autotuning_profiles_cache(cache_file_path)
+    profile_key = create_profile_key(detection_model_weights_file_path, detection_model_configuration_file_path,
+                                     cache["file_hashes"])
+    cache["profiles"][profile_key] = profile
+    save_autotuning_profiles_cache(cache, cache_file_path)
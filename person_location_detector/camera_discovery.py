@@ -0,0 +1,265 @@
+import os
+import re
+import sys
+import glob
+import json
+import time
+import shutil
+import subprocess
+import cv2 as cv
+from concurrent.futures import ThreadPoolExecutor
+import capture_sources
+
+CAMERA_CAPABILITIES_CACHE_FILE_PATH = os.path.join(os.path.expanduser("~"), ".cache", "person_location_detector",
+                                                   "camera_capabilities.json")
+CAMERA_CAPABILITIES_CACHE_VERSION = 1
+
+# Camera indexes that are offered when video devices cannot be enumerated (e.g. on Windows)
+FALLBACK_CAMERA_INDEXES = [0, 1, 2, 3, 4]
+
+# Modes that are probed when the camera driver cannot list its modes (v4l2-ctl is not installed)
+CANDIDATE_CAMERA_MODES = [("MJPG", (3840, 2160), 30), ("MJPG", (1920, 1080), 30), ("MJPG", (1280, 720), 30),
+                          ("MJPG", (640, 480), 30)]
+
+# Mode runs at full frame rate if the measured FPS is not lower than this share of the negotiated FPS
+FULL_FRAME_RATE_SHARE = 0.9
+PROBE_WARMUP_FRAMES_NUMBER = 5
+PROBE_FRAMES_NUMBER = 20
+
+
+def read_sysfs_file(file_path):
+    """
+    Reads sysfs attribute file.
+
+    :param file_path: attribute file path
+    :return: attribute value (None if the file does not exist)
+    """
+    try:
+        with open(file_path) as sysfs_file:
+            return sysfs_file.read().strip()
+    except OSError:
+        return None
+
+
+def list_video_devices():
+    """
+    Lists camera indexes of the video capture devices: on Linux /dev/video* devices are enumerated (metadata nodes of
+    the UVC cameras are skipped), otherwise fallback camera indexes are returned.
+
+    :return: list of camera indexes
+    """
+    if not sys.platform.startswith("linux"):
+        return list(FALLBACK_CAMERA_INDEXES)
+
+    camera_indexes = []
+    for video_device_path in glob.glob("/dev/video*"):
+        camera_index = os.path.basename(video_device_path)[len("video"):]
+        if not camera_index.isdigit():
+            continue
+        if read_sysfs_file("/sys/class/video4linux/video%s/index" % camera_index) not in (None, "0"):
+            continue
+        camera_indexes.append(int(camera_index))
+
+    return sorted(camera_indexes)
+
+
+def get_video_device_identity(camera_index):
+    """
+    Returns identity of the video device that does not change when camera indexes are reassigned: device name, USB
+    vendor and product IDs, serial number and USB port.
+
+    :param camera_index: camera index
+    :return: tuple with device identity (None if it is unknown) and device name
+    """
+    sysfs_device_path = "/sys/class/video4linux/video%d" % camera_index
+    device_name = read_sysfs_file(os.path.join(sysfs_device_path, "name"))
+    if device_name is None:
+        return None, "Camera %d" % camera_index
+
+    usb_device_path = os.path.realpath(os.path.join(sysfs_device_path, "device"))
+    while usb_device_path != "/" and not os.path.exists(os.path.join(usb_device_path, "idVendor")):
+        usb_device_path = os.path.dirname(usb_device_path)
+    if usb_device_path == "/":
+        return "%s|%s" % (device_name, os.path.realpath(os.path.join(sysfs_device_path, "device"))), device_name
+
+    return "%s|%s:%s|%s|%s" % (device_name, read_sysfs_file(os.path.join(usb_device_path, "idVendor")),
+                               read_sysfs_file(os.path.join(usb_device_path, "idProduct")),
+                               read_sysfs_file(os.path.join(usb_device_path, "serial")) or "",
+                               os.path.basename(usb_device_path)), device_name
+
+
+def list_video_device_modes(camera_index):
+    """
+    Lists modes of the video device reported by its driver (v4l2-ctl): the format with the maximum frame rate is
+    taken for every resolution (MJPEG is preferred if frame rates are equal).
+
+    :param camera_index: camera index
+    :return: list of (FOURCC, resolution, FPS) modes sorted by resolution in descending order (candidate modes if
+    driver modes cannot be listed)
+    """
+    if not sys.platform.startswith("linux") or shutil.which("v4l2-ctl") is None:
+        return list(CANDIDATE_CAMERA_MODES)
+
+    try:
+        formats_description = subprocess.run(
+            ["v4l2-ctl", "-d", "/dev/video%d" % camera_index, "--list-formats-ext"], stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL, universal_newlines=True, timeout=10).stdout
+    except (OSError, subprocess.SubprocessError):
+        return list(CANDIDATE_CAMERA_MODES)
+
+    modes = {}
+    fourcc = resolution = None
+    for line in formats_description.splitlines():
+        format_match = re.search(r"\[\d+\]: '(\w+)'", line)
+        size_match = re.search(r"Size: Discrete (\d+)x(\d+)", line)
+        interval_match = re.search(r"\(([\d.]+) fps\)", line)
+        if format_match is not None:
+            fourcc = format_match.group(1)
+        elif size_match is not None:
+            resolution = (int(size_match.group(1)), int(size_match.group(2)))
+        elif interval_match is not None and fourcc is not None and resolution is not None:
+            mode = (fourcc, resolution, round(float(interval_match.group(1))))
+            if resolution not in modes or (mode[2], mode[0] == "MJPG") > (modes[resolution][2],
+                                                                           modes[resolution][0] == "MJPG"):
+                modes[resolution] = mode
+
+    if len(modes) == 0:
+        return list(CANDIDATE_CAMERA_MODES)
+
+    return sorted(modes.values(), key=lambda mode: mode[1][0] * mode[1][1], reverse=True)
+
+
+def probe_camera_mode(video_capture, fourcc, resolution, fps):
+    """
+    Probes camera mode: negotiates it and measures actual frame rate.
+
+    :param video_capture: OpenCV video capture of the camera
+    :param fourcc: FOURCC of the mode
+    :param resolution: resolution of the mode
+    :param fps: FPS of the mode
+    :return: dictionary with FOURCC, resolution, negotiated and measured FPS of the mode (None if camera does not
+    support resolution)
+    """
+    camera_format = capture_sources.negotiate_camera_format(video_capture, resolution, fps, fourcc)
+    if camera_format["resolution"] != tuple(resolution):
+        return None
+
+    for _ in range(PROBE_WARMUP_FRAMES_NUMBER):
+        video_capture.read()
+    start_time = time.perf_counter()
+    read_frames_number = sum(video_capture.read()[0] for _ in range(PROBE_FRAMES_NUMBER))
+    duration = time.perf_counter() - start_time
+
+    return {"fourcc": camera_format["fourcc"], "resolution": list(resolution), "fps": camera_format["fps"] or fps,
+            "measured_fps": read_frames_number / duration if duration > 0 else 0.0}
+
+
+def probe_camera(camera_index):
+    """
+    Probes camera: lists its modes and measures their frame rates.
+
+    :param camera_index: camera index
+    :return: list of probed modes (None if camera cannot be opened)
+    """
+    video_capture = cv.VideoCapture(camera_index)
+    if not video_capture.isOpened():
+        return None
+
+    try:
+        modes = []
+        for fourcc, resolution, fps in list_video_device_modes(camera_index):
+            mode = probe_camera_mode(video_capture, fourcc, resolution, fps)
+            if mode is not None:
+                modes.append(mode)
+        return modes
+    finally:
+        video_capture.release()
+
+
+def is_full_frame_rate_mode(mode):
+    """
+    Checks whether camera mode runs at full frame rate.
+
+    :param mode: probed mode
+    :return: whether mode runs at full frame rate
+    """
+    return mode["measured_fps"] >= FULL_FRAME_RATE_SHARE * mode["fps"]
+
+
+def load_camera_capabilities_cache(cache_file_path=CAMERA_CAPABILITIES_CACHE_FILE_PATH):
+    """
+    Loads cached camera capabilities (cache of another version or corrupted cache is ignored).
+
+    :param cache_file_path: cache file path
+    :return: dictionary with probed modes by device identity
+    """
+    try:
+        with open(cache_file_path) as cache_file:
+            cache = json.load(cache_file)
+    except (OSError, ValueError):
+        return {}
+
+    if not isinstance(cache, dict) or cache.get("version", None) != CAMERA_CAPABILITIES_CACHE_VERSION:
+        return {}
+
+    return cache.get("cameras", {})
+
+
+def save_camera_capabilities_cache(cameras_capabilities, cache_file_path=CAMERA_CAPABILITIES_CACHE_FILE_PATH):
+    """
+    Saves camera capabilities cache (cache file is replaced atomically).
+
+    :param cameras_capabilities: dictionary with probed modes by device identity
+    :param cache_file_path: cache file path
+    """
+    os.makedirs(os.path.dirname(cache_file_path), exist_ok=True)
+    temporary_cache_file_path = cache_file_path + ".tmp"
+    with open(temporary_cache_file_path, "w") as cache_file:
+        json.dump({"version": CAMERA_CAPABILITIES_CACHE_VERSION, "cameras": cameras_capabilities}, cache_file,
+                  indent=4)
+    os.replace(temporary_cache_file_path, cache_file_path)
+
+
+def discover_cameras(cache_file_path=CAMERA_CAPABILITIES_CACHE_FILE_PATH, is_cache_used=True):
+    """
+    Discovers connected cameras: video devices are enumerated and the ones that are not cached are probed in parallel.
+    Probed modes are cached by device identity.
+
+    :param cache_file_path: cache file path
+    :param is_cache_used: whether cached capabilities are used (devices are probed again if it is False)
+    :return: list of dictionaries with camera index, name and probed modes of the discovered cameras
+    """
+    cameras_capabilities = load_camera_capabilities_cache(cache_file_path) if is_cache_used else {}
+    video_devices = [(camera_index,) + get_video_device_identity(camera_index)
+                     for camera_index in list_video_devices()]
+    camera_indexes_to_probe = [camera_index for camera_index, identity, _ in video_devices
+                               if identity not in cameras_capabilities]
+
+    probed_modes = {}
+    if len(camera_indexes_to_probe) > 0:
+        with ThreadPoolExecutor(len(camera_indexes_to_probe)) as probing_executor:
+            probed_modes = dict(zip(camera_indexes_to_probe, probing_executor.map(probe_camera,
+                                                                                  camera_indexes_to_probe)))
+
+    cameras = []
+    is_cache_changed = False
+    for camera_index, identity, name in video_devices:
+        if camera_index in probed_modes:
+            modes = probed_modes[camera_index]
+            # Devices that cannot be opened (e.g. used by another application) are probed next time
+            if modes is None:
+                continue
+            if identity is not None:
+                cameras_capabilities[identity] = {"name": name, "modes": modes}
+                is_cache_changed = True
+        else:
+            modes = cameras_capabilities[identity]["modes"]
+        cameras.append({"camera_index": camera_index, "name": name, "modes": modes})
+
+    if is_cache_changed:
+        try:
+            save_camera_capabilities_cache(cameras_capabilities, cache_file_path)
+        except OSError:
+            pass
+
+    return cameras
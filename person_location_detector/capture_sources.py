@@ -0,0 +1,423 @@
+import os
+import time
+import threading
+import collections
+import cv2 as cv
+from concurrent.futures import ThreadPoolExecutor, Future
+from urllib.parse import urlsplit
+from urllib.request import url2pathname, pathname2url
+import synthetic
+import metrics
+
+CAMERA_DEVICE_SOURCE_TYPE = "device"
+VIDEO_FILE_SOURCE_TYPE = "file"
+GSTREAMER_PIPELINE_SOURCE_TYPE = "gstreamer"
+SYNTHETIC_CAMERA_SOURCE_TYPE = "synthetic"
+STREAM_URL_SOURCE_TYPE = "stream"
+
+VIDEO_FILE_URI_SCHEME = "file"
+GSTREAMER_PIPELINE_URI_SCHEME = "gstreamer"
+
+REALTIME_PACING = "realtime"
+FAST_PACING = "fast"
+
+# Appsink keeps only the latest decoded buffer, so stale frames are dropped inside GStreamer instead of being queued
+GSTREAMER_APPSINK_PROPERTIES = {"drop": "true", "max-buffers": "1"}
+
+# USB cameras fall back to raw YUYV without FOURCC negotiation, which cannot reach 30 FPS at 1080p over USB 2.0
+DEFAULT_CAMERA_FOURCC = "MJPG"
+DEFAULT_CAMERA_FPS = 30
+# Camera keeps only the latest frame, so frames are not queued in the driver while pipeline is busy
+DEFAULT_CAMERA_BUFFER_SIZE = 1
+DEFAULT_DECODING_WORKERS_NUMBER = 2
+
+# GStreamer source elements that produce finite streams (stream ends when they have been read to the end)
+FINITE_GSTREAMER_SOURCE_ELEMENTS = ("filesrc", "multifilesrc", "uridecodebin", "playbin")
+
+
+def parse_camera_source(camera_source):
+    """
+    Parses camera source: camera index (e.g. 0 or "0"), video file path or URI (e.g.
+    "file:///videos/clip.mp4?pacing=fast&loop=true"), GStreamer pipeline (e.g.
+    "gstreamer://videotestsrc ! videoconvert ! appsink" or any string with "!" separated elements), synthetic camera
+    URI (e.g. "synthetic://?fps=60") or stream URL (e.g. "rtsp://camera/stream").
+
+    :param camera_source: camera source
+    :return: tuple with source type, location (camera index, file path, pipeline or URL) and parameters dictionary
+    """
+    if isinstance(camera_source, int):
+        return CAMERA_DEVICE_SOURCE_TYPE, camera_source, {}
+
+    camera_source = camera_source.strip()
+    if camera_source.isdigit():
+        return CAMERA_DEVICE_SOURCE_TYPE, int(camera_source), {}
+
+    if synthetic.is_uri_of_scheme(camera_source, synthetic.SYNTHETIC_CAMERA_URI_SCHEME):
+        return SYNTHETIC_CAMERA_SOURCE_TYPE, camera_source, {}
+
+    if synthetic.is_uri_of_scheme(camera_source, GSTREAMER_PIPELINE_URI_SCHEME):
+        return GSTREAMER_PIPELINE_SOURCE_TYPE, camera_source[len(GSTREAMER_PIPELINE_URI_SCHEME) + 3:], {}
+
+    if synthetic.is_uri_of_scheme(camera_source, VIDEO_FILE_URI_SCHEME):
+        parameters = synthetic.parse_uri_parameters(camera_source, VideoFileCapture.DEFAULT_PARAMETERS)
+        return VIDEO_FILE_SOURCE_TYPE, url2pathname(urlsplit(camera_source).path), parameters
+
+    if "!" in camera_source:
+        return GSTREAMER_PIPELINE_SOURCE_TYPE, camera_source, {}
+
+    if "://" in camera_source:
+        return STREAM_URL_SOURCE_TYPE, camera_source, {}
+
+    return VIDEO_FILE_SOURCE_TYPE, camera_source, dict(VideoFileCapture.DEFAULT_PARAMETERS)
+
+
+def create_video_file_uri(video_file_path, pacing=REALTIME_PACING, is_looped=False):
+    """
+    Creates video file URI.
+
+    :param video_file_path: video file path
+    :param pacing: "realtime" (frames are read at the video FPS) or "fast" (frames are read as fast as possible)
+    :param is_looped: whether video file is replayed from the beginning when it has ended
+    :return: video file URI
+    """
+    return "%s://%s?pacing=%s&loop=%s" % (VIDEO_FILE_URI_SCHEME, pathname2url(os.path.abspath(video_file_path)),
+                                          pacing, "true" if is_looped else "false")
+
+
+def is_finite_camera_source(camera_source):
+    """
+    Checks whether camera source ends (video file that is not looped or GStreamer pipeline that reads files), so its
+    failed read means the end of the stream rather than camera failure.
+
+    :param camera_source: camera source
+    :return: whether camera source is finite
+    """
+    source_type, location, parameters = parse_camera_source(camera_source)
+    if source_type == VIDEO_FILE_SOURCE_TYPE:
+        return not parameters["loop"]
+    if source_type == GSTREAMER_PIPELINE_SOURCE_TYPE:
+        source_element = location.split("!")[0].split()
+        return len(source_element) > 0 and (source_element[0] in FINITE_GSTREAMER_SOURCE_ELEMENTS or any(
+            element_property.startswith("num-buffers=") for element_property in source_element[1:]))
+
+    return False
+
+
+def configure_gstreamer_appsink(pipeline):
+    """
+    Configures appsink of the GStreamer pipeline to drop stale buffers and keep only the latest one: appsink is added
+    to the end of the pipeline if it is missing.
+
+    :param pipeline: GStreamer pipeline
+    :return: configured GStreamer pipeline
+    """
+    elements = [element.strip() for element in pipeline.split("!")]
+    sink_element_tokens = elements[-1].split()
+    if len(sink_element_tokens) == 0 or sink_element_tokens[0] != "appsink":
+        elements.append("appsink")
+        sink_element_tokens = ["appsink"]
+
+    sink_element_properties = [token for token in sink_element_tokens[1:]
+                               if token.split("=")[0] not in GSTREAMER_APPSINK_PROPERTIES]
+    sink_element_properties.extend("%s=%s" % (property_name, property_value)
+                                   for property_name, property_value in GSTREAMER_APPSINK_PROPERTIES.items())
+    elements[-1] = " ".join(["appsink"] + sink_element_properties)
+
+    return " ! ".join(elements)
+
+
+def decode_fourcc(fourcc_code):
+    """
+    Decodes FOURCC code of the video capture into the string.
+
+    :param fourcc_code: FOURCC code (CAP_PROP_FOURCC property value)
+    :return: FOURCC string (e.g. "MJPG" or "YUYV")
+    """
+    fourcc_code = int(fourcc_code)
+    return "".join(chr((fourcc_code >> 8 * character_index) & 0xFF) for character_index in range(4)).strip("\x00")
+
+
+def negotiate_camera_format(video_capture, camera_resolution, camera_fps=DEFAULT_CAMERA_FPS,
+                            camera_fourcc=DEFAULT_CAMERA_FOURCC, camera_buffer_size=DEFAULT_CAMERA_BUFFER_SIZE):
+    """
+    Negotiates camera format: FOURCC is set before resolution and FPS, because drivers choose available resolutions
+    and frame rates by pixel format. Camera can reject any property, so actual format is read back.
+
+    :param video_capture: OpenCV video capture of the connected camera
+    :param camera_resolution: requested camera resolution
+    :param camera_fps: requested camera FPS (it is not negotiated if it is None)
+    :param camera_fourcc: requested camera FOURCC (it is not negotiated if it is None)
+    :param camera_buffer_size: requested number of frames buffered by the camera driver (it is not negotiated if it
+    is None)
+    :return: dictionary with actual FOURCC, resolution, FPS and buffer size of the camera
+    """
+    if camera_fourcc is not None:
+        video_capture.set(cv.CAP_PROP_FOURCC, cv.VideoWriter_fourcc(*camera_fourcc))
+    video_capture.set(cv.CAP_PROP_FRAME_WIDTH, camera_resolution[0])
+    video_capture.set(cv.CAP_PROP_FRAME_HEIGHT, camera_resolution[1])
+    if camera_fps is not None:
+        video_capture.set(cv.CAP_PROP_FPS, camera_fps)
+    if camera_buffer_size is not None:
+        video_capture.set(cv.CAP_PROP_BUFFERSIZE, camera_buffer_size)
+
+    return {"fourcc": decode_fourcc(video_capture.get(cv.CAP_PROP_FOURCC)),
+            "resolution": (int(video_capture.get(cv.CAP_PROP_FRAME_WIDTH)),
+                           int(video_capture.get(cv.CAP_PROP_FRAME_HEIGHT))),
+            "fps": video_capture.get(cv.CAP_PROP_FPS),
+            "buffer_size": int(video_capture.get(cv.CAP_PROP_BUFFERSIZE))}
+
+
+def open_video_capture(camera_source):
+    """
+    Opens video capture of the camera source.
+
+    :param camera_source: camera source (see parse_camera_source)
+    :return: video capture (OpenCV video capture or object with the same interface)
+    """
+    source_type, location, parameters = parse_camera_source(camera_source)
+    if source_type == SYNTHETIC_CAMERA_SOURCE_TYPE:
+        return synthetic.SyntheticVideoCapture.from_uri(location)
+    if source_type == GSTREAMER_PIPELINE_SOURCE_TYPE:
+        return cv.VideoCapture(configure_gstreamer_appsink(location), cv.CAP_GSTREAMER)
+    if source_type == VIDEO_FILE_SOURCE_TYPE:
+        return VideoFileCapture(location, parameters["pacing"], parameters["loop"])
+
+    return cv.VideoCapture(location)
+
+
+class VideoFileCapture:
+    """
+    Video file capture that has the same interface as OpenCV video capture. In real-time pacing mode frames are read
+    at the video FPS and frames that are already late are skipped as a live camera would drop them; in fast mode frames
+    are read as fast as possible (e.g. for offline runs). Video file can be looped.
+    """
+
+    DEFAULT_PARAMETERS = {"pacing": REALTIME_PACING, "loop": False}
+
+    def __init__(self, video_file_path, pacing=REALTIME_PACING, is_looped=False):
+        """
+        Initializes video file capture.
+
+        :param video_file_path: video file path
+        :param pacing: "realtime" (frames are read at the video FPS) or "fast" (frames are read as fast as possible)
+        :param is_looped: whether video file is replayed from the beginning when it has ended
+        """
+        if pacing not in (REALTIME_PACING, FAST_PACING):
+            raise Exception("Unknown video file pacing %s!" % pacing)
+
+        self.video_file_path = video_file_path
+        self.pacing = pacing
+        self.is_looped = is_looped
+        self.skipped_frames_number = 0
+        self.video_capture = cv.VideoCapture(video_file_path)
+        self.frame_duration = 1.0 / (self.video_capture.get(cv.CAP_PROP_FPS) or 30.0)
+        self.__start_time = None
+        self.__next_frame_index = 0
+
+    def isOpened(self):
+        """
+        Returns whether video file has been opened.
+
+        :return: whether video file has been opened
+        """
+        return self.video_capture.isOpened()
+
+    def set(self, property_id, value):
+        """
+        Sets property of the video capture (frame width and height of the video file cannot be changed).
+
+        :param property_id: OpenCV video capture property ID
+        :param value: property value
+        :return: whether property has been set
+        """
+        return self.video_capture.set(property_id, value)
+
+    def get(self, property_id):
+        """
+        Gets property of the video capture.
+
+        :param property_id: OpenCV video capture property ID
+        :return: property value
+        """
+        return self.video_capture.get(property_id)
+
+    def read(self):
+        """
+        Reads next frame: waits until its time has come in real-time pacing mode and replays video file from the
+        beginning if it is looped.
+
+        :return: tuple with indication whether frame has been read and the frame
+        """
+        if self.pacing == REALTIME_PACING:
+            self.__wait_for_next_frame_time()
+
+        is_successful_frame_read, frame = self.video_capture.read()
+        if not is_successful_frame_read and self.is_looped and self.__next_frame_index > 0:
+            self.video_capture.set(cv.CAP_PROP_POS_FRAMES, 0)
+            self.__start_time = None
+            self.__next_frame_index = 0
+            is_successful_frame_read, frame = self.video_capture.read()
+        self.__next_frame_index += 1
+
+        return is_successful_frame_read, frame
+
+    def __wait_for_next_frame_time(self):
+        """
+        Waits until the time of the next frame has come: frames which time has already passed are skipped.
+        """
+        current_time = time.perf_counter()
+        if self.__start_time is None:
+            self.__start_time = current_time - self.__next_frame_index * self.frame_duration
+
+        while current_time - self.__start_time >= (self.__next_frame_index + 1) * self.frame_duration:
+            if not self.video_capture.grab():
+                return
+            self.__next_frame_index += 1
+            self.skipped_frames_number += 1
+
+        time.sleep(max(self.__start_time + self.__next_frame_index * self.frame_duration - current_time, 0))
+
+    def release(self):
+        """
+        Releases video file.
+        """
+        self.video_capture.release()
+
+
+class MjpegDecodingVideoCapture:
+    """
+    Video capture of the MJPEG camera that has the same interface as OpenCV video capture. Grabbing thread reads
+    compressed frames from the camera and decoding workers decode them in parallel, so decoding does not serialize
+    with capture. Frames are returned in the capture order; if reader does not keep up, the oldest pending frames are
+    dropped as camera with a single buffer drops them.
+    """
+
+    def __init__(self, video_capture, decoding_workers_number=DEFAULT_DECODING_WORKERS_NUMBER, camera_name=None):
+        """
+        Initializes video capture and starts grabbing thread.
+
+        :param video_capture: OpenCV video capture of the connected camera which format has been negotiated to MJPEG
+        :param decoding_workers_number: number of decoding workers
+        :param camera_name: name of the camera (dropped frames are counted in metrics with its label)
+        """
+        self.video_capture = video_capture
+        self.decoding_workers_number = decoding_workers_number
+        self.camera_name = camera_name
+        self.dropped_frames_number = 0
+        self.is_running = True
+        # Backend returns compressed frame as a single row of bytes instead of decoding it
+        self.is_compressed_frames_grabbing = bool(self.video_capture.set(cv.CAP_PROP_CONVERT_RGB, 0))
+        self.__decoding_executor = ThreadPoolExecutor(decoding_workers_number, "Decoding")
+        self.__pending_frames = collections.deque()
+        self.__pending_frames_condition = threading.Condition()
+        self.__grabbing_thread = threading.Thread(target=self.__grab_frames, name="Grabbing (%s)" % camera_name,
+                                                  daemon=True)
+        self.__grabbing_thread.start()
+
+    def isOpened(self):
+        """
+        Returns whether camera has been opened.
+
+        :return: whether camera has been opened
+        """
+        return self.video_capture.isOpened()
+
+    def set(self, property_id, value):
+        """
+        Sets property of the video capture.
+
+        :param property_id: OpenCV video capture property ID
+        :param value: property value
+        :return: whether property has been set
+        """
+        return self.video_capture.set(property_id, value)
+
+    def get(self, property_id):
+        """
+        Gets property of the video capture.
+
+        :param property_id: OpenCV video capture property ID
+        :return: property value
+        """
+        return self.video_capture.get(property_id)
+
+    def read(self):
+        """
+        Reads the oldest pending frame: waits until it has been grabbed and decoded.
+
+        :return: tuple with indication whether frame has been read and the frame
+        """
+        with self.__pending_frames_condition:
+            while self.is_running and len(self.__pending_frames) == 0:
+                self.__pending_frames_condition.wait()
+            if len(self.__pending_frames) == 0:
+                return False, None
+            pending_frame = self.__pending_frames.popleft()
+            self.__pending_frames_condition.notify_all()  # Grabbing thread may wait for the failed read to be taken
+
+        return pending_frame.result()
+
+    def __grab_frames(self):
+        """
+        Grabs frames from the camera and submits them for decoding until video capture is released (reader is woken up
+        if grabbing has failed).
+        """
+        try:
+            self.__grab_frames_until_released()
+        finally:
+            with self.__pending_frames_condition:
+                self.is_running = False
+                self.__pending_frames_condition.notify_all()
+
+    def __grab_frames_until_released(self):
+        """
+        Grabs frames from the camera and submits them for decoding until video capture is released. After a failed read
+        (e.g. unplugged camera) camera is not read again until reader has taken the failure, so failed reads are paced
+        by the reader retries and reconnection rather than repeated in a tight loop.
+        """
+        while self.is_running:
+            is_successful_frame_read, frame = self.video_capture.read()
+            if not is_successful_frame_read:
+                pending_frame = Future()
+                pending_frame.set_result((False, None))
+            elif frame.ndim == 3:
+                # Backend has decoded frame itself
+                pending_frame = Future()
+                pending_frame.set_result((True, frame))
+            else:
+                pending_frame = self.__decoding_executor.submit(self.__decode_frame, frame)
+
+            with self.__pending_frames_condition:
+                self.__pending_frames.append(pending_frame)
+                while len(self.__pending_frames) > self.decoding_workers_number + 1:
+                    self.__pending_frames.popleft().cancel()
+                    self.dropped_frames_number += 1
+                    if self.camera_name is not None:
+                        metrics.DEFAULT_METRICS_REGISTRY.increment("camera_dropped_frames_total",
+                                                                   camera=self.camera_name)
+                self.__pending_frames_condition.notify_all()
+                if not is_successful_frame_read:
+                    self.__pending_frames_condition.wait_for(
+                        lambda: not self.is_running or pending_frame not in self.__pending_frames)
+
+    @staticmethod
+    def __decode_frame(compressed_frame):
+        """
+        Decodes compressed frame.
+
+        :param compressed_frame: compressed frame bytes
+        :return: tuple with indication whether frame has been decoded and the frame
+        """
+        frame = cv.imdecode(compressed_frame, cv.IMREAD_COLOR)
+        return frame is not None, frame
+
+    def release(self):
+        """
+        Stops grabbing thread and decoding workers and releases camera.
+        """
+        with self.__pending_frames_condition:
+            self.is_running = False
+            self.__pending_frames_condition.notify_all()
+        self.__grabbing_thread.join()
+        self.__decoding_executor.shutdown()
+        self.video_capture.release()
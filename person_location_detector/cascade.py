@@ -0,0 +1,129 @@
+import threading
+import numpy as np
+import metrics
+
+FAST_DETECTION_MODEL = "fast"
+ACCURATE_DETECTION_MODEL = "accurate"
+
+DEFAULT_ESCALATION_PERSONS_NUMBER = 6
+DEFAULT_DE_ESCALATION_PERSONS_NUMBER = 3
+DEFAULT_ESCALATION_AMBIGUITY = 0.4
+DEFAULT_DE_ESCALATION_AMBIGUITY = 0.2
+DEFAULT_AMBIGUITY_MARGIN = 0.1
+DEFAULT_DE_ESCALATION_BATCHES_NUMBER = 30
+
+
+def calculate_scene_load(frames_confidences, confidence_threshold, ambiguity_margin):
+    """
+    Calculates scene load of the batch from person confidences detected with the confidence threshold lowered by the
+    ambiguity margin: maximum number of persons on a single frame (confidence is not less than the threshold) and
+    ambiguity (share of persons candidates whose confidence is within the margin around the threshold).
+
+    :param frames_confidences: list of person confidences of every frame of the batch
+    :param confidence_threshold: detection model confidence threshold
+    :param ambiguity_margin: margin around the confidence threshold persons are ambiguous within
+    :return: tuple with number of persons and ambiguity (0.0 if there are no persons candidates)
+    """
+    persons_number, ambiguous_persons_number, candidates_number = 0, 0, 0
+    for confidences in frames_confidences:
+        confidences = np.asarray(confidences, dtype=np.float32).reshape(-1)
+        persons_number = max(persons_number, int(np.count_nonzero(confidences >= confidence_threshold)))
+        ambiguous_persons_number += int(np.count_nonzero(np.abs(confidences - confidence_threshold) <
+                                                         ambiguity_margin))
+        candidates_number += len(confidences)
+
+    return persons_number, ambiguous_persons_number / candidates_number if candidates_number > 0 else 0.0
+
+
+class DetectionModelCascade:
+    """
+    Policy of the detection model cascade: fast detection model runs by default and the cascade escalates to the
+    accurate detection model as soon as the scene gets crowded (number of persons) or ambiguous (share of persons near
+    the confidence threshold). It de-escalates back only after the scene has been calm (below lower de-escalation
+    levels) for a number of consecutive batches, so it does not flap between detection models.
+    """
+
+    def __init__(self, escalation_persons_number=DEFAULT_ESCALATION_PERSONS_NUMBER,
+                 de_escalation_persons_number=DEFAULT_DE_ESCALATION_PERSONS_NUMBER,
+                 escalation_ambiguity=DEFAULT_ESCALATION_AMBIGUITY,
+                 de_escalation_ambiguity=DEFAULT_DE_ESCALATION_AMBIGUITY, ambiguity_margin=DEFAULT_AMBIGUITY_MARGIN,
+                 de_escalation_batches_number=DEFAULT_DE_ESCALATION_BATCHES_NUMBER):
+        """
+        Initializes cascade.
+
+        :param escalation_persons_number: number of persons on a frame the cascade escalates at
+        :param de_escalation_persons_number: maximum number of persons on a frame of the calm scene
+        :param escalation_ambiguity: ambiguity the cascade escalates at (None to escalate by number of persons only)
+        :param de_escalation_ambiguity: maximum ambiguity of the calm scene (ignored if escalation ambiguity is None)
+        :param ambiguity_margin: margin around the confidence threshold persons are ambiguous within
+        :param de_escalation_batches_number: number of consecutive calm batches the cascade de-escalates after
+        """
+        if de_escalation_persons_number >= escalation_persons_number or \
+                (escalation_ambiguity is not None and de_escalation_ambiguity >= escalation_ambiguity):
+            raise Exception("You need to set de-escalation levels less than escalation ones!")
+
+        self.escalation_persons_number = escalation_persons_number
+        self.de_escalation_persons_number = de_escalation_persons_number
+        self.escalation_ambiguity = escalation_ambiguity
+        self.de_escalation_ambiguity = de_escalation_ambiguity
+        self.ambiguity_margin = ambiguity_margin
+        self.de_escalation_batches_number = de_escalation_batches_number
+        self.is_escalated = False
+        self.__calm_batches_number = 0
+        self.__batches_numbers = {FAST_DETECTION_MODEL: 0, ACCURATE_DETECTION_MODEL: 0}
+        self.__escalations_number = 0
+        self.__lock = threading.Lock()
+
+    def get_detection_model(self):
+        """
+        Returns detection model the next batch is detected with.
+
+        :return: "fast" or "accurate"
+        """
+        return ACCURATE_DETECTION_MODEL if self.is_escalated else FAST_DETECTION_MODEL
+
+    def update(self, persons_number, ambiguity):
+        """
+        Updates cascade with the scene load of the detected batch (see calculate_scene_load). Escalation applies to the
+        next batch.
+
+        :param persons_number: number of persons
+        :param ambiguity: ambiguity
+        :return: detection model the next batch is detected with
+        """
+        with self.__lock:
+            self.__batches_numbers[self.get_detection_model()] += 1
+            metrics.DEFAULT_METRICS_REGISTRY.increment("detection_model_cascade_batches_total",
+                                                       detection_model=self.get_detection_model())
+            if not self.is_escalated:
+                if persons_number >= self.escalation_persons_number or \
+                        (self.escalation_ambiguity is not None and ambiguity >= self.escalation_ambiguity):
+                    self.is_escalated = True
+                    self.__calm_batches_number = 0
+                    self.__escalations_number += 1
+                    metrics.DEFAULT_METRICS_REGISTRY.increment("detection_model_cascade_escalations_total")
+            elif persons_number <= self.de_escalation_persons_number and \
+                    (self.escalation_ambiguity is None or ambiguity <= self.de_escalation_ambiguity):
+                self.__calm_batches_number += 1
+                if self.__calm_batches_number >= self.de_escalation_batches_number:
+                    self.is_escalated = False
+            else:
+                self.__calm_batches_number = 0
+            metrics.DEFAULT_METRICS_REGISTRY.set_gauge("detection_model_cascade_escalated", int(self.is_escalated))
+
+            return self.get_detection_model()
+
+    def get_statistics(self):
+        """
+        Returns statistics of the cascade.
+
+        :return: dictionary with whether cascade is escalated, number of escalations, number of batches detected by
+        every detection model and share of batches detected by the accurate detection model
+        """
+        with self.__lock:
+            batches_number = sum(self.__batches_numbers.values())
+            return {"is_escalated": self.is_escalated, "escalations_number": self.__escalations_number,
+                    "fast_batches_number": self.__batches_numbers[FAST_DETECTION_MODEL],
+                    "accurate_batches_number": self.__batches_numbers[ACCURATE_DETECTION_MODEL],
+                    "accurate_batches_share": self.__batches_numbers[ACCURATE_DETECTION_MODEL] / batches_number
+                    if batches_number > 0 else 0.0}
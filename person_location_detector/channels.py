@@ -0,0 +1,189 @@
+import time
+import queue
+import metrics
+
+BLOCK_POLICY = "block"
+DROP_OLDEST_POLICY = "drop_oldest"
+DROP_NEWEST_POLICY = "drop_newest"
+SAMPLE_POLICY = "sample"
+POLICIES = [BLOCK_POLICY, DROP_OLDEST_POLICY, DROP_NEWEST_POLICY, SAMPLE_POLICY]
+
+# Capture waits until its camera frame has been processed (zero loss, capture is paced by detection)
+DEFAULT_DETECTION_CHANNEL_SPECIFICATION = "block:1"
+# GUI always renders the latest camera frame and Qt event queue does not grow when GUI cannot keep up
+DEFAULT_GUI_CHANNEL_SPECIFICATION = "drop_oldest:1"
+
+
+def parse_channel_specification(channel_specification):
+    """
+    Parses channel specification "<policy>[:<capacity>[:<sample interval>]]", e.g. "drop_oldest:2" or "sample:1:3".
+
+    :param channel_specification: channel specification
+    :return: dictionary with policy, capacity and sample interval of the channel
+    """
+    specification_parts = channel_specification.split(":")
+    if specification_parts[0] not in POLICIES or len(specification_parts) > 3 or not all(
+            specification_part.isdigit() and int(specification_part) > 0
+            for specification_part in specification_parts[1:]):
+        raise Exception("You need to specify channel as <policy>[:<capacity>[:<sample interval>]] with one of the "
+                        "policies: %s!" % ", ".join(POLICIES))
+
+    return {"policy": specification_parts[0],
+            "capacity": int(specification_parts[1]) if len(specification_parts) > 1 else 1,
+            "sample_interval": int(specification_parts[2]) if len(specification_parts) > 2 else 2}
+
+
+class BackpressureChannel(queue.Queue):
+    """
+    Bounded queue between pipeline stages that applies backpressure policy when it is full:
+    1. block — producer waits until less than capacity items are unprocessed (queued or taken but not marked as done),
+    so capacity 1 runs producer and consumer in lockstep and nothing is lost
+    2. drop_oldest — the oldest queued item is dropped, so consumer always gets the latest items
+    3. drop_newest — the new item is dropped, so queued items are kept
+    4. sample — only every N-th item is offered (the others are dropped), offered items block as above
+    Accepted, dropped items and producer blocked time are counted per channel in metrics.
+    """
+
+    def __init__(self, channel_name, policy=BLOCK_POLICY, capacity=1, sample_interval=2, **labels):
+        """
+        Initializes channel.
+
+        :param channel_name: name of the channel (e.g. "capture_to_detection")
+        :param policy: backpressure policy
+        :param capacity: maximum number of items in the channel
+        :param sample_interval: interval between items that are offered with sample policy
+        :param labels: additional metrics labels of the channel (e.g. camera name)
+        """
+        super(BackpressureChannel, self).__init__(capacity)
+
+        if policy not in POLICIES:
+            raise Exception("You need to use one of the policies: %s!" % ", ".join(POLICIES))
+
+        self.channel_name = channel_name
+        self.policy = policy
+        self.capacity = capacity
+        self.sample_interval = sample_interval
+        self.labels = dict(labels, channel=channel_name)
+        # Called (by producer) when item has been put into the empty channel, so consumer can be notified once
+        self.item_put_into_empty_channel_callback = None
+        self.__put_items_number = 0
+
+    @classmethod
+    def from_specification(cls, channel_name, channel_specification, **labels):
+        """
+        Creates channel from the specification, e.g. "drop_oldest:2".
+
+        :param channel_name: name of the channel
+        :param channel_specification: channel specification
+        :param labels: additional metrics labels of the channel
+        :return: channel
+        """
+        return cls(channel_name, **parse_channel_specification(channel_specification), **labels)
+
+    def put(self, item, block=True, timeout=None):
+        """
+        Puts item into the channel applying backpressure policy.
+
+        :param item: item to put
+        :param block: whether producer waits while the channel is full (for block and sample policies)
+        :param timeout: maximum waiting time (in seconds), queue.Full is raised if it has passed (the item can be put
+        again, it is not counted)
+        :return: whether item has been accepted (False if it has been dropped)
+        """
+        start_time = time.perf_counter()
+        is_accepted = True
+        is_oldest_item_dropped = False
+        with self.not_full:
+            if self.policy == SAMPLE_POLICY and self.__put_items_number % self.sample_interval != 0:
+                is_accepted = False
+            elif self.policy == DROP_NEWEST_POLICY and self._qsize() >= self.capacity:
+                is_accepted = False
+            elif self.policy == DROP_OLDEST_POLICY and self._qsize() >= self.capacity:
+                self._get()
+                self.__finish_task()
+                is_oldest_item_dropped = True
+            elif self.policy in (BLOCK_POLICY, SAMPLE_POLICY):
+                if not self.__wait_for_free_space(block, timeout):
+                    metrics.DEFAULT_METRICS_REGISTRY.increment("channel_blocked_seconds_total",
+                                                               time.perf_counter() - start_time, **self.labels)
+                    raise queue.Full
+
+            self.__put_items_number += 1
+            is_channel_empty = self._qsize() == 0 and not is_oldest_item_dropped
+            if is_accepted:
+                self._put(item)
+                self.unfinished_tasks += 1
+                self.not_empty.notify()
+
+        if self.policy in (BLOCK_POLICY, SAMPLE_POLICY):
+            metrics.DEFAULT_METRICS_REGISTRY.increment("channel_blocked_seconds_total",
+                                                       time.perf_counter() - start_time, **self.labels)
+        if is_accepted:
+            metrics.DEFAULT_METRICS_REGISTRY.increment("channel_items_total", **self.labels)
+        if not is_accepted or is_oldest_item_dropped:
+            metrics.DEFAULT_METRICS_REGISTRY.increment("channel_dropped_items_total", **self.labels)
+        if is_accepted and is_channel_empty and self.item_put_into_empty_channel_callback is not None:
+            self.item_put_into_empty_channel_callback()
+
+        return is_accepted
+
+    def task_done(self):
+        """
+        Marks taken item as processed: producer that waits for free space is woken up.
+        """
+        with self.all_tasks_done:
+            if self.unfinished_tasks <= 0:
+                raise ValueError("task_done() called too many times")
+            self.__finish_task()
+
+    def wait_for_free_space(self, timeout=None):
+        """
+        Waits until the next item can be put without blocking (it returns immediately for drop policies). Producer that
+        waits after putting the item (rather than before putting the next one) does not hold stale item while waiting.
+
+        :param timeout: maximum waiting time (in seconds)
+        :return: whether the channel has free space
+        """
+        if self.policy not in (BLOCK_POLICY, SAMPLE_POLICY):
+            return True
+
+        start_time = time.perf_counter()
+        with self.not_full:
+            has_free_space = self.__wait_for_free_space(True, timeout)
+        metrics.DEFAULT_METRICS_REGISTRY.increment("channel_blocked_seconds_total", time.perf_counter() - start_time,
+                                                   **self.labels)
+
+        return has_free_space
+
+    def clear(self):
+        """
+        Removes queued items marking them as processed, so producer that waits for them is released.
+        """
+        with self.mutex:
+            while self._qsize() > 0:
+                self._get()
+                self.__finish_task()
+
+    def __wait_for_free_space(self, block, timeout):
+        """
+        Waits until less than capacity items are unprocessed (channel mutex needs to be held).
+
+        :param block: whether to wait
+        :param timeout: maximum waiting time (in seconds)
+        :return: whether the channel has free space
+        """
+        end_time = None if timeout is None else time.monotonic() + timeout
+        while self.unfinished_tasks >= self.capacity:
+            remaining_time = None if end_time is None else end_time - time.monotonic()
+            if not block or (remaining_time is not None and remaining_time <= 0):
+                return False
+            self.all_tasks_done.wait(remaining_time)
+
+        return True
+
+    def __finish_task(self):
+        """
+        Marks one item as processed and wakes up waiting threads (channel mutex needs to be held).
+        """
+        self.unfinished_tasks -= 1
+        self.all_tasks_done.notify_all()
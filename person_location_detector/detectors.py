@@ -0,0 +1,557 @@
+import os
+import mmap
+import numpy as np
+import cv2 as cv
+import collections
+import threading
+import csv
+import helpers
+
+try:
+    import onnxruntime
+except ImportError:
+    onnxruntime = None  # ONNX models are run by OpenCV
+
+try:
+    import onnx
+except ImportError:
+    onnx = None  # Input shape of ONNX models run by OpenCV is not known
+
+ONNX_MODEL_FILE_EXTENSION = ".onnx"
+
+OPENCV_RUNTIME = "opencv"
+ONNX_RUNTIME = "onnxruntime"
+DETECTION_MODEL_RUNTIMES = (OPENCV_RUNTIME, ONNX_RUNTIME)
+
+DARKNET_ACTIVATION_LAYER_TYPES = ("leaky", "relu", "mish", "swish", "logistic", "tanh", "elu", "relu6", "hardswish")
+
+# Read-only mappings of the weights files by file path, shared by all networks of the process
+MAPPED_WEIGHTS_FILES = {}
+MAPPED_WEIGHTS_FILES_LOCK = threading.Lock()
+
+
+def map_weights_file(weights_file_path):
+    """
+    Maps weights file into memory read-only. Mapped pages are the page cache pages of the file, so they are shared
+    between processes and networks that load the same weights instead of being read into private buffers. Mapping is
+    kept for the next networks of the process and is replaced if the file has changed.
+
+    :param weights_file_path: weights file path
+    :return: weights file buffer (uint8 array backed by the mapping)
+    """
+    weights_file_stat = os.stat(weights_file_path)
+    weights_file_identity = (weights_file_stat.st_size, weights_file_stat.st_mtime_ns)
+    absolute_weights_file_path = os.path.abspath(weights_file_path)
+    with MAPPED_WEIGHTS_FILES_LOCK:
+        mapped_weights_file = MAPPED_WEIGHTS_FILES.get(absolute_weights_file_path, None)
+        if mapped_weights_file is None or mapped_weights_file["identity"] != weights_file_identity:
+            with open(weights_file_path, "rb") as weights_file:
+                weights_file_mapping = mmap.mmap(weights_file.fileno(), 0, access=mmap.ACCESS_READ)
+            if hasattr(weights_file_mapping, "madvise"):
+                # Weights are parsed front to back once, so kernel reads ahead
+                weights_file_mapping.madvise(mmap.MADV_SEQUENTIAL)
+            # Replaced mapping is closed by garbage collector once networks that are being loaded from it release it
+            mapped_weights_file = {"identity": weights_file_identity,
+                                   "buffer": np.frombuffer(weights_file_mapping, dtype=np.uint8)}
+            MAPPED_WEIGHTS_FILES[absolute_weights_file_path] = mapped_weights_file
+
+    return mapped_weights_file["buffer"]
+
+
+def read_darknet_net(configuration_file_path, weights_file_path):
+    """
+    Reads Darknet network from the configuration file and memory-mapped weights file, so loading time is dominated by
+    page faults of the shared weights pages rather than by copying the file (empty or not mappable weights file is
+    read by OpenCV as usual).
+
+    :param configuration_file_path: network configuration file path
+    :param weights_file_path: network weights file path
+    :return: network
+    """
+    try:
+        weights_buffer = map_weights_file(weights_file_path)
+    except (OSError, ValueError):
+        return cv.dnn.readNetFromDarknet(configuration_file_path, weights_file_path)
+
+    return cv.dnn.readNetFromDarknet(np.fromfile(configuration_file_path, dtype=np.uint8), weights_buffer)
+
+
+def is_onnx_model(detection_model_weights_file_path):
+    """
+    Returns whether detection model weights file is ONNX model (see training/convert_darknet_to_onnx.py).
+
+    :param detection_model_weights_file_path: detection model weights file path
+    :return: whether detection model is ONNX model
+    """
+    return detection_model_weights_file_path.lower().endswith(ONNX_MODEL_FILE_EXTENSION)
+
+
+def is_onnx_runtime_available():
+    """
+    Returns whether ONNX Runtime is installed.
+
+    :return: whether ONNX Runtime is installed
+    """
+    return onnxruntime is not None
+
+
+def select_detection_model_runtime(detection_model_weights_file_path, detection_model_backend, detection_model_target,
+                                   detection_model_runtime=None):
+    """
+    Selects runtime of the detection model. When runtime is not set, ONNX model is run by ONNX Runtime if it is
+    installed and OpenCV CPU backend and target are set, other models are run by OpenCV. INT8 quantized ONNX models
+    (see training/quantize_onnx_model.py) can be run by ONNX Runtime only.
+
+    :param detection_model_weights_file_path: detection model weights file path or ONNX model file path
+    :param detection_model_backend: OpenCV DNN backend of the detection model
+    :param detection_model_target: OpenCV DNN target of the detection model
+    :param detection_model_runtime: runtime of the detection model ("opencv", "onnxruntime" or None to select it)
+    :return: runtime of the detection model
+    """
+    if detection_model_runtime is None:
+        if is_onnx_model(detection_model_weights_file_path) and is_onnx_runtime_available() and \
+                detection_model_backend == cv.dnn.DNN_BACKEND_OPENCV and \
+                detection_model_target == cv.dnn.DNN_TARGET_CPU:
+            return ONNX_RUNTIME
+        return OPENCV_RUNTIME
+
+    if detection_model_runtime not in DETECTION_MODEL_RUNTIMES:
+        raise Exception("You need to set one of the detection model runtimes: %s!" %
+                        ", ".join(DETECTION_MODEL_RUNTIMES))
+    if detection_model_runtime == ONNX_RUNTIME:
+        if not is_onnx_model(detection_model_weights_file_path):
+            raise Exception("You need to use ONNX model to run it by ONNX Runtime!")
+        if not is_onnx_runtime_available():
+            raise Exception("You need to install ONNX Runtime first!")
+
+    return detection_model_runtime
+
+
+def read_onnx_net(onnx_model_file_path):
+    """
+    Reads OpenCV network from the memory-mapped ONNX model file.
+
+    :param onnx_model_file_path: ONNX model file path
+    :return: network
+    """
+    try:
+        onnx_model_buffer = map_weights_file(onnx_model_file_path)
+    except (OSError, ValueError):
+        return cv.dnn.readNetFromONNX(onnx_model_file_path)
+
+    return cv.dnn.readNetFromONNX(onnx_model_buffer)
+
+
+def read_onnx_model_input_shape(onnx_model_file_path):
+    """
+    Reads input shape of the ONNX model (ONNX needs to be installed).
+
+    :param onnx_model_file_path: ONNX model file path
+    :return: list with batch size, channels number, height and width (dynamic dimensions are None), None if ONNX is not
+    installed
+    """
+    if onnx is None:
+        return None
+
+    onnx_model = onnx.load(onnx_model_file_path)
+    return [dimension.dim_value if dimension.HasField("dim_value") else None
+            for dimension in onnx_model.graph.input[0].type.tensor_type.shape.dim]
+
+
+class OnnxRuntimeNet:
+    """
+    ONNX model run by ONNX Runtime CPU execution provider with the part of OpenCV network interface that batched
+    detection model uses. Number of ONNX Runtime threads is the number of OpenCV threads when the network is created,
+    so pipeline scheduling applies to it too.
+    """
+
+    def __init__(self, onnx_model_file_path):
+        """
+        Initializes network.
+
+        :param onnx_model_file_path: ONNX model file path
+        """
+        if onnxruntime is None:
+            raise Exception("You need to install ONNX Runtime first!")
+
+        session_options = onnxruntime.SessionOptions()
+        session_options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        session_options.intra_op_num_threads = max(1, cv.getNumThreads())
+        self.session = onnxruntime.InferenceSession(onnx_model_file_path, session_options,
+                                                    providers=["CPUExecutionProvider"])
+        self.input_name = self.session.get_inputs()[0].name
+        self.input_shape = [dimension if isinstance(dimension, int) else None
+                            for dimension in self.session.get_inputs()[0].shape]
+        self.__input_blob = None
+
+    def setPreferableBackend(self, backend):
+        """
+        Does nothing: network runs on ONNX Runtime CPU execution provider.
+
+        :param backend: network backend
+        """
+
+    def setPreferableTarget(self, target):
+        """
+        Does nothing: network runs on ONNX Runtime CPU execution provider.
+
+        :param target: network target
+        """
+
+    def getUnconnectedOutLayersNames(self):
+        """
+        Returns names of the network outputs.
+
+        :return: list of output names
+        """
+        return [output.name for output in self.session.get_outputs()]
+
+    def setInput(self, blob):
+        """
+        Sets input blob of the next forward pass.
+
+        :param blob: input blob
+        """
+        self.__input_blob = blob
+
+    def forward(self, output_names):
+        """
+        Runs forward pass of the network.
+
+        :param output_names: names of the outputs
+        :return: list of outputs
+        """
+        return self.session.run(output_names, {self.input_name: self.__input_blob})
+
+
+class BatchedDetectionModel:
+    """
+    Detection model that detects objects on several frames with a single forward pass of the network. Darknet models
+    are run by OpenCV, ONNX models (that output region rows as OpenCV Darknet importer does) are run by OpenCV or ONNX
+    Runtime. ONNX models have fixed input size and may have fixed batch size: input size of the model is used instead of
+    the set one (if it is known) and frames are split into batches of the model size.
+    """
+
+    def __init__(self, detection_model_weights_file_path, detection_model_configuration_file_path,
+                 is_onnx_runtime_used=False):
+        """
+        Initializes detection model.
+
+        :param detection_model_weights_file_path: detection model weights file path (or ONNX model file path)
+        :param detection_model_configuration_file_path: detection model configuration file path (not used for ONNX
+        models)
+        :param is_onnx_runtime_used: whether ONNX model is run by ONNX Runtime CPU execution provider
+        """
+        input_shape = None
+        if not is_onnx_model(detection_model_weights_file_path):
+            self.net = read_darknet_net(detection_model_configuration_file_path, detection_model_weights_file_path)
+        elif is_onnx_runtime_used:
+            self.net = OnnxRuntimeNet(detection_model_weights_file_path)
+            input_shape = self.net.input_shape
+        else:
+            self.net = read_onnx_net(detection_model_weights_file_path)
+            input_shape = read_onnx_model_input_shape(detection_model_weights_file_path)
+        self.output_layer_names = self.net.getUnconnectedOutLayersNames()
+        self.input_scale = 1.0
+        self.input_size = None
+        self.fixed_batch_size = input_shape[0] if input_shape is not None else None
+        self.fixed_input_size = (input_shape[3], input_shape[2]) \
+            if input_shape is not None and None not in input_shape[2:] else None
+
+    def set_preferable_backend_and_target(self, backend, target):
+        """
+        Sets preferable backend and target of the network.
+
+        :param backend: network backend
+        :param target: network target
+        """
+        self.net.setPreferableBackend(backend)
+        self.net.setPreferableTarget(target)
+
+    def set_input_params(self, input_scale, input_size):
+        """
+        Sets input parameters of the network.
+
+        :param input_scale: scale factor for input frames
+        :param input_size: input size
+        """
+        self.input_scale = input_scale
+        self.input_size = input_size if self.fixed_input_size is None else self.fixed_input_size
+
+    def detect(self, frame, confidence_threshold, nms_threshold):
+        """
+        Detects objects on the frame.
+
+        :param frame: frame
+        :param confidence_threshold: confidence threshold
+        :param nms_threshold: non-maximum suppression threshold
+        :return: tuple of class id's, confidences and bounding boxes
+        """
+        return self.detect_batch([frame], confidence_threshold, nms_threshold)[0]
+
+    def detect_batch(self, frames, confidence_threshold, nms_threshold):
+        """
+        Detects objects on the frames. Frames are packed into one blob, so the network runs a single forward pass for
+        all of them, and the results are split back per frame.
+
+        :param frames: list of frames
+        :param confidence_threshold: confidence threshold
+        :param nms_threshold: non-maximum suppression threshold
+        :return: list with tuple of class id's, confidences and bounding boxes for every frame
+        """
+        return [decode_region_rows(frame_rows, (frame.shape[1], frame.shape[0]), confidence_threshold, nms_threshold)
+                for frame, frame_rows in zip(frames, self.__forward_batch(frames))]
+
+    def detect_persons_batch(self, frames, person_class_id, confidence_threshold, nms_threshold,
+                             projection_area_masks):
+        """
+        Detects persons on the frames. Unlike detecting all objects, rows are rejected by person confidence, class and
+        projection area mask before non-maximum suppression, so it runs only for the few remaining rows.
+
+        :param frames: list of frames
+        :param person_class_id: person class ID
+        :param confidence_threshold: confidence threshold
+        :param nms_threshold: non-maximum suppression threshold
+        :param projection_area_masks: list of projection area masks (one per frame)
+        :return: list with tuple of class id's, confidences and bounding boxes for every frame
+        """
+        return [decode_person_region_rows(frame_rows, (frame.shape[1], frame.shape[0]), person_class_id,
+                                          confidence_threshold, nms_threshold, projection_area_mask)
+                for frame, frame_rows, projection_area_mask in zip(frames, self.__forward_batch(frames),
+                                                                   projection_area_masks)]
+
+    def __forward_batch(self, frames):
+        """
+        Runs forward pass of the network for the frames.
+
+        :param frames: list of frames
+        :return: region layer rows of every frame
+        """
+        if self.fixed_batch_size is not None and len(frames) != self.fixed_batch_size:
+            # Last batch is padded with the last frame, rows of the padding frames are discarded
+            return np.concatenate([self.__forward_batch(
+                (frames[first_frame_index:first_frame_index + self.fixed_batch_size] +
+                 [frames[-1]] * self.fixed_batch_size)[:self.fixed_batch_size])[:len(frames) - first_frame_index]
+                for first_frame_index in range(0, len(frames), self.fixed_batch_size)])
+
+        self.net.setInput(cv.dnn.blobFromImages(frames, self.input_scale, self.input_size))
+        outputs = self.net.forward(self.output_layer_names)
+
+        # Region layer output is (batch size, rows, columns) for batches and (rows, columns) for a single frame
+        return np.concatenate([output.reshape(len(frames), -1, output.shape[-1]) for output in outputs], axis=1)
+
+
+def decode_region_rows(rows, frame_resolution, confidence_threshold, nms_threshold):
+    """
+    Decodes region layer rows (center x, center y, width, height, objectness and class scores relative to the frame)
+    into detections the same way OpenCV detection model does it: the best class is taken for every row, rows below
+    confidence threshold are rejected and non-maximum suppression is run for every class separately.
+
+    :param rows: region layer rows
+    :param frame_resolution: resolution of the frame
+    :param confidence_threshold: confidence threshold
+    :param nms_threshold: non-maximum suppression threshold
+    :return: tuple with class id's, confidences and bounding boxes
+    """
+    class_scores = rows[:, 5:]
+    class_ids = np.argmax(class_scores, axis=1)
+    confidences = class_scores[np.arange(len(rows)), class_ids]
+
+    is_confident = confidences >= confidence_threshold
+    rows, class_ids, confidences = rows[is_confident], class_ids[is_confident], confidences[is_confident]
+
+    return suppress_non_maximum_bounding_boxes(class_ids, confidences,
+                                               convert_region_rows_to_bounding_boxes(rows, frame_resolution),
+                                               confidence_threshold, nms_threshold)
+
+
+def decode_person_region_rows(rows, frame_resolution, person_class_id, confidence_threshold, nms_threshold,
+                              projection_area_mask):
+    """
+    Decodes region layer rows into person detections with early rejection: rows are rejected by person confidence
+    first, then rows where person is not the best class are rejected (as OpenCV detection model would assign them to
+    another class) and then rows which bounding box bottom edge center point is outside the projection area mask.
+    Non-maximum suppression is run only for the remaining rows.
+
+    :param rows: region layer rows
+    :param frame_resolution: resolution of the frame
+    :param person_class_id: person class ID
+    :param confidence_threshold: confidence threshold
+    :param nms_threshold: non-maximum suppression threshold
+    :param projection_area_mask: projection area mask (non-zero pixels are within the projection area)
+    :return: tuple with class id's, confidences and bounding boxes
+    """
+    confidences = rows[:, 5 + person_class_id]
+    is_confident = confidences >= confidence_threshold
+    rows, confidences = rows[is_confident], confidences[is_confident]
+
+    is_person = np.argmax(rows[:, 5:], axis=1) == person_class_id
+    rows, confidences = rows[is_person], confidences[is_person]
+
+    bounding_boxes = convert_region_rows_to_bounding_boxes(rows, frame_resolution)
+    bottom_edge_center_xs = np.clip(bounding_boxes[:, 0] + bounding_boxes[:, 2] // 2, 0, frame_resolution[0] - 1)
+    bottom_edge_center_ys = np.clip(bounding_boxes[:, 1] + bounding_boxes[:, 3], 0, frame_resolution[1] - 1)
+    is_within_projection_area = projection_area_mask[bottom_edge_center_ys, bottom_edge_center_xs] != 0
+
+    return suppress_non_maximum_bounding_boxes(
+        np.full(np.count_nonzero(is_within_projection_area), person_class_id),
+        confidences[is_within_projection_area], bounding_boxes[is_within_projection_area], confidence_threshold,
+        nms_threshold)
+
+
+def create_projection_area_mask(projection_area_coordinates, frame_resolution):
+    """
+    Creates projection area mask: image of the frame resolution where pixels within the projection area are non-zero.
+
+    :param projection_area_coordinates: projection area coordinates
+    :param frame_resolution: resolution of the frame
+    :return: projection area mask
+    """
+    projection_area_mask = np.zeros((frame_resolution[1], frame_resolution[0]), dtype=np.uint8)
+    cv.fillPoly(projection_area_mask, [np.int32(np.round(projection_area_coordinates))], 1)
+
+    return projection_area_mask
+
+
+def convert_region_rows_to_bounding_boxes(rows, frame_resolution):
+    """
+    Converts region layer rows to bounding boxes (left, top, width, height) in frame pixels. Bounding boxes are rounded
+    and clipped to the frame the same way OpenCV detection model does it.
+
+    :param rows: region layer rows
+    :param frame_resolution: resolution of the frame
+    :return: bounding boxes
+    """
+    center_xs = (rows[:, 0] * frame_resolution[0]).astype(np.int32)
+    center_ys = (rows[:, 1] * frame_resolution[1]).astype(np.int32)
+    widths = (rows[:, 2] * frame_resolution[0]).astype(np.int32)
+    heights = (rows[:, 3] * frame_resolution[1]).astype(np.int32)
+
+    lefts = np.clip(center_xs - widths // 2, 0, frame_resolution[0] - 1)
+    tops = np.clip(center_ys - heights // 2, 0, frame_resolution[1] - 1)
+    widths = np.clip(widths, 1, frame_resolution[0] - lefts)
+    heights = np.clip(heights, 1, frame_resolution[1] - tops)
+
+    return np.stack([lefts, tops, widths, heights], axis=1)
+
+
+def suppress_non_maximum_bounding_boxes(class_ids, confidences, bounding_boxes, confidence_threshold, nms_threshold):
+    """
+    Runs non-maximum suppression for every class separately.
+
+    :param class_ids: class id's
+    :param confidences: confidences
+    :param bounding_boxes: bounding boxes
+    :param confidence_threshold: confidence threshold
+    :param nms_threshold: non-maximum suppression threshold
+    :return: tuple with kept class id's, confidences and bounding boxes (class id's and confidences have one column to
+    match OpenCV detection model results)
+    """
+    kept_indexes = []
+    for class_id in np.unique(class_ids):
+        class_indexes = np.flatnonzero(class_ids == class_id)
+        class_kept_indexes = cv.dnn.NMSBoxes(bounding_boxes[class_indexes].tolist(),
+                                             confidences[class_indexes].tolist(), confidence_threshold,
+                                             nms_threshold)
+        kept_indexes.extend(class_indexes[np.array(class_kept_indexes, dtype=np.int64).flatten()])
+
+    kept_indexes = np.array(kept_indexes, dtype=np.int64)
+
+    return (class_ids[kept_indexes].reshape(-1, 1), confidences[kept_indexes].reshape(-1, 1),
+            bounding_boxes[kept_indexes].reshape(-1, 4))
+
+
+class LayersProfiler:
+    """
+    Profiler that aggregates per-layer inference timings of the network over a window of the latest forward passes and
+    maps network layers back to the sections of the Darknet configuration file.
+    """
+
+    def __init__(self, net, configuration_file_path, window_size):
+        """
+        Initializes profiler.
+
+        :param net: network
+        :param configuration_file_path: Darknet configuration file path (layers are not mapped to sections if it is
+        None)
+        :param window_size: number of the latest forward passes to aggregate timings over
+        """
+        self.window_size = window_size
+        self.layer_names = list(net.getLayerNames())
+        self.__configuration_sections = [] if configuration_file_path is None else \
+            helpers.parse_darknet_configuration_sections(configuration_file_path)[1:]  # Layers don't include [net]
+        self.__layers_timings = collections.deque(maxlen=window_size)
+        self.__layers_timings_lock = threading.Lock()
+
+    def collect(self, net):
+        """
+        Collects per-layer timings of the last forward pass of the network.
+
+        :param net: network
+        """
+        _, layers_timings = net.getPerfProfile()
+        with self.__layers_timings_lock:
+            self.__layers_timings.append(np.float64(layers_timings).flatten() * 1000 / cv.getTickFrequency())
+
+    def get_layer_configuration_section(self, layer_name):
+        """
+        Gets Darknet configuration section the layer has been created from. OpenCV names layers as "<type>_<section
+        index>", but activation layers get index of the next section.
+
+        :param layer_name: name of the layer
+        :return: tuple with section index, section type and section line number (tuple of None values if layer can't
+        be mapped)
+        """
+        layer_type, _, layer_index = layer_name.rpartition("_")
+        if not layer_index.isdigit():
+            return None, None, None
+
+        section_index = int(layer_index) - 1 if layer_type in DARKNET_ACTIVATION_LAYER_TYPES else int(layer_index)
+        if section_index < 0 or section_index >= len(self.__configuration_sections):
+            return None, None, None
+
+        section_type, section_line_number, _ = self.__configuration_sections[section_index]
+        return section_index, section_type, section_line_number
+
+    def get_layers_profile(self):
+        """
+        Gets per-layer profile aggregated over the window.
+
+        :return: list of dictionaries (one per layer in the network order) with layer name, configuration section
+        index, type and line number, mean time (in milliseconds) and share of the total time (in percents)
+        """
+        with self.__layers_timings_lock:
+            if len(self.__layers_timings) == 0:
+                return []
+            mean_layers_timings = np.mean(self.__layers_timings, axis=0)
+
+        total_time = mean_layers_timings.sum()
+
+        layers_profile = []
+        for layer_name, mean_layer_time in zip(self.layer_names, mean_layers_timings):
+            section_index, section_type, section_line_number = self.get_layer_configuration_section(layer_name)
+            layers_profile.append({
+                "layer_name": layer_name,
+                "section_index": section_index,
+                "section_type": section_type,
+                "section_line_number": section_line_number,
+                "mean_time_ms": float(mean_layer_time),
+                "time_share": float(mean_layer_time / total_time * 100) if total_time > 0 else 0.0
+            })
+
+        return layers_profile
+
+
+def write_layers_profile(layers_profile, file_path):
+    """
+    Writes per-layer profile to the CSV file.
+
+    :param layers_profile: per-layer profile
+    :param file_path: CSV file path
+    """
+    with open(file_path, "w", newline="") as layers_profile_file:
+        csv_writer = csv.DictWriter(layers_profile_file, fieldnames=["layer_name", "section_index", "section_type",
+                                                                     "section_line_number", "mean_time_ms",
+                                                                     "time_share"])
+        csv_writer.writeheader()
+        csv_writer.writerows(layers_profile)
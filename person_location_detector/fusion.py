@@ -0,0 +1,157 @@
+import math
+import threading
+import collections
+
+
+class SpatialHashGrid:
+    """
+    Spatial hash grid that buckets items by the square cell of their point, so items near a point are found by looking
+    into the cell of this point and 8 surrounding cells only.
+    """
+
+    def __init__(self, cell_size):
+        """
+        Initializes grid.
+
+        :param cell_size: size of the grid cell
+        """
+        self.cell_size = cell_size
+        self.cells = collections.defaultdict(list)
+
+    def get_cell(self, point):
+        """
+        Gets cell of the point.
+
+        :param point: (x, y) point
+        :return: (column, row) cell
+        """
+        return int(math.floor(point[0] / self.cell_size)), int(math.floor(point[1] / self.cell_size))
+
+    def insert(self, point, item):
+        """
+        Inserts item into the cell of the point.
+
+        :param point: (x, y) point
+        :param item: item
+        """
+        self.cells[self.get_cell(point)].append(item)
+
+    def get_neighbour_items(self, point):
+        """
+        Gets items from the cell of the point and its 8 surrounding cells.
+
+        :param point: (x, y) point
+        :return: list of items
+        """
+        column, row = self.get_cell(point)
+
+        neighbour_items = []
+        for neighbour_column in (column - 1, column, column + 1):
+            for neighbour_row in (row - 1, row, row + 1):
+                neighbour_items.extend(self.cells.get((neighbour_column, neighbour_row), ()))
+
+        return neighbour_items
+
+
+def merge_persons_locations(cameras_persons_locations, distance_threshold):
+    """
+    Merges locations of the same persons reported by different cameras. Every location joins the nearest group within
+    distance threshold that has no location from the same camera yet (one camera never reports the same person twice),
+    otherwise it starts a new group. Groups are looked up in the spatial hash grid with cell size equal to distance
+    threshold, so merging takes linear time instead of comparing every pair of locations.
+
+    :param cameras_persons_locations: list of (camera name, (x, y) location) tuples
+    :param distance_threshold: maximum distance between locations of the same person
+    :return: list of (merged (x, y) location, sorted list of names of the cameras that have seen the person) tuples
+    """
+    spatial_hash_grid = SpatialHashGrid(distance_threshold)
+
+    persons_locations_groups = []
+    for camera_name, person_location in cameras_persons_locations:
+        nearest_group = None
+        nearest_group_distance = distance_threshold
+        for group in spatial_hash_grid.get_neighbour_items(person_location):
+            if camera_name in group["camera_names"]:
+                continue
+
+            group_distance = math.hypot(group["x_sum"] / group["count"] - person_location[0],
+                                        group["y_sum"] / group["count"] - person_location[1])
+            if group_distance <= nearest_group_distance:
+                nearest_group = group
+                nearest_group_distance = group_distance
+
+        if nearest_group is None:
+            nearest_group = {"x_sum": 0.0, "y_sum": 0.0, "count": 0, "camera_names": set()}
+            persons_locations_groups.append(nearest_group)
+            spatial_hash_grid.insert(person_location, nearest_group)
+
+        nearest_group["x_sum"] += person_location[0]
+        nearest_group["y_sum"] += person_location[1]
+        nearest_group["count"] += 1
+        nearest_group["camera_names"].add(camera_name)
+
+    return [((group["x_sum"] / group["count"], group["y_sum"] / group["count"]), sorted(group["camera_names"]))
+            for group in persons_locations_groups]
+
+
+class PersonsLocationsFusion:
+    """
+    Fusion of persons locations from different cameras in the shared floor coordinate system. Keeps the latest persons
+    locations of every camera and merges them into one deduplicated set once per time step.
+    """
+
+    def __init__(self, distance_threshold, time_step, max_locations_age=1.0):
+        """
+        Initializes fusion.
+
+        :param distance_threshold: maximum distance between locations of the same person (in floor units)
+        :param time_step: time step (in seconds) between fused persons locations sets
+        :param max_locations_age: maximum age (in seconds) of the camera persons locations to be fused
+        """
+        self.distance_threshold = distance_threshold
+        self.time_step = time_step
+        self.max_locations_age = max_locations_age
+        self.__cameras_persons_locations = {}
+        self.__cameras_persons_locations_lock = threading.Lock()
+        self.__last_fusion_time = 0.0
+
+    def update_camera_persons_locations(self, camera_name, persons_locations_time, persons_floor_locations):
+        """
+        Updates the latest persons locations of the camera.
+
+        :param camera_name: name of the camera
+        :param persons_locations_time: time when the camera frame with these persons has been captured
+        :param persons_floor_locations: list of persons (x, y) locations in the shared floor coordinate system
+        """
+        with self.__cameras_persons_locations_lock:
+            self.__cameras_persons_locations[camera_name] = (persons_locations_time, persons_floor_locations)
+
+    def remove_camera(self, camera_name):
+        """
+        Removes persons locations of the camera.
+
+        :param camera_name: name of the camera
+        """
+        with self.__cameras_persons_locations_lock:
+            self.__cameras_persons_locations.pop(camera_name, None)
+
+    def fuse_if_time_step_passed(self, current_time):
+        """
+        Fuses the latest persons locations of all cameras if time step has passed since the previous fusion.
+
+        :param current_time: current time
+        :return: tuple with fusion time and list of (merged (x, y) location, names of the cameras) tuples or None if
+        time step has not passed yet
+        """
+        if current_time - self.__last_fusion_time < self.time_step:
+            return None
+        self.__last_fusion_time = current_time
+
+        with self.__cameras_persons_locations_lock:
+            cameras_persons_locations = list(self.__cameras_persons_locations.items())
+
+        return current_time, merge_persons_locations(
+            [(camera_name, person_floor_location)
+             for camera_name, (persons_locations_time, persons_floor_locations) in cameras_persons_locations
+             if current_time - persons_locations_time <= self.max_locations_age
+             for person_floor_location in persons_floor_locations], self.distance_threshold)
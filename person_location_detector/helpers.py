@@ -47,3 +47,26 @@ def convert_points_to_another_resolution(points, current_resolution, result_reso
         converted_points.append((point[0] * scaling[0], point[1] * scaling[1]))
 
     return converted_points
+
+
+def parse_darknet_configuration_sections(configuration_file_path):
+    """
+    Parses sections of the Darknet configuration file.
+
+    :param configuration_file_path: configuration file path
+    :return: list of (section type, section line number, section options dictionary) tuples in the order of the file
+    """
+    configuration_sections = []
+    with open(configuration_file_path, "r") as configuration_file:
+        for line_number, line in enumerate(configuration_file, start=1):
+            line = line.split("#")[0].strip()
+            if line == "":
+                continue
+
+            if line.startswith("[") and line.endswith("]"):
+                configuration_sections.append((line[1:-1].strip(), line_number, {}))
+            elif "=" in line and len(configuration_sections) > 0:
+                option_name, option_value = line.split("=", 1)
+                configuration_sections[-1][2][option_name.strip()] = option_value.strip()
+
+    return configuration_sections
@@ -0,0 +1,399 @@
+import math
+import time
+import threading
+import collections
+import numpy as np
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+HISTOGRAM_QUANTILES = (0.5, 0.95, 0.99)
+
+
+class RollingHistogram:
+    """
+    Histogram of the latest observed values: quantiles are calculated over the rolling window of values, while count
+    and sum of values are accumulated over the whole lifetime (as Prometheus summaries expect).
+    """
+
+    def __init__(self, window_size=1000):
+        """
+        Initializes histogram.
+
+        :param window_size: number of the latest values to calculate quantiles over
+        """
+        self.values = collections.deque(maxlen=window_size)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        """
+        Observes value.
+
+        :param value: value
+        """
+        self.values.append(value)
+        self.count += 1
+        self.sum += value
+
+    def get_quantiles(self, quantiles=HISTOGRAM_QUANTILES):
+        """
+        Calculates quantiles over the rolling window.
+
+        :param quantiles: quantiles (from 0 to 1)
+        :return: list of quantile values (zeros if nothing has been observed)
+        """
+        if len(self.values) == 0:
+            return [0.0] * len(quantiles)
+
+        return [float(quantile_value) for quantile_value in np.quantile(list(self.values), quantiles)]
+
+
+class RateMeter:
+    """
+    Meter of the events rate (events per second) over the rolling time window.
+    """
+
+    def __init__(self, window_duration=5.0):
+        """
+        Initializes meter.
+
+        :param window_duration: duration (in seconds) of the time window
+        """
+        self.window_duration = window_duration
+        self.events_times = collections.deque()
+
+    def mark(self, event_time):
+        """
+        Marks event and drops events that are out of the time window.
+
+        :param event_time: time of the event
+        """
+        self.events_times.append(event_time)
+        while self.events_times[0] < event_time - self.window_duration:
+            self.events_times.popleft()
+
+    def get_rate(self, current_time):
+        """
+        Calculates events rate.
+
+        :param current_time: current time
+        :return: events per second
+        """
+        events_number = sum(1 for event_time in self.events_times if event_time >= current_time - self.window_duration)
+        if events_number == 0:
+            return 0.0
+
+        return events_number / min(self.window_duration, max(current_time - self.events_times[0], 1e-6))
+
+
+class StageMeasurement:
+    """
+    Context manager that measures wall time and CPU time of the calling thread spent in the pipeline stage and records
+    them into the metrics registry.
+    """
+
+    def __init__(self, metrics_registry, stage, labels):
+        """
+        Initializes measurement.
+
+        :param metrics_registry: metrics registry
+        :param stage: name of the pipeline stage
+        :param labels: additional labels of the stage metrics
+        """
+        self.metrics_registry = metrics_registry
+        self.labels = dict(labels, stage=stage)
+        self.start_time = None
+        self.start_cpu_time = None
+
+    def __enter__(self):
+        self.start_time = time.perf_counter()
+        self.start_cpu_time = time.thread_time()
+        return self
+
+    def __exit__(self, exception_type, exception_value, traceback):
+        self.metrics_registry.observe("pipeline_stage_latency_seconds", time.perf_counter() - self.start_time,
+                                      **self.labels)
+        self.metrics_registry.increment("pipeline_stage_cpu_seconds_total", time.thread_time() - self.start_cpu_time,
+                                        **self.labels)
+
+
+class MetricsRegistry:
+    """
+    Thread-safe registry of pipeline metrics: counters, gauges, rates and rolling latency histograms. Metrics are
+    identified by name and labels.
+    """
+
+    METRICS_DESCRIPTIONS = {
+        "pipeline_stage_latency_seconds": "Latency of the pipeline stage",
+        "pipeline_stage_cpu_seconds_total": "CPU time of the thread spent in the pipeline stage",
+        "camera_frame_latency_seconds": "Latency between capturing and processing the camera frame",
+        "camera_frames_total": "Number of camera frames read",
+        "camera_fps": "Camera frames read per second",
+        "camera_failed_reads_total": "Number of failed camera frame reads",
+        "camera_dropped_frames_total": "Number of camera frames dropped before decoding because reader did not keep up",
+        "camera_negotiated_fps": "FPS negotiated with the connected camera",
+        "camera_up": "Whether camera frames are being read (0 while camera is reconnecting)",
+        "camera_reconnection_attempts_total": "Number of camera reconnection attempts",
+        "camera_reconnections_total": "Number of successful camera reconnections",
+        "pipeline_stage_stalls_total": "Number of pipeline stage stalls detected by watchdog",
+        "pipeline_stage_restarts_total": "Number of stalled pipeline stages restarted by watchdog",
+        "channel_items_total": "Number of items accepted by inter-stage channel",
+        "channel_dropped_items_total": "Number of items dropped by inter-stage channel backpressure policy",
+        "channel_blocked_seconds_total": "Time producer has been blocked by inter-stage channel",
+        "stage_scheduling_errors_total": "Number of stage scheduling settings that could not be applied",
+        "detection_model_cascade_batches_total": "Number of batches detected by every detection model of the cascade",
+        "detection_model_cascade_escalations_total": "Number of escalations of the cascade to the accurate detection "
+                                                     "model",
+        "detection_model_cascade_escalated": "Whether the cascade runs the accurate detection model"
+    }
+
+    def __init__(self, histogram_window_size=1000, rate_window_duration=5.0):
+        """
+        Initializes registry.
+
+        :param histogram_window_size: number of the latest values histograms calculate quantiles over
+        :param rate_window_duration: duration (in seconds) of the time window rates are calculated over
+        """
+        self.histogram_window_size = histogram_window_size
+        self.rate_window_duration = rate_window_duration
+        self.__histograms = {}
+        self.__counters = {}
+        self.__gauges = {}
+        self.__rate_meters = {}
+        self.__lock = threading.Lock()
+
+    def observe(self, name, value, **labels):
+        """
+        Observes value of the histogram.
+
+        :param name: name of the histogram
+        :param value: observed value
+        :param labels: labels of the histogram
+        """
+        key = (name, tuple(sorted(labels.items())))
+        with self.__lock:
+            histogram = self.__histograms.get(key, None)
+            if histogram is None:
+                histogram = self.__histograms[key] = RollingHistogram(self.histogram_window_size)
+            histogram.observe(value)
+
+    def increment(self, name, value=1, **labels):
+        """
+        Increments counter.
+
+        :param name: name of the counter
+        :param value: increment value
+        :param labels: labels of the counter
+        """
+        key = (name, tuple(sorted(labels.items())))
+        with self.__lock:
+            self.__counters[key] = self.__counters.get(key, 0) + value
+
+    def set_gauge(self, name, value, **labels):
+        """
+        Sets gauge value.
+
+        :param name: name of the gauge
+        :param value: gauge value
+        :param labels: labels of the gauge
+        """
+        with self.__lock:
+            self.__gauges[(name, tuple(sorted(labels.items())))] = value
+
+    def mark(self, name, **labels):
+        """
+        Marks event of the rate (rates are exported as gauges with events per second).
+
+        :param name: name of the rate
+        :param labels: labels of the rate
+        """
+        key = (name, tuple(sorted(labels.items())))
+        with self.__lock:
+            rate_meter = self.__rate_meters.get(key, None)
+            if rate_meter is None:
+                rate_meter = self.__rate_meters[key] = RateMeter(self.rate_window_duration)
+            rate_meter.mark(time.time())
+
+    def get_counter(self, name, **labels):
+        """
+        Gets counter value.
+
+        :param name: name of the counter
+        :param labels: labels of the counter
+        :return: counter value (zero if counter has not been incremented yet)
+        """
+        with self.__lock:
+            return self.__counters.get((name, tuple(sorted(labels.items()))), 0)
+
+    def measure_stage(self, stage, **labels):
+        """
+        Creates context manager that measures latency and CPU time of the pipeline stage.
+
+        :param stage: name of the pipeline stage
+        :param labels: additional labels of the stage metrics
+        :return: stage measurement context manager
+        """
+        return StageMeasurement(self, stage, labels)
+
+    def reset(self):
+        """
+        Drops all metrics (e.g. after warmup of the pipeline).
+        """
+        with self.__lock:
+            self.__histograms.clear()
+            self.__counters.clear()
+            self.__gauges.clear()
+            self.__rate_meters.clear()
+
+    def get_snapshot(self):
+        """
+        Gets snapshot of all metrics.
+
+        :return: dictionary with "histograms", "counters" and "gauges" lists; every item is a dictionary with metric
+        name, labels and values (p50, p95, p99, count and sum for histograms, value for counters and gauges)
+        """
+        current_time = time.time()
+        with self.__lock:
+            histograms = []
+            for (name, labels), histogram in self.__histograms.items():
+                p50, p95, p99 = histogram.get_quantiles()
+                histograms.append({"name": name, "labels": dict(labels), "p50": p50, "p95": p95, "p99": p99,
+                                   "count": histogram.count, "sum": histogram.sum})
+            counters = [{"name": name, "labels": dict(labels), "value": value}
+                        for (name, labels), value in self.__counters.items()]
+            gauges = [{"name": name, "labels": dict(labels), "value": value}
+                      for (name, labels), value in self.__gauges.items()]
+            gauges.extend({"name": name, "labels": dict(labels), "value": rate_meter.get_rate(current_time)}
+                          for (name, labels), rate_meter in self.__rate_meters.items())
+
+        return {"histograms": sorted(histograms, key=get_metric_sort_key),
+                "counters": sorted(counters, key=get_metric_sort_key),
+                "gauges": sorted(gauges, key=get_metric_sort_key)}
+
+    def format_prometheus_text(self):
+        """
+        Formats all metrics in Prometheus text exposition format: histograms are exported as summaries with 0.5, 0.95
+        and 0.99 quantiles.
+
+        :return: metrics text
+        """
+        snapshot = self.get_snapshot()
+        lines = []
+        described_metric_names = set()
+
+        def describe_metric(metric_name, metric_type):
+            if metric_name not in described_metric_names:
+                described_metric_names.add(metric_name)
+                lines.append("# HELP %s %s" % (metric_name, self.METRICS_DESCRIPTIONS.get(metric_name, metric_name)))
+                lines.append("# TYPE %s %s" % (metric_name, metric_type))
+
+        for histogram in snapshot["histograms"]:
+            describe_metric(histogram["name"], "summary")
+            for quantile, quantile_key in zip(HISTOGRAM_QUANTILES, ("p50", "p95", "p99")):
+                lines.append("%s%s %s" % (histogram["name"], format_prometheus_labels(
+                    dict(histogram["labels"], quantile=format_prometheus_value(quantile))),
+                    format_prometheus_value(histogram[quantile_key])))
+            lines.append("%s_sum%s %s" % (histogram["name"], format_prometheus_labels(histogram["labels"]),
+                                          format_prometheus_value(histogram["sum"])))
+            lines.append("%s_count%s %d" % (histogram["name"], format_prometheus_labels(histogram["labels"]),
+                                            histogram["count"]))
+
+        for metric_type, metrics in (("counter", snapshot["counters"]), ("gauge", snapshot["gauges"])):
+            for metric in metrics:
+                describe_metric(metric["name"], metric_type)
+                lines.append("%s%s %s" % (metric["name"], format_prometheus_labels(metric["labels"]),
+                                          format_prometheus_value(metric["value"])))
+
+        return "\n".join(lines) + "\n"
+
+
+def get_metric_sort_key(metric):
+    """
+    Gets key metrics are sorted by: metrics with the same name are kept together as Prometheus expects.
+
+    :param metric: metric dictionary
+    :return: sort key
+    """
+    return metric["name"], sorted((label_name, str(label_value))
+                                  for label_name, label_value in metric["labels"].items())
+
+
+def format_prometheus_value(value):
+    """
+    Formats value in Prometheus text exposition format: infinities and NaN are spelled as "+Inf", "-Inf" and "NaN"
+    (Python spells them as "inf", "-inf" and "nan"), other values are formatted as floats.
+
+    :param value: value
+    :return: formatted value
+    """
+    value = float(value)
+    if math.isnan(value):
+        return "NaN"
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+
+    return repr(value)
+
+
+def format_prometheus_labels(labels):
+    """
+    Formats labels in Prometheus text exposition format.
+
+    :param labels: dictionary of labels
+    :return: formatted labels
+    """
+    if len(labels) == 0:
+        return ""
+
+    return "{%s}" % ",".join('%s="%s"' % (label_name, str(label_value).replace("\\", "\\\\").replace('"', '\\"'))
+                             for label_name, label_value in sorted(labels.items()))
+
+
+class MetricsHttpServer:
+    """
+    HTTP server that exports metrics of the registry in Prometheus text exposition format on "/metrics" path.
+    """
+
+    def __init__(self, metrics_registry, host, port):
+        """
+        Initializes server.
+
+        :param metrics_registry: metrics registry
+        :param host: host to listen on
+        :param port: port to listen on
+        """
+
+        class MetricsRequestHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+
+                metrics_text = metrics_registry.format_prometheus_text().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(metrics_text)))
+                self.end_headers()
+                self.wfile.write(metrics_text)
+
+            def log_message(self, message_format, *arguments):
+                pass
+
+        self.http_server = HTTPServer((host, port), MetricsRequestHandler)
+        self.http_server_thread = threading.Thread(target=self.http_server.serve_forever, daemon=True)
+
+    def start(self):
+        """
+        Starts serving requests in the background thread.
+        """
+        self.http_server_thread.start()
+
+    def stop(self):
+        """
+        Stops serving requests and closes server socket.
+        """
+        self.http_server.shutdown()
+        self.http_server.server_close()
+        self.http_server_thread.join()
+
+
+DEFAULT_METRICS_REGISTRY = MetricsRegistry()
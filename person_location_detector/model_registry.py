@@ -0,0 +1,213 @@
+import os
+import threading
+import helpers
+import detectors
+
+DETECTION_MODELS_DIRECTORY_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "detection_models")
+
+DARKNET_CONFIGURATION_FILE_EXTENSION = ".cfg"
+DARKNET_WEIGHTS_FILE_EXTENSION = ".weights"
+CLASS_NAMES_FILE_EXTENSION = ".names"
+
+# Darknet weights file header: major, minor and revision versions (int32) and seen images number (int32 before 0.2)
+DARKNET_WEIGHTS_HEADER_SIZES = (16, 20)
+
+PERSON_CLASS_NAME = "person"
+DEFAULT_PERSON_CLASS_ID = 0
+DEFAULT_DETECTION_MODEL_INPUT_SIZE = (416, 416)
+
+# Metadata of the parsed configuration files by file path, parsed again only when the file is modified
+DETECTION_MODELS_METADATA = {}
+DETECTION_MODELS_METADATA_LOCK = threading.Lock()
+
+
+def analyze_darknet_layers(configuration_sections, input_size, input_channels_number):
+    """
+    Propagates shapes through Darknet layers and counts parameters and floating point operations of the network.
+
+    :param configuration_sections: configuration sections without [net] section
+    :param input_size: network input size
+    :param input_channels_number: number of network input channels
+    :return: tuple with list of output layers (YOLO layers with OpenCV layer name, grid size, stride and anchors),
+    number of parameters and number of floating point operations (multiply-add is counted as two operations)
+    """
+    layers_output_shapes = []
+    output_layers = []
+    parameters_number, flops = 0, 0
+    output_shape = (input_channels_number, input_size[1], input_size[0])
+    for layer_index, (section_type, section_line_number, options) in enumerate(configuration_sections):
+        if section_type == "convolutional":
+            filters, size, stride = int(options["filters"]), int(options.get("size", 1)), \
+                int(options.get("stride", 1))
+            groups = int(options.get("groups", 1))
+            padding = int(options.get("padding", size // 2 if int(options.get("pad", 0)) else 0))
+            kernel_parameters_number = output_shape[0] // groups * size * size * filters
+            # Biases or batch normalization scales, means and variances are stored before the kernel
+            parameters_number += kernel_parameters_number + filters * \
+                (4 if int(options.get("batch_normalize", 0)) else 1)
+            output_shape = (filters, (output_shape[1] + 2 * padding - size) // stride + 1,
+                            (output_shape[2] + 2 * padding - size) // stride + 1)
+            flops += 2 * kernel_parameters_number * output_shape[1] * output_shape[2]
+        elif section_type == "maxpool":
+            size, stride = int(options.get("size", 2)), int(options.get("stride", 2))
+            padding = int(options.get("padding", size - 1))
+            output_shape = (output_shape[0], (output_shape[1] + padding - size) // stride + 1,
+                            (output_shape[2] + padding - size) // stride + 1)
+        elif section_type == "route":
+            routed_shapes = [layers_output_shapes[int(routed_layer_index) if int(routed_layer_index) >= 0 else
+                                                  layer_index + int(routed_layer_index)]
+                             for routed_layer_index in options["layers"].split(",")]
+            output_shape = (sum(routed_shape[0] for routed_shape in routed_shapes) // int(options.get("groups", 1)),
+                            routed_shapes[0][1], routed_shapes[0][2])
+        elif section_type == "upsample":
+            stride = int(options.get("stride", 2))
+            output_shape = (output_shape[0], output_shape[1] * stride, output_shape[2] * stride)
+        elif section_type == "yolo":
+            anchors = [int(anchor) for anchor in options.get("anchors", "").split(",") if anchor.strip() != ""]
+            anchors = list(zip(anchors[::2], anchors[1::2]))
+            mask = [int(anchor_index) for anchor_index in options.get("mask", "").split(",")
+                    if anchor_index.strip() != ""] or list(range(len(anchors)))
+            output_layers.append({"name": "yolo_%d" % layer_index, "line_number": section_line_number,
+                                  "grid_size": (output_shape[2], output_shape[1]),
+                                  "stride": input_size[0] // output_shape[2],
+                                  "anchors": [anchors[anchor_index] for anchor_index in mask]})
+        elif section_type not in ("shortcut", "dropout"):
+            raise Exception("You need to use configuration with convolutional, maxpool, route, shortcut, upsample and "
+                            "yolo layers only (line %d)!" % section_line_number)
+        layers_output_shapes.append(output_shape)
+
+    return output_layers, parameters_number, flops
+
+
+def read_detection_model_metadata(configuration_file_path):
+    """
+    Reads metadata of the detection model from its Darknet configuration file. Configuration file is parsed once and
+    parsed again only when it is modified.
+
+    :param configuration_file_path: configuration file path
+    :return: dictionary with input size, number of input channels, number of classes, anchors, output layers, number of
+    parameters and floating point operations of the detection model
+    """
+    absolute_configuration_file_path = os.path.abspath(configuration_file_path)
+    configuration_file_stat = os.stat(absolute_configuration_file_path)
+    with DETECTION_MODELS_METADATA_LOCK:
+        cached_metadata = DETECTION_MODELS_METADATA.get(absolute_configuration_file_path, None)
+        if cached_metadata is not None and cached_metadata[0] == (configuration_file_stat.st_size,
+                                                                 configuration_file_stat.st_mtime_ns):
+            return cached_metadata[1]
+
+    configuration_sections = helpers.parse_darknet_configuration_sections(absolute_configuration_file_path)
+    if len(configuration_sections) == 0 or configuration_sections[0][0] not in ("net", "network"):
+        raise Exception("You need to use configuration that starts with [net] section!")
+
+    net_options = configuration_sections[0][2]
+    input_size = (int(net_options.get("width", DEFAULT_DETECTION_MODEL_INPUT_SIZE[0])),
+                  int(net_options.get("height", DEFAULT_DETECTION_MODEL_INPUT_SIZE[1])))
+    input_channels_number = int(net_options.get("channels", 3))
+    output_layers, parameters_number, flops = analyze_darknet_layers(configuration_sections[1:], input_size,
+                                                                     input_channels_number)
+    yolo_options = [options for section_type, _, options in configuration_sections if section_type == "yolo"]
+    metadata = {
+        "input_size": input_size,
+        "input_channels_number": input_channels_number,
+        "classes_number": int(yolo_options[0].get("classes", 80)) if len(yolo_options) > 0 else None,
+        "anchors": [anchor for output_layer in output_layers for anchor in output_layer["anchors"]],
+        "output_layers": output_layers,
+        "parameters_number": parameters_number,
+        "flops": flops
+    }
+    with DETECTION_MODELS_METADATA_LOCK:
+        DETECTION_MODELS_METADATA[absolute_configuration_file_path] = (
+            (configuration_file_stat.st_size, configuration_file_stat.st_mtime_ns), metadata)
+
+    return metadata
+
+
+def read_person_class_id(configuration_file_path):
+    """
+    Reads person class ID from the class names file next to the configuration file (file with the same name and
+    ".names" extension, one class name per line).
+
+    :param configuration_file_path: configuration file path
+    :return: person class ID (0 if there is no class names file or person class in it)
+    """
+    class_names_file_path = os.path.splitext(configuration_file_path)[0] + CLASS_NAMES_FILE_EXTENSION
+    try:
+        with open(class_names_file_path) as class_names_file:
+            class_names = [line.strip().lower() for line in class_names_file if line.strip() != ""]
+    except OSError:
+        return DEFAULT_PERSON_CLASS_ID
+
+    return class_names.index(PERSON_CLASS_NAME) if PERSON_CLASS_NAME in class_names else DEFAULT_PERSON_CLASS_ID
+
+
+def is_weights_file_matching_configuration(weights_file_path, metadata):
+    """
+    Returns whether Darknet weights file size matches the number of parameters of the configuration.
+
+    :param weights_file_path: Darknet weights file path
+    :param metadata: detection model metadata of the configuration
+    :return: whether weights file matches the configuration
+    """
+    parameters_size = metadata["parameters_number"] * 4
+    return os.path.getsize(weights_file_path) - parameters_size in DARKNET_WEIGHTS_HEADER_SIZES
+
+
+def create_detection_model_entry(name, weights_file_path, configuration_file_path):
+    """
+    Creates registry entry of the detection model.
+
+    :param name: detection model name
+    :param weights_file_path: weights file path or ONNX model file path (None if weights have not been trained yet)
+    :param configuration_file_path: configuration file path (None if it is not known for ONNX model)
+    :return: dictionary with name, weights and configuration file paths, person class ID and metadata of the
+    configuration (None values if it is not known or configuration cannot be analyzed)
+    """
+    detection_model_entry = {"name": name, "weights_file_path": weights_file_path,
+                             "configuration_file_path": configuration_file_path, "person_class_id": None,
+                             "input_size": None, "input_channels_number": None, "classes_number": None,
+                             "anchors": None, "output_layers": None, "parameters_number": None, "flops": None}
+    if configuration_file_path is not None:
+        detection_model_entry["person_class_id"] = read_person_class_id(configuration_file_path)
+        try:
+            detection_model_entry.update(read_detection_model_metadata(configuration_file_path))
+        except Exception:
+            pass  # Configuration with unsupported layers is listed without metadata
+
+    return detection_model_entry
+
+
+def scan_detection_models(directory_path=DETECTION_MODELS_DIRECTORY_PATH):
+    """
+    Scans detection models directory: every Darknet configuration file is paired with the weights file of the same
+    name and every ONNX model is paired with the configuration it has been converted from (the longest configuration
+    name its name starts with, e.g. "yolov4-tiny-COCO-Person-INT8.onnx" with "yolov4-tiny-COCO-Person.cfg"). Weights
+    files are not read, so models are loaded only when detection is started.
+
+    :param directory_path: detection models directory path
+    :return: list of detection model entries sorted by name (see create_detection_model_entry)
+    """
+    try:
+        file_names = sorted(os.listdir(directory_path))
+    except OSError:
+        return []
+
+    configuration_names = [os.path.splitext(file_name)[0] for file_name in file_names
+                           if file_name.lower().endswith(DARKNET_CONFIGURATION_FILE_EXTENSION)]
+    detection_model_entries = []
+    for file_name in file_names:
+        name, file_extension = os.path.splitext(file_name)
+        if file_extension.lower() == DARKNET_CONFIGURATION_FILE_EXTENSION:
+            weights_file_path = os.path.join(directory_path, name + DARKNET_WEIGHTS_FILE_EXTENSION)
+            detection_model_entries.append(create_detection_model_entry(
+                name, weights_file_path if os.path.isfile(weights_file_path) else None,
+                os.path.join(directory_path, file_name)))
+        elif detectors.is_onnx_model(file_name):
+            configuration_name = max((configuration_name for configuration_name in configuration_names
+                                      if name.startswith(configuration_name)), key=len, default=None)
+            detection_model_entries.append(create_detection_model_entry(
+                name, os.path.join(directory_path, file_name),
+                os.path.join(directory_path, configuration_name + DARKNET_CONFIGURATION_FILE_EXTENSION)
+                if configuration_name is not None else None))
+
+    return sorted(detection_model_entries, key=lambda detection_model_entry: detection_model_entry["name"])
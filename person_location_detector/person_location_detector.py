@@ -1,13 +1,22 @@
+import os
 import sys
 import application_resources
 import widgets
+import scheduling
 from PyQt5 import QtWidgets, QtGui
 
 
 def main():
     """
-    Application entry point: initializes and starts application.
+    Application entry point: initializes and starts application. Pipeline scheduling (see scheduling) is read from the
+    PERSON_LOCATION_DETECTOR_SCHEDULING environment variable.
     """
+    pipeline_scheduling_specification = os.environ.get(scheduling.PIPELINE_SCHEDULING_ENVIRONMENT_VARIABLE, None)
+    if pipeline_scheduling_specification:
+        scheduling.DEFAULT_PIPELINE_SCHEDULING = scheduling.parse_pipeline_scheduling_specification(
+            pipeline_scheduling_specification)
+        scheduling.apply_stage_scheduling(scheduling.GUI_STAGE)
+
     application = QtWidgets.QApplication(sys.argv)
 
     QtGui.QFontDatabase.addApplicationFont(":/fonts/roboto_regular")
@@ -0,0 +1,161 @@
+import os
+import cv2 as cv
+import metrics
+
+CAPTURE_STAGE = "capture"
+DETECTION_STAGE = "detection"
+GUI_STAGE = "gui"
+STAGES = [CAPTURE_STAGE, DETECTION_STAGE, GUI_STAGE]
+
+# Environment variable the application reads pipeline scheduling specification from
+PIPELINE_SCHEDULING_ENVIRONMENT_VARIABLE = "PERSON_LOCATION_DETECTOR_SCHEDULING"
+
+# Cores and nice value of the process before any stage has changed them (threads inherit them from the thread that has
+# started them, so stages without own settings are returned to these ones)
+PROCESS_CPU_CORES = sorted(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else None
+PROCESS_NICE = os.getpriority(os.PRIO_PROCESS, 0) if hasattr(os, "getpriority") else None
+
+
+def parse_cpu_cores(cpu_cores_specification):
+    """
+    Parses CPU cores specification, e.g. "2-3" or "0+2-3".
+
+    :param cpu_cores_specification: CPU cores specification (ranges joined with "+")
+    :return: sorted list of CPU cores
+    """
+    cpu_cores = set()
+    for cpu_cores_range in cpu_cores_specification.split("+"):
+        first_cpu_core, _, last_cpu_core = cpu_cores_range.partition("-")
+        cpu_cores.update(range(int(first_cpu_core), int(last_cpu_core or first_cpu_core) + 1))
+
+    return sorted(cpu_cores)
+
+
+def format_cpu_cores(cpu_cores):
+    """
+    Formats CPU cores as specification, e.g. [0, 2, 3] as "0+2-3".
+
+    :param cpu_cores: list of CPU cores
+    :return: CPU cores specification
+    """
+    cpu_cores_ranges = []
+    for cpu_core in sorted(cpu_cores):
+        if len(cpu_cores_ranges) > 0 and cpu_cores_ranges[-1][1] == cpu_core - 1:
+            cpu_cores_ranges[-1][1] = cpu_core
+        else:
+            cpu_cores_ranges.append([cpu_core, cpu_core])
+
+    return "+".join(str(first_cpu_core) if first_cpu_core == last_cpu_core else
+                    "%d-%d" % (first_cpu_core, last_cpu_core) for first_cpu_core, last_cpu_core in cpu_cores_ranges)
+
+
+def parse_pipeline_scheduling_specification(pipeline_scheduling_specification):
+    """
+    Parses pipeline scheduling specification "<stage>:<setting>=<value>,...;...", e.g.
+    "capture:cores=0,nice=-5;detection:threads=3,cores=1-3;gui:cores=0". Settings are:
+    1. threads — number of OpenCV threads (OpenCV thread pool is shared by the whole process, so only one stage can
+    set it, pool workers started when the number changes inherit the stage cores)
+    2. cores — CPU cores the stage thread is pinned to (ranges joined with "+", e.g. "0+2-3")
+    3. nice — nice value of the stage thread (negative values need CAP_SYS_NICE)
+
+    :param pipeline_scheduling_specification: pipeline scheduling specification
+    :return: dictionary with threads number, CPU cores and nice value (None if they are not set) by stage
+    """
+    pipeline_scheduling = {}
+    for stage_scheduling_specification in filter(None, pipeline_scheduling_specification.split(";")):
+        stage, _, settings_specification = stage_scheduling_specification.strip().partition(":")
+        if stage not in STAGES:
+            raise Exception("You need to use one of the stages: %s!" % ", ".join(STAGES))
+
+        stage_scheduling = {"threads_number": None, "cpu_cores": None, "nice": None}
+        for setting_specification in filter(None, settings_specification.split(",")):
+            setting_name, _, setting_value = setting_specification.partition("=")
+            try:
+                if setting_name == "threads":
+                    stage_scheduling["threads_number"] = int(setting_value)
+                elif setting_name == "cores":
+                    stage_scheduling["cpu_cores"] = parse_cpu_cores(setting_value)
+                elif setting_name == "nice":
+                    stage_scheduling["nice"] = int(setting_value)
+                else:
+                    raise ValueError(setting_name)
+            except ValueError:
+                raise Exception("You need to set stage scheduling as threads=<number>,cores=<cores>,nice=<value>!")
+        pipeline_scheduling[stage] = stage_scheduling
+
+    if sum(stage_scheduling["threads_number"] is not None for stage_scheduling in pipeline_scheduling.values()) > 1:
+        raise Exception("You need to set OpenCV threads number for one stage only!")
+
+    return pipeline_scheduling
+
+
+def format_pipeline_scheduling(pipeline_scheduling):
+    """
+    Formats pipeline scheduling as specification.
+
+    :param pipeline_scheduling: dictionary with stage scheduling by stage
+    :return: pipeline scheduling specification
+    """
+    stage_scheduling_specifications = []
+    for stage in STAGES:
+        stage_scheduling = pipeline_scheduling.get(stage, {"threads_number": None, "cpu_cores": None, "nice": None})
+        settings_specifications = []
+        if stage_scheduling["threads_number"] is not None:
+            settings_specifications.append("threads=%d" % stage_scheduling["threads_number"])
+        if stage_scheduling["cpu_cores"] is not None:
+            settings_specifications.append("cores=%s" % format_cpu_cores(stage_scheduling["cpu_cores"]))
+        if stage_scheduling["nice"] is not None:
+            settings_specifications.append("nice=%d" % stage_scheduling["nice"])
+        if len(settings_specifications) == 0:
+            continue
+        stage_scheduling_specifications.append("%s:%s" % (stage, ",".join(settings_specifications)))
+
+    return ";".join(stage_scheduling_specifications)
+
+
+def apply_stage_scheduling(stage, pipeline_scheduling=None):
+    """
+    Applies scheduling of the stage to the calling thread. Nothing is changed if pipeline scheduling is not set,
+    otherwise CPU cores and nice value that are not set for the stage are returned to the process ones (thread
+    inherits them from the thread that has started it). Settings that cannot be applied (e.g. negative nice value
+    without privileges) are skipped and counted in metrics.
+
+    :param stage: stage name
+    :param pipeline_scheduling: dictionary with stage scheduling by stage (DEFAULT_PIPELINE_SCHEDULING is used if it
+    is None)
+    :return: dictionary with applied threads number, CPU cores and nice value
+    """
+    pipeline_scheduling = DEFAULT_PIPELINE_SCHEDULING if pipeline_scheduling is None else pipeline_scheduling
+    applied_stage_scheduling = {"threads_number": None, "cpu_cores": None, "nice": None}
+    if pipeline_scheduling is None:
+        return applied_stage_scheduling
+
+    stage_scheduling = pipeline_scheduling.get(stage, {})
+    threads_number = stage_scheduling.get("threads_number", None)
+    cpu_cores = stage_scheduling.get("cpu_cores", None) or PROCESS_CPU_CORES
+    nice = stage_scheduling.get("nice", None)
+    nice = PROCESS_NICE if nice is None else nice
+
+    # Affinity is set first, so OpenCV thread pool workers created by the stage inherit its cores
+    if cpu_cores is not None:
+        try:
+            # Thread ID 0 is the calling thread on Linux
+            os.sched_setaffinity(0, cpu_cores)
+            applied_stage_scheduling["cpu_cores"] = cpu_cores
+        except (AttributeError, OSError):
+            metrics.DEFAULT_METRICS_REGISTRY.increment("stage_scheduling_errors_total", stage=stage, setting="cores")
+    if nice is not None:
+        try:
+            # Nice value is an attribute of the calling thread on Linux
+            os.setpriority(os.PRIO_PROCESS, 0, nice)
+            applied_stage_scheduling["nice"] = nice
+        except (AttributeError, OSError):
+            metrics.DEFAULT_METRICS_REGISTRY.increment("stage_scheduling_errors_total", stage=stage, setting="nice")
+    if threads_number is not None:
+        cv.setNumThreads(threads_number)
+        applied_stage_scheduling["threads_number"] = threads_number
+
+    return applied_stage_scheduling
+
+
+DEFAULT_PIPELINE_SCHEDULING = None
@@ -2,59 +2,261 @@ import numpy as np
 import cv2 as cv
 import queue
 import time
+import collections
+import threading
+import detectors
+import fusion
+import metrics
+import tracing
+import synthetic
+import capture_sources
+import camera_discovery
+import watchdog
+import channels
+import scheduling
+import autotuning
+import model_registry
+import cascade
 from PyQt5 import QtCore
 from shapely.geometry import Point, Polygon
 
 
+class ChannelRelay(QtCore.QObject):
+    """
+    Relays items that pipeline thread puts into the channel to the thread relay has been created in (GUI thread).
+    Relay is notified once per items put into the empty channel, so Qt event queue does not grow with the items and
+    channel policy decides which items are delivered.
+    """
+
+    items_available = QtCore.pyqtSignal()
+    item_relayed = QtCore.pyqtSignal(object)
+
+    def __init__(self, channel):
+        """
+        Initializes relay.
+
+        :param channel: channel which items are relayed
+        """
+        super(ChannelRelay, self).__init__()
+
+        self.channel = channel
+        self.channel.item_put_into_empty_channel_callback = self.items_available.emit
+        self.items_available.connect(self.relay_items)
+
+    @QtCore.pyqtSlot()
+    def relay_items(self):
+        """
+        Relays queued items and marks them as processed.
+        """
+        while True:
+            try:
+                item = self.channel.get_nowait()
+            except queue.Empty:
+                break
+            self.item_relayed.emit(item)
+            self.channel.task_done()
+
+
 class CameraStreamReaderThread(QtCore.QThread):
     """
-    Thread that initializes connected camera and captures its frames.
+    Thread that initializes connected camera and captures its frames. If camera stops delivering frames (e.g. USB
+    hiccup), thread reconnects it with exponential backoff, so consumers of its frames stay alive.
     """
 
+    INITIALIZING_HEALTH_STATE = "initializing"
+    HEALTHY_HEALTH_STATE = "healthy"
+    RECONNECTING_HEALTH_STATE = "reconnecting"
+    ENDED_HEALTH_STATE = "ended"
+    STOPPED_HEALTH_STATE = "stopped"
+
+    MAX_CONSECUTIVE_FAILED_READS_NUMBER = 10
+    FAILED_READ_RETRY_DELAY = 0.05
+    INITIAL_RECONNECTION_DELAY = 0.1
+    MAX_RECONNECTION_DELAY = 5.0
+    INITIALIZATION_DEADLINE = 30.0
+    HEARTBEAT_INTERVAL = 0.5
+
     camera_initialized = QtCore.pyqtSignal(bool)
     camera_frame_read = QtCore.pyqtSignal(np.ndarray)
+    camera_health_changed = QtCore.pyqtSignal(str)
 
-    def __init__(self, camera_index, camera_resolution):
+    def __init__(self, camera_name, camera_index, camera_resolution, camera_fps=capture_sources.DEFAULT_CAMERA_FPS,
+                 camera_fourcc=capture_sources.DEFAULT_CAMERA_FOURCC,
+                 decoding_workers_number=capture_sources.DEFAULT_DECODING_WORKERS_NUMBER,
+                 camera_frame_read_channel_specification=channels.DEFAULT_GUI_CHANNEL_SPECIFICATION):
         """
         Initializes thread.
 
-        :param camera_index: index of the connected camera
+        :param camera_name: name of the connected camera
+        :param camera_index: index of the connected camera or camera source URI (see capture_sources)
         :param camera_resolution: resolution of the connected camera
+        :param camera_fps: FPS requested from the connected camera
+        :param camera_fourcc: FOURCC requested from the connected camera (e.g. "MJPG" or "YUYV")
+        :param decoding_workers_number: number of workers that decode MJPEG frames (camera backend decodes frames
+        itself if it is zero)
+        :param camera_frame_read_channel_specification: specification of the channel read camera frames are emitted
+        through (see channels)
         """
         super(CameraStreamReaderThread, self).__init__()
 
+        self.camera_name = camera_name
         self.camera_index = camera_index
         self.camera_resolution = camera_resolution
+        self.camera_fps = camera_fps
+        self.camera_fourcc = camera_fourcc
+        self.decoding_workers_number = decoding_workers_number
+        self.camera_format = None
         self.is_running = False
         self.video_capture = None
         self.is_person_location_detection_running = False
         self.camera_frames_to_process = None
+        self.camera_frame_sequence_number = 0
+        self.health_state = self.INITIALIZING_HEALTH_STATE
+        self.stage_name = "capture (%s)" % camera_name
+        self.is_restarted = False
+        self.is_abandoned = False
+        self.camera_frame_read_channel_specification = camera_frame_read_channel_specification
+        self.camera_frame_read_channel = channels.BackpressureChannel.from_specification(
+            "capture_to_gui", camera_frame_read_channel_specification, camera=camera_name)
+        self.camera_frame_read_relay = ChannelRelay(self.camera_frame_read_channel)
+        self.camera_frame_read_relay.item_relayed.connect(self.camera_frame_read)
 
     def run(self):
         """
         Runs thread: initializes connected camera and captures its frames. Thread can switch its state and start putting
-        camera frames into the queue in order for person location detection thread to process them.
+        camera frames together with their capture time and sequence number into the channel in order for person location
+        detection thread to process them. Restarted thread reconnects camera if it cannot be initialized right away.
         """
         self.is_running = True
-
-        if not self.__initialize_camera():
+        threading.current_thread().name = "Capture (%s)" % self.camera_name
+        scheduling.apply_stage_scheduling(scheduling.CAPTURE_STAGE)
+
+        watchdog.DEFAULT_STAGE_WATCHDOG.beat(self.stage_name, self.INITIALIZATION_DEADLINE)
+        if self.is_restarted:
+            if not self.__initialize_camera() and not self.__reconnect_camera():
+                return
+        elif not self.__initialize_camera():
             self.camera_initialized.emit(False)
             self.is_running = False
             self.video_capture = None
             return
+        else:
+            self.camera_initialized.emit(True)
+        self.__change_health_state(self.HEALTHY_HEALTH_STATE)
 
-        self.camera_initialized.emit(True)
-
+        consecutive_failed_reads_number = 0
         while self.is_running:
-            is_successful_camera_frame_read, camera_frame = self.video_capture.read()
-            if is_successful_camera_frame_read:
-                self.camera_frame_read.emit(camera_frame)
+            watchdog.DEFAULT_STAGE_WATCHDOG.beat(self.stage_name)
+            camera_frame_sequence_number = self.camera_frame_sequence_number + 1
+            with metrics.DEFAULT_METRICS_REGISTRY.measure_stage("capture", camera=self.camera_name), \
+                    tracing.DEFAULT_TRACER.span("capture", camera_frame_sequence_number, camera=self.camera_name):
+                is_successful_camera_frame_read, camera_frame = self.video_capture.read()
+            if not is_successful_camera_frame_read:
+                metrics.DEFAULT_METRICS_REGISTRY.increment("camera_failed_reads_total", camera=self.camera_name)
+                if capture_sources.is_finite_camera_source(self.camera_index):
+                    # Video file or GStreamer pipeline has ended
+                    self.__change_health_state(self.ENDED_HEALTH_STATE)
+                    break
+
+                consecutive_failed_reads_number += 1
+                if consecutive_failed_reads_number < self.MAX_CONSECUTIVE_FAILED_READS_NUMBER:
+                    time.sleep(self.FAILED_READ_RETRY_DELAY)
+                elif self.__reconnect_camera():
+                    consecutive_failed_reads_number = 0
+            else:
+                consecutive_failed_reads_number = 0
+                self.camera_frame_sequence_number = camera_frame_sequence_number
+                metrics.DEFAULT_METRICS_REGISTRY.increment("camera_frames_total", camera=self.camera_name)
+                metrics.DEFAULT_METRICS_REGISTRY.mark("camera_fps", camera=self.camera_name)
+                self.__put_into_channel(self.camera_frame_read_channel, camera_frame)
 
                 if self.is_person_location_detection_running:
-                    self.camera_frames_to_process.put(camera_frame)
-                    self.camera_frames_to_process.join()
+                    with tracing.DEFAULT_TRACER.span("wait_for_processing", camera_frame_sequence_number,
+                                                     camera=self.camera_name):
+                        if self.__put_into_channel(self.camera_frames_to_process,
+                                                   (camera_frame, time.time(), camera_frame_sequence_number)):
+                            self.__wait_for_channel_free_space(self.camera_frames_to_process)
+
+        if self.video_capture is not None:
+            self.video_capture.release()
+        if self.health_state != self.ENDED_HEALTH_STATE:
+            self.__change_health_state(self.STOPPED_HEALTH_STATE)
+        elif not self.is_abandoned:
+            # Ended stream is not stalled, so it is not restarted
+            watchdog.DEFAULT_STAGE_WATCHDOG.unregister_stage(self.stage_name)
+
+    def __put_into_channel(self, channel, item):
+        """
+        Puts item into the channel applying its backpressure policy, sending heartbeats while channel blocks, so
+        waiting for slow consumer is not considered as capture stall.
+
+        :param channel: channel
+        :param item: item to put
+        :return: whether item has been accepted (False if it has been dropped or thread has been stopped)
+        """
+        while self.is_running:
+            try:
+                return channel.put(item, timeout=self.HEARTBEAT_INTERVAL)
+            except queue.Full:
+                watchdog.DEFAULT_STAGE_WATCHDOG.beat(self.stage_name)
+
+        return False
+
+    def __wait_for_channel_free_space(self, channel):
+        """
+        Waits until the next camera frame can be put into the channel (camera frame put into the channel with block
+        policy and capacity 1 has been processed), sending heartbeats while waiting.
+
+        :param channel: channel
+        """
+        while self.is_running and not channel.wait_for_free_space(self.HEARTBEAT_INTERVAL):
+            watchdog.DEFAULT_STAGE_WATCHDOG.beat(self.stage_name)
+
+    def __change_health_state(self, health_state):
+        """
+        Changes camera health state and emits it.
 
-        self.video_capture.release()
+        :param health_state: camera health state
+        """
+        self.health_state = health_state
+        metrics.DEFAULT_METRICS_REGISTRY.set_gauge("camera_up", int(health_state == self.HEALTHY_HEALTH_STATE),
+                                                   camera=self.camera_name)
+        self.camera_health_changed.emit(health_state)
+
+    def __reconnect_camera(self):
+        """
+        Reconnects camera: releases it and tries to initialize it again with exponentially growing delays until it is
+        initialized or thread is stopped.
+
+        :return: whether camera has been reconnected
+        """
+        self.__change_health_state(self.RECONNECTING_HEALTH_STATE)
+        if self.video_capture is not None:
+            self.video_capture.release()
+        self.video_capture = None
+
+        reconnection_delay = self.INITIAL_RECONNECTION_DELAY
+        while self.is_running:
+            # Delay is slept in short steps, so stopped thread does not wait for the whole delay
+            reconnection_time = time.time() + reconnection_delay
+            while self.is_running and time.time() < reconnection_time:
+                watchdog.DEFAULT_STAGE_WATCHDOG.beat(self.stage_name)
+                time.sleep(min(reconnection_time - time.time(), self.FAILED_READ_RETRY_DELAY))
+            if not self.is_running:
+                break
+
+            metrics.DEFAULT_METRICS_REGISTRY.increment("camera_reconnection_attempts_total", camera=self.camera_name)
+            watchdog.DEFAULT_STAGE_WATCHDOG.beat(self.stage_name, self.INITIALIZATION_DEADLINE)
+            if self.__initialize_camera():
+                metrics.DEFAULT_METRICS_REGISTRY.increment("camera_reconnections_total", camera=self.camera_name)
+                self.__change_health_state(self.HEALTHY_HEALTH_STATE)
+                return True
+
+            self.video_capture.release()
+            self.video_capture = None
+            reconnection_delay = min(reconnection_delay * 2, self.MAX_RECONNECTION_DELAY)
+
+        return False
 
     def __initialize_camera(self):
         """
@@ -62,12 +264,23 @@ class CameraStreamReaderThread(QtCore.QThread):
 
         :return: whether camera has been initialized successfully
         """
-        self.video_capture = cv.VideoCapture(self.camera_index)
+        self.video_capture = capture_sources.open_video_capture(self.camera_index)
         if not self.video_capture.isOpened():
             return False
 
-        self.video_capture.set(cv.CAP_PROP_FRAME_WIDTH, self.camera_resolution[0])
-        self.video_capture.set(cv.CAP_PROP_FRAME_HEIGHT, self.camera_resolution[1])
+        if capture_sources.parse_camera_source(self.camera_index)[0] != capture_sources.CAMERA_DEVICE_SOURCE_TYPE:
+            self.video_capture.set(cv.CAP_PROP_FRAME_WIDTH, self.camera_resolution[0])
+            self.video_capture.set(cv.CAP_PROP_FRAME_HEIGHT, self.camera_resolution[1])
+            return True
+
+        self.camera_format = capture_sources.negotiate_camera_format(self.video_capture, self.camera_resolution,
+                                                                     self.camera_fps, self.camera_fourcc)
+        metrics.DEFAULT_METRICS_REGISTRY.set_gauge("camera_negotiated_fps", self.camera_format["fps"],
+                                                   camera=self.camera_name, fourcc=self.camera_format["fourcc"])
+        if self.camera_format["fourcc"] == "MJPG" and self.decoding_workers_number > 0:
+            self.video_capture = capture_sources.MjpegDecodingVideoCapture(self.video_capture,
+                                                                           self.decoding_workers_number,
+                                                                           self.camera_name)
 
         return True
 
@@ -80,142 +293,516 @@ class CameraStreamReaderThread(QtCore.QThread):
         self.wait()
         self.video_capture = None
 
+    def abandon(self):
+        """
+        Abandons stalled thread without waiting for it: thread stops putting camera frames into the channel, its signals
+        are disconnected and it finishes as soon as it returns from the stalled call.
+        """
+        self.is_abandoned = True
+        self.is_running = False
+        self.is_person_location_detection_running = False
+        for signal in (self.camera_initialized, self.camera_frame_read, self.camera_health_changed):
+            try:
+                signal.disconnect()
+            except TypeError:
+                pass  # Signal has no connections
+
 
 class CameraService:
     """
-    Service that initializes connected camera and captures its frames.
+    Service that initializes connected cameras and captures their frames. Every camera stream is identified by its
+    name.
     """
 
     def __init__(self):
         """
         Initializes service.
         """
-        self.__camera_stream_reader_thread = None
+        self.__camera_stream_reader_threads = {}
+        self.__camera_stream_reader_slots = {}
+        self.__abandoned_camera_stream_reader_threads = []
+
+    def get_camera_names(self):
+        """
+        Returns names of the cameras which stream reader threads have been created.
+
+        :return: list of camera names
+        """
+        return list(self.__camera_stream_reader_threads.keys())
 
-    def is_camera_stream_reading_running(self):
+    def is_camera_stream_reading_running(self, camera_name):
         """
         Returns whether camera stream reading is running (whether camera stream reader thread has been started).
 
+        :param camera_name: name of the camera
         :return: whether camera stream reading is running
         """
-        return self.__camera_stream_reader_thread is not None and self.__camera_stream_reader_thread.is_running
+        camera_stream_reader_thread = self.__camera_stream_reader_threads.get(camera_name, None)
+        return camera_stream_reader_thread is not None and camera_stream_reader_thread.is_running
+
+    def get_camera_health_state(self, camera_name):
+        """
+        Returns health state of the camera: camera is "healthy" while its frames are read, "reconnecting" after
+        consecutive failed reads until it is initialized again, "ended" when its video file or pipeline has ended.
+
+        :param camera_name: name of the camera
+        :return: camera health state
+        """
+        if camera_name not in self.__camera_stream_reader_threads:
+            raise Exception("You need to start camera stream reading first!")
+
+        return self.__camera_stream_reader_threads[camera_name].health_state
+
+    def get_camera_format(self, camera_name):
+        """
+        Returns format negotiated with the connected camera.
+
+        :param camera_name: name of the camera
+        :return: dictionary with actual FOURCC, resolution, FPS and buffer size of the camera (None if camera is not
+        a connected camera or it has not been initialized yet)
+        """
+        if not self.is_camera_stream_reading_running(camera_name):
+            raise Exception("You need to start camera stream reading first!")
 
-    def start_camera_stream_reading(self, camera_index, camera_resolution, camera_initialized_slot,
-                                    camera_frame_read_slot):
+        return self.__camera_stream_reader_threads[camera_name].camera_format
+
+    def start_camera_stream_reading(self, camera_name, camera_index, camera_resolution, camera_initialized_slot,
+                                    camera_frame_read_slot, camera_frames_to_process=None,
+                                    camera_fps=capture_sources.DEFAULT_CAMERA_FPS,
+                                    camera_fourcc=capture_sources.DEFAULT_CAMERA_FOURCC,
+                                    decoding_workers_number=capture_sources.DEFAULT_DECODING_WORKERS_NUMBER,
+                                    camera_health_changed_slot=None,
+                                    camera_frame_read_channel_specification=channels.DEFAULT_GUI_CHANNEL_SPECIFICATION):
         """
         Creates camera stream reader thread, connects signals with slots and starts thread execution.
 
-        :param camera_index: index of the connected camera
+        :param camera_name: name of the camera
+        :param camera_index: index of the connected camera, path or URI of the video file (e.g.
+        "file:///videos/clip.mp4?pacing=fast"), GStreamer pipeline (e.g. "gstreamer://videotestsrc ! videoconvert !
+        appsink") or synthetic camera URI (e.g. "synthetic://?fps=60&persons=10")
         :param camera_resolution: resolution of the connected camera
         :param camera_initialized_slot: slot that is called when the camera has been initialized
         :param camera_frame_read_slot: slot that is called when the camera frame has been read
+        :param camera_frames_to_process: camera frames to process channel (if it is set, thread puts camera frames into
+        it from the first read frame, so no frame of the video file is missed by person location detection)
+        :param camera_fps: FPS requested from the connected camera
+        :param camera_fourcc: FOURCC requested from the connected camera (MJPEG frames are decoded by the workers)
+        :param decoding_workers_number: number of workers that decode MJPEG frames (camera backend decodes frames
+        itself if it is zero)
+        :param camera_health_changed_slot: slot that is called with the camera health state when it has changed
+        ("healthy", "reconnecting", "ended" or "stopped")
+        :param camera_frame_read_channel_specification: backpressure policy and capacity of the channel read camera
+        frames are delivered to the slot through, e.g. "drop_oldest:1" (see channels)
         """
-        if self.is_camera_stream_reading_running():
+        if self.is_camera_stream_reading_running(camera_name):
             raise Exception("You need to stop camera stream reading first!")
 
-        self.__camera_stream_reader_thread = CameraStreamReaderThread(camera_index, camera_resolution)
-        self.__camera_stream_reader_thread.camera_initialized.connect(camera_initialized_slot)
-        self.__camera_stream_reader_thread.camera_frame_read.connect(camera_frame_read_slot)
-        self.__camera_stream_reader_thread.start()
+        camera_stream_reader_thread = CameraStreamReaderThread(camera_name, camera_index, camera_resolution,
+                                                               camera_fps, camera_fourcc, decoding_workers_number,
+                                                               camera_frame_read_channel_specification)
+        camera_stream_reader_thread.camera_initialized.connect(camera_initialized_slot)
+        camera_stream_reader_thread.camera_frame_read.connect(camera_frame_read_slot)
+        if camera_health_changed_slot is not None:
+            camera_stream_reader_thread.camera_health_changed.connect(camera_health_changed_slot)
+        if camera_frames_to_process is not None:
+            camera_stream_reader_thread.camera_frames_to_process = camera_frames_to_process
+            camera_stream_reader_thread.is_person_location_detection_running = True
+        self.__camera_stream_reader_threads[camera_name] = camera_stream_reader_thread
+        # Slots are kept, so they can be connected to the restarted thread
+        self.__camera_stream_reader_slots[camera_name] = {"camera_frame_read": [camera_frame_read_slot],
+                                                          "camera_health_changed": camera_health_changed_slot}
+        watchdog.DEFAULT_STAGE_WATCHDOG.register_stage(camera_stream_reader_thread.stage_name,
+                                                       lambda: self.restart_camera_stream_reading(camera_name))
+        camera_stream_reader_thread.start()
+
+    def restart_camera_stream_reading(self, camera_name):
+        """
+        Restarts stalled camera stream reader thread: stalled thread is abandoned and the new thread with the same
+        configuration, channels and slots continues camera stream reading.
+
+        :param camera_name: name of the camera
+        """
+        if not self.is_camera_stream_reading_running(camera_name):
+            raise Exception("You need to start camera stream reading first!")
 
-    def update_camera_frame_read_slot(self, current_camera_frame_read_slot, updated_camera_frame_read_slot):
+        stalled_camera_stream_reader_thread = self.__camera_stream_reader_threads[camera_name]
+        is_person_location_detection_running = stalled_camera_stream_reader_thread.is_person_location_detection_running
+        stalled_camera_stream_reader_thread.abandon()
+        # Running QThread must not be destroyed, so abandoned threads are kept until they finish
+        self.__abandoned_camera_stream_reader_threads = [
+            camera_stream_reader_thread for camera_stream_reader_thread in self.__abandoned_camera_stream_reader_threads
+            if not camera_stream_reader_thread.isFinished()] + [stalled_camera_stream_reader_thread]
+
+        camera_stream_reader_thread = CameraStreamReaderThread(
+            camera_name, stalled_camera_stream_reader_thread.camera_index,
+            stalled_camera_stream_reader_thread.camera_resolution, stalled_camera_stream_reader_thread.camera_fps,
+            stalled_camera_stream_reader_thread.camera_fourcc,
+            stalled_camera_stream_reader_thread.decoding_workers_number,
+            stalled_camera_stream_reader_thread.camera_frame_read_channel_specification)
+        camera_stream_reader_thread.is_restarted = True
+        camera_stream_reader_thread.camera_frame_sequence_number = \
+            stalled_camera_stream_reader_thread.camera_frame_sequence_number
+        camera_stream_reader_thread.camera_frames_to_process = \
+            stalled_camera_stream_reader_thread.camera_frames_to_process
+        camera_stream_reader_thread.is_person_location_detection_running = is_person_location_detection_running
+        camera_stream_reader_slots = self.__camera_stream_reader_slots[camera_name]
+        for camera_frame_read_slot in camera_stream_reader_slots["camera_frame_read"]:
+            camera_stream_reader_thread.camera_frame_read.connect(camera_frame_read_slot)
+        if camera_stream_reader_slots["camera_health_changed"] is not None:
+            camera_stream_reader_thread.camera_health_changed.connect(
+                camera_stream_reader_slots["camera_health_changed"])
+        self.__camera_stream_reader_threads[camera_name] = camera_stream_reader_thread
+        watchdog.DEFAULT_STAGE_WATCHDOG.register_stage(camera_stream_reader_thread.stage_name,
+                                                       lambda: self.restart_camera_stream_reading(camera_name))
+        camera_stream_reader_thread.start()
+
+    def update_camera_frame_read_slot(self, camera_name, current_camera_frame_read_slot,
+                                      updated_camera_frame_read_slot):
         """
         Updates "camera frame read" slot.
 
+        :param camera_name: name of the camera
         :param current_camera_frame_read_slot: current slot that is called when the camera frame has been read
         :param updated_camera_frame_read_slot: updated slot that is called when the camera frame has been read
         """
-        if not self.is_camera_stream_reading_running():
+        if not self.is_camera_stream_reading_running(camera_name):
             raise Exception("You need to start camera stream reading first!")
 
-        self.__camera_stream_reader_thread.camera_frame_read.disconnect(current_camera_frame_read_slot)
-        self.__camera_stream_reader_thread.camera_frame_read.connect(updated_camera_frame_read_slot)
+        camera_stream_reader_thread = self.__camera_stream_reader_threads[camera_name]
+        camera_stream_reader_thread.camera_frame_read.disconnect(current_camera_frame_read_slot)
+        camera_stream_reader_thread.camera_frame_read.connect(updated_camera_frame_read_slot)
+        camera_frame_read_slots = self.__camera_stream_reader_slots[camera_name]["camera_frame_read"]
+        camera_frame_read_slots[camera_frame_read_slots.index(current_camera_frame_read_slot)] = \
+            updated_camera_frame_read_slot
 
-    def disconnect_camera_frame_read_slot(self, camera_frame_read_slot):
+    def disconnect_camera_frame_read_slot(self, camera_name, camera_frame_read_slot):
         """
         Disconnects "camera frame read" slot.
 
+        :param camera_name: name of the camera
         :param camera_frame_read_slot: slot that is called when the camera frame has been read
         """
-        if not self.is_camera_stream_reading_running():
+        if not self.is_camera_stream_reading_running(camera_name):
             raise Exception("You need to start camera stream reading first!")
 
-        self.__camera_stream_reader_thread.camera_frame_read.disconnect(camera_frame_read_slot)
+        self.__camera_stream_reader_threads[camera_name].camera_frame_read.disconnect(camera_frame_read_slot)
+        self.__camera_stream_reader_slots[camera_name]["camera_frame_read"].remove(camera_frame_read_slot)
 
-    def connect_camera_frame_read_slot(self, camera_frame_read_slot):
+    def connect_camera_frame_read_slot(self, camera_name, camera_frame_read_slot):
         """
         Connects "camera frame read" slot.
 
+        :param camera_name: name of the camera
         :param camera_frame_read_slot: slot that is called when the camera frame has been read
         """
-        if not self.is_camera_stream_reading_running():
+        if not self.is_camera_stream_reading_running(camera_name):
             raise Exception("You need to start camera stream reading first!")
 
-        self.__camera_stream_reader_thread.camera_frame_read.connect(camera_frame_read_slot)
+        self.__camera_stream_reader_threads[camera_name].camera_frame_read.connect(camera_frame_read_slot)
+        self.__camera_stream_reader_slots[camera_name]["camera_frame_read"].append(camera_frame_read_slot)
 
-    def clean_camera_stream_reading_resources(self):
+    def clean_camera_stream_reading_resources(self, camera_name):
         """
         Cleans camera stream reader thread resources.
+
+        :param camera_name: name of the camera
         """
-        if self.__camera_stream_reader_thread is None:
+        if camera_name not in self.__camera_stream_reader_threads:
             raise Exception("You need to start camera stream reading first!")
 
-        self.__camera_stream_reader_thread = None
+        watchdog.DEFAULT_STAGE_WATCHDOG.unregister_stage(self.__camera_stream_reader_threads[camera_name].stage_name)
+        del self.__camera_stream_reader_threads[camera_name]
+        del self.__camera_stream_reader_slots[camera_name]
 
-    def stop_camera_stream_reading(self):
+    def stop_camera_stream_reading(self, camera_name):
         """
         Stops camera stream reader thread execution and cleans its resources.
+
+        :param camera_name: name of the camera
         """
-        if not self.is_camera_stream_reading_running():
+        if not self.is_camera_stream_reading_running(camera_name):
             raise Exception("You need to start camera stream reading first!")
 
-        self.__camera_stream_reader_thread.stop()
-        self.clean_camera_stream_reading_resources()
+        self.__camera_stream_reader_threads[camera_name].stop()
+        self.clean_camera_stream_reading_resources(camera_name)
 
-    def switch_camera_stream_reading_state(self, is_person_location_detection, camera_frames_to_process=None):
+    def switch_camera_stream_reading_state(self, camera_name, is_person_location_detection,
+                                           camera_frames_to_process=None):
         """
         Switches camera stream reading state from plain reading to reading camera frames and putting them into the
-        queue in order for person location detection thread to process them and vice versa.
+        channel in order for person location detection thread to process them and vice versa.
 
+        :param camera_name: name of the camera
         :param is_person_location_detection: whether person location detection is running
-        :param camera_frames_to_process: camera frames to process queue
+        :param camera_frames_to_process: camera frames to process channel
         """
-        if not self.is_camera_stream_reading_running():
+        if not self.is_camera_stream_reading_running(camera_name):
             raise Exception("You need to start camera stream reading first!")
 
+        camera_stream_reader_thread = self.__camera_stream_reader_threads[camera_name]
         if is_person_location_detection:
             if camera_frames_to_process is None:
-                raise Exception("Camera frames to process queue should be initialized!")
+                raise Exception("Camera frames to process channel should be initialized!")
 
-            self.__camera_stream_reader_thread.camera_frames_to_process = camera_frames_to_process
-            self.__camera_stream_reader_thread.is_person_location_detection_running = True
+            camera_stream_reader_thread.camera_frames_to_process = camera_frames_to_process
+            camera_stream_reader_thread.is_person_location_detection_running = True
         else:
-            self.__camera_stream_reader_thread.is_person_location_detection_running = False
+            camera_stream_reader_thread.is_person_location_detection_running = False
+
+
+class CameraDiscoveryThread(QtCore.QThread):
+    """
+    Thread that discovers connected cameras and probes their modes (probing takes seconds, so it does not block GUI).
+    """
+
+    cameras_discovered = QtCore.pyqtSignal(list)
+
+    def __init__(self, is_cache_used=True):
+        """
+        Initializes thread.
+
+        :param is_cache_used: whether cached camera capabilities are used
+        """
+        super(CameraDiscoveryThread, self).__init__()
+
+        self.is_cache_used = is_cache_used
+        self.cameras = None
+
+    def run(self):
+        """
+        Runs thread: discovers cameras and emits them.
+        """
+        threading.current_thread().name = "Camera discovery"
+
+        self.cameras = camera_discovery.discover_cameras(is_cache_used=self.is_cache_used)
+        self.cameras_discovered.emit(self.cameras)
+
+
+class CameraDiscoveryService:
+    """
+    Service that discovers connected cameras and their modes that run at full frame rate.
+    """
+
+    def __init__(self):
+        """
+        Initializes service.
+        """
+        self.__camera_discovery_thread = None
+
+    def is_camera_discovery_running(self):
+        """
+        Returns whether camera discovery is running.
+
+        :return: whether camera discovery is running
+        """
+        return self.__camera_discovery_thread is not None and self.__camera_discovery_thread.isRunning()
+
+    def start_camera_discovery(self, cameras_discovered_slot, is_cache_used=True):
+        """
+        Creates camera discovery thread, connects signal with slot and starts thread execution.
+
+        :param cameras_discovered_slot: slot that is called with the list of discovered cameras (dictionaries with
+        camera index, name and modes that run at full frame rate)
+        :param is_cache_used: whether cached camera capabilities are used (cameras are probed again if it is False)
+        """
+        if self.is_camera_discovery_running():
+            raise Exception("You need to wait for camera discovery to finish first!")
+
+        self.__camera_discovery_thread = CameraDiscoveryThread(is_cache_used)
+        self.__camera_discovery_thread.cameras_discovered.connect(
+            lambda cameras: cameras_discovered_slot(self.__filter_full_frame_rate_modes(cameras)))
+        self.__camera_discovery_thread.start()
+
+    def get_discovered_cameras(self):
+        """
+        Returns cameras discovered by the last camera discovery.
+
+        :return: list of discovered cameras (None if cameras have not been discovered yet)
+        """
+        if self.__camera_discovery_thread is None or self.__camera_discovery_thread.cameras is None:
+            return None
+
+        return self.__filter_full_frame_rate_modes(self.__camera_discovery_thread.cameras)
+
+    def wait_for_camera_discovery(self):
+        """
+        Waits for camera discovery to finish.
+        """
+        if self.__camera_discovery_thread is not None:
+            self.__camera_discovery_thread.wait()
+
+    @staticmethod
+    def __filter_full_frame_rate_modes(cameras):
+        """
+        Leaves only camera modes that run at full frame rate.
+
+        :param cameras: list of discovered cameras
+        :return: list of discovered cameras with modes that run at full frame rate
+        """
+        return [dict(camera, modes=[mode for mode in camera["modes"] if camera_discovery.is_full_frame_rate_mode(mode)])
+                for camera in cameras]
+
+
+class CameraProjectionArea:
+    """
+    Projection area of the camera which frames are processed by person location detection thread. Holds camera frames
+    to process channel, perspective transformation matrix and processing statistics of the camera.
+    """
+
+    STATISTICS_WINDOW_DURATION = 5
+
+    def __init__(self, camera_name, projection_area_coordinates, projection_area_resolution,
+                 floor_transformation_matrix=None,
+                 camera_frames_to_process_channel_specification=channels.DEFAULT_DETECTION_CHANNEL_SPECIFICATION):
+        """
+        Initializes camera projection area.
+
+        :param camera_name: name of the camera
+        :param projection_area_coordinates: projection area coordinates
+        :param projection_area_resolution: projection area resolution
+        :param floor_transformation_matrix: 3×3 matrix that maps projection area coordinates to the floor coordinate
+        system shared by all cameras (projection area coordinates are used as floor coordinates if it is not set)
+        :param camera_frames_to_process_channel_specification: specification of the channel camera frames are put into
+        by camera stream reader thread (see channels)
+        """
+        self.camera_name = camera_name
+        self.projection_area_coordinates = projection_area_coordinates
+        self.projection_area_resolution = projection_area_resolution
+        self.floor_transformation_matrix = np.eye(3) if floor_transformation_matrix is None else np.float64(
+            floor_transformation_matrix)
+        self.camera_frames_to_process = channels.BackpressureChannel.from_specification(
+            "capture_to_detection", camera_frames_to_process_channel_specification, camera=camera_name)
+        self.perspective_transformation_matrix = None
+        self.projection_area_polygon = Polygon(self.projection_area_coordinates)
+        self.__projection_area_masks = {}
+        self.__processed_camera_frames = collections.deque()
+        self.__processed_camera_frames_lock = threading.Lock()
+
+        self.__initialize_perspective_transformation_matrix()
+
+    def __initialize_perspective_transformation_matrix(self):
+        """
+        Initializes perspective transformation matrix.
+        """
+        source_points = np.float32(self.projection_area_coordinates)
+        destination_points = np.float32([[self.projection_area_resolution[0], 0], self.projection_area_resolution,
+                                         [0, self.projection_area_resolution[1]], [0, 0]])
+        self.perspective_transformation_matrix = cv.getPerspectiveTransform(source_points, destination_points)
+
+    def get_projection_area_mask(self, camera_frame_resolution):
+        """
+        Gets projection area mask for the camera frame resolution (masks are created once per resolution).
+
+        :param camera_frame_resolution: resolution of the camera frame
+        :return: projection area mask
+        """
+        projection_area_mask = self.__projection_area_masks.get(camera_frame_resolution, None)
+        if projection_area_mask is None:
+            projection_area_mask = detectors.create_projection_area_mask(self.projection_area_coordinates,
+                                                                         camera_frame_resolution)
+            self.__projection_area_masks[camera_frame_resolution] = projection_area_mask
+
+        return projection_area_mask
+
+    def convert_persons_locations_to_floor_locations(self, persons_locations):
+        """
+        Converts persons locations from projection area coordinates to the shared floor coordinate system.
+
+        :param persons_locations: list of persons (x, y) locations within the projection area
+        :return: list of persons (x, y) locations on the floor
+        """
+        if len(persons_locations) == 0:
+            return []
+
+        return [tuple(person_floor_location) for person_floor_location in cv.perspectiveTransform(
+            np.float64(persons_locations).reshape(-1, 1, 2), self.floor_transformation_matrix).reshape(-1, 2).tolist()]
+
+    def clear_camera_frames_to_process(self):
+        """
+        Clears camera frames to process channel marking removed frames as processed, so camera stream reader thread that
+        waits for them is released.
+        """
+        self.camera_frames_to_process.clear()
+
+    def register_processed_camera_frame(self, camera_frame_capture_time, camera_frame_processed_time):
+        """
+        Registers processed camera frame and drops frames that are out of the statistics window.
+
+        :param camera_frame_capture_time: time when the camera frame has been captured
+        :param camera_frame_processed_time: time when the camera frame has been processed
+        """
+        with self.__processed_camera_frames_lock:
+            self.__processed_camera_frames.append(
+                (camera_frame_processed_time, camera_frame_processed_time - camera_frame_capture_time))
+
+            while self.__processed_camera_frames[0][0] < camera_frame_processed_time - self.STATISTICS_WINDOW_DURATION:
+                self.__processed_camera_frames.popleft()
+
+    def get_statistics(self):
+        """
+        Returns camera processing statistics over the statistics window: throughput (processed frames per second) and
+        average latency between capturing and processing a frame (in seconds).
+
+        :return: dictionary with throughput and latency
+        """
+        with self.__processed_camera_frames_lock:
+            processed_camera_frames = list(self.__processed_camera_frames)
+
+        if len(processed_camera_frames) == 0:
+            return {"throughput": 0.0, "latency": 0.0}
+
+        window_duration = min(self.STATISTICS_WINDOW_DURATION, time.time() - processed_camera_frames[0][0])
+        throughput = len(processed_camera_frames) / window_duration if window_duration > 0 else 0.0
+        latency = sum(latency for _, latency in processed_camera_frames) / len(processed_camera_frames)
+
+        return {"throughput": throughput, "latency": latency}
 
 
 class PersonLocationDetectionThread(QtCore.QThread):
     """
-    Thread that detects locations of persons within the projection area.
+    Thread that detects locations of persons within the projection areas of the attached cameras. All cameras share one
+    detection model and their frames are scheduled in round-robin order. Persons locations of all cameras are fused in
+    the shared floor coordinate system once per fusion time step.
     """
 
+    # Detection model initialization (e.g. CUDA context creation) takes much longer than processing of one batch
+    DETECTION_MODEL_INITIALIZATION_DEADLINE = 120.0
+    HEARTBEAT_INTERVAL = 0.5
+
     camera_frame_processed = QtCore.pyqtSignal(tuple)
+    persons_locations_fused = QtCore.pyqtSignal(tuple)
+    detection_model_swapped = QtCore.pyqtSignal(dict)
 
     def __init__(self, detection_model_weights_file_path, detection_model_configuration_file_path,
                  detection_model_input_scale, detection_model_input_size, detection_model_person_class_id,
-                 detection_model_confidence_threshold, detection_model_nms_threshold, projection_area_coordinates,
-                 projection_area_resolution):
+                 detection_model_confidence_threshold, detection_model_nms_threshold, detection_model_max_batch_size=1,
+                 detection_model_max_batch_wait_time=0.005, is_person_only_decoding=False,
+                 detection_model_backend=cv.dnn.DNN_BACKEND_CUDA, detection_model_target=cv.dnn.DNN_TARGET_CUDA,
+                 camera_frame_processed_channel_specification=channels.DEFAULT_GUI_CHANNEL_SPECIFICATION,
+                 detection_model_runtime=None):
         """
         Initializes thread.
 
-        :param detection_model_weights_file_path: detection model weights file path
-        :param detection_model_configuration_file_path: detection model configuration file path
+        :param detection_model_weights_file_path: detection model weights file path, ONNX model file path or mock
+        detection model URI
+        :param detection_model_configuration_file_path: detection model configuration file path (None for ONNX model)
         :param detection_model_input_scale: detection model scale factor for input frames
         :param detection_model_input_size: detection model input size
         :param detection_model_person_class_id: detection model person class ID
         :param detection_model_confidence_threshold: detection model confidence threshold
         :param detection_model_nms_threshold: detection model non-maximum suppression threshold
-        :param projection_area_coordinates: projection area coordinates
-        :param projection_area_resolution: projection area resolution
+        :param detection_model_max_batch_size: maximum number of camera frames that are detected with a single forward
+        pass of the detection model
+        :param detection_model_max_batch_wait_time: maximum time (in seconds) to wait for other cameras frames after the
+        first camera frame of the batch has been taken
+        :param is_person_only_decoding: whether detection model outputs are decoded only for persons within projection
+        areas (rows are rejected before non-maximum suppression)
+        :param detection_model_backend: OpenCV DNN backend of the detection model
+        :param detection_model_target: OpenCV DNN target of the detection model
+        :param camera_frame_processed_channel_specification: specification of the channels camera frames processing
+        results are emitted through (see channels)
+        :param detection_model_runtime: runtime of the detection model ("opencv", "onnxruntime" or None to select it,
+        see detectors.select_detection_model_runtime)
         """
         super(PersonLocationDetectionThread, self).__init__()
 
@@ -226,209 +813,1249 @@ class PersonLocationDetectionThread(QtCore.QThread):
         self.detection_model_person_class_id = detection_model_person_class_id
         self.detection_model_confidence_threshold = detection_model_confidence_threshold
         self.detection_model_nms_threshold = detection_model_nms_threshold
-        self.projection_area_coordinates = projection_area_coordinates
-        self.projection_area_resolution = projection_area_resolution
+        self.detection_model_max_batch_size = detection_model_max_batch_size
+        self.detection_model_max_batch_wait_time = detection_model_max_batch_wait_time
+        self.is_person_only_decoding = is_person_only_decoding
+        self.detection_model_backend = detection_model_backend
+        self.detection_model_target = detection_model_target
+        self.detection_model_runtime = detection_model_runtime
         self.is_running = False
-        self.camera_frames_to_process = queue.Queue(1)
+        self.camera_projection_areas = collections.OrderedDict()
+        self.camera_projection_areas_lock = threading.Lock()
+        self.persons_locations_fusion = fusion.PersonsLocationsFusion(distance_threshold=50, time_step=0.1)
+        self.layers_profiling_window_size = None
+        self.layers_profiler = None
+        # Number of OpenCV threads of the autotuning profile (threads number of the pipeline scheduling takes
+        # precedence)
+        self.opencv_threads_number = None
         self.detection_model = None
-        self.perspective_transformation_matrix = None
-        self.projection_area_polygon = None
+        self.detection_model_net = None
+        # Replacement detection model loaded by the detection model loading thread, it is swapped in between batches
+        self.replacement_detection_model = None
+        self.replacement_detection_model_lock = threading.Lock()
+        # Accurate detection model of the cascade (loaded by the detection model loading thread) and cascade policy
+        self.accurate_detection_model = None
+        self.accurate_detection_model_lock = threading.Lock()
+        self.detection_model_cascade = None
+        self.stage_name = "detection"
+        self.is_abandoned = False
+        self.camera_frames_batch_in_progress = collections.deque()
+        self.camera_frames_batch_in_progress_lock = threading.Lock()
+        self.camera_frame_processed_channel_specification = camera_frame_processed_channel_specification
+        self.camera_frame_processed_relays = {}
+        # Set (by camera stream reader threads) when camera frame has been put into the empty channel, so idle thread
+        # sleeps until there is a camera frame to process instead of polling the channels
+        self.camera_frame_available = threading.Event()
+        self.__next_camera_projection_area_index = 0
+
+    def attach_camera_projection_area(self, camera_projection_area):
+        """
+        Attaches camera projection area: frames of this camera start being processed. Processing results of every camera
+        are emitted through own channel, so results of one camera are not dropped in favor of another camera.
+
+        :param camera_projection_area: camera projection area
+        """
+        camera_frame_processed_relay = ChannelRelay(channels.BackpressureChannel.from_specification(
+            "detection_to_gui", self.camera_frame_processed_channel_specification,
+            camera=camera_projection_area.camera_name))
+        camera_frame_processed_relay.item_relayed.connect(self.camera_frame_processed)
+        camera_projection_area.camera_frames_to_process.item_put_into_empty_channel_callback = \
+            self.camera_frame_available.set
+        with self.camera_projection_areas_lock:
+            self.camera_projection_areas[camera_projection_area.camera_name] = camera_projection_area
+            self.camera_frame_processed_relays[camera_projection_area.camera_name] = camera_frame_processed_relay
+        # Camera frames could have been put before the callback has been set
+        self.camera_frame_available.set()
+
+    def detach_camera_projection_area(self, camera_name):
+        """
+        Detaches camera projection area: frames of this camera stop being processed.
+
+        :param camera_name: name of the camera
+        :return: detached camera projection area
+        """
+        with self.camera_projection_areas_lock:
+            camera_projection_area = self.camera_projection_areas.pop(camera_name)
+            self.camera_frame_processed_relays.pop(camera_name)
+        camera_projection_area.camera_frames_to_process.item_put_into_empty_channel_callback = None
+        self.persons_locations_fusion.remove_camera(camera_name)
+
+        return camera_projection_area
 
     def run(self):
         """
-        Runs thread: initializes detection model, perspective transformation matrix, projection area polygon and
-        processes camera frames.
+        Runs thread: initializes detection model and processes camera frames of the attached cameras. Camera frames of
+        different cameras are collected into batches which are detected with a single forward pass of the detection
+        model.
         """
         self.is_running = True
+        threading.current_thread().name = "Detection"
+        # Post-processing and warping run in this thread too, so they share detection stage scheduling
+        applied_stage_scheduling = scheduling.apply_stage_scheduling(scheduling.DETECTION_STAGE)
+        if self.opencv_threads_number is not None and applied_stage_scheduling["threads_number"] is None:
+            cv.setNumThreads(self.opencv_threads_number)
 
+        watchdog.DEFAULT_STAGE_WATCHDOG.beat(self.stage_name, self.DETECTION_MODEL_INITIALIZATION_DEADLINE)
         self.__initialize_detection_model()
-        self.__initialize_perspective_transformation_matrix()
-        self.projection_area_polygon = Polygon(self.projection_area_coordinates)
 
         while self.is_running:
-            try:
-                camera_frame_to_process = self.camera_frames_to_process.get_nowait()
-            except queue.Empty:
+            watchdog.DEFAULT_STAGE_WATCHDOG.beat(self.stage_name)
+            self.__swap_detection_model_if_replaced()
+            camera_frames_batch = self.__get_next_camera_frames_batch_to_process()
+            if len(camera_frames_batch) == 0:
+                # Heartbeat interval bounds the wait, so idle thread keeps beating and notices stop and swap requests
+                self.camera_frame_available.wait(self.HEARTBEAT_INTERVAL)
                 continue
 
-            class_ids, confidences, bounding_boxes, fps_number = self.__detect_camera_frame_objects_and_measure_fps(
-                camera_frame_to_process)
+            # Camera frames of the batch are released by abandon if thread stalls while processing them
+            with self.camera_frames_batch_in_progress_lock:
+                if self.is_abandoned:
+                    for camera_projection_area, _, _, _ in camera_frames_batch:
+                        camera_projection_area.camera_frames_to_process.task_done()
+                    break
+                self.camera_frames_batch_in_progress.extend(
+                    camera_projection_area for camera_projection_area, _, _, _ in camera_frames_batch)
+
+            # Batch is detected at once, so its span is keyed by sequence numbers of all its camera frames
+            with metrics.DEFAULT_METRICS_REGISTRY.measure_stage("inference"), tracing.DEFAULT_TRACER.span(
+                    "inference", frames={camera_projection_area.camera_name: camera_frame_sequence_number
+                                         for camera_projection_area, _, _, camera_frame_sequence_number
+                                         in camera_frames_batch}):
+                camera_frames_detections, fps_number, person_class_id = \
+                    self.__detect_camera_frames_objects_and_measure_fps(camera_frames_batch)
+            if self.is_abandoned:
+                break  # Stalled detection has returned after the thread has been replaced, results are stale
+
+            for (camera_projection_area, camera_frame_to_process, camera_frame_capture_time,
+                 camera_frame_sequence_number), (class_ids, confidences, bounding_boxes) in zip(
+                    camera_frames_batch, camera_frames_detections):
+                self.__process_camera_frame_detections(camera_projection_area, camera_frame_to_process,
+                                                       camera_frame_capture_time, camera_frame_sequence_number,
+                                                       fps_number, person_class_id, class_ids, confidences,
+                                                       bounding_boxes)
+
+            fused_persons_locations = self.persons_locations_fusion.fuse_if_time_step_passed(time.time())
+            if fused_persons_locations is not None:
+                self.persons_locations_fused.emit(fused_persons_locations)
+
+    def __process_camera_frame_detections(self, camera_projection_area, camera_frame_to_process,
+                                          camera_frame_capture_time, camera_frame_sequence_number, fps_number,
+                                          person_class_id, class_ids, confidences, bounding_boxes):
+        """
+        Filters detected persons within the projection area, calculates their locations, warps camera frame and emits
+        results.
+
+        :param camera_projection_area: camera projection area
+        :param camera_frame_to_process: camera frame to process
+        :param camera_frame_capture_time: time when the camera frame has been captured
+        :param camera_frame_sequence_number: sequence number of the camera frame
+        :param fps_number: FPS number
+        :param person_class_id: person class ID of the detection model that has detected the camera frame
+        :param class_ids: detected class id's
+        :param confidences: detected confidences
+        :param bounding_boxes: detected bounding boxes
+        """
+        camera_name = camera_projection_area.camera_name
 
-            result_confidences = []
-            result_bounding_boxes = []
-            result_persons_locations = []
+        result_confidences = []
+        result_bounding_boxes = []
+        result_persons_locations = []
+        with metrics.DEFAULT_METRICS_REGISTRY.measure_stage("post_processing", camera=camera_name), \
+                tracing.DEFAULT_TRACER.span("post_processing", camera_frame_sequence_number, camera=camera_name):
             for (class_id, confidence, bounding_box) in zip(class_ids, confidences, bounding_boxes):
-                if class_id[0] != self.detection_model_person_class_id:
+                if class_id[0] != person_class_id:
                     continue
 
                 bounding_box_bottom_edge_center_point, is_within_projection_area = \
-                    self.__is_bounding_box_bottom_edge_center_point_within_projection_area(bounding_box)
+                    self.__is_bounding_box_bottom_edge_center_point_within_projection_area(
+                        camera_projection_area, bounding_box, self.is_person_only_decoding)
                 if not is_within_projection_area:
                     continue
 
                 result_confidences.append(confidence[0])
                 result_bounding_boxes.append(bounding_box)
-                result_persons_locations.append(self.__calculate_person_location(bounding_box_bottom_edge_center_point))
+                result_persons_locations.append(
+                    self.__calculate_person_location(camera_projection_area, bounding_box_bottom_edge_center_point))
+
+        with metrics.DEFAULT_METRICS_REGISTRY.measure_stage("warp", camera=camera_name), \
+                tracing.DEFAULT_TRACER.span("warp", camera_frame_sequence_number, camera=camera_name):
+            camera_frame_to_process_warped = self.__warp_camera_frame_to_process(camera_projection_area,
+                                                                                 camera_frame_to_process)
+        with self.camera_projection_areas_lock:
+            camera_frame_processed_relay = self.camera_frame_processed_relays.get(camera_name, None)
+        if camera_frame_processed_relay is not None:
+            self.__put_into_channel(camera_frame_processed_relay.channel, (
+                camera_name, camera_frame_sequence_number, camera_frame_to_process, camera_frame_to_process_warped,
+                fps_number, result_confidences, result_bounding_boxes, result_persons_locations))
+
+        self.persons_locations_fusion.update_camera_persons_locations(
+            camera_projection_area.camera_name, camera_frame_capture_time,
+            camera_projection_area.convert_persons_locations_to_floor_locations(result_persons_locations))
+
+        camera_frame_processed_time = time.time()
+        metrics.DEFAULT_METRICS_REGISTRY.observe("camera_frame_latency_seconds",
+                                                 camera_frame_processed_time - camera_frame_capture_time,
+                                                 camera=camera_name)
+        camera_projection_area.register_processed_camera_frame(camera_frame_capture_time, camera_frame_processed_time)
+        with self.camera_frames_batch_in_progress_lock:
+            if not self.is_abandoned:
+                self.camera_frames_batch_in_progress.popleft()
+                camera_projection_area.camera_frames_to_process.task_done()
+
+    def __put_into_channel(self, channel, item):
+        """
+        Puts item into the channel applying its backpressure policy, sending heartbeats while channel blocks, so
+        waiting for slow GUI is not considered as detection stall.
 
-            camera_frame_to_process_warped = self.__warp_camera_frame_to_process(camera_frame_to_process)
-            self.camera_frame_processed.emit((camera_frame_to_process, camera_frame_to_process_warped, fps_number,
-                                              result_confidences, result_bounding_boxes, result_persons_locations))
+        :param channel: channel
+        :param item: item to put
+        :return: whether item has been accepted (False if it has been dropped or thread has been stopped)
+        """
+        while self.is_running:
+            try:
+                return channel.put(item, timeout=self.HEARTBEAT_INTERVAL)
+            except queue.Full:
+                watchdog.DEFAULT_STAGE_WATCHDOG.beat(self.stage_name)
 
-            self.camera_frames_to_process.task_done()
+        return False
 
     def __initialize_detection_model(self):
         """
-        Initializes detection model.
+        Initializes detection model of the thread configuration.
+        """
+        self.detection_model, self.detection_model_net = self.create_detection_model(
+            self.detection_model_weights_file_path, self.detection_model_configuration_file_path,
+            self.detection_model_input_size, self.detection_model_person_class_id, self.detection_model_backend,
+            self.detection_model_target, self.detection_model_runtime)
+
+    def create_detection_model(self, detection_model_weights_file_path, detection_model_configuration_file_path,
+                               detection_model_input_size, detection_model_person_class_id, detection_model_backend,
+                               detection_model_target, detection_model_runtime):
+        """
+        Creates detection model without changing the thread state, so it can be called from another thread to load
+        replacement detection model. Batched detection model is used when more than one camera frame can be detected
+        at once, when detection model outputs are decoded only for persons or when detection model is ONNX model (ONNX
+        model is run by ONNX Runtime on CPU if it is selected as detection model runtime). Mock detection model is used
+        when weights file path is mock detection model URI (e.g. "mock://?latency=0.05").
+
+        :param detection_model_weights_file_path: detection model weights file path, ONNX model file path or mock
+        detection model URI
+        :param detection_model_configuration_file_path: detection model configuration file path (None for ONNX model)
+        :param detection_model_input_size: detection model input size
+        :param detection_model_person_class_id: detection model person class ID
+        :param detection_model_backend: OpenCV DNN backend of the detection model
+        :param detection_model_target: OpenCV DNN target of the detection model
+        :param detection_model_runtime: runtime of the detection model (None to select it)
+        :return: tuple with detection model and its OpenCV network used for layers profiling (None if it is not
+        available)
+        """
+        if synthetic.is_uri_of_scheme(detection_model_weights_file_path, synthetic.MOCK_DETECTION_MODEL_URI_SCHEME):
+            # Mock detection model has no network, so layers profiling is not available
+            detection_model = synthetic.MockDetectionModel.from_uri(detection_model_weights_file_path)
+            detection_model.person_class_id = detection_model_person_class_id
+            return detection_model, None
+
+        if self.detection_model_max_batch_size > 1 or self.is_person_only_decoding or \
+                detectors.is_onnx_model(detection_model_weights_file_path):
+            is_onnx_runtime_used = detectors.select_detection_model_runtime(
+                detection_model_weights_file_path, detection_model_backend, detection_model_target,
+                detection_model_runtime) == detectors.ONNX_RUNTIME
+            detection_model = detectors.BatchedDetectionModel(detection_model_weights_file_path,
+                                                              detection_model_configuration_file_path,
+                                                              is_onnx_runtime_used)
+            detection_model.set_preferable_backend_and_target(detection_model_backend, detection_model_target)
+            detection_model.set_input_params(self.detection_model_input_scale, detection_model_input_size)
+            # Layers profiling is available for OpenCV networks only
+            return detection_model, None if is_onnx_runtime_used else detection_model.net
+
+        # Detection model is created from the network, so the network can be used for profiling
+        detection_model_net = detectors.read_darknet_net(detection_model_configuration_file_path,
+                                                         detection_model_weights_file_path)
+        detection_model = cv.dnn_DetectionModel(detection_model_net)
+        detection_model.setPreferableBackend(detection_model_backend)
+        detection_model.setPreferableTarget(detection_model_target)
+        detection_model.setInputParams(self.detection_model_input_scale, detection_model_input_size)
+        return detection_model, detection_model_net
+
+    def get_detection_model_configuration(self):
         """
-        self.detection_model = cv.dnn_DetectionModel(self.detection_model_weights_file_path,
-                                                     self.detection_model_configuration_file_path)
-        self.detection_model.setPreferableBackend(cv.dnn.DNN_BACKEND_CUDA)
-        self.detection_model.setPreferableTarget(cv.dnn.DNN_TARGET_CUDA)
-        self.detection_model.setInputParams(self.detection_model_input_scale, self.detection_model_input_size)
+        Returns configuration of the detection model the thread runs.
 
-    def __initialize_perspective_transformation_matrix(self):
+        :return: dictionary with detection model weights and configuration file paths, input size, person class ID,
+        backend, target and runtime
         """
-        Initializes perspective transformation matrix.
+        return {"detection_model_weights_file_path": self.detection_model_weights_file_path,
+                "detection_model_configuration_file_path": self.detection_model_configuration_file_path,
+                "detection_model_input_size": self.detection_model_input_size,
+                "detection_model_person_class_id": self.detection_model_person_class_id,
+                "detection_model_backend": self.detection_model_backend,
+                "detection_model_target": self.detection_model_target,
+                "detection_model_runtime": self.detection_model_runtime}
+
+    def set_replacement_detection_model(self, detection_model, detection_model_net, detection_model_configuration):
         """
-        source_points = np.float32(self.projection_area_coordinates)
-        destination_points = np.float32([[self.projection_area_resolution[0], 0], self.projection_area_resolution,
-                                         [0, self.projection_area_resolution[1]], [0, 0]])
-        self.perspective_transformation_matrix = cv.getPerspectiveTransform(source_points, destination_points)
+        Sets replacement detection model that is swapped in before the next batch of camera frames (replacement that
+        has not been swapped in yet is replaced).
 
-    def __detect_camera_frame_objects_and_measure_fps(self, camera_frame_to_process):
+        :param detection_model: replacement detection model (see create_detection_model)
+        :param detection_model_net: OpenCV network of the replacement detection model (None if it is not available)
+        :param detection_model_configuration: configuration of the replacement detection model (see
+        get_detection_model_configuration)
         """
-        Detects objects on the camera frame and measures FPS.
+        with self.replacement_detection_model_lock:
+            self.replacement_detection_model = (detection_model, detection_model_net, detection_model_configuration)
+        self.camera_frame_available.set()  # Idle thread swaps replacement in without waiting for camera frames
 
-        :param camera_frame_to_process: camera frame to process
-        :return: tuple with class id's, confidences, bounding boxes and FPS number
+    def __swap_detection_model_if_replaced(self):
+        """
+        Swaps in replacement detection model if it has been set. Swap happens between batches in this thread, so every
+        camera frame is detected and post-processed by one detection model, while attached cameras, their projection
+        areas and persons locations fusion are kept.
+        """
+        with self.replacement_detection_model_lock:
+            replacement_detection_model, self.replacement_detection_model = self.replacement_detection_model, None
+        if replacement_detection_model is None:
+            return
+
+        self.detection_model, self.detection_model_net, detection_model_configuration = replacement_detection_model
+        for attribute_name, attribute_value in detection_model_configuration.items():
+            setattr(self, attribute_name, attribute_value)
+        # Layers of the previous network are not collected into the profile of the new one
+        self.layers_profiler = None
+        self.detection_model_swapped.emit(self.get_detection_model_configuration())
+
+    def __get_next_camera_frame_to_process(self):
+        """
+        Gets next camera frame to process. Cameras are visited in round-robin order starting from the camera that
+        follows the last processed one, so a fast camera cannot starve the others.
+
+        :return: tuple with camera projection area, camera frame to process, its capture time and sequence number
+        (tuple of None values if there are no camera frames to process)
+        """
+        # Event is cleared before the channels are visited, so camera frame put after the visit sets it again
+        self.camera_frame_available.clear()
+        with self.camera_projection_areas_lock:
+            camera_projection_areas = list(self.camera_projection_areas.values())
+
+        for i in range(len(camera_projection_areas)):
+            camera_projection_area_index = (self.__next_camera_projection_area_index + i) % len(
+                camera_projection_areas)
+            camera_projection_area = camera_projection_areas[camera_projection_area_index]
+            try:
+                camera_frame_to_process, camera_frame_capture_time, camera_frame_sequence_number = \
+                    camera_projection_area.camera_frames_to_process.get_nowait()
+            except queue.Empty:
+                continue
+
+            self.__next_camera_projection_area_index = camera_projection_area_index + 1
+            metrics.DEFAULT_METRICS_REGISTRY.observe("pipeline_stage_latency_seconds",
+                                                     time.time() - camera_frame_capture_time, stage="queue_wait",
+                                                     camera=camera_projection_area.camera_name)
+            return camera_projection_area, camera_frame_to_process, camera_frame_capture_time, \
+                camera_frame_sequence_number
+
+        return None, None, None, None
+
+    def __get_next_camera_frames_batch_to_process(self):
+        """
+        Gets next batch of camera frames to process (dynamic batching). After the first camera frame has been taken,
+        camera frames of other cameras are added to the batch until it reaches maximum batch size, every attached camera
+        has contributed a frame or maximum batch wait time has passed.
+
+        :return: list of tuples with camera projection area, camera frame to process, its capture time and sequence
+        number
+        """
+        camera_frame_to_process_tuple = self.__get_next_camera_frame_to_process()
+        if camera_frame_to_process_tuple[0] is None:
+            return []
+
+        camera_frames_batch = [camera_frame_to_process_tuple]
+        with self.camera_projection_areas_lock:
+            batch_size = min(self.detection_model_max_batch_size, len(self.camera_projection_areas))
+
+        batch_wait_end_time = time.time() + self.detection_model_max_batch_wait_time
+        while len(camera_frames_batch) < batch_size and time.time() < batch_wait_end_time and self.is_running:
+            camera_frame_to_process_tuple = self.__get_next_camera_frame_to_process()
+            if camera_frame_to_process_tuple[0] is None:
+                self.camera_frame_available.wait(max(batch_wait_end_time - time.time(), 0))
+                continue
+
+            camera_frames_batch.append(camera_frame_to_process_tuple)
+
+        return camera_frames_batch
+
+    def __detect_camera_frames_objects_and_measure_fps(self, camera_frames_batch):
         """
+        Detects objects on the camera frames and measures FPS. When detection model cascade is enabled, the batch is
+        detected by the detection model the cascade has selected with the confidence threshold lowered by the ambiguity
+        margin, so the cascade sees persons near the threshold, and detections below the threshold are removed
+        afterwards.
+
+        :param camera_frames_batch: list of tuples with camera projection area, camera frame to process, its capture
+        time and sequence number
+        :return: tuple with list of class id's, confidences and bounding boxes tuples (one per camera frame), FPS number
+        and person class ID of the detection model that has detected the camera frames
+        """
+        camera_frames_to_process = [camera_frame_to_process for _, camera_frame_to_process, _, _ in camera_frames_batch]
+
+        detection_model, person_class_id = self.detection_model, self.detection_model_person_class_id
+        detection_model_cascade = self.detection_model_cascade
+        confidence_threshold = self.detection_model_confidence_threshold
+        with self.accurate_detection_model_lock:
+            accurate_detection_model = self.accurate_detection_model
+        if detection_model_cascade is not None:
+            if accurate_detection_model is not None and \
+                    detection_model_cascade.get_detection_model() == cascade.ACCURATE_DETECTION_MODEL:
+                detection_model = accurate_detection_model[0]
+                person_class_id = accurate_detection_model[2]["detection_model_person_class_id"]
+            confidence_threshold = max(confidence_threshold - detection_model_cascade.ambiguity_margin, 0.0)
+
         start_detection_time = time.time()
-        class_ids, confidences, bounding_boxes = self.detection_model.detect(
-            camera_frame_to_process, self.detection_model_confidence_threshold, self.detection_model_nms_threshold)
+        if self.is_person_only_decoding:
+            camera_frames_detections = detection_model.detect_persons_batch(
+                camera_frames_to_process, person_class_id, confidence_threshold, self.detection_model_nms_threshold,
+                [camera_projection_area.get_projection_area_mask(
+                    (camera_frame_to_process.shape[1], camera_frame_to_process.shape[0]))
+                    for camera_projection_area, camera_frame_to_process, _, _ in camera_frames_batch])
+        elif self.detection_model_max_batch_size > 1:
+            camera_frames_detections = detection_model.detect_batch(camera_frames_to_process, confidence_threshold,
+                                                                    self.detection_model_nms_threshold)
+        else:
+            camera_frames_detections = [detection_model.detect(camera_frames_to_process[0], confidence_threshold,
+                                                               self.detection_model_nms_threshold)]
         end_detection_time = time.time()
-        fps_number = 1 / (end_detection_time - start_detection_time)
+        fps_number = len(camera_frames_to_process) / (end_detection_time - start_detection_time)
+
+        if detection_model_cascade is not None:
+            camera_frames_detections = self.__update_detection_model_cascade(
+                detection_model_cascade, camera_frames_detections, person_class_id,
+                accurate_detection_model is not None)
+        # Layers profile is collected for the network of the main detection model only
+        if detection_model is self.detection_model:
+            self.__collect_layers_profile()
+
+        return camera_frames_detections, fps_number, person_class_id
+
+    def __update_detection_model_cascade(self, detection_model_cascade, camera_frames_detections, person_class_id,
+                                         is_accurate_detection_model_loaded):
+        """
+        Updates detection model cascade with the scene load of the detected camera frames and removes detections
+        below the confidence threshold.
+
+        :param detection_model_cascade: detection model cascade
+        :param camera_frames_detections: list of class id's, confidences and bounding boxes tuples (one per camera
+        frame) detected with the lowered confidence threshold
+        :param person_class_id: person class ID of the detection model that has detected the camera frames
+        :param is_accurate_detection_model_loaded: whether accurate detection model has been loaded (cascade does not
+        escalate before that)
+        :return: list of class id's, confidences and bounding boxes tuples with confidence not less than the threshold
+        """
+        frames_person_confidences = []
+        thresholded_camera_frames_detections = []
+        for class_ids, confidences, bounding_boxes in camera_frames_detections:
+            class_ids, confidences = np.asarray(class_ids), np.asarray(confidences)
+            flat_confidences = confidences.reshape(-1)
+            frames_person_confidences.append(flat_confidences[class_ids.reshape(-1) == person_class_id])
+            is_confident = flat_confidences >= self.detection_model_confidence_threshold
+            thresholded_camera_frames_detections.append(
+                (class_ids[is_confident], confidences[is_confident], np.asarray(bounding_boxes)[is_confident]))
+
+        if is_accurate_detection_model_loaded:
+            detection_model_cascade.update(*cascade.calculate_scene_load(
+                frames_person_confidences, self.detection_model_confidence_threshold,
+                detection_model_cascade.ambiguity_margin))
+
+        return thresholded_camera_frames_detections
+
+    def set_accurate_detection_model(self, detection_model, detection_model_net, detection_model_configuration):
+        """
+        Sets accurate detection model of the cascade (None to remove it).
+
+        :param detection_model: accurate detection model (see create_detection_model)
+        :param detection_model_net: OpenCV network of the accurate detection model (None if it is not available)
+        :param detection_model_configuration: configuration of the accurate detection model (see
+        get_detection_model_configuration)
+        """
+        with self.accurate_detection_model_lock:
+            self.accurate_detection_model = (detection_model, detection_model_net, detection_model_configuration) \
+                if detection_model is not None else None
+
+    def __collect_layers_profile(self):
+        """
+        Collects per-layer timings of the last detection if layers profiling is enabled.
+        """
+        layers_profiling_window_size = self.layers_profiling_window_size
+        if layers_profiling_window_size is None or self.detection_model_net is None:
+            self.layers_profiler = None
+            return
 
-        return class_ids, confidences, bounding_boxes, fps_number
+        if self.layers_profiler is None or self.layers_profiler.window_size != layers_profiling_window_size:
+            # Layers of ONNX models are not mapped to Darknet configuration sections
+            self.layers_profiler = detectors.LayersProfiler(
+                self.detection_model_net, None if detectors.is_onnx_model(self.detection_model_weights_file_path)
+                else self.detection_model_configuration_file_path, layers_profiling_window_size)
+        self.layers_profiler.collect(self.detection_model_net)
 
-    def __is_bounding_box_bottom_edge_center_point_within_projection_area(self, bounding_box):
+    def __is_bounding_box_bottom_edge_center_point_within_projection_area(self, camera_projection_area, bounding_box,
+                                                                           is_already_checked=False):
         """
         Calculates bounding box bottom edge center point and checks whether it is within the projection area.
 
+        :param camera_projection_area: camera projection area
         :param bounding_box: bounding box
+        :param is_already_checked: whether bounding box has been already checked against projection area mask during
+        decoding (the check is skipped then)
         :return: calculated bounding box bottom edge center point and indication whether it is within the projection
         area
         """
         bounding_box_bottom_edge_center_point = Point((bounding_box[0] + bounding_box[2] / 2,
                                                        bounding_box[1] + bounding_box[3]))
 
-        return (bounding_box_bottom_edge_center_point,
-                bounding_box_bottom_edge_center_point.within(self.projection_area_polygon))
+        return (bounding_box_bottom_edge_center_point, is_already_checked or
+                bounding_box_bottom_edge_center_point.within(camera_projection_area.projection_area_polygon))
 
-    def __calculate_person_location(self, bounding_box_bottom_edge_center_point):
+    def __calculate_person_location(self, camera_projection_area, bounding_box_bottom_edge_center_point):
         """
         Calculates person location by transforming it in perspective.
 
+        :param camera_projection_area: camera projection area
         :param bounding_box_bottom_edge_center_point: bounding box bottom edge center point
         :return: transformed bounding box bottom edge center point
         """
-        return ((self.perspective_transformation_matrix[0][0] * bounding_box_bottom_edge_center_point.x +
-                 self.perspective_transformation_matrix[0][1] * bounding_box_bottom_edge_center_point.y +
-                 self.perspective_transformation_matrix[0][2]) /
-                (self.perspective_transformation_matrix[2][0] * bounding_box_bottom_edge_center_point.x +
-                 self.perspective_transformation_matrix[2][1] * bounding_box_bottom_edge_center_point.y +
-                 self.perspective_transformation_matrix[2][2]),
-                (self.perspective_transformation_matrix[1][0] * bounding_box_bottom_edge_center_point.x +
-                 self.perspective_transformation_matrix[1][1] * bounding_box_bottom_edge_center_point.y +
-                 self.perspective_transformation_matrix[1][2]) /
-                (self.perspective_transformation_matrix[2][0] * bounding_box_bottom_edge_center_point.x +
-                 self.perspective_transformation_matrix[2][1] * bounding_box_bottom_edge_center_point.y +
-                 self.perspective_transformation_matrix[2][2]))
-
-    def __warp_camera_frame_to_process(self, camera_frame_to_process):
+        perspective_transformation_matrix = camera_projection_area.perspective_transformation_matrix
+        return ((perspective_transformation_matrix[0][0] * bounding_box_bottom_edge_center_point.x +
+                 perspective_transformation_matrix[0][1] * bounding_box_bottom_edge_center_point.y +
+                 perspective_transformation_matrix[0][2]) /
+                (perspective_transformation_matrix[2][0] * bounding_box_bottom_edge_center_point.x +
+                 perspective_transformation_matrix[2][1] * bounding_box_bottom_edge_center_point.y +
+                 perspective_transformation_matrix[2][2]),
+                (perspective_transformation_matrix[1][0] * bounding_box_bottom_edge_center_point.x +
+                 perspective_transformation_matrix[1][1] * bounding_box_bottom_edge_center_point.y +
+                 perspective_transformation_matrix[1][2]) /
+                (perspective_transformation_matrix[2][0] * bounding_box_bottom_edge_center_point.x +
+                 perspective_transformation_matrix[2][1] * bounding_box_bottom_edge_center_point.y +
+                 perspective_transformation_matrix[2][2]))
+
+    def __warp_camera_frame_to_process(self, camera_projection_area, camera_frame_to_process):
         """
         Warps camera frame to process.
 
+        :param camera_projection_area: camera projection area
         :param camera_frame_to_process: camera frame to process
         :return: warped camera frame to process
         """
-        return cv.warpPerspective(camera_frame_to_process, self.perspective_transformation_matrix,
-                                  self.projection_area_resolution)
+        return cv.warpPerspective(camera_frame_to_process, camera_projection_area.perspective_transformation_matrix,
+                                  camera_projection_area.projection_area_resolution)
 
     def stop(self):
         """
         Stops thread: returns thread to the initial state (before running).
         """
         self.is_running = False
+        self.camera_frame_available.set()
         self.wait()
-        self.camera_frames_to_process.queue.clear()
+        with self.camera_projection_areas_lock:
+            for camera_projection_area in self.camera_projection_areas.values():
+                camera_projection_area.camera_frames_to_process.item_put_into_empty_channel_callback = None
+                camera_projection_area.clear_camera_frames_to_process()
+            self.camera_projection_areas.clear()
+        self.layers_profiler = None
         self.detection_model = None
-        self.perspective_transformation_matrix = None
-        self.projection_area_polygon = None
+        self.detection_model_net = None
+        with self.replacement_detection_model_lock:
+            self.replacement_detection_model = None
+        self.set_accurate_detection_model(None, None, None)
+
+    def abandon(self):
+        """
+        Abandons stalled thread without waiting for it: camera frames it is processing are released, so camera stream
+        reader threads are not blocked, its signals are disconnected and it finishes as soon as it returns from the
+        stalled call.
+        """
+        self.is_running = False
+        self.camera_frame_available.set()
+        with self.camera_frames_batch_in_progress_lock:
+            self.is_abandoned = True
+            while len(self.camera_frames_batch_in_progress) > 0:
+                self.camera_frames_batch_in_progress.popleft().camera_frames_to_process.task_done()
+        for signal in (self.camera_frame_processed, self.persons_locations_fused, self.detection_model_swapped):
+            try:
+                signal.disconnect()
+            except TypeError:
+                pass  # Signal has no connections
 
 
-class PersonLocationDetectionService:
+class DetectionModelLoadingThread(QtCore.QThread):
     """
-    Service that detects locations of persons within the projection area.
+    Thread that loads replacement detection model in the background (loading takes seconds, e.g. CUDA context
+    creation), warms it up and hands it over to the person location detection thread, so detection is not stopped.
     """
 
-    def __init__(self):
-        """
-        Initializes service.
+    detection_model_swap_failed = QtCore.pyqtSignal(str)
+
+    def __init__(self, person_location_detection_thread, detection_model_configuration,
+                 replacement_detection_model_loaded):
         """
-        self.__person_location_detection_thread = None
+        Initializes thread.
 
-    def is_person_location_detection_running(self):
+        :param person_location_detection_thread: person location detection thread that creates detection model
+        :param detection_model_configuration: configuration of the replacement detection model (see
+        PersonLocationDetectionThread.get_detection_model_configuration)
+        :param replacement_detection_model_loaded: function that is called with the loaded detection model, its network
+        and configuration
         """
-        Returns whether person location detection is running (whether person location detection thread has been
+        super(DetectionModelLoadingThread, self).__init__()
+
+        self.person_location_detection_thread = person_location_detection_thread
+        self.detection_model_configuration = detection_model_configuration
+        self.replacement_detection_model_loaded = replacement_detection_model_loaded
+
+    def run(self):
+        """
+        Runs thread: creates detection model, runs it once on a blank frame, so the first camera frames after the swap
+        are not delayed by lazy initialization, and hands it over.
+        """
+        threading.current_thread().name = "Detection model loading"
+
+        try:
+            detection_model, detection_model_net = self.person_location_detection_thread.create_detection_model(
+                **self.detection_model_configuration)
+            detection_model_input_size = self.detection_model_configuration["detection_model_input_size"]
+            detection_model.detect(np.zeros((detection_model_input_size[1], detection_model_input_size[0], 3),
+                                            dtype=np.uint8), 0.5, 0.4)
+        except Exception as exception:
+            self.detection_model_swap_failed.emit(str(exception))
+            return
+
+        self.replacement_detection_model_loaded(detection_model, detection_model_net,
+                                                self.detection_model_configuration)
+
+
+class PersonLocationDetectionService:
+    """
+    Service that detects locations of persons within the projection areas of the attached cameras.
+    """
+
+    def __init__(self):
+        """
+        Initializes service.
+        """
+        self.__person_location_detection_thread = None
+        self.__layers_profiling_window_size = None
+        self.__camera_frame_processed_slots = []
+        self.__persons_locations_fused_slots = []
+        self.__abandoned_person_location_detection_threads = []
+        self.__autotuning_profile = None
+        self.__detection_model_swapped_slots = []
+        self.__detection_model_loading_thread = None
+        self.__detection_model_cascade = None
+        self.__accurate_detection_model_configuration = None
+        self.__accurate_detection_model_loading_thread = None
+
+    def is_person_location_detection_running(self):
+        """
+        Returns whether person location detection is running (whether person location detection thread has been
         started).
 
         :return: whether person location detection is running
         """
-        return self.__person_location_detection_thread is not None and self.__person_location_detection_thread.is_running
-
-    def start_person_location_detection(self, detection_model_weights_file_path,
-                                        detection_model_configuration_file_path, detection_model_input_scale,
-                                        detection_model_input_size, detection_model_person_class_id,
-                                        detection_model_confidence_threshold, detection_model_nms_threshold,
-                                        projection_area_coordinates, projection_area_resolution,
-                                        camera_frame_processed_slot):
+        return self.__person_location_detection_thread is not None and \
+            self.__person_location_detection_thread.is_running
+
+    def start_person_location_detection(
+            self, detection_model_weights_file_path, detection_model_configuration_file_path,
+            detection_model_input_scale, detection_model_input_size, detection_model_person_class_id,
+            detection_model_confidence_threshold, detection_model_nms_threshold, camera_frame_processed_slot,
+            detection_model_max_batch_size=1, detection_model_max_batch_wait_time=0.005, is_person_only_decoding=False,
+            detection_model_backend=cv.dnn.DNN_BACKEND_CUDA, detection_model_target=cv.dnn.DNN_TARGET_CUDA,
+            camera_frame_processed_channel_specification=channels.DEFAULT_GUI_CHANNEL_SPECIFICATION,
+            is_autotuning_profile_used=False, detection_model_runtime=None):
         """
-        Creates person location detection thread, connects signal with slot and starts thread execution.
+        Creates person location detection thread, connects signal with slot and starts thread execution. Cameras need
+        to be attached afterwards in order for their frames to be processed.
 
-        :param detection_model_weights_file_path: detection model weights file path
-        :param detection_model_configuration_file_path: detection model configuration file path
+        :param detection_model_weights_file_path: detection model weights file path, ONNX model file path or mock
+        detection model URI
+        :param detection_model_configuration_file_path: detection model configuration file path (None for ONNX model)
         :param detection_model_input_scale: detection model scale factor for input frames
-        :param detection_model_input_size: detection model input size
-        :param detection_model_person_class_id: detection model person class ID
+        :param detection_model_input_size: detection model input size (None to take it from the configuration, see
+        model_registry)
+        :param detection_model_person_class_id: detection model person class ID (None to take it from the class names
+        file next to the configuration, see model_registry)
         :param detection_model_confidence_threshold: detection model confidence threshold
         :param detection_model_nms_threshold: detection model non-maximum suppression threshold
-        :param projection_area_coordinates: projection area coordinates
-        :param projection_area_resolution: projection area resolution
         :param camera_frame_processed_slot: slot that is called when the camera frame has been processed
+        :param detection_model_max_batch_size: maximum number of camera frames that are detected with a single forward
+        pass of the detection model
+        :param detection_model_max_batch_wait_time: maximum time (in seconds) to wait for other cameras frames after the
+        first camera frame of the batch has been taken
+        :param is_person_only_decoding: whether detection model outputs are decoded only for persons within projection
+        areas (rows are rejected before non-maximum suppression)
+        :param detection_model_backend: OpenCV DNN backend of the detection model
+        :param detection_model_target: OpenCV DNN target of the detection model
+        :param camera_frame_processed_channel_specification: backpressure policy and capacity of the channels camera
+        frames processing results are delivered to the slots through (every camera has own channel), e.g.
+        "drop_oldest:1" (see channels)
+        :param is_autotuning_profile_used: whether detection model backend, target, input size, OpenCV threads number
+        and capture to detection channel of the attached cameras are taken from the cached autotuning profile of the
+        detection model on this host (passed ones are used if the detection model has not been autotuned)
+        :param detection_model_runtime: runtime of the detection model: "opencv", "onnxruntime" (CPU only, needed for
+        INT8 quantized ONNX models) or None to run ONNX model by ONNX Runtime if it is installed and OpenCV CPU backend
+        and target are set
         """
         if self.is_person_location_detection_running():
             raise Exception("You need to stop person location detection first!")
-
-        self.__person_location_detection_thread = PersonLocationDetectionThread(detection_model_weights_file_path,
-                                                                                detection_model_configuration_file_path,
-                                                                                detection_model_input_scale,
-                                                                                detection_model_input_size,
-                                                                                detection_model_person_class_id,
-                                                                                detection_model_confidence_threshold,
-                                                                                detection_model_nms_threshold,
-                                                                                projection_area_coordinates,
-                                                                                projection_area_resolution)
+        detection_model_input_size, detection_model_person_class_id = self.__configure_detection_model(
+            detection_model_weights_file_path, detection_model_configuration_file_path, detection_model_input_size,
+            detection_model_person_class_id, detection_model_backend, detection_model_target, detection_model_runtime)
+
+        self.__autotuning_profile = None
+        self.__detection_model_cascade = None
+        self.__accurate_detection_model_configuration = None
+        if is_autotuning_profile_used:
+            self.load_autotuning_profile(detection_model_weights_file_path, detection_model_configuration_file_path)
+        if self.__autotuning_profile is not None:
+            detection_model_backend = self.__autotuning_profile["detection_model_backend"]
+            detection_model_target = self.__autotuning_profile["detection_model_target"]
+            detection_model_input_size = tuple(self.__autotuning_profile["detection_model_input_size"])
+
+        self.__person_location_detection_thread = PersonLocationDetectionThread(
+            detection_model_weights_file_path, detection_model_configuration_file_path, detection_model_input_scale,
+            detection_model_input_size, detection_model_person_class_id, detection_model_confidence_threshold,
+            detection_model_nms_threshold, detection_model_max_batch_size, detection_model_max_batch_wait_time,
+            is_person_only_decoding, detection_model_backend, detection_model_target,
+            camera_frame_processed_channel_specification, detection_model_runtime)
         self.__person_location_detection_thread.camera_frame_processed.connect(camera_frame_processed_slot)
+        self.__person_location_detection_thread.layers_profiling_window_size = self.__layers_profiling_window_size
+        if self.__autotuning_profile is not None:
+            self.__person_location_detection_thread.opencv_threads_number = \
+                self.__autotuning_profile["opencv_threads_number"]
+        # Slots are kept, so they can be connected to the restarted thread
+        self.__camera_frame_processed_slots = [camera_frame_processed_slot]
+        self.__persons_locations_fused_slots = []
+        self.__detection_model_swapped_slots = []
+        watchdog.DEFAULT_STAGE_WATCHDOG.register_stage(self.__person_location_detection_thread.stage_name,
+                                                       self.restart_person_location_detection)
         self.__person_location_detection_thread.start()
 
-    @property
-    def camera_frames_to_process(self):
+    def restart_person_location_detection(self):
+        """
+        Restarts stalled person location detection thread: stalled thread is abandoned and the new thread with the same
+        configuration, attached cameras, persons locations fusion and slots continues person location detection
+        (detection model is initialized again).
+        """
+        if not self.is_person_location_detection_running():
+            raise Exception("You need to start person location detection first!")
+
+        stalled_thread = self.__person_location_detection_thread
+        stalled_thread.abandon()
+        # Running QThread must not be destroyed, so abandoned threads are kept until they finish
+        self.__abandoned_person_location_detection_threads = [
+            person_location_detection_thread
+            for person_location_detection_thread in self.__abandoned_person_location_detection_threads
+            if not person_location_detection_thread.isFinished()] + [stalled_thread]
+
+        person_location_detection_thread = PersonLocationDetectionThread(
+            stalled_thread.detection_model_weights_file_path, stalled_thread.detection_model_configuration_file_path,
+            stalled_thread.detection_model_input_scale, stalled_thread.detection_model_input_size,
+            stalled_thread.detection_model_person_class_id, stalled_thread.detection_model_confidence_threshold,
+            stalled_thread.detection_model_nms_threshold, stalled_thread.detection_model_max_batch_size,
+            stalled_thread.detection_model_max_batch_wait_time, stalled_thread.is_person_only_decoding,
+            stalled_thread.detection_model_backend, stalled_thread.detection_model_target,
+            stalled_thread.camera_frame_processed_channel_specification, stalled_thread.detection_model_runtime)
+        with stalled_thread.camera_projection_areas_lock:
+            camera_projection_areas = list(stalled_thread.camera_projection_areas.values())
+        for camera_projection_area in camera_projection_areas:
+            person_location_detection_thread.attach_camera_projection_area(camera_projection_area)
+        person_location_detection_thread.persons_locations_fusion = stalled_thread.persons_locations_fusion
+        person_location_detection_thread.layers_profiling_window_size = self.__layers_profiling_window_size
+        person_location_detection_thread.opencv_threads_number = stalled_thread.opencv_threads_number
+        for camera_frame_processed_slot in self.__camera_frame_processed_slots:
+            person_location_detection_thread.camera_frame_processed.connect(camera_frame_processed_slot)
+        for persons_locations_fused_slot in self.__persons_locations_fused_slots:
+            person_location_detection_thread.persons_locations_fused.connect(persons_locations_fused_slot)
+        for detection_model_swapped_slot in self.__detection_model_swapped_slots:
+            person_location_detection_thread.detection_model_swapped.connect(detection_model_swapped_slot)
+        person_location_detection_thread.detection_model_cascade = self.__detection_model_cascade
+        self.__person_location_detection_thread = person_location_detection_thread
+        watchdog.DEFAULT_STAGE_WATCHDOG.register_stage(self.__person_location_detection_thread.stage_name,
+                                                       self.restart_person_location_detection)
+        person_location_detection_thread.start()
+        # Accurate detection model of the cascade is loaded again for the new thread (unless it is still loading)
+        if self.__accurate_detection_model_configuration is not None and \
+                not self.__is_accurate_detection_model_loading_running():
+            self.__start_accurate_detection_model_loading(None)
+
+    def is_detection_model_swap_running(self):
+        """
+        Returns whether replacement detection model is being loaded.
+
+        :return: whether detection model swap is running
+        """
+        return self.__detection_model_loading_thread is not None and self.__detection_model_loading_thread.isRunning()
+
+    def swap_detection_model(self, detection_model_weights_file_path, detection_model_configuration_file_path,
+                             detection_model_input_size=None, detection_model_person_class_id=None,
+                             detection_model_backend=None, detection_model_target=None, detection_model_runtime=None,
+                             detection_model_swap_failed_slot=None):
+        """
+        Swaps detection model without stopping person location detection: replacement detection model is loaded and
+        warmed up in the background while the current one keeps detecting, then it is swapped in between batches of
+        camera frames. Attached cameras, their projection areas and channels, persons locations fusion and slots are
+        kept. Connected "detection model swapped" slots are called after the swap.
+
+        :param detection_model_weights_file_path: detection model weights file path, ONNX model file path or mock
+        detection model URI
+        :param detection_model_configuration_file_path: detection model configuration file path (None for ONNX model)
+        :param detection_model_input_size: detection model input size (None to take it from the configuration)
+        :param detection_model_person_class_id: detection model person class ID (None to take it from the class names
+        file next to the configuration)
+        :param detection_model_backend: OpenCV DNN backend of the detection model (None to keep the current one)
+        :param detection_model_target: OpenCV DNN target of the detection model (None to keep the current one)
+        :param detection_model_runtime: runtime of the detection model (None to select it)
+        :param detection_model_swap_failed_slot: slot that is called with the error message if replacement detection
+        model cannot be loaded (the current one keeps detecting)
+        """
+        if not self.is_person_location_detection_running():
+            raise Exception("You need to start person location detection first!")
+        if self.is_detection_model_swap_running():
+            raise Exception("You need to wait for the detection model swap to finish first!")
+
+        detection_model_configuration = self.__person_location_detection_thread.get_detection_model_configuration()
+        if detection_model_backend is None:
+            detection_model_backend = detection_model_configuration["detection_model_backend"]
+        if detection_model_target is None:
+            detection_model_target = detection_model_configuration["detection_model_target"]
+        detection_model_input_size, detection_model_person_class_id = self.__configure_detection_model(
+            detection_model_weights_file_path, detection_model_configuration_file_path, detection_model_input_size,
+            detection_model_person_class_id, detection_model_backend, detection_model_target, detection_model_runtime)
+
+        self.__detection_model_loading_thread = DetectionModelLoadingThread(
+            self.__person_location_detection_thread,
+            {"detection_model_weights_file_path": detection_model_weights_file_path,
+             "detection_model_configuration_file_path": detection_model_configuration_file_path,
+             "detection_model_input_size": tuple(detection_model_input_size),
+             "detection_model_person_class_id": detection_model_person_class_id,
+             "detection_model_backend": detection_model_backend, "detection_model_target": detection_model_target,
+             "detection_model_runtime": detection_model_runtime},
+            self.__hand_over_replacement_detection_model)
+        if detection_model_swap_failed_slot is not None:
+            self.__detection_model_loading_thread.detection_model_swap_failed.connect(detection_model_swap_failed_slot)
+        self.__detection_model_loading_thread.start()
+
+    def __hand_over_replacement_detection_model(self, detection_model, detection_model_net,
+                                                detection_model_configuration):
+        """
+        Hands over loaded replacement detection model to the current person location detection thread (thread may
+        have been restarted by the watchdog while the replacement was loading).
+
+        :param detection_model: replacement detection model
+        :param detection_model_net: OpenCV network of the replacement detection model (None if it is not available)
+        :param detection_model_configuration: configuration of the replacement detection model
+        """
+        person_location_detection_thread = self.__person_location_detection_thread
+        if person_location_detection_thread is not None:
+            person_location_detection_thread.set_replacement_detection_model(detection_model, detection_model_net,
+                                                                             detection_model_configuration)
+
+    def get_detection_model_configuration(self):
+        """
+        Returns configuration of the detection model person location detection runs.
+
+        :return: dictionary with detection model weights and configuration file paths, input size, person class ID,
+        backend, target and runtime
+        """
+        if not self.is_person_location_detection_running():
+            raise Exception("You need to start person location detection first!")
+
+        return self.__person_location_detection_thread.get_detection_model_configuration()
+
+    def connect_detection_model_swapped_slot(self, detection_model_swapped_slot):
+        """
+        Connects "detection model swapped" slot.
+
+        :param detection_model_swapped_slot: slot that is called with the detection model configuration when the
+        replacement detection model has been swapped in
+        """
+        if self.__person_location_detection_thread is None:
+            raise Exception("You need to start person location detection first!")
+
+        self.__person_location_detection_thread.detection_model_swapped.connect(detection_model_swapped_slot)
+        self.__detection_model_swapped_slots.append(detection_model_swapped_slot)
+
+    def enable_detection_model_cascade(
+            self, detection_model_weights_file_path, detection_model_configuration_file_path,
+            detection_model_input_size=None, detection_model_person_class_id=None, detection_model_backend=None,
+            detection_model_target=None, detection_model_runtime=None,
+            escalation_persons_number=cascade.DEFAULT_ESCALATION_PERSONS_NUMBER,
+            de_escalation_persons_number=cascade.DEFAULT_DE_ESCALATION_PERSONS_NUMBER,
+            escalation_ambiguity=cascade.DEFAULT_ESCALATION_AMBIGUITY,
+            de_escalation_ambiguity=cascade.DEFAULT_DE_ESCALATION_AMBIGUITY,
+            ambiguity_margin=cascade.DEFAULT_AMBIGUITY_MARGIN,
+            de_escalation_batches_number=cascade.DEFAULT_DE_ESCALATION_BATCHES_NUMBER,
+            detection_model_cascade_failed_slot=None):
+        """
+        Enables detection model cascade: the running detection model is the fast one and the accurate (heavier or
+        larger input) detection model is loaded in the background. Camera frames are detected by the fast detection
+        model until the scene gets crowded or ambiguous, then by the accurate one until the scene has been calm for a
+        number of consecutive batches (see cascade.DetectionModelCascade). Scene load is measured over all attached
+        cameras, since camera frames of one batch are detected by one detection model.
+
+        :param detection_model_weights_file_path: accurate detection model weights file path, ONNX model file path or
+        mock detection model URI
+        :param detection_model_configuration_file_path: accurate detection model configuration file path (None for ONNX
+        model)
+        :param detection_model_input_size: accurate detection model input size (None to take it from the
+        configuration)
+        :param detection_model_person_class_id: accurate detection model person class ID (None to take it from the
+        class names file next to the configuration)
+        :param detection_model_backend: OpenCV DNN backend of the accurate detection model (None to use the backend of
+        the fast one)
+        :param detection_model_target: OpenCV DNN target of the accurate detection model (None to use the target of the
+        fast one)
+        :param detection_model_runtime: runtime of the accurate detection model (None to select it)
+        :param escalation_persons_number: number of persons on a camera frame the cascade escalates at
+        :param de_escalation_persons_number: maximum number of persons on a camera frame of the calm scene
+        :param escalation_ambiguity: share of persons within the ambiguity margin around the confidence threshold the
+        cascade escalates at (None to escalate by number of persons only)
+        :param de_escalation_ambiguity: maximum ambiguity of the calm scene (ignored if escalation ambiguity is None)
+        :param ambiguity_margin: margin around the confidence threshold persons are ambiguous within
+        :param de_escalation_batches_number: number of consecutive calm batches the cascade de-escalates after
+        :param detection_model_cascade_failed_slot: slot that is called with the error message if accurate detection
+        model cannot be loaded (the fast one keeps detecting)
+        """
+        if not self.is_person_location_detection_running():
+            raise Exception("You need to start person location detection first!")
+        if self.__is_accurate_detection_model_loading_running():
+            raise Exception("You need to wait for the accurate detection model loading to finish first!")
+
+        detection_model_configuration = self.__person_location_detection_thread.get_detection_model_configuration()
+        if detection_model_backend is None:
+            detection_model_backend = detection_model_configuration["detection_model_backend"]
+        if detection_model_target is None:
+            detection_model_target = detection_model_configuration["detection_model_target"]
+        detection_model_input_size, detection_model_person_class_id = self.__configure_detection_model(
+            detection_model_weights_file_path, detection_model_configuration_file_path, detection_model_input_size,
+            detection_model_person_class_id, detection_model_backend, detection_model_target, detection_model_runtime)
+        detection_model_cascade = cascade.DetectionModelCascade(
+            escalation_persons_number, de_escalation_persons_number, escalation_ambiguity, de_escalation_ambiguity,
+            ambiguity_margin, de_escalation_batches_number)
+
+        self.disable_detection_model_cascade()
+        self.__detection_model_cascade = detection_model_cascade
+        self.__accurate_detection_model_configuration = {
+            "detection_model_weights_file_path": detection_model_weights_file_path,
+            "detection_model_configuration_file_path": detection_model_configuration_file_path,
+            "detection_model_input_size": tuple(detection_model_input_size),
+            "detection_model_person_class_id": detection_model_person_class_id,
+            "detection_model_backend": detection_model_backend, "detection_model_target": detection_model_target,
+            "detection_model_runtime": detection_model_runtime}
+        # Fast detection model keeps detecting every camera frame until accurate one has been loaded
+        self.__person_location_detection_thread.detection_model_cascade = detection_model_cascade
+        self.__start_accurate_detection_model_loading(detection_model_cascade_failed_slot)
+
+    def disable_detection_model_cascade(self):
+        """
+        Disables detection model cascade: camera frames are detected only by the fast detection model and the accurate
+        one is released.
+        """
+        self.__detection_model_cascade = None
+        self.__accurate_detection_model_configuration = None
+        if self.__person_location_detection_thread is not None:
+            self.__person_location_detection_thread.detection_model_cascade = None
+            self.__person_location_detection_thread.set_accurate_detection_model(None, None, None)
+
+    def is_detection_model_cascade_enabled(self):
+        """
+        Returns whether detection model cascade is enabled.
+
+        :return: whether detection model cascade is enabled
+        """
+        return self.__detection_model_cascade is not None
+
+    def get_detection_model_cascade_statistics(self):
+        """
+        Returns statistics of the detection model cascade.
+
+        :return: dictionary with whether accurate detection model has been loaded, whether cascade is escalated, number
+        of escalations and number and share of batches detected by every detection model (see
+        cascade.DetectionModelCascade.get_statistics)
         """
-        Gets camera frames to process queue.
+        if self.__detection_model_cascade is None:
+            raise Exception("You need to enable detection model cascade first!")
 
-        :return: camera frames to process queue
+        person_location_detection_thread = self.__person_location_detection_thread
+        return dict(self.__detection_model_cascade.get_statistics(),
+                    is_accurate_detection_model_loaded=person_location_detection_thread is not None and
+                    person_location_detection_thread.accurate_detection_model is not None)
+
+    def __is_accurate_detection_model_loading_running(self):
+        """
+        Returns whether accurate detection model of the cascade is being loaded.
+
+        :return: whether accurate detection model loading is running
+        """
+        return self.__accurate_detection_model_loading_thread is not None and \
+            self.__accurate_detection_model_loading_thread.isRunning()
+
+    def __start_accurate_detection_model_loading(self, detection_model_cascade_failed_slot):
+        """
+        Starts loading of the accurate detection model of the cascade in the background.
+
+        :param detection_model_cascade_failed_slot: slot that is called with the error message if accurate detection
+        model cannot be loaded (None if it is not needed)
+        """
+        self.__accurate_detection_model_loading_thread = DetectionModelLoadingThread(
+            self.__person_location_detection_thread, self.__accurate_detection_model_configuration,
+            self.__hand_over_accurate_detection_model)
+        if detection_model_cascade_failed_slot is not None:
+            self.__accurate_detection_model_loading_thread.detection_model_swap_failed.connect(
+                detection_model_cascade_failed_slot)
+        self.__accurate_detection_model_loading_thread.start()
+
+    def __hand_over_accurate_detection_model(self, detection_model, detection_model_net,
+                                             detection_model_configuration):
+        """
+        Hands over loaded accurate detection model to the current person location detection thread unless cascade has
+        been disabled or enabled with another accurate detection model while it was loading.
+
+        :param detection_model: accurate detection model
+        :param detection_model_net: OpenCV network of the accurate detection model (None if it is not available)
+        :param detection_model_configuration: configuration of the accurate detection model
+        """
+        person_location_detection_thread = self.__person_location_detection_thread
+        if person_location_detection_thread is not None and \
+                detection_model_configuration is self.__accurate_detection_model_configuration:
+            person_location_detection_thread.set_accurate_detection_model(detection_model, detection_model_net,
+                                                                          detection_model_configuration)
+
+    @staticmethod
+    def get_detection_models(directory_path=model_registry.DETECTION_MODELS_DIRECTORY_PATH):
+        """
+        Returns detection models of the detection models directory with metadata of their configurations (weights are
+        not loaded).
+
+        :param directory_path: detection models directory path
+        :return: list of detection model entries (see model_registry.scan_detection_models)
+        """
+        return model_registry.scan_detection_models(directory_path)
+
+    @staticmethod
+    def __configure_detection_model(detection_model_weights_file_path, detection_model_configuration_file_path,
+                                    detection_model_input_size, detection_model_person_class_id,
+                                    detection_model_backend, detection_model_target, detection_model_runtime):
+        """
+        Checks detection model runtime, checks that detection model weights match the configuration and takes input
+        size and person class ID that are not set from the configuration metadata (the cached one if the configuration
+        has not been modified).
+
+        :param detection_model_weights_file_path: detection model weights file path, ONNX model file path or mock
+        detection model URI
+        :param detection_model_configuration_file_path: detection model configuration file path (None for ONNX model)
+        :param detection_model_input_size: detection model input size (None to take it from the configuration)
+        :param detection_model_person_class_id: detection model person class ID (None to take it from the class names
+        file next to the configuration)
+        :param detection_model_backend: OpenCV DNN backend of the detection model
+        :param detection_model_target: OpenCV DNN target of the detection model
+        :param detection_model_runtime: runtime of the detection model (None to select it)
+        :return: tuple with detection model input size and person class ID
+        """
+        is_mock_detection_model = synthetic.is_uri_of_scheme(detection_model_weights_file_path,
+                                                             synthetic.MOCK_DETECTION_MODEL_URI_SCHEME)
+        if not is_mock_detection_model:
+            detectors.select_detection_model_runtime(detection_model_weights_file_path, detection_model_backend,
+                                                     detection_model_target, detection_model_runtime)
+        if detection_model_configuration_file_path is None or is_mock_detection_model:
+            # Input size of ONNX model is fixed by the model itself, the set one is used only for dynamic input size
+            # (mock detection model has no configuration at all)
+            return detection_model_input_size or model_registry.DEFAULT_DETECTION_MODEL_INPUT_SIZE, \
+                detection_model_person_class_id or model_registry.DEFAULT_PERSON_CLASS_ID
+
+        detection_model_metadata = model_registry.read_detection_model_metadata(detection_model_configuration_file_path)
+        if not detectors.is_onnx_model(detection_model_weights_file_path) and \
+                not model_registry.is_weights_file_matching_configuration(detection_model_weights_file_path,
+                                                                          detection_model_metadata):
+            raise Exception("You need to use weights file that matches the configuration!")
+        if detection_model_input_size is None:
+            detection_model_input_size = detection_model_metadata["input_size"]
+        if detection_model_person_class_id is None:
+            detection_model_person_class_id = model_registry.read_person_class_id(
+                detection_model_configuration_file_path)
+        if detection_model_metadata["classes_number"] is not None and \
+                detection_model_person_class_id >= detection_model_metadata["classes_number"]:
+            raise Exception("You need to set person class ID less than the number of detection model classes!")
+
+        return detection_model_input_size, detection_model_person_class_id
+
+    def load_autotuning_profile(self, detection_model_weights_file_path, detection_model_configuration_file_path,
+                                cache_file_path=autotuning.AUTOTUNING_PROFILES_CACHE_FILE_PATH):
+        """
+        Loads cached autotuning profile of the detection model on this host (see benchmarks/autotune.py). Hashes of the
+        detection model files are cached too, so the profile is loaded without reading them.
+
+        :param detection_model_weights_file_path: detection model weights file path, ONNX model file path or mock
+        detection model URI
+        :param detection_model_configuration_file_path: detection model configuration file path (None for ONNX model)
+        :param cache_file_path: autotuning profiles cache file path
+        :return: autotuning profile (None if the detection model has not been autotuned on this host)
+        """
+        self.__autotuning_profile = autotuning.load_autotuning_profile(
+            detection_model_weights_file_path, detection_model_configuration_file_path, cache_file_path)
+
+        return self.__autotuning_profile
+
+    def get_autotuning_profile(self):
+        """
+        Returns autotuning profile person location detection has been started with.
+
+        :return: autotuning profile (None if it has not been loaded)
+        """
+        return self.__autotuning_profile
+
+    def connect_camera_frame_processed_slot(self, camera_frame_processed_slot):
+        """
+        Connects "camera frame processed" slot.
+
+        :param camera_frame_processed_slot: slot that is called when the camera frame has been processed
+        """
+        if self.__person_location_detection_thread is None:
+            raise Exception("You need to start person location detection first!")
+
+        self.__person_location_detection_thread.camera_frame_processed.connect(camera_frame_processed_slot)
+        self.__camera_frame_processed_slots.append(camera_frame_processed_slot)
+
+    def disconnect_camera_frame_processed_slot(self, camera_frame_processed_slot):
+        """
+        Disconnects "camera frame processed" slot.
+
+        :param camera_frame_processed_slot: slot that is called when the camera frame has been processed
+        """
+        if self.__person_location_detection_thread is None:
+            raise Exception("You need to start person location detection first!")
+
+        self.__person_location_detection_thread.camera_frame_processed.disconnect(camera_frame_processed_slot)
+        self.__camera_frame_processed_slots.remove(camera_frame_processed_slot)
+
+    def connect_persons_locations_fused_slot(self, persons_locations_fused_slot):
+        """
+        Connects "persons locations fused" slot.
+
+        :param persons_locations_fused_slot: slot that is called when persons locations of all cameras have been fused
+        """
+        if self.__person_location_detection_thread is None:
+            raise Exception("You need to start person location detection first!")
+
+        self.__person_location_detection_thread.persons_locations_fused.connect(persons_locations_fused_slot)
+        self.__persons_locations_fused_slots.append(persons_locations_fused_slot)
+
+    def update_persons_locations_fusion_parameters(self, distance_threshold, time_step):
         """
-        return self.__person_location_detection_thread.camera_frames_to_process
+        Updates persons locations fusion parameters.
+
+        :param distance_threshold: maximum distance between locations of the same person (in floor units)
+        :param time_step: time step (in seconds) between fused persons locations sets
+        """
+        if self.__person_location_detection_thread is None:
+            raise Exception("You need to start person location detection first!")
+
+        self.__person_location_detection_thread.persons_locations_fusion.distance_threshold = distance_threshold
+        self.__person_location_detection_thread.persons_locations_fusion.time_step = time_step
+
+    def is_camera_attached(self, camera_name):
+        """
+        Returns whether camera is attached to the person location detection.
+
+        :param camera_name: name of the camera
+        :return: whether camera is attached
+        """
+        return self.__person_location_detection_thread is not None and \
+            camera_name in self.__person_location_detection_thread.camera_projection_areas
+
+    def attach_camera(self, camera_name, projection_area_coordinates, projection_area_resolution,
+                      floor_transformation_matrix=None, camera_frames_to_process_channel_specification=None):
+        """
+        Attaches camera to the person location detection: creates its projection area with own perspective
+        transformation matrix and starts processing its frames.
+
+        :param camera_name: name of the camera
+        :param projection_area_coordinates: projection area coordinates
+        :param projection_area_resolution: projection area resolution
+        :param floor_transformation_matrix: 3×3 matrix that maps projection area coordinates to the floor coordinate
+        system shared by all cameras (projection area coordinates are used as floor coordinates if it is not set)
+        :param camera_frames_to_process_channel_specification: backpressure policy and capacity of the channel camera
+        frames are put into for processing, e.g. "block:1" for zero loss or "drop_oldest:1" for minimum latency (see
+        channels), channel of the autotuning profile or "block:1" is used if it is None
+        :return: camera frames to process channel of the attached camera
+        """
+        if self.__person_location_detection_thread is None:
+            raise Exception("You need to start person location detection first!")
+
+        if self.is_camera_attached(camera_name):
+            raise Exception("You need to detach camera first!")
+
+        if camera_frames_to_process_channel_specification is None:
+            camera_frames_to_process_channel_specification = channels.DEFAULT_DETECTION_CHANNEL_SPECIFICATION \
+                if self.__autotuning_profile is None else autotuning.create_detection_channel_specification(
+                    self.__autotuning_profile["detect_every_frames_number"])
+
+        camera_projection_area = CameraProjectionArea(camera_name, projection_area_coordinates,
+                                                      projection_area_resolution, floor_transformation_matrix,
+                                                      camera_frames_to_process_channel_specification)
+        self.__person_location_detection_thread.attach_camera_projection_area(camera_projection_area)
+
+        return camera_projection_area.camera_frames_to_process
+
+    def detach_camera(self, camera_name):
+        """
+        Detaches camera from the person location detection: stops processing its frames.
+
+        :param camera_name: name of the camera
+        """
+        if not self.is_camera_attached(camera_name):
+            raise Exception("You need to attach camera first!")
+
+        camera_projection_area = self.__person_location_detection_thread.detach_camera_projection_area(camera_name)
+        camera_projection_area.clear_camera_frames_to_process()
+
+    def get_attached_camera_names(self):
+        """
+        Returns names of the attached cameras.
+
+        :return: list of camera names
+        """
+        if self.__person_location_detection_thread is None:
+            return []
+
+        with self.__person_location_detection_thread.camera_projection_areas_lock:
+            return list(self.__person_location_detection_thread.camera_projection_areas.keys())
+
+    def get_camera_frames_to_process(self, camera_name):
+        """
+        Gets camera frames to process channel of the attached camera.
+
+        :param camera_name: name of the camera
+        :return: camera frames to process channel
+        """
+        if not self.is_camera_attached(camera_name):
+            raise Exception("You need to attach camera first!")
+
+        return self.__person_location_detection_thread.camera_projection_areas[camera_name].camera_frames_to_process
+
+    def get_cameras_statistics(self):
+        """
+        Returns processing statistics of the attached cameras: throughput (processed frames per second) and average
+        latency between capturing and processing a frame (in seconds).
+
+        :return: dictionary where keys are camera names and values are dictionaries with throughput and latency
+        """
+        if self.__person_location_detection_thread is None:
+            return {}
+
+        with self.__person_location_detection_thread.camera_projection_areas_lock:
+            camera_projection_areas = list(self.__person_location_detection_thread.camera_projection_areas.values())
+
+        return {camera_projection_area.camera_name: camera_projection_area.get_statistics()
+                for camera_projection_area in camera_projection_areas}
 
     def update_detection_model_confidence_threshold(self, updated_detection_model_confidence_threshold):
         """
@@ -453,12 +2080,278 @@ class PersonLocationDetectionService:
 
         self.__person_location_detection_thread.detection_model_nms_threshold = updated_detection_model_nms_threshold
 
+    def is_layers_profiling_enabled(self):
+        """
+        Returns whether layers profiling is enabled.
+
+        :return: whether layers profiling is enabled
+        """
+        return self.__layers_profiling_window_size is not None
+
+    def enable_layers_profiling(self, window_size=100):
+        """
+        Enables layers profiling: per-layer timings of the detection model are collected after every detection and
+        aggregated over the window of the latest detections. Profiling stays enabled when detection is restarted.
+
+        :param window_size: number of the latest detections to aggregate timings over
+        """
+        self.__layers_profiling_window_size = window_size
+        if self.__person_location_detection_thread is not None:
+            self.__person_location_detection_thread.layers_profiling_window_size = window_size
+
+    def disable_layers_profiling(self):
+        """
+        Disables layers profiling and drops collected timings.
+        """
+        self.__layers_profiling_window_size = None
+        if self.__person_location_detection_thread is not None:
+            self.__person_location_detection_thread.layers_profiling_window_size = None
+
+    def get_layers_profile(self):
+        """
+        Returns per-layer profile of the detection model aggregated over the profiling window.
+
+        :return: list of dictionaries (one per layer in the network order) with layer name, configuration section
+        index, type and line number, mean time (in milliseconds) and share of the total time (in percents)
+        """
+        if self.__person_location_detection_thread is None:
+            return []
+
+        layers_profiler = self.__person_location_detection_thread.layers_profiler
+        return [] if layers_profiler is None else layers_profiler.get_layers_profile()
+
+    def export_layers_profile(self, file_path):
+        """
+        Exports per-layer profile of the detection model to the CSV file.
+
+        :param file_path: CSV file path
+        """
+        detectors.write_layers_profile(self.get_layers_profile(), file_path)
+
     def stop_person_location_detection(self):
         """
-        Stops person location detection thread execution and cleans its resources.
+        Stops person location detection thread execution, detaches all cameras and cleans its resources.
         """
         if not self.is_person_location_detection_running():
             raise Exception("You need to start person location detection first!")
 
+        watchdog.DEFAULT_STAGE_WATCHDOG.unregister_stage(self.__person_location_detection_thread.stage_name)
         self.__person_location_detection_thread.stop()
         self.__person_location_detection_thread = None
+        self.__detection_model_cascade = None
+        self.__accurate_detection_model_configuration = None
+        # Replacement and accurate detection models are dropped, they must not be handed over to the next detection
+        for detection_model_loading_thread in (self.__detection_model_loading_thread,
+                                               self.__accurate_detection_model_loading_thread):
+            if detection_model_loading_thread is not None:
+                detection_model_loading_thread.wait()
+        self.__detection_model_loading_thread = None
+        self.__accurate_detection_model_loading_thread = None
+
+
+class MetricsService:
+    """
+    Service that reads pipeline metrics (capture FPS, failed reads, stages latency histograms and CPU time) and exports
+    them in Prometheus text exposition format from the local HTTP endpoint.
+    """
+
+    def __init__(self, metrics_registry=metrics.DEFAULT_METRICS_REGISTRY):
+        """
+        Initializes service.
+
+        :param metrics_registry: metrics registry pipeline stages record metrics into
+        """
+        self.__metrics_registry = metrics_registry
+        self.__metrics_http_server = None
+
+    def get_metrics(self):
+        """
+        Returns snapshot of all pipeline metrics.
+
+        :return: dictionary with "histograms", "counters" and "gauges" lists; every item is a dictionary with metric
+        name, labels and values (p50, p95, p99, count and sum for histograms, value for counters and gauges)
+        """
+        return self.__metrics_registry.get_snapshot()
+
+    def get_prometheus_metrics_text(self):
+        """
+        Returns all pipeline metrics in Prometheus text exposition format.
+
+        :return: metrics text
+        """
+        return self.__metrics_registry.format_prometheus_text()
+
+    def is_metrics_endpoint_running(self):
+        """
+        Returns whether metrics HTTP endpoint is running.
+
+        :return: whether metrics HTTP endpoint is running
+        """
+        return self.__metrics_http_server is not None
+
+    def start_metrics_endpoint(self, port=9464, host="127.0.0.1"):
+        """
+        Starts metrics HTTP endpoint: metrics are served on "http://<host>:<port>/metrics".
+
+        :param port: port to listen on
+        :param host: host to listen on (only local connections are accepted by default)
+        """
+        if self.is_metrics_endpoint_running():
+            raise Exception("You need to stop metrics endpoint first!")
+
+        self.__metrics_http_server = metrics.MetricsHttpServer(self.__metrics_registry, host, port)
+        self.__metrics_http_server.start()
+
+    def stop_metrics_endpoint(self):
+        """
+        Stops metrics HTTP endpoint.
+        """
+        if not self.is_metrics_endpoint_running():
+            raise Exception("You need to start metrics endpoint first!")
+
+        self.__metrics_http_server.stop()
+        self.__metrics_http_server = None
+
+
+class TracingService:
+    """
+    Service that records spans of the pipeline stages (capture, inference, post-processing, warp and rendering) keyed
+    by camera frame sequence number and exports them in Chrome trace event format.
+    """
+
+    def __init__(self, tracer=tracing.DEFAULT_TRACER):
+        """
+        Initializes service.
+
+        :param tracer: tracer pipeline stages record spans into
+        """
+        self.__tracer = tracer
+
+    def is_tracing_enabled(self):
+        """
+        Returns whether tracing is enabled.
+
+        :return: whether tracing is enabled
+        """
+        return self.__tracer.is_enabled
+
+    def enable_tracing(self, max_events_number=1000000):
+        """
+        Enables tracing: previously recorded spans are dropped.
+
+        :param max_events_number: maximum number of recorded spans (further spans are dropped)
+        """
+        self.__tracer.enable(max_events_number)
+
+    def disable_tracing(self):
+        """
+        Disables tracing: recorded spans are kept, so they can be exported.
+        """
+        self.__tracer.disable()
+
+    def export_trace(self, file_path):
+        """
+        Exports recorded spans to the Chrome trace event JSON file (it can be opened in chrome://tracing or Perfetto).
+
+        :param file_path: JSON file path
+        """
+        self.__tracer.export_chrome_trace(file_path)
+
+
+class StageWatchdogThread(QtCore.QThread):
+    """
+    Thread that periodically checks heartbeats of the pipeline stages and emits stalled ones.
+    """
+
+    stage_stalled = QtCore.pyqtSignal(str, float)
+
+    def __init__(self, stage_watchdog, check_interval):
+        """
+        Initializes thread.
+
+        :param stage_watchdog: watchdog pipeline stages send heartbeats to
+        :param check_interval: interval (in seconds) between heartbeats checks
+        """
+        super(StageWatchdogThread, self).__init__()
+
+        self.stage_watchdog = stage_watchdog
+        self.check_interval = check_interval
+        self.is_running = False
+
+    def run(self):
+        """
+        Runs thread: checks heartbeats of the pipeline stages and emits stalled stages with their stall durations.
+        """
+        self.is_running = True
+        threading.current_thread().name = "Watchdog"
+
+        while self.is_running:
+            for stage_name, stall_duration in self.stage_watchdog.get_stalled_stages():
+                self.stage_stalled.emit(stage_name, stall_duration)
+            time.sleep(self.check_interval)
+
+    def stop(self):
+        """
+        Stops thread.
+        """
+        self.is_running = False
+        self.wait()
+
+
+class WatchdogService:
+    """
+    Service that watches heartbeats of the capture and detection stages and restarts stalled stages (e.g. camera read
+    hung inside the driver or detection stuck in the inference) recording incidents in metrics.
+    """
+
+    def __init__(self, stage_watchdog=watchdog.DEFAULT_STAGE_WATCHDOG):
+        """
+        Initializes service.
+
+        :param stage_watchdog: watchdog pipeline stages send heartbeats to
+        """
+        self.__stage_watchdog = stage_watchdog
+        self.__stage_watchdog_thread = None
+
+    def is_watchdog_running(self):
+        """
+        Returns whether watchdog is running.
+
+        :return: whether watchdog is running
+        """
+        return self.__stage_watchdog_thread is not None
+
+    def start_watchdog(self, deadline=5.0, check_interval=0.5):
+        """
+        Starts watchdog. Stalled stages are restarted in the thread that has started watchdog (GUI thread), as stages
+        are started there.
+
+        :param deadline: time (in seconds) within which stages need to send their next heartbeats
+        :param check_interval: interval (in seconds) between heartbeats checks
+        """
+        if self.is_watchdog_running():
+            raise Exception("You need to stop watchdog first!")
+
+        self.__stage_watchdog.deadline = deadline
+        self.__stage_watchdog_thread = StageWatchdogThread(self.__stage_watchdog, check_interval)
+        self.__stage_watchdog_thread.stage_stalled.connect(self.__stage_watchdog.restart_stage)
+        self.__stage_watchdog_thread.start()
+
+    def get_incidents(self):
+        """
+        Returns the latest incidents of the stalled stages.
+
+        :return: list of dictionaries with incident time, stage name, stall duration, whether stage has been restarted
+        and restart error
+        """
+        return self.__stage_watchdog.get_incidents()
+
+    def stop_watchdog(self):
+        """
+        Stops watchdog.
+        """
+        if not self.is_watchdog_running():
+            raise Exception("You need to start watchdog first!")
+
+        self.__stage_watchdog_thread.stop()
+        self.__stage_watchdog_thread = None
@@ -0,0 +1,332 @@
+import time
+import numpy as np
+import cv2 as cv
+from urllib.parse import urlsplit, parse_qsl
+
+SYNTHETIC_CAMERA_URI_SCHEME = "synthetic"
+MOCK_DETECTION_MODEL_URI_SCHEME = "mock"
+
+# Persons are drawn with the color that never appears in the grayscale background, so they can be found exactly
+SYNTHETIC_PERSON_COLOR = (60, 20, 200)
+
+
+def parse_uri_parameters(uri, default_parameters):
+    """
+    Parses parameters from the URI query (e.g. "synthetic://?fps=60&persons=10"): values are converted to the types
+    of the default parameters (boolean values are "1", "true" or "yes").
+
+    :param uri: URI
+    :param default_parameters: dictionary with default parameters
+    :return: dictionary with parameters
+    """
+    parameters = dict(default_parameters)
+    for parameter_name, parameter_value in parse_qsl(urlsplit(uri).query):
+        if parameter_name not in default_parameters:
+            raise Exception("Unknown parameter %s in %s!" % (parameter_name, uri))
+        if isinstance(default_parameters[parameter_name], bool):
+            parameters[parameter_name] = parameter_value.lower() in ("1", "true", "yes")
+        else:
+            parameters[parameter_name] = type(default_parameters[parameter_name])(parameter_value)
+
+    return parameters
+
+
+def is_uri_of_scheme(uri, scheme):
+    """
+    Checks whether URI has the scheme.
+
+    :param uri: URI (or any other camera index or file path)
+    :param scheme: URI scheme
+    :return: whether URI has the scheme
+    """
+    return isinstance(uri, str) and uri.startswith(scheme + "://")
+
+
+class SyntheticVideoCapture:
+    """
+    Synthetic camera that has the same interface as OpenCV video capture. It renders person-like blobs that walk over
+    the smoothed noise background and keeps their ground truth bounding boxes. Frames are paced to the camera FPS.
+    """
+
+    DEFAULT_PARAMETERS = {"width": 1280, "height": 720, "fps": 30.0, "persons": 5, "seed": 0}
+
+    def __init__(self, resolution=(1280, 720), fps=30.0, persons_number=5, seed=0):
+        """
+        Initializes synthetic camera.
+
+        :param resolution: frames resolution
+        :param fps: frames per second (frames are not paced if it is zero)
+        :param persons_number: number of persons
+        :param seed: seed of the random generator (the same seed gives the same frames)
+        """
+        self.fps = fps
+        self.persons_number = persons_number
+        self.seed = seed
+        self.ground_truth_bounding_boxes = []
+        self.frame_index = 0
+        self.is_opened = True
+        self.__next_frame_time = None
+        self.__background = None
+        self.__persons_positions = None
+        self.__persons_velocities = None
+        self.__person_size = None
+
+        self.__initialize_scene(resolution)
+
+    @classmethod
+    def from_uri(cls, uri):
+        """
+        Creates synthetic camera from the URI, e.g. "synthetic://?width=3840&height=2160&fps=60&persons=10&seed=1".
+
+        :param uri: synthetic camera URI
+        :return: synthetic camera
+        """
+        parameters = parse_uri_parameters(uri, cls.DEFAULT_PARAMETERS)
+        return cls((parameters["width"], parameters["height"]), parameters["fps"], parameters["persons"],
+                   parameters["seed"])
+
+    def __initialize_scene(self, resolution):
+        """
+        Initializes background and persons for the resolution.
+
+        :param resolution: frames resolution
+        """
+        random_generator = np.random.default_rng(self.seed)
+        # Background is rendered at lower resolution, so even 4K scenes are initialized quickly
+        background = random_generator.integers(0, 256, (max(resolution[1] // 8, 1), max(resolution[0] // 8, 1)),
+                                               dtype=np.uint8)
+        background = cv.resize(cv.GaussianBlur(background, (7, 7), 0), resolution, interpolation=cv.INTER_LINEAR)
+        self.__background = cv.cvtColor(background, cv.COLOR_GRAY2BGR)
+
+        self.__person_size = np.array([max(resolution[0] // 24, 2), max(resolution[1] // 4, 4)])
+        self.__persons_positions = random_generator.uniform(0, 1, (self.persons_number, 2)) * (
+                np.array(resolution) - self.__person_size)
+        self.__persons_velocities = random_generator.uniform(-1, 1, (self.persons_number, 2)) * (
+                np.array(resolution) / 200)
+
+    def isOpened(self):
+        """
+        Returns whether synthetic camera is opened (it is opened until it is released).
+
+        :return: whether synthetic camera is opened
+        """
+        return self.is_opened
+
+    def set(self, property_id, value):
+        """
+        Sets property of the synthetic camera: frame width, frame height (scene is initialized again) or FPS.
+
+        :param property_id: OpenCV video capture property ID
+        :param value: property value
+        :return: whether property is supported
+        """
+        resolution = [self.__background.shape[1], self.__background.shape[0]]
+        if property_id == cv.CAP_PROP_FRAME_WIDTH:
+            resolution[0] = int(value)
+        elif property_id == cv.CAP_PROP_FRAME_HEIGHT:
+            resolution[1] = int(value)
+        elif property_id == cv.CAP_PROP_FPS:
+            self.fps = float(value)
+            return True
+        else:
+            return False
+
+        self.__initialize_scene(tuple(resolution))
+        return True
+
+    def get(self, property_id):
+        """
+        Gets property of the synthetic camera: frame width, frame height, FPS or index of the next frame.
+
+        :param property_id: OpenCV video capture property ID
+        :return: property value (zero if property is not supported)
+        """
+        if property_id == cv.CAP_PROP_FRAME_WIDTH:
+            return float(self.__background.shape[1])
+        if property_id == cv.CAP_PROP_FRAME_HEIGHT:
+            return float(self.__background.shape[0])
+        if property_id == cv.CAP_PROP_FPS:
+            return float(self.fps)
+        if property_id == cv.CAP_PROP_POS_FRAMES:
+            return float(self.frame_index)
+
+        return 0.0
+
+    def read(self):
+        """
+        Renders next frame: waits until its time has come if frames are paced, moves persons and draws them.
+
+        :return: tuple with indication whether frame has been read and the frame
+        """
+        if not self.is_opened:
+            return False, None
+
+        if self.fps > 0:
+            current_time = time.perf_counter()
+            if self.__next_frame_time is None or self.__next_frame_time < current_time - 1.0 / self.fps:
+                self.__next_frame_time = current_time
+            time.sleep(max(self.__next_frame_time - current_time, 0))
+            self.__next_frame_time += 1.0 / self.fps
+
+        frame_resolution = np.array([self.__background.shape[1], self.__background.shape[0]])
+        self.__persons_positions += self.__persons_velocities
+        # Persons bounce off the frame borders
+        for axis in range(2):
+            is_out_of_frame = (self.__persons_positions[:, axis] < 0) | (
+                    self.__persons_positions[:, axis] > frame_resolution[axis] - self.__person_size[axis])
+            self.__persons_velocities[is_out_of_frame, axis] *= -1
+            self.__persons_positions[:, axis] = np.clip(self.__persons_positions[:, axis], 0,
+                                                        frame_resolution[axis] - self.__person_size[axis])
+
+        frame = self.__background.copy()
+        self.ground_truth_bounding_boxes = []
+        width, height = self.__person_size.tolist()
+        for x, y in self.__persons_positions.astype(int).tolist():
+            # Body and head
+            cv.rectangle(frame, (x, y + height // 5), (x + width - 1, y + height - 1), SYNTHETIC_PERSON_COLOR, -1)
+            cv.circle(frame, (x + width // 2, y + height // 10), min(width // 2, height // 10), SYNTHETIC_PERSON_COLOR,
+                      -1)
+            self.ground_truth_bounding_boxes.append([x, y, width, height])
+        self.frame_index += 1
+
+        return True, frame
+
+    def release(self):
+        """
+        Releases synthetic camera: frames are not read anymore.
+        """
+        self.is_opened = False
+
+
+class MockDetectionModel:
+    """
+    Deterministic detection model that has the same interface as OpenCV detection model and batched detection model.
+    It finds persons drawn by the synthetic camera by their color and simulates inference latency.
+    """
+
+    DEFAULT_PARAMETERS = {"latency": 0.02, "latency_jitter": 0.0, "confidence": 0.9, "seed": 0}
+
+    def __init__(self, latency=0.02, latency_jitter=0.0, confidence=0.9, person_class_id=0, seed=0):
+        """
+        Initializes mock detection model.
+
+        :param latency: simulated inference latency (in seconds) per forward pass
+        :param latency_jitter: maximum random deviation (in seconds) of the latency
+        :param confidence: confidence of the detected persons
+        :param person_class_id: class ID of the detected persons
+        :param seed: seed of the latency jitter random generator
+        """
+        self.latency = latency
+        self.latency_jitter = latency_jitter
+        self.confidence = confidence
+        self.person_class_id = person_class_id
+        self.__random_generator = np.random.default_rng(seed)
+
+    @classmethod
+    def from_uri(cls, uri):
+        """
+        Creates mock detection model from the URI, e.g. "mock://?latency=0.05&latency_jitter=0.01".
+
+        :param uri: mock detection model URI
+        :return: mock detection model
+        """
+        return cls(**parse_uri_parameters(uri, cls.DEFAULT_PARAMETERS))
+
+    def set_preferable_backend_and_target(self, backend, target):
+        """
+        Does nothing: mock detection model does not run on any backend.
+
+        :param backend: OpenCV DNN backend
+        :param target: OpenCV DNN target
+        """
+        pass
+
+    def set_input_params(self, scale, size):
+        """
+        Does nothing: frames are not converted to blobs.
+
+        :param scale: scale factor for input frames
+        :param size: input size
+        """
+        pass
+
+    def __simulate_latency(self):
+        """
+        Sleeps for the simulated inference latency.
+        """
+        latency = self.latency
+        if self.latency_jitter > 0:
+            latency += self.__random_generator.uniform(-self.latency_jitter, self.latency_jitter)
+        time.sleep(max(latency, 0))
+
+    def __find_persons(self, frame, confidence_threshold):
+        """
+        Finds synthetic persons on the frame: connected regions of the person color (the mask is searched at quarter
+        resolution).
+
+        :param frame: frame
+        :param confidence_threshold: confidence threshold
+        :return: tuple with class id's, confidences and bounding boxes
+        """
+        if self.confidence < confidence_threshold:
+            return np.zeros((0, 1), np.int32), np.zeros((0, 1), np.float32), np.zeros((0, 4), np.int32)
+
+        step = 4
+        persons_mask = cv.inRange(frame[::step, ::step], SYNTHETIC_PERSON_COLOR, SYNTHETIC_PERSON_COLOR)
+        components_number, _, components_statistics, _ = cv.connectedComponentsWithStats(persons_mask)
+        bounding_boxes = components_statistics[1:components_number, :4] * step
+
+        return (np.full((len(bounding_boxes), 1), self.person_class_id, np.int32),
+                np.full((len(bounding_boxes), 1), self.confidence, np.float32), bounding_boxes.astype(np.int32))
+
+    def detect(self, frame, confidence_threshold, nms_threshold):
+        """
+        Detects persons on the frame.
+
+        :param frame: frame
+        :param confidence_threshold: confidence threshold
+        :param nms_threshold: non-maximum suppression threshold (not used)
+        :return: tuple with class id's, confidences and bounding boxes
+        """
+        self.__simulate_latency()
+        return self.__find_persons(frame, confidence_threshold)
+
+    def detect_batch(self, frames, confidence_threshold, nms_threshold):
+        """
+        Detects persons on the batch of frames with a single simulated forward pass.
+
+        :param frames: list of frames
+        :param confidence_threshold: confidence threshold
+        :param nms_threshold: non-maximum suppression threshold (not used)
+        :return: list of class id's, confidences and bounding boxes tuples (one per frame)
+        """
+        self.__simulate_latency()
+        return [self.__find_persons(frame, confidence_threshold) for frame in frames]
+
+    def detect_persons_batch(self, frames, person_class_id, confidence_threshold, nms_threshold,
+                             projection_area_masks):
+        """
+        Detects persons within the projection areas on the batch of frames with a single simulated forward pass.
+
+        :param frames: list of frames
+        :param person_class_id: person class ID
+        :param confidence_threshold: confidence threshold
+        :param nms_threshold: non-maximum suppression threshold (not used)
+        :param projection_area_masks: list of projection area masks (one per frame)
+        :return: list of class id's, confidences and bounding boxes tuples (one per frame)
+        """
+        self.__simulate_latency()
+
+        frames_detections = []
+        for frame, projection_area_mask in zip(frames, projection_area_masks):
+            class_ids, confidences, bounding_boxes = self.__find_persons(frame, confidence_threshold)
+            bottom_edge_center_points = np.stack([
+                np.clip(bounding_boxes[:, 0] + bounding_boxes[:, 2] // 2, 0, projection_area_mask.shape[1] - 1),
+                np.clip(bounding_boxes[:, 1] + bounding_boxes[:, 3], 0, projection_area_mask.shape[0] - 1)], axis=1)
+            is_within_projection_area = projection_area_mask[bottom_edge_center_points[:, 1],
+                                                             bottom_edge_center_points[:, 0]] > 0
+            frames_detections.append((np.full((int(is_within_projection_area.sum()), 1), person_class_id, np.int32),
+                                      confidences[is_within_projection_area],
+                                      bounding_boxes[is_within_projection_area]))
+
+        return frames_detections
@@ -0,0 +1,141 @@
+import os
+import json
+import time
+import threading
+
+
+class Span:
+    """
+    Context manager that records duration of the code block as Chrome trace "complete" event.
+    """
+
+    def __init__(self, tracer, name, frame_sequence_number, arguments):
+        """
+        Initializes span.
+
+        :param tracer: tracer the event is recorded into
+        :param name: name of the span
+        :param frame_sequence_number: sequence number of the camera frame the span belongs to
+        :param arguments: additional arguments of the event
+        """
+        self.tracer = tracer
+        self.name = name
+        self.arguments = arguments
+        if frame_sequence_number is not None:
+            self.arguments["frame"] = frame_sequence_number
+        self.start_time = None
+
+    def __enter__(self):
+        self.start_time = time.perf_counter()
+        return self
+
+    def __exit__(self, exception_type, exception_value, traceback):
+        self.tracer.record_complete_event(self.name, self.start_time, time.perf_counter(), self.arguments)
+
+
+class DisabledSpan:
+    """
+    Context manager that does nothing: it is returned when tracing is disabled, so disabled spans cost one attribute
+    check and no allocations.
+    """
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exception_type, exception_value, traceback):
+        pass
+
+
+DISABLED_SPAN = DisabledSpan()
+
+
+class Tracer:
+    """
+    Tracer that records spans of the pipeline stages per thread and exports them in Chrome trace event format (it can
+    be opened in chrome://tracing or Perfetto).
+    """
+
+    def __init__(self):
+        """
+        Initializes tracer (tracing is disabled).
+        """
+        self.is_enabled = False
+        self.max_events_number = 0
+        self.dropped_events_number = 0
+        self.__events = []
+        self.__threads_names = {}
+        self.__start_time = time.perf_counter()
+        self.__events_lock = threading.Lock()
+
+    def enable(self, max_events_number=1000000):
+        """
+        Enables tracing and drops previously recorded events.
+
+        :param max_events_number: maximum number of recorded events (further events are dropped)
+        """
+        with self.__events_lock:
+            self.max_events_number = max_events_number
+            self.dropped_events_number = 0
+            self.__events = []
+            self.__threads_names = {}
+            self.__start_time = time.perf_counter()
+        self.is_enabled = True
+
+    def disable(self):
+        """
+        Disables tracing (recorded events are kept until tracing is enabled again).
+        """
+        self.is_enabled = False
+
+    def span(self, name, frame_sequence_number=None, **arguments):
+        """
+        Creates span of the code block.
+
+        :param name: name of the span
+        :param frame_sequence_number: sequence number of the camera frame the span belongs to
+        :param arguments: additional arguments of the span (e.g. camera name)
+        :return: span context manager
+        """
+        if not self.is_enabled:
+            return DISABLED_SPAN
+
+        return Span(self, name, frame_sequence_number, arguments)
+
+    def record_complete_event(self, name, start_time, end_time, arguments):
+        """
+        Records Chrome trace "complete" event of the current thread.
+
+        :param name: name of the event
+        :param start_time: start time (performance counter value)
+        :param end_time: end time (performance counter value)
+        :param arguments: arguments of the event
+        """
+        current_thread = threading.current_thread()
+        with self.__events_lock:
+            if len(self.__events) >= self.max_events_number:
+                self.dropped_events_number += 1
+                return
+
+            self.__threads_names[current_thread.ident] = current_thread.name
+            self.__events.append({"name": name, "ph": "X", "pid": os.getpid(), "tid": current_thread.ident,
+                                  "ts": (start_time - self.__start_time) * 1000000,
+                                  "dur": (end_time - start_time) * 1000000, "args": arguments})
+
+    def export_chrome_trace(self, file_path):
+        """
+        Exports recorded events to the Chrome trace event JSON file.
+
+        :param file_path: JSON file path
+        """
+        with self.__events_lock:
+            trace_events = [{"name": "thread_name", "ph": "M", "pid": os.getpid(), "tid": thread_id,
+                             "args": {"name": thread_name}} for thread_id, thread_name in self.__threads_names.items()]
+            trace_events.extend(self.__events)
+            dropped_events_number = self.dropped_events_number
+
+        with open(file_path, "w") as trace_file:
+            json.dump({"traceEvents": trace_events, "displayTimeUnit": "ms",
+                       "otherData": {"dropped_events_number": dropped_events_number}}, trace_file)
+
+
+DEFAULT_TRACER = Tracer()
@@ -0,0 +1,130 @@
+import time
+import threading
+import metrics
+
+
+class StageWatchdog:
+    """
+    Thread-safe watchdog of the pipeline stages: stages send heartbeats while they make progress, stage is stalled if
+    its next heartbeat has not been sent within the deadline. Stalled stage is restarted with its restart callback and
+    the incident is recorded in metrics. Heartbeats of the stages that are not registered are ignored.
+    """
+
+    def __init__(self, deadline=5.0, max_incidents_number=100):
+        """
+        Initializes watchdog.
+
+        :param deadline: default time (in seconds) within which stage needs to send its next heartbeat
+        :param max_incidents_number: maximum number of the latest incidents that are kept
+        """
+        self.deadline = deadline
+        self.max_incidents_number = max_incidents_number
+        self.__stages = {}
+        self.__incidents = []
+        self.__lock = threading.Lock()
+
+    def register_stage(self, stage_name, restart_callback, deadline=None):
+        """
+        Registers stage: its heartbeats start being tracked from now on.
+
+        :param stage_name: name of the stage
+        :param restart_callback: callback without arguments that restarts stage
+        :param deadline: time (in seconds) within which stage needs to send its next heartbeat (watchdog deadline is
+        used if it is None)
+        """
+        with self.__lock:
+            self.__stages[stage_name] = {"restart_callback": restart_callback, "deadline": deadline,
+                                         "heartbeat_time": time.monotonic(), "heartbeat_deadline": None,
+                                         "is_stalled": False}
+
+    def unregister_stage(self, stage_name):
+        """
+        Unregisters stage: its heartbeats stop being tracked.
+
+        :param stage_name: name of the stage
+        """
+        with self.__lock:
+            self.__stages.pop(stage_name, None)
+
+    def is_stage_registered(self, stage_name):
+        """
+        Returns whether stage is registered.
+
+        :param stage_name: name of the stage
+        :return: whether stage is registered
+        """
+        with self.__lock:
+            return stage_name in self.__stages
+
+    def beat(self, stage_name, deadline=None):
+        """
+        Sends heartbeat of the stage.
+
+        :param stage_name: name of the stage
+        :param deadline: time (in seconds) within which the next heartbeat is sent (e.g. longer deadline before
+        detection model initialization), stage deadline is used if it is None
+        """
+        with self.__lock:
+            stage = self.__stages.get(stage_name, None)
+            if stage is not None:
+                stage["heartbeat_time"] = time.monotonic()
+                stage["heartbeat_deadline"] = deadline
+                stage["is_stalled"] = False
+
+    def get_stalled_stages(self):
+        """
+        Returns stages that have stalled since the last check (every stall is returned once).
+
+        :return: list of tuples with stage name and time (in seconds) since its last heartbeat
+        """
+        current_time = time.monotonic()
+        stalled_stages = []
+        with self.__lock:
+            for stage_name, stage in self.__stages.items():
+                stall_duration = current_time - stage["heartbeat_time"]
+                deadline = next(deadline for deadline in (stage["heartbeat_deadline"], stage["deadline"],
+                                                          self.deadline) if deadline is not None)
+                if not stage["is_stalled"] and stall_duration > deadline:
+                    stage["is_stalled"] = True
+                    stalled_stages.append((stage_name, stall_duration))
+
+        return stalled_stages
+
+    def restart_stage(self, stage_name, stall_duration):
+        """
+        Restarts stalled stage and records incident in metrics.
+
+        :param stage_name: name of the stage
+        :param stall_duration: time (in seconds) since the last heartbeat of the stage
+        """
+        with self.__lock:
+            stage = self.__stages.get(stage_name, None)
+        if stage is None:
+            return  # Stage has been stopped after it had stalled
+
+        metrics.DEFAULT_METRICS_REGISTRY.increment("pipeline_stage_stalls_total", stage=stage_name)
+        incident = {"time": time.time(), "stage": stage_name, "stall_duration": stall_duration, "is_restarted": True,
+                    "error": None}
+        try:
+            stage["restart_callback"]()
+            metrics.DEFAULT_METRICS_REGISTRY.increment("pipeline_stage_restarts_total", stage=stage_name)
+        except Exception as exception:
+            incident["is_restarted"] = False
+            incident["error"] = str(exception)
+
+        with self.__lock:
+            self.__incidents.append(incident)
+            del self.__incidents[:-self.max_incidents_number]
+
+    def get_incidents(self):
+        """
+        Returns the latest incidents.
+
+        :return: list of dictionaries with incident time, stage name, stall duration, whether stage has been restarted
+        and restart error
+        """
+        with self.__lock:
+            return [dict(incident) for incident in self.__incidents]
+
+
+DEFAULT_STAGE_WATCHDOG = StageWatchdog()
@@ -1,8 +1,12 @@
 import services
+import detectors
+import capture_sources
 from PyQt5 import QtWidgets, QtCore, QtGui
 import numpy as np
 import os
 import helpers
+import metrics
+import tracing
 
 
 class MainWindow(QtWidgets.QMainWindow):
@@ -19,7 +23,12 @@ class MainWindow(QtWidgets.QMainWindow):
         super(MainWindow, self).__init__()
 
         self.__camera_service = services.CameraService()
+        self.__camera_discovery_service = services.CameraDiscoveryService()
         self.__person_location_detection_service = services.PersonLocationDetectionService()
+        self.__metrics_service = services.MetricsService()
+        self.__tracing_service = services.TracingService()
+        self.__watchdog_service = services.WatchdogService()
+        self.__watchdog_service.start_watchdog()
 
         self.central_widget = QtWidgets.QWidget(self)
         self.central_widget_layout = QtWidgets.QHBoxLayout(self.central_widget)
@@ -109,7 +118,11 @@ class MainWindow(QtWidgets.QMainWindow):
         self.menu_list_widget.setIconSize(QtCore.QSize(32, 32))
 
         menu_items = [(":/icons/camera", "Detection",
-                       DetectionWidget(self.__camera_service, self.__person_location_detection_service)),
+                       CamerasWidget(self.__camera_service, self.__person_location_detection_service,
+                                     self.__camera_discovery_service)),
+                      (self.style().standardIcon(QtWidgets.QStyle.SP_FileDialogDetailedView), "Performance",
+                       PerformanceWidget(self.__person_location_detection_service, self.__metrics_service,
+                                         self.__tracing_service)),
                       (":/icons/information", "About", AboutWidget())]
         for menu_item_icon, menu_item_name, menu_item_widget in menu_items:
             menu_item = QtWidgets.QListWidgetItem(QtGui.QIcon(menu_item_icon), menu_item_name, self.menu_list_widget)
@@ -153,10 +166,17 @@ class MainWindow(QtWidgets.QMainWindow):
                                                               QtWidgets.QMessageBox.No | QtWidgets.QMessageBox.Yes,
                                                               QtWidgets.QMessageBox.No)
         if exit_question_result == QtWidgets.QMessageBox.Yes:
-            if self.__camera_service.is_camera_stream_reading_running():
-                self.__camera_service.stop_camera_stream_reading()
+            # Stages that are stopping must not be restarted
+            if self.__watchdog_service.is_watchdog_running():
+                self.__watchdog_service.stop_watchdog()
+            for camera_name in self.__camera_service.get_camera_names():
+                if self.__camera_service.is_camera_stream_reading_running(camera_name):
+                    self.__camera_service.stop_camera_stream_reading(camera_name)
             if self.__person_location_detection_service.is_person_location_detection_running():
                 self.__person_location_detection_service.stop_person_location_detection()
+            if self.__metrics_service.is_metrics_endpoint_running():
+                self.__metrics_service.stop_metrics_endpoint()
+            self.__camera_discovery_service.wait_for_camera_discovery()
             event.accept()
         else:
             event.ignore()
@@ -224,6 +244,61 @@ class ProjectionAreaWidget(QtWidgets.QWidget):
         self.__is_clearing_projection_area = False
 
 
+class CamerasWidget(QtWidgets.QWidget):
+    def __init__(self, camera_service, person_location_detection_service, camera_discovery_service=None):
+        super(CamerasWidget, self).__init__()
+
+        self.__camera_service = camera_service
+        self.__person_location_detection_service = person_location_detection_service
+        self.__camera_discovery_service = camera_discovery_service
+
+        self.cameras_widget_layout = QtWidgets.QVBoxLayout(self)
+        self.cameras_widget_layout.setContentsMargins(0, 0, 0, 0)
+
+        # Every camera has own tab with camera stream, projection area and persons locations, cameras share detection
+        self.cameras_tab_widget = QtWidgets.QTabWidget(self)
+        self.cameras_tab_widget.setTabsClosable(True)
+        self.cameras_tab_widget.tabCloseRequested.connect(self.remove_camera_tab)
+        self.cameras_widget_layout.addWidget(self.cameras_tab_widget)
+
+        self.add_camera_push_button = QtWidgets.QPushButton("Add camera", self.cameras_tab_widget)
+        self.add_camera_push_button.clicked.connect(self.add_camera_tab)
+        self.cameras_tab_widget.setCornerWidget(self.add_camera_push_button)
+
+        # Cameras are discovered once for all tabs
+        if self.__camera_discovery_service is not None and \
+                self.__camera_discovery_service.get_discovered_cameras() is None:
+            self.__camera_discovery_service.start_camera_discovery(self.cameras_discovered)
+
+        self.add_camera_tab()
+
+    @QtCore.pyqtSlot()
+    def add_camera_tab(self):
+        detection_widget = DetectionWidget(self.__camera_service, self.__person_location_detection_service,
+                                           self.__camera_discovery_service)
+        detection_widget.camera_name_changed.connect(self.camera_name_changed)
+        self.cameras_tab_widget.setCurrentIndex(self.cameras_tab_widget.addTab(detection_widget, "New camera"))
+
+    @QtCore.pyqtSlot(int)
+    def remove_camera_tab(self, index):
+        detection_widget = self.cameras_tab_widget.widget(index)
+        detection_widget.release_camera()
+        self.cameras_tab_widget.removeTab(index)
+        detection_widget.deleteLater()
+
+        if self.cameras_tab_widget.count() == 0:
+            self.add_camera_tab()
+
+    @QtCore.pyqtSlot(str)
+    def camera_name_changed(self, camera_name):
+        self.cameras_tab_widget.setTabText(self.cameras_tab_widget.indexOf(self.sender()), camera_name or "New camera")
+
+    @QtCore.pyqtSlot(list)
+    def cameras_discovered(self, cameras):
+        for index in range(self.cameras_tab_widget.count()):
+            self.cameras_tab_widget.widget(index).cameras_discovered(cameras)
+
+
 class DetectionWidget(QtWidgets.QWidget):
     PROJECTION_AREA_RESOLUTIONS = {
         "1920×1080": (1920, 1080),
@@ -237,11 +312,14 @@ class DetectionWidget(QtWidgets.QWidget):
         "640×480": (640, 480)
     }
 
-    def __init__(self, camera_service, person_location_detection_service):
+    camera_name_changed = QtCore.pyqtSignal(str)
+
+    def __init__(self, camera_service, person_location_detection_service, camera_discovery_service=None):
         super(DetectionWidget, self).__init__()
 
         self.__camera_service = camera_service
         self.__person_location_detection_service = person_location_detection_service
+        self.__camera_discovery_service = camera_discovery_service
 
         self.detection_widget_layout = QtWidgets.QGridLayout(self)
         self.detection_widget_layout.setRowStretch(0, 1)
@@ -254,6 +332,7 @@ class DetectionWidget(QtWidgets.QWidget):
         self.camera_stream_widgets_layout.setSpacing(0)
         self.camera_stream_widgets_layout.setRowStretch(0, 0)
         self.camera_stream_widgets_layout.setRowStretch(1, 1)
+        self.camera_stream_widgets_layout.setRowStretch(2, 0)
 
         self.camera_stream_label = QtWidgets.QLabel("Camera stream", self)
         self.camera_stream_widgets_layout.addWidget(self.camera_stream_label, 0, 0, alignment=QtCore.Qt.AlignHCenter)
@@ -269,6 +348,16 @@ class DetectionWidget(QtWidgets.QWidget):
         self.projection_area_widget.projection_area_set.connect(self.projection_area_set)
         self.camera_stream_widgets_layout.addWidget(self.projection_area_widget, 1, 0, alignment=QtCore.Qt.AlignHCenter)
 
+        # Processing statistics of the camera (cameras share detection, so each camera has own throughput and latency)
+        self.camera_statistics_label = QtWidgets.QLabel(self)
+        self.camera_statistics_label.hide()
+        self.camera_stream_widgets_layout.addWidget(self.camera_statistics_label, 2, 0,
+                                                    alignment=QtCore.Qt.AlignHCenter)
+
+        self.camera_statistics_timer = QtCore.QTimer(self)
+        self.camera_statistics_timer.setInterval(1000)
+        self.camera_statistics_timer.timeout.connect(self.update_camera_statistics)
+
         self.detection_widget_layout.addLayout(self.camera_stream_widgets_layout, 0, 0, 1, 1)
 
         # Location of detected persons widgets
@@ -277,8 +366,8 @@ class DetectionWidget(QtWidgets.QWidget):
         self.detection_widget_layout.addLayout(self.location_of_detected_persons_widgets_layout, 1, 0, 1, 1)
 
         self.location_of_detected_persons_text_label = QtWidgets.QLabel("Location of detected persons", self)
-        self.location_of_detected_persons_widgets_layout.addWidget(self.location_of_detected_persons_text_label,
-                                                                   alignment=QtCore.Qt.AlignTop | QtCore.Qt.AlignHCenter)
+        self.location_of_detected_persons_widgets_layout.addWidget(
+            self.location_of_detected_persons_text_label, alignment=QtCore.Qt.AlignTop | QtCore.Qt.AlignHCenter)
 
         self.location_of_detected_persons_label = QtWidgets.QLabel(self)
         self.location_of_detected_persons_label.setAlignment(QtCore.Qt.AlignHCenter)
@@ -297,6 +386,12 @@ class DetectionWidget(QtWidgets.QWidget):
 
         self.camera_indexes_combo_box = QtWidgets.QComboBox(self.camera_settings_group_box)
         self.camera_indexes_combo_box.addItems(["0", "1", "2", "3", "4"])
+        # Besides camera index, video file path or URI, GStreamer pipeline or synthetic camera URI can be entered
+        self.camera_indexes_combo_box.setEditable(True)
+        self.camera_indexes_combo_box.setToolTip("Camera index, video file (e.g. file:///videos/clip.mp4?pacing=fast), "
+                                                 "GStreamer pipeline (e.g. gstreamer://videotestsrc ! videoconvert ! "
+                                                 "appsink) or synthetic camera (e.g. synthetic://?fps=30)")
+        self.camera_indexes_combo_box.currentIndexChanged.connect(self.camera_indexes_combo_box_selection_changed)
         self.camera_settings_group_box_layout.addRow("Camera index", self.camera_indexes_combo_box)
 
         self.camera_resolutions_combo_box = QtWidgets.QComboBox(self.camera_settings_group_box)
@@ -394,6 +489,21 @@ class DetectionWidget(QtWidgets.QWidget):
         self.detection_settings_group_box_layout = QtWidgets.QFormLayout(self.detection_settings_group_box)
         self.detection_settings_group_box_layout.setSpacing(15)
 
+        # Detection models of the detection models directory have weights paired with configuration
+        self.detection_models_combo_box = QtWidgets.QComboBox(self.detection_settings_group_box)
+        self.detection_models_combo_box.addItem("Custom", None)
+        for detection_model in self.__person_location_detection_service.get_detection_models():
+            if detection_model["weights_file_path"] is None:
+                continue
+            if detection_model["input_size"] is not None:
+                self.detection_models_combo_box.addItem("%s (%d×%d, %.1f BFLOPs)" % (
+                    detection_model["name"], detection_model["input_size"][0], detection_model["input_size"][1],
+                    detection_model["flops"] / 1e9), detection_model)
+            else:
+                self.detection_models_combo_box.addItem(detection_model["name"], detection_model)
+        self.detection_models_combo_box.currentIndexChanged.connect(self.detection_models_combo_box_selection_changed)
+        self.detection_settings_group_box_layout.addRow("Detection model", self.detection_models_combo_box)
+
         self.detection_model_weights_widgets_layout = QtWidgets.QHBoxLayout(self.detection_settings_group_box)
         self.select_detection_model_weights_file_line_edit = QtWidgets.QLineEdit(self.detection_settings_group_box)
         self.select_detection_model_weights_file_line_edit.setReadOnly(True)
@@ -416,8 +526,8 @@ class DetectionWidget(QtWidgets.QWidget):
         self.detection_model_configuration_widgets_layout.addWidget(
             self.select_detection_model_configuration_file_line_edit)
 
-        self.select_detection_model_configuration_file_push_button = QtWidgets.QPushButton("Select",
-                                                                                           self.detection_settings_group_box)
+        self.select_detection_model_configuration_file_push_button = QtWidgets.QPushButton(
+            "Select", self.detection_settings_group_box)
         self.select_detection_model_configuration_file_push_button.setFixedWidth(100)
         self.select_detection_model_configuration_file_push_button.clicked.connect(
             self.select_detection_model_weights_or_configuration)
@@ -480,6 +590,7 @@ class DetectionWidget(QtWidgets.QWidget):
 
         self.settings_layout.addStretch()
 
+        self.camera_name = None
         self.camera_frame_resolution = None
         self.selected_projection_area_resolution = None
 
@@ -494,9 +605,35 @@ class DetectionWidget(QtWidgets.QWidget):
         self.detected_persons_locations_brush = QtGui.QBrush(QtGui.QColor(118, 255, 3))
         self.detected_persons_locations_ellipse_size = 50
 
+        # Cameras are probed in background, camera can be selected after discovery has finished (discovery that is
+        # running has been started by the cameras widget, which passes discovered cameras to every camera tab)
+        if self.__camera_discovery_service is not None:
+            discovered_cameras = self.__camera_discovery_service.get_discovered_cameras()
+            if discovered_cameras is not None:
+                self.cameras_discovered(discovered_cameras)
+            else:
+                self.camera_indexes_combo_box.setEnabled(False)
+                self.start_camera_stream_push_button.setEnabled(False)
+                self.camera_indexes_combo_box.setEditText("Discovering cameras...")
+                if not self.__camera_discovery_service.is_camera_discovery_running():
+                    self.__camera_discovery_service.start_camera_discovery(self.cameras_discovered)
+
     @QtCore.pyqtSlot()
     def start_or_stop_camera_stream(self):
         if self.sender() == self.start_camera_stream_push_button:
+            discovered_camera = self.get_selected_discovered_camera()
+            if discovered_camera is not None:
+                camera_index = discovered_camera["camera_index"]
+                camera_name = "Camera %d" % camera_index
+            else:
+                camera_index = self.camera_indexes_combo_box.currentText().strip()
+                camera_name = "Camera %s" % camera_index
+                camera_index = int(camera_index) if camera_index.isdigit() else camera_index
+            # Camera streams are shared by name, so one camera can be opened in one camera tab only
+            if camera_name in self.__camera_service.get_camera_names():
+                QtWidgets.QMessageBox.critical(self, "Error", "This camera is already opened in another camera tab!")
+                return
+
             self.camera_indexes_combo_box.setEnabled(False)
             self.camera_resolutions_combo_box.setEnabled(False)
             self.camera_width_spin_box.setEnabled(False)
@@ -506,12 +643,21 @@ class DetectionWidget(QtWidgets.QWidget):
             self.projection_area_camera_stream_label.show()
 
             # Start camera stream reading
-            camera_index = self.camera_indexes_combo_box.currentIndex()
-            camera_resolution = self.CAMERA_RESOLUTIONS.get(self.camera_resolutions_combo_box.currentText(), None)
+            self.camera_name = camera_name
+            self.camera_name_changed.emit(self.camera_name)
+            camera_mode = self.camera_resolutions_combo_box.currentData()
+            camera_fps, camera_fourcc = capture_sources.DEFAULT_CAMERA_FPS, capture_sources.DEFAULT_CAMERA_FOURCC
+            if camera_mode is not None:
+                camera_resolution, camera_fps, camera_fourcc = tuple(camera_mode["resolution"]), round(
+                    camera_mode["fps"]), camera_mode["fourcc"]
+            else:
+                camera_resolution = self.CAMERA_RESOLUTIONS.get(self.camera_resolutions_combo_box.currentText(), None)
             if camera_resolution is None:
                 camera_resolution = (self.camera_width_spin_box.value(), self.camera_height_spin_box.value())
-            self.__camera_service.start_camera_stream_reading(camera_index, camera_resolution, self.camera_initialized,
-                                                              self.update_first_frame)
+            self.__camera_service.start_camera_stream_reading(self.camera_name, camera_index, camera_resolution,
+                                                              self.camera_initialized, self.update_first_frame,
+                                                              camera_fps=camera_fps, camera_fourcc=camera_fourcc,
+                                                              camera_health_changed_slot=self.camera_health_changed)
         else:
             self.camera_settings_and_stream_initial_state()
             self.change_projection_area_settings_widgets_state(False)
@@ -520,7 +666,8 @@ class DetectionWidget(QtWidgets.QWidget):
             self.projection_area_widget.hide()
 
             # Stop camera stream reading
-            self.__camera_service.stop_camera_stream_reading()
+            self.__camera_service.stop_camera_stream_reading(self.camera_name)
+            self.camera_name_changed.emit("")
 
     @QtCore.pyqtSlot(bool)
     def camera_initialized(self, is_successful):
@@ -529,12 +676,13 @@ class DetectionWidget(QtWidgets.QWidget):
             self.change_projection_area_settings_widgets_state(True)
         else:
             # Cleans camera stream reading resources
-            self.__camera_service.clean_camera_stream_reading_resources()
+            self.__camera_service.clean_camera_stream_reading_resources(self.camera_name)
+            self.camera_name_changed.emit("")
 
             self.camera_settings_and_stream_initial_state()
             QtWidgets.QMessageBox.critical(self, "Error",
                                            "An error occurred during camera initialization!"
-                                           "Probably there is no connected camera with such index.")
+                                           "Probably there is no connected camera with such index or source.")
 
     @QtCore.pyqtSlot(np.ndarray)
     def update_first_frame(self, camera_frame):
@@ -548,7 +696,7 @@ class DetectionWidget(QtWidgets.QWidget):
 
         self.camera_frame_resolution = (camera_frame.shape[1], camera_frame.shape[0])  # Save actual camera resolution
 
-        self.__camera_service.update_camera_frame_read_slot(self.update_first_frame,
+        self.__camera_service.update_camera_frame_read_slot(self.camera_name, self.update_first_frame,
                                                             self.camera_frame_read)  # Change camera stream reading slot
 
     @QtCore.pyqtSlot(np.ndarray)
@@ -557,10 +705,52 @@ class DetectionWidget(QtWidgets.QWidget):
             helpers.convert_opencv_image_to_pixmap(camera_frame).scaled(self.projection_area_camera_stream_label.size(),
                                                                         QtCore.Qt.KeepAspectRatio))
 
+    @QtCore.pyqtSlot(str)
+    def camera_health_changed(self, health_state):
+        if health_state == services.CameraStreamReaderThread.RECONNECTING_HEALTH_STATE:
+            self.camera_settings_group_box.setTitle("Camera settings (camera is reconnecting...)")
+        elif health_state == services.CameraStreamReaderThread.ENDED_HEALTH_STATE:
+            self.camera_settings_group_box.setTitle("Camera settings (camera stream has ended)")
+        else:
+            self.camera_settings_group_box.setTitle("Camera settings")
+
+    @QtCore.pyqtSlot(list)
+    def cameras_discovered(self, cameras):
+        self.camera_indexes_combo_box.clear()
+        for camera in cameras:
+            self.camera_indexes_combo_box.addItem("%d: %s" % (camera["camera_index"], camera["name"]), camera)
+        self.camera_indexes_combo_box.setEnabled(True)
+        self.start_camera_stream_push_button.setEnabled(True)
+
+    def get_selected_discovered_camera(self):
+        current_index = self.camera_indexes_combo_box.currentIndex()
+        if current_index < 0 or self.camera_indexes_combo_box.currentText() != \
+                self.camera_indexes_combo_box.itemText(current_index):
+            return None  # Camera source has been entered
+        return self.camera_indexes_combo_box.itemData(current_index)
+
+    @QtCore.pyqtSlot(int)
+    def camera_indexes_combo_box_selection_changed(self, current_index):
+        discovered_camera = self.camera_indexes_combo_box.itemData(current_index) if current_index >= 0 else None
+
+        # Discovered camera offers only modes that run at full frame rate
+        self.camera_resolutions_combo_box.clear()
+        if discovered_camera is not None and len(discovered_camera["modes"]) > 0:
+            for camera_mode in discovered_camera["modes"]:
+                self.camera_resolutions_combo_box.addItem("%d×%d (%s, %d FPS)" % (
+                    camera_mode["resolution"][0], camera_mode["resolution"][1], camera_mode["fourcc"],
+                    round(camera_mode["fps"])), camera_mode)
+        else:
+            self.camera_resolutions_combo_box.addItems(list(self.CAMERA_RESOLUTIONS.keys()) + ["Other"])
+
+    def is_other_camera_resolution_selected(self):
+        return self.camera_resolutions_combo_box.currentData() is None and \
+            self.camera_resolutions_combo_box.currentText() not in self.CAMERA_RESOLUTIONS
+
     def camera_settings_and_stream_initial_state(self):
         self.camera_indexes_combo_box.setEnabled(True)
         self.camera_resolutions_combo_box.setEnabled(True)
-        if self.camera_resolutions_combo_box.currentText() not in self.CAMERA_RESOLUTIONS:
+        if self.is_other_camera_resolution_selected():
             self.camera_width_spin_box.setEnabled(True)
             self.camera_height_spin_box.setEnabled(True)
         self.start_camera_stream_push_button.setEnabled(True)
@@ -606,7 +796,7 @@ class DetectionWidget(QtWidgets.QWidget):
                 self.projection_area_width_spin_box.setEnabled(True)
                 self.projection_area_height_spin_box.setEnabled(True)
         else:
-            if current_text in self.CAMERA_RESOLUTIONS:
+            if not self.is_other_camera_resolution_selected():
                 self.camera_width_spin_box.setEnabled(False)
                 self.camera_height_spin_box.setEnabled(False)
             else:
@@ -614,6 +804,7 @@ class DetectionWidget(QtWidgets.QWidget):
                 self.camera_height_spin_box.setEnabled(True)
 
     def change_detection_settings_widgets_state(self, is_enabled):
+        self.detection_models_combo_box.setEnabled(is_enabled)
         self.select_detection_model_weights_file_push_button.setEnabled(is_enabled)
         self.select_detection_model_weights_file_line_edit.setEnabled(is_enabled)
         self.select_detection_model_configuration_file_push_button.setEnabled(is_enabled)
@@ -632,11 +823,15 @@ class DetectionWidget(QtWidgets.QWidget):
             weights_file_path = QtWidgets.QFileDialog.getOpenFileName(self, "Select detection model weights file",
                                                                       os.path.join(
                                                                           os.path.dirname(os.path.abspath(__file__)),
-                                                                          "detection_models"), "Weights (*.weights)")[0]
+                                                                          "detection_models"),
+                                                                      "Weights (*.weights *.onnx)")[0]
             if weights_file_path != "":
+                self.detection_models_combo_box.setCurrentIndex(0)
                 self.select_detection_model_weights_file_line_edit.setText(weights_file_path)
 
-                if self.select_detection_model_configuration_file_line_edit.text() != "":
+                # ONNX model does not need configuration
+                if self.select_detection_model_configuration_file_line_edit.text() != "" or \
+                        detectors.is_onnx_model(weights_file_path):
                     self.start_detection_push_button.setEnabled(True)
         else:
             configuration_file_path = \
@@ -645,11 +840,25 @@ class DetectionWidget(QtWidgets.QWidget):
                                                           os.path.dirname(os.path.abspath(__file__)),
                                                           "detection_models"), "Configuration (*.cfg)")[0]
             if configuration_file_path != "":
+                self.detection_models_combo_box.setCurrentIndex(0)
                 self.select_detection_model_configuration_file_line_edit.setText(configuration_file_path)
 
                 if self.select_detection_model_weights_file_line_edit.text() != "":
                     self.start_detection_push_button.setEnabled(True)
 
+    @QtCore.pyqtSlot(int)
+    def detection_models_combo_box_selection_changed(self, current_index):
+        detection_model = self.detection_models_combo_box.itemData(current_index) if current_index >= 0 else None
+        if detection_model is None:
+            return
+
+        self.select_detection_model_weights_file_line_edit.setText(detection_model["weights_file_path"])
+        self.select_detection_model_configuration_file_line_edit.setText(
+            detection_model["configuration_file_path"] or "")
+        if detection_model["person_class_id"] is not None:
+            self.person_class_id_spin_box.setValue(detection_model["person_class_id"])
+        self.start_detection_push_button.setEnabled(True)
+
     @QtCore.pyqtSlot(int)
     def slider_value_changed(self, value):
         if self.sender() == self.confidence_threshold_slider:
@@ -679,42 +888,59 @@ class DetectionWidget(QtWidgets.QWidget):
         # Get projection area coordinates
         projection_area_polygon_coordinates = helpers.convert_polygon_points_to_coordinates_list(
             self.projection_area_widget.get_projection_area_polygon())
-        current_resolution = self.projection_area_camera_stream_label.pixmap().width(), self.projection_area_camera_stream_label.pixmap().height()
+        current_resolution = self.projection_area_camera_stream_label.pixmap().width(), \
+            self.projection_area_camera_stream_label.pixmap().height()
         projection_area_coordinates = helpers.convert_points_to_another_resolution(projection_area_polygon_coordinates,
                                                                                    current_resolution,
                                                                                    self.camera_frame_resolution)
 
-        # Start person location detection
-        self.__camera_service.disconnect_camera_frame_read_slot(self.camera_frame_read)
-        self.__person_location_detection_service.start_person_location_detection(
-            self.select_detection_model_weights_file_line_edit.text(),
-            self.select_detection_model_configuration_file_line_edit.text(),
-            1.0 / 255, (416, 416),  # Hardcoded for now
-            self.person_class_id_spin_box.value(),
-            self.confidence_threshold_slider.value() * 0.01,
-            self.nms_threshold_slider.value() * 0.01,
-            projection_area_coordinates,
-            self.selected_projection_area_resolution,
-            self.camera_frame_processed)
-        self.__camera_service.switch_camera_stream_reading_state(
-            True, self.__person_location_detection_service.camera_frames_to_process)
+        # Start person location detection (detection is shared between cameras, so it may be already running)
+        self.__camera_service.disconnect_camera_frame_read_slot(self.camera_name, self.camera_frame_read)
+        if self.__person_location_detection_service.is_person_location_detection_running():
+            self.__person_location_detection_service.connect_camera_frame_processed_slot(self.camera_frame_processed)
+        else:
+            self.__person_location_detection_service.start_person_location_detection(
+                self.select_detection_model_weights_file_line_edit.text(),
+                self.select_detection_model_configuration_file_line_edit.text() or None,
+                1.0 / 255, None,  # Input size is taken from the configuration
+                self.person_class_id_spin_box.value(),
+                self.confidence_threshold_slider.value() * 0.01,
+                self.nms_threshold_slider.value() * 0.01,
+                self.camera_frame_processed,
+                is_autotuning_profile_used=True)
+        camera_frames_to_process = self.__person_location_detection_service.attach_camera(
+            self.camera_name, projection_area_coordinates, self.selected_projection_area_resolution)
+        self.__camera_service.switch_camera_stream_reading_state(self.camera_name, True, camera_frames_to_process)
 
         # Update UI
         self.start_detection_push_button.setEnabled(False)
         self.stop_detection_push_button.setEnabled(True)
         self.change_camera_and_projection_area_settings_group_boxes_state(False)
         self.location_of_detected_persons_label.show()
+        self.camera_statistics_label.setText("Waiting for processed camera frames...")
+        self.camera_statistics_label.show()
+        self.camera_statistics_timer.start()
 
     def set_detections_drawing_parameters(self):
-        self.detected_persons_pen.setWidth(self.camera_frame_resolution[0] * 10 / 1920)
-        self.detected_persons_painter_fps_font.setPointSize(self.camera_frame_resolution[0] * 54 / 1920)
-        self.detected_persons_painter_font.setPointSize(self.camera_frame_resolution[0] * 32 / 1920)
-        self.detected_persons_locations_ellipse_size = self.selected_projection_area_resolution[0] * 50 / 1920
+        self.detected_persons_pen.setWidth(self.camera_frame_resolution[0] * 10 // 1920)
+        self.detected_persons_painter_fps_font.setPointSize(self.camera_frame_resolution[0] * 54 // 1920)
+        self.detected_persons_painter_font.setPointSize(self.camera_frame_resolution[0] * 32 // 1920)
+        self.detected_persons_locations_ellipse_size = self.selected_projection_area_resolution[0] * 50 // 1920
 
     @QtCore.pyqtSlot(tuple)
     def camera_frame_processed(self, results):
-        camera_frame, camera_frame_warped, fps_number, confidences, bounding_boxes, persons_locations = results
+        camera_name, camera_frame_sequence_number, camera_frame, camera_frame_warped, fps_number, confidences, \
+            bounding_boxes, persons_locations = results
+        if camera_name != self.camera_name:
+            return
 
+        with metrics.DEFAULT_METRICS_REGISTRY.measure_stage("render", camera=camera_name), \
+                tracing.DEFAULT_TRACER.span("render", camera_frame_sequence_number, camera=camera_name):
+            self.draw_camera_frame_processing_results(camera_frame, camera_frame_warped, fps_number, confidences,
+                                                      bounding_boxes, persons_locations)
+
+    def draw_camera_frame_processing_results(self, camera_frame, camera_frame_warped, fps_number, confidences,
+                                             bounding_boxes, persons_locations):
         # Draw detected persons
         camera_frame_pixmap = helpers.convert_opencv_image_to_pixmap(camera_frame)
 
@@ -741,10 +967,9 @@ class DetectionWidget(QtWidgets.QWidget):
         self.detected_persons_locations_painter.begin(camera_frame_warped_pixmap)
         self.detected_persons_locations_painter.setBrush(self.detected_persons_locations_brush)
         for person_location in persons_locations:
-            self.detected_persons_locations_painter.drawEllipse(person_location[0],
-                                                                person_location[1],
-                                                                self.detected_persons_locations_ellipse_size,
-                                                                self.detected_persons_locations_ellipse_size)
+            self.detected_persons_locations_painter.drawEllipse(
+                QtCore.QRectF(person_location[0], person_location[1], self.detected_persons_locations_ellipse_size,
+                              self.detected_persons_locations_ellipse_size))
         self.detected_persons_locations_painter.end()
 
         self.location_of_detected_persons_label.setPixmap(
@@ -753,19 +978,45 @@ class DetectionWidget(QtWidgets.QWidget):
 
     @QtCore.pyqtSlot()
     def stop_detection(self):
-        # Stop person location detection
-        self.__camera_service.switch_camera_stream_reading_state(False)
-        self.__person_location_detection_service.stop_person_location_detection()
-        self.__camera_service.connect_camera_frame_read_slot(self.camera_frame_read)
+        # Stop person location detection (detection keeps running while other cameras are attached)
+        self.__camera_service.switch_camera_stream_reading_state(self.camera_name, False)
+        self.__person_location_detection_service.detach_camera(self.camera_name)
+        if len(self.__person_location_detection_service.get_attached_camera_names()) == 0:
+            self.__person_location_detection_service.stop_person_location_detection()
+        else:
+            self.__person_location_detection_service.disconnect_camera_frame_processed_slot(
+                self.camera_frame_processed)
+        self.__camera_service.connect_camera_frame_read_slot(self.camera_name, self.camera_frame_read)
 
         self.stop_detection_push_button.setEnabled(False)
         self.start_detection_push_button.setEnabled(True)
         self.change_camera_and_projection_area_settings_group_boxes_state(True)
         self.location_of_detected_persons_label.hide()
+        self.camera_statistics_timer.stop()
+        self.camera_statistics_label.hide()
+
+    @QtCore.pyqtSlot()
+    def update_camera_statistics(self):
+        camera_statistics = self.__person_location_detection_service.get_cameras_statistics().get(self.camera_name,
+                                                                                                 None)
+        if camera_statistics is not None and camera_statistics["throughput"] > 0:
+            self.camera_statistics_label.setText("Throughput: %.1f FPS, latency: %d ms" % (
+                camera_statistics["throughput"], round(camera_statistics["latency"] * 1000)))
+
+    def release_camera(self):
+        # Camera tab is being removed: its camera is detached from detection and its stream is stopped
+        if self.__person_location_detection_service.is_camera_attached(self.camera_name):
+            self.stop_detection()
+        if self.camera_name in self.__camera_service.get_camera_names():
+            if self.__camera_service.is_camera_stream_reading_running(self.camera_name):
+                self.__camera_service.stop_camera_stream_reading(self.camera_name)
+            else:
+                self.__camera_service.clean_camera_stream_reading_resources(self.camera_name)
 
     def change_camera_and_projection_area_settings_group_boxes_state(self, is_enabled):
         self.camera_settings_group_box.setEnabled(is_enabled)
         self.projection_area_settings_group_box.setEnabled(is_enabled)
+        self.detection_models_combo_box.setEnabled(is_enabled)
         self.select_detection_model_weights_file_push_button.setEnabled(is_enabled)
         self.select_detection_model_weights_file_line_edit.setEnabled(is_enabled)
         self.select_detection_model_configuration_file_push_button.setEnabled(is_enabled)
@@ -773,6 +1024,197 @@ class DetectionWidget(QtWidgets.QWidget):
         self.person_class_id_spin_box.setEnabled(is_enabled)
 
 
+class PerformanceWidget(QtWidgets.QWidget):
+    LAYERS_PROFILE_COLUMNS = [("Layer", "layer_name"), ("Section", "section_index"), ("Section type", "section_type"),
+                              ("Configuration line", "section_line_number"), ("Time (ms)", "mean_time_ms"),
+                              ("Share (%)", "time_share")]
+
+    PIPELINE_METRICS_COLUMNS = ["Metric", "Labels", "Value / p50", "p95", "p99"]
+
+    def __init__(self, person_location_detection_service, metrics_service, tracing_service):
+        super(PerformanceWidget, self).__init__()
+
+        self.__person_location_detection_service = person_location_detection_service
+        self.__metrics_service = metrics_service
+        self.__tracing_service = tracing_service
+
+        self.performance_widget_layout = QtWidgets.QVBoxLayout(self)
+
+        # Pipeline metrics
+        self.pipeline_metrics_group_box = QtWidgets.QGroupBox("Pipeline metrics", self)
+        self.performance_widget_layout.addWidget(self.pipeline_metrics_group_box)
+        self.pipeline_metrics_group_box_layout = QtWidgets.QVBoxLayout(self.pipeline_metrics_group_box)
+
+        self.metrics_endpoint_settings_layout = QtWidgets.QHBoxLayout()
+        self.pipeline_metrics_group_box_layout.addLayout(self.metrics_endpoint_settings_layout)
+
+        self.metrics_endpoint_check_box = QtWidgets.QCheckBox("Serve Prometheus metrics on port",
+                                                              self.pipeline_metrics_group_box)
+        self.metrics_endpoint_check_box.toggled.connect(self.metrics_endpoint_check_box_toggled)
+        self.metrics_endpoint_settings_layout.addWidget(self.metrics_endpoint_check_box)
+
+        self.metrics_endpoint_port_spin_box = QtWidgets.QSpinBox(self.pipeline_metrics_group_box)
+        self.metrics_endpoint_port_spin_box.setMinimum(1024)
+        self.metrics_endpoint_port_spin_box.setMaximum(65535)
+        self.metrics_endpoint_port_spin_box.setValue(9464)
+        self.metrics_endpoint_settings_layout.addWidget(self.metrics_endpoint_port_spin_box)
+        self.metrics_endpoint_settings_layout.addStretch()
+
+        self.tracing_settings_layout = QtWidgets.QHBoxLayout()
+        self.pipeline_metrics_group_box_layout.addLayout(self.tracing_settings_layout)
+
+        self.tracing_check_box = QtWidgets.QCheckBox("Record frame stages trace", self.pipeline_metrics_group_box)
+        self.tracing_check_box.setChecked(self.__tracing_service.is_tracing_enabled())
+        self.tracing_check_box.toggled.connect(self.tracing_check_box_toggled)
+        self.tracing_settings_layout.addWidget(self.tracing_check_box)
+
+        self.export_trace_push_button = QtWidgets.QPushButton("Export", self.pipeline_metrics_group_box)
+        self.export_trace_push_button.setFixedWidth(100)
+        self.export_trace_push_button.clicked.connect(self.export_trace)
+        self.tracing_settings_layout.addWidget(self.export_trace_push_button)
+        self.tracing_settings_layout.addStretch()
+
+        self.pipeline_metrics_table_widget = QtWidgets.QTableWidget(0, len(self.PIPELINE_METRICS_COLUMNS),
+                                                                    self.pipeline_metrics_group_box)
+        self.pipeline_metrics_table_widget.setHorizontalHeaderLabels(self.PIPELINE_METRICS_COLUMNS)
+        self.pipeline_metrics_table_widget.horizontalHeader().setSectionResizeMode(QtWidgets.QHeaderView.Stretch)
+        self.pipeline_metrics_table_widget.setEditTriggers(QtWidgets.QAbstractItemView.NoEditTriggers)
+        self.pipeline_metrics_group_box_layout.addWidget(self.pipeline_metrics_table_widget)
+
+        # Layers profiling
+        self.layers_profiling_group_box = QtWidgets.QGroupBox("Detection model layers profiling", self)
+        self.performance_widget_layout.addWidget(self.layers_profiling_group_box)
+        self.layers_profiling_group_box_layout = QtWidgets.QVBoxLayout(self.layers_profiling_group_box)
+
+        self.layers_profiling_settings_layout = QtWidgets.QHBoxLayout()
+        self.layers_profiling_group_box_layout.addLayout(self.layers_profiling_settings_layout)
+
+        self.layers_profiling_check_box = QtWidgets.QCheckBox("Enable profiling", self.layers_profiling_group_box)
+        self.layers_profiling_check_box.setChecked(
+            self.__person_location_detection_service.is_layers_profiling_enabled())
+        self.layers_profiling_check_box.toggled.connect(self.layers_profiling_check_box_toggled)
+        self.layers_profiling_settings_layout.addWidget(self.layers_profiling_check_box)
+
+        self.layers_profiling_window_size_spin_box = QtWidgets.QSpinBox(self.layers_profiling_group_box)
+        self.layers_profiling_window_size_spin_box.setPrefix("Window: ")
+        self.layers_profiling_window_size_spin_box.setSuffix(" detections")
+        self.layers_profiling_window_size_spin_box.setMinimum(1)
+        self.layers_profiling_window_size_spin_box.setMaximum(10000)
+        self.layers_profiling_window_size_spin_box.setValue(100)
+        self.layers_profiling_window_size_spin_box.valueChanged.connect(self.layers_profiling_window_size_changed)
+        self.layers_profiling_settings_layout.addWidget(self.layers_profiling_window_size_spin_box)
+
+        self.export_layers_profile_push_button = QtWidgets.QPushButton("Export", self.layers_profiling_group_box)
+        self.export_layers_profile_push_button.setFixedWidth(100)
+        self.export_layers_profile_push_button.clicked.connect(self.export_layers_profile)
+        self.layers_profiling_settings_layout.addWidget(self.export_layers_profile_push_button)
+        self.layers_profiling_settings_layout.addStretch()
+
+        self.layers_profile_table_widget = QtWidgets.QTableWidget(0, len(self.LAYERS_PROFILE_COLUMNS),
+                                                                  self.layers_profiling_group_box)
+        self.layers_profile_table_widget.setHorizontalHeaderLabels(
+            [column_name for column_name, _ in self.LAYERS_PROFILE_COLUMNS])
+        self.layers_profile_table_widget.horizontalHeader().setSectionResizeMode(QtWidgets.QHeaderView.Stretch)
+        self.layers_profile_table_widget.setEditTriggers(QtWidgets.QAbstractItemView.NoEditTriggers)
+        self.layers_profiling_group_box_layout.addWidget(self.layers_profile_table_widget)
+
+        self.update_timer = QtCore.QTimer(self)
+        self.update_timer.setInterval(1000)
+        self.update_timer.timeout.connect(self.update_performance)
+        self.update_timer.start()
+
+    @QtCore.pyqtSlot(bool)
+    def metrics_endpoint_check_box_toggled(self, is_checked):
+        if is_checked:
+            try:
+                self.__metrics_service.start_metrics_endpoint(self.metrics_endpoint_port_spin_box.value())
+            except OSError:
+                self.metrics_endpoint_check_box.setChecked(False)
+                QtWidgets.QMessageBox.critical(self, "Error", "An error occurred during metrics endpoint starting! "
+                                                              "Probably this port is already in use.")
+                return
+            self.metrics_endpoint_port_spin_box.setEnabled(False)
+        else:
+            if self.__metrics_service.is_metrics_endpoint_running():
+                self.__metrics_service.stop_metrics_endpoint()
+            self.metrics_endpoint_port_spin_box.setEnabled(True)
+
+    @QtCore.pyqtSlot(bool)
+    def tracing_check_box_toggled(self, is_checked):
+        if is_checked:
+            self.__tracing_service.enable_tracing()
+        else:
+            self.__tracing_service.disable_tracing()
+
+    @QtCore.pyqtSlot()
+    def export_trace(self):
+        trace_file_path = QtWidgets.QFileDialog.getSaveFileName(self, "Export trace", "trace.json",
+                                                                "Chrome trace (*.json)")[0]
+        if trace_file_path != "":
+            self.__tracing_service.export_trace(trace_file_path)
+
+    @QtCore.pyqtSlot(bool)
+    def layers_profiling_check_box_toggled(self, is_checked):
+        if is_checked:
+            self.__person_location_detection_service.enable_layers_profiling(
+                self.layers_profiling_window_size_spin_box.value())
+        else:
+            self.__person_location_detection_service.disable_layers_profiling()
+            self.layers_profile_table_widget.setRowCount(0)
+
+    @QtCore.pyqtSlot(int)
+    def layers_profiling_window_size_changed(self, value):
+        if self.__person_location_detection_service.is_layers_profiling_enabled():
+            self.__person_location_detection_service.enable_layers_profiling(value)
+
+    @QtCore.pyqtSlot()
+    def export_layers_profile(self):
+        layers_profile_file_path = QtWidgets.QFileDialog.getSaveFileName(self, "Export layers profile",
+                                                                         "layers_profile.csv", "CSV (*.csv)")[0]
+        if layers_profile_file_path != "":
+            self.__person_location_detection_service.export_layers_profile(layers_profile_file_path)
+
+    @QtCore.pyqtSlot()
+    def update_performance(self):
+        if not self.isVisible():
+            return
+
+        self.update_pipeline_metrics()
+        if self.__person_location_detection_service.is_layers_profiling_enabled():
+            self.update_layers_profile()
+
+    def update_pipeline_metrics(self):
+        pipeline_metrics = self.__metrics_service.get_metrics()
+
+        pipeline_metrics_rows = []
+        for histogram in pipeline_metrics["histograms"]:
+            # Latency histograms are shown in milliseconds
+            pipeline_metrics_rows.append((histogram["name"].replace("_seconds", "_ms"), histogram["labels"],
+                                          ["%.2f" % (histogram[quantile_key] * 1000)
+                                           for quantile_key in ("p50", "p95", "p99")]))
+        for metric in pipeline_metrics["counters"] + pipeline_metrics["gauges"]:
+            pipeline_metrics_rows.append((metric["name"], metric["labels"], ["%.2f" % metric["value"], "", ""]))
+
+        self.pipeline_metrics_table_widget.setRowCount(len(pipeline_metrics_rows))
+        for row, (metric_name, metric_labels, metric_values) in enumerate(pipeline_metrics_rows):
+            metric_labels = ", ".join("%s=%s" % (label_name, label_value)
+                                      for label_name, label_value in sorted(metric_labels.items()))
+            for column, metric_text in enumerate([metric_name, metric_labels] + metric_values):
+                self.pipeline_metrics_table_widget.setItem(row, column, QtWidgets.QTableWidgetItem(metric_text))
+
+    def update_layers_profile(self):
+        layers_profile = self.__person_location_detection_service.get_layers_profile()
+        self.layers_profile_table_widget.setRowCount(len(layers_profile))
+        for row, layer_profile in enumerate(layers_profile):
+            for column, (_, layer_profile_key) in enumerate(self.LAYERS_PROFILE_COLUMNS):
+                layer_profile_value = layer_profile[layer_profile_key]
+                if isinstance(layer_profile_value, float):
+                    layer_profile_value = "%.2f" % layer_profile_value
+                self.layers_profile_table_widget.setItem(
+                    row, column, QtWidgets.QTableWidgetItem("" if layer_profile_value is None else str(
+                        layer_profile_value)))
+
+
 class AboutWidget(QtWidgets.QWidget):
     def __init__(self):
         super(AboutWidget, self).__init__()
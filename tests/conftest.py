@@ -0,0 +1,6 @@
+import os
+import sys
+
+# Application modules import each other as top-level modules (as when the application is run from its directory)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                "person_location_detector"))
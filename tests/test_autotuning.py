@@ -0,0 +1,120 @@
+import os
+import json
+import hashlib
+import pytest
+import autotuning
+
+PROFILE = {"backend": "opencv", "target": "cpu", "input_size": [320, 320], "threads_number": 2,
+           "detect_every_frames_number": 1, "fps": 31.5, "latency": 84.0}
+
+
+@pytest.fixture
+def detection_model_files(tmp_path):
+    weights_file_path = str(tmp_path / "model.weights")
+    configuration_file_path = str(tmp_path / "model.cfg")
+    with open(weights_file_path, "wb") as weights_file:
+        weights_file.write(b"\x01" * 100)
+    with open(configuration_file_path, "w") as configuration_file:
+        configuration_file.write("[net]\nwidth=320\nheight=320\n")
+
+    return weights_file_path, configuration_file_path
+
+
+def test_calculate_file_hash_caches_hash_by_size_and_modification_time(tmp_path):
+    file_path = str(tmp_path / "model.weights")
+    with open(file_path, "wb") as hashed_file:
+        hashed_file.write(b"weights")
+    file_hashes = {}
+
+    assert autotuning.calculate_file_hash(file_path, file_hashes) == hashlib.sha256(b"weights").hexdigest()
+    assert file_hashes[os.path.abspath(file_path)]["size"] == 7
+
+    file_hashes[os.path.abspath(file_path)]["hash"] = "cached"
+    assert autotuning.calculate_file_hash(file_path, file_hashes) == "cached"
+
+    with open(file_path, "wb") as hashed_file:
+        hashed_file.write(b"new weights")
+    assert autotuning.calculate_file_hash(file_path, file_hashes) == hashlib.sha256(b"new weights").hexdigest()
+
+
+def test_calculate_file_hash_hashes_mock_detection_model_uri():
+    assert autotuning.calculate_file_hash("mock://?latency=0.02") == \
+           hashlib.sha256(b"mock://?latency=0.02").hexdigest()
+
+
+def test_create_profile_key_depends_on_detection_model_files(detection_model_files):
+    weights_file_path, configuration_file_path = detection_model_files
+    profile_key = autotuning.create_profile_key(weights_file_path, configuration_file_path)
+
+    assert profile_key.startswith("%s|%s|" % (autotuning.get_cpu_model(), autotuning.get_opencv_build_identity()))
+    assert profile_key == autotuning.create_profile_key(weights_file_path, configuration_file_path)
+    assert profile_key != autotuning.create_profile_key(weights_file_path, None)
+    assert profile_key != autotuning.create_profile_key(configuration_file_path, weights_file_path)
+
+
+@pytest.mark.parametrize("detect_every_frames_number, channel_specification", [
+    (0, "block:1"),
+    (1, "block:1"),
+    (3, "sample:1:3"),
+])
+def test_create_detection_channel_specification(detect_every_frames_number, channel_specification):
+    assert autotuning.create_detection_channel_specification(detect_every_frames_number) == channel_specification
+
+
+def test_autotuning_profile_is_saved_and_loaded(tmp_path, detection_model_files):
+    cache_file_path = str(tmp_path / "cache" / "autotuning_profiles.json")
+
+    assert autotuning.load_autotuning_profile(*detection_model_files, cache_file_path=cache_file_path) is None
+
+    autotuning.save_autotuning_profile(*detection_model_files, PROFILE, cache_file_path=cache_file_path)
+
+    assert autotuning.load_autotuning_profile(*detection_model_files, cache_file_path=cache_file_path) == PROFILE
+    cache = autotuning.load_autotuning_profiles_cache(cache_file_path)
+    assert list(cache["profiles"].values()) == [PROFILE]
+    assert sorted(cache["file_hashes"]) == sorted(os.path.abspath(file_path) for file_path in detection_model_files)
+    assert not os.path.exists(cache_file_path + ".tmp")
+
+
+def test_autotuning_profile_is_not_loaded_for_modified_detection_model(tmp_path, detection_model_files):
+    cache_file_path = str(tmp_path / "autotuning_profiles.json")
+    autotuning.save_autotuning_profile(*detection_model_files, PROFILE, cache_file_path=cache_file_path)
+
+    with open(detection_model_files[0], "ab") as weights_file:
+        weights_file.write(b"\x02")
+
+    assert autotuning.load_autotuning_profile(*detection_model_files, cache_file_path=cache_file_path) is None
+
+
+@pytest.mark.parametrize("cache_file_content", ["{corrupted", json.dumps([]),
+                                                json.dumps({"version": 0, "profiles": {"key": PROFILE}})])
+def test_load_autotuning_profiles_cache_ignores_invalid_cache(tmp_path, cache_file_content):
+    cache_file_path = str(tmp_path / "autotuning_profiles.json")
+    with open(cache_file_path, "w") as cache_file:
+        cache_file.write(cache_file_content)
+
+    assert autotuning.load_autotuning_profiles_cache(cache_file_path) == {"profiles": {}, "file_hashes": {}}
+    assert autotuning.load_autotuning_profiles_cache(str(tmp_path / "missing.json")) == \
+           {"profiles": {}, "file_hashes": {}}
+
+
+@pytest.mark.parametrize("is_configuration_autotuned", [False, True])
+def test_onnx_model_profile_saved_by_autotune_is_found_by_service(tmp_path, detection_model_files,
+                                                                  is_configuration_autotuned):
+    pytest.importorskip("PyQt5")
+    import services
+
+    onnx_model_file_path = str(tmp_path / "model.onnx")
+    with open(onnx_model_file_path, "wb") as onnx_model_file:
+        onnx_model_file.write(b"\x03" * 100)
+    configuration_file_path = detection_model_files[1]
+    cache_file_path = str(tmp_path / "autotuning_profiles.json")
+    # Autotune used to hash its default configuration even for ONNX model, which application runs without one
+    autotuning.save_autotuning_profile(
+        onnx_model_file_path, configuration_file_path if is_configuration_autotuned else None,
+        PROFILE, cache_file_path=cache_file_path)
+
+    person_location_detection_service = services.PersonLocationDetectionService()
+    assert person_location_detection_service.load_autotuning_profile(onnx_model_file_path, None,
+                                                                     cache_file_path) == PROFILE
+    assert person_location_detection_service.load_autotuning_profile(onnx_model_file_path, configuration_file_path,
+                                                                     cache_file_path) == PROFILE
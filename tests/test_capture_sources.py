@@ -0,0 +1,67 @@
+import os
+import cv2 as cv
+import pytest
+import capture_sources
+
+
+@pytest.mark.parametrize("camera_source, expected_source", [
+    (0, ("device", 0, {})),
+    (" 2 ", ("device", 2, {})),
+    ("synthetic://?fps=60", ("synthetic", "synthetic://?fps=60", {})),
+    ("gstreamer://videotestsrc ! appsink", ("gstreamer", "videotestsrc ! appsink", {})),
+    ("videotestsrc ! videoconvert ! appsink", ("gstreamer", "videotestsrc ! videoconvert ! appsink", {})),
+    ("rtsp://camera/stream", ("stream", "rtsp://camera/stream", {})),
+    ("clip.mp4", ("file", "clip.mp4", {"pacing": "realtime", "loop": False})),
+])
+def test_parse_camera_source_detects_source_type(camera_source, expected_source):
+    assert capture_sources.parse_camera_source(camera_source) == expected_source
+
+
+def test_parse_camera_source_reads_video_file_uri_parameters():
+    source_type, location, parameters = capture_sources.parse_camera_source(
+        "file:///videos/my%20clip.mp4?pacing=fast&loop=true")
+
+    assert source_type == "file"
+    assert location == "/videos/my clip.mp4"
+    assert parameters == {"pacing": "fast", "loop": True}
+
+
+def test_parse_camera_source_rejects_unknown_video_file_uri_parameter():
+    with pytest.raises(Exception):
+        capture_sources.parse_camera_source("file:///videos/clip.mp4?speed=2")
+
+
+def test_create_video_file_uri_is_parsed_back(tmp_path):
+    video_file_path = os.path.join(str(tmp_path), "my clip.mp4")
+    video_file_uri = capture_sources.create_video_file_uri(video_file_path, capture_sources.FAST_PACING, True)
+
+    assert capture_sources.parse_camera_source(video_file_uri) == ("file", video_file_path,
+                                                                   {"pacing": "fast", "loop": True})
+
+
+@pytest.mark.parametrize("camera_source, is_finite", [
+    ("clip.mp4", True),
+    ("file:///videos/clip.mp4?loop=true", False),
+    ("filesrc location=clip.mp4 ! decodebin ! videoconvert ! appsink", True),
+    ("gstreamer://videotestsrc num-buffers=100 ! videoconvert ! appsink", True),
+    ("gstreamer://videotestsrc ! videoconvert ! appsink", False),
+    ("rtsp://camera/stream", False),
+    (0, False),
+])
+def test_is_finite_camera_source(camera_source, is_finite):
+    assert capture_sources.is_finite_camera_source(camera_source) == is_finite
+
+
+def test_configure_gstreamer_appsink_adds_missing_appsink():
+    assert capture_sources.configure_gstreamer_appsink("videotestsrc ! videoconvert") == \
+           "videotestsrc ! videoconvert ! appsink drop=true max-buffers=1"
+
+
+def test_configure_gstreamer_appsink_replaces_drop_and_buffers_properties():
+    assert capture_sources.configure_gstreamer_appsink("videotestsrc ! appsink sync=false drop=false max-buffers=5") \
+           == "videotestsrc ! appsink sync=false drop=true max-buffers=1"
+
+
+@pytest.mark.parametrize("fourcc", ["MJPG", "YUYV"])
+def test_decode_fourcc(fourcc):
+    assert capture_sources.decode_fourcc(float(cv.VideoWriter_fourcc(*fourcc))) == fourcc
@@ -0,0 +1,72 @@
+import pytest
+import cascade
+
+
+def create_detection_model_cascade(**levels):
+    return cascade.DetectionModelCascade(**dict(dict(
+        escalation_persons_number=6, de_escalation_persons_number=3, escalation_ambiguity=0.4,
+        de_escalation_ambiguity=0.2, ambiguity_margin=0.1, de_escalation_batches_number=3), **levels))
+
+
+def test_calculate_scene_load():
+    persons_number, ambiguity = cascade.calculate_scene_load([[0.9, 0.55, 0.45], [0.8], []], 0.5, 0.1)
+
+    assert persons_number == 2
+    assert ambiguity == pytest.approx(2 / 4)
+
+
+def test_calculate_scene_load_without_candidates():
+    assert cascade.calculate_scene_load([[], []], 0.5, 0.1) == (0, 0.0)
+
+
+def test_de_escalation_levels_need_to_be_less_than_escalation_ones():
+    with pytest.raises(Exception):
+        create_detection_model_cascade(de_escalation_persons_number=6)
+    with pytest.raises(Exception):
+        create_detection_model_cascade(de_escalation_ambiguity=0.4)
+
+
+def test_escalates_on_crowded_scene():
+    detection_model_cascade = create_detection_model_cascade()
+
+    assert detection_model_cascade.update(5, 0.0) == cascade.FAST_DETECTION_MODEL
+    assert detection_model_cascade.update(6, 0.0) == cascade.ACCURATE_DETECTION_MODEL
+
+
+def test_escalates_on_ambiguous_scene():
+    detection_model_cascade = create_detection_model_cascade()
+
+    assert detection_model_cascade.update(0, 0.4) == cascade.ACCURATE_DETECTION_MODEL
+
+
+def test_de_escalates_only_after_consecutive_calm_batches():
+    detection_model_cascade = create_detection_model_cascade()
+    detection_model_cascade.update(6, 0.0)
+
+    assert detection_model_cascade.update(3, 0.2) == cascade.ACCURATE_DETECTION_MODEL
+    assert detection_model_cascade.update(2, 0.0) == cascade.ACCURATE_DETECTION_MODEL
+    # Scene between de-escalation and escalation levels is not calm, so calm batches are counted again
+    assert detection_model_cascade.update(4, 0.0) == cascade.ACCURATE_DETECTION_MODEL
+    assert detection_model_cascade.update(0, 0.0) == cascade.ACCURATE_DETECTION_MODEL
+    assert detection_model_cascade.update(0, 0.0) == cascade.ACCURATE_DETECTION_MODEL
+    assert detection_model_cascade.update(0, 0.0) == cascade.FAST_DETECTION_MODEL
+
+
+def test_de_escalates_on_ambiguous_scene_if_ambiguity_escalation_is_disabled():
+    detection_model_cascade = create_detection_model_cascade(escalation_ambiguity=None)
+
+    assert detection_model_cascade.update(0, 1.0) == cascade.FAST_DETECTION_MODEL
+    detection_model_cascade.update(6, 1.0)
+    for _ in range(2):
+        assert detection_model_cascade.update(0, 1.0) == cascade.ACCURATE_DETECTION_MODEL
+    assert detection_model_cascade.update(0, 1.0) == cascade.FAST_DETECTION_MODEL
+
+
+def test_get_statistics():
+    detection_model_cascade = create_detection_model_cascade(de_escalation_batches_number=1)
+    for persons_number in (0, 6, 6, 0, 6):
+        detection_model_cascade.update(persons_number, 0.0)
+
+    assert detection_model_cascade.get_statistics() == {
+        "is_escalated": True, "escalations_number": 2, "fast_batches_number": 3, "accurate_batches_number": 2,
+        "accurate_batches_share": 0.4}
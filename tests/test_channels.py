@@ -0,0 +1,112 @@
+import queue
+import threading
+import time
+import pytest
+import channels
+import metrics
+
+
+@pytest.fixture(autouse=True)
+def reset_metrics():
+    metrics.DEFAULT_METRICS_REGISTRY.reset()
+    yield
+    metrics.DEFAULT_METRICS_REGISTRY.reset()
+
+
+def get_queued_items(channel):
+    items = []
+    while not channel.empty():
+        items.append(channel.get_nowait())
+        channel.task_done()
+
+    return items
+
+
+@pytest.mark.parametrize("channel_specification, expected_specification", [
+    ("block", {"policy": "block", "capacity": 1, "sample_interval": 2}),
+    ("drop_oldest:2", {"policy": "drop_oldest", "capacity": 2, "sample_interval": 2}),
+    ("sample:1:3", {"policy": "sample", "capacity": 1, "sample_interval": 3}),
+])
+def test_parse_channel_specification(channel_specification, expected_specification):
+    assert channels.parse_channel_specification(channel_specification) == expected_specification
+
+
+@pytest.mark.parametrize("channel_specification", ["", "lifo:1", "block:0", "block:-1", "block:two", "sample:1:2:3"])
+def test_parse_channel_specification_rejects_invalid_specification(channel_specification):
+    with pytest.raises(Exception):
+        channels.parse_channel_specification(channel_specification)
+
+
+def test_from_specification_creates_channel_with_labels():
+    channel = channels.BackpressureChannel.from_specification("capture_to_gui", "drop_newest:3", camera="front")
+
+    assert (channel.policy, channel.capacity, channel.maxsize) == ("drop_newest", 3, 3)
+    assert channel.labels == {"channel": "capture_to_gui", "camera": "front"}
+
+
+def test_drop_oldest_keeps_newest_items():
+    channel = channels.BackpressureChannel("test", channels.DROP_OLDEST_POLICY, 3)
+
+    assert all(channel.put(item) for item in range(10))
+    assert get_queued_items(channel) == [7, 8, 9]
+    assert metrics.DEFAULT_METRICS_REGISTRY.get_counter("channel_items_total", channel="test") == 10
+    assert metrics.DEFAULT_METRICS_REGISTRY.get_counter("channel_dropped_items_total", channel="test") == 7
+
+
+def test_drop_newest_keeps_first_items():
+    channel = channels.BackpressureChannel("test", channels.DROP_NEWEST_POLICY, 3)
+
+    assert [channel.put(item) for item in range(5)] == [True, True, True, False, False]
+    assert get_queued_items(channel) == [0, 1, 2]
+    assert metrics.DEFAULT_METRICS_REGISTRY.get_counter("channel_dropped_items_total", channel="test") == 2
+
+
+def test_sample_offers_every_nth_item():
+    channel = channels.BackpressureChannel("test", channels.SAMPLE_POLICY, 10, 3)
+
+    assert [channel.put(item) for item in range(7)] == [True, False, False, True, False, False, True]
+    assert get_queued_items(channel) == [0, 3, 6]
+
+
+def test_block_waits_until_item_is_processed():
+    channel = channels.BackpressureChannel("test")
+    channel.put(0)
+    item = channel.get()
+
+    with pytest.raises(queue.Full):
+        channel.put(1, timeout=0.01)
+    assert not channel.wait_for_free_space(0.01)
+
+    channel.task_done()
+    assert channel.wait_for_free_space(0.01)
+    assert channel.put(1, timeout=0.01)
+    assert (item, get_queued_items(channel)) == (0, [1])
+
+
+def test_callback_is_called_when_item_is_put_into_empty_channel():
+    channel = channels.BackpressureChannel("test", channels.DROP_OLDEST_POLICY, 2)
+    put_items_numbers = []
+    channel.item_put_into_empty_channel_callback = lambda: put_items_numbers.append(channel.qsize())
+
+    channel.put(0)
+    channel.put(1)
+    channel.put(2)
+    get_queued_items(channel)
+    channel.put(3)
+
+    assert put_items_numbers == [1, 1]
+
+
+def test_clear_releases_waiting_producer():
+    channel = channels.BackpressureChannel("test")
+    channel.put(0)
+    producer_thread = threading.Thread(target=channel.put, args=(1,))
+    producer_thread.start()
+    time.sleep(0.05)
+    assert producer_thread.is_alive()
+
+    channel.clear()
+    producer_thread.join(1)
+
+    assert not producer_thread.is_alive()
+    assert get_queued_items(channel) == [1]
@@ -0,0 +1,59 @@
+import pytest
+import fusion
+
+
+def test_spatial_hash_grid_finds_items_in_surrounding_cells_only():
+    spatial_hash_grid = fusion.SpatialHashGrid(10)
+    spatial_hash_grid.insert((5, 5), "a")
+    spatial_hash_grid.insert((15, 15), "b")
+    spatial_hash_grid.insert((-5, -5), "c")
+    spatial_hash_grid.insert((35, 5), "d")
+
+    assert spatial_hash_grid.get_cell((-5, -5)) == (-1, -1)
+    assert sorted(spatial_hash_grid.get_neighbour_items((5, 5))) == ["a", "b", "c"]
+
+
+def test_merge_persons_locations_merges_same_person_seen_by_different_cameras():
+    merged_persons_locations = fusion.merge_persons_locations(
+        [("a", (100, 100)), ("b", (110, 100)), ("a", (300, 300))], 50)
+
+    assert merged_persons_locations == [((105, 100), ["a", "b"]), ((300, 300), ["a"])]
+
+
+def test_merge_persons_locations_does_not_merge_persons_of_same_camera():
+    merged_persons_locations = fusion.merge_persons_locations([("a", (100, 100)), ("a", (110, 100))], 50)
+
+    assert [cameras_names for _, cameras_names in merged_persons_locations] == [["a"], ["a"]]
+
+
+def test_merge_persons_locations_joins_nearest_group():
+    merged_persons_locations = fusion.merge_persons_locations(
+        [("a", (0, 0)), ("b", (100, 0)), ("c", (60, 0))], 50)
+
+    assert merged_persons_locations == [((0, 0), ["a"]), ((80, 0), ["b", "c"])]
+
+
+def test_merge_persons_locations_across_cell_border():
+    merged_persons_locations = fusion.merge_persons_locations([("a", (49, 0)), ("b", (51, 0))], 50)
+
+    assert merged_persons_locations == [((50, 0), ["a", "b"])]
+
+
+def test_merge_persons_locations_does_not_merge_persons_beyond_distance_threshold():
+    assert len(fusion.merge_persons_locations([("a", (0, 0)), ("b", (0, 51))], 50)) == 2
+
+
+def test_persons_locations_fusion_fuses_once_per_time_step_and_skips_stale_locations():
+    persons_locations_fusion = fusion.PersonsLocationsFusion(distance_threshold=50, time_step=0.1,
+                                                             max_locations_age=1.0)
+    persons_locations_fusion.update_camera_persons_locations("a", 10.0, [(0, 0)])
+    persons_locations_fusion.update_camera_persons_locations("b", 8.0, [(10, 0)])
+    persons_locations_fusion.update_camera_persons_locations("c", 10.0, [(5, 0)])
+
+    fusion_time, fused_persons_locations = persons_locations_fusion.fuse_if_time_step_passed(10.5)
+    assert fusion_time == 10.5
+    assert fused_persons_locations == [(pytest.approx((2.5, 0)), ["a", "c"])]
+    assert persons_locations_fusion.fuse_if_time_step_passed(10.55) is None
+
+    persons_locations_fusion.remove_camera("c")
+    assert persons_locations_fusion.fuse_if_time_step_passed(10.7)[1] == [((0, 0), ["a"])]
@@ -0,0 +1,85 @@
+import math
+import pytest
+import metrics
+
+
+def test_rolling_histogram_quantiles_are_calculated_over_window():
+    histogram = metrics.RollingHistogram(window_size=100)
+    for value in range(1000):
+        histogram.observe(float(value))
+
+    assert histogram.get_quantiles((0.0, 0.5, 1.0)) == pytest.approx([900.0, 949.5, 999.0])
+    assert histogram.count == 1000
+    assert histogram.sum == pytest.approx(sum(range(1000)))
+
+
+def test_rolling_histogram_quantiles_without_values():
+    assert metrics.RollingHistogram().get_quantiles() == [0.0, 0.0, 0.0]
+
+
+def test_rate_meter_drops_events_out_of_window():
+    rate_meter = metrics.RateMeter(window_duration=5.0)
+    for event_time in range(11):
+        rate_meter.mark(float(event_time))
+
+    assert len(rate_meter.events_times) == 6
+    assert rate_meter.get_rate(10.0) == pytest.approx(6 / 5.0)
+    assert rate_meter.get_rate(100.0) == 0.0
+
+
+def test_registry_snapshot():
+    metrics_registry = metrics.MetricsRegistry()
+    for value in (0.1, 0.2, 0.3):
+        metrics_registry.observe("camera_frame_latency_seconds", value, camera="a")
+    metrics_registry.increment("camera_frames_total", camera="a")
+    metrics_registry.increment("camera_frames_total", 2, camera="a")
+    metrics_registry.set_gauge("camera_up", 1, camera="a")
+
+    snapshot = metrics_registry.get_snapshot()
+
+    histogram, = snapshot["histograms"]
+    assert (histogram["name"], histogram["labels"], histogram["count"]) == ("camera_frame_latency_seconds",
+                                                                            {"camera": "a"}, 3)
+    assert histogram["p50"] == pytest.approx(0.2)
+    assert snapshot["counters"] == [{"name": "camera_frames_total", "labels": {"camera": "a"}, "value": 3}]
+    assert snapshot["gauges"] == [{"name": "camera_up", "labels": {"camera": "a"}, "value": 1}]
+    assert metrics_registry.get_counter("camera_frames_total", camera="a") == 3
+
+
+def test_format_prometheus_text():
+    metrics_registry = metrics.MetricsRegistry()
+    metrics_registry.observe("pipeline_stage_latency_seconds", 0.25, stage="inference")
+    metrics_registry.increment("camera_frames_total", camera='front "door"')
+
+    assert metrics_registry.format_prometheus_text().splitlines() == [
+        "# HELP pipeline_stage_latency_seconds Latency of the pipeline stage",
+        "# TYPE pipeline_stage_latency_seconds summary",
+        'pipeline_stage_latency_seconds{quantile="0.5",stage="inference"} 0.25',
+        'pipeline_stage_latency_seconds{quantile="0.95",stage="inference"} 0.25',
+        'pipeline_stage_latency_seconds{quantile="0.99",stage="inference"} 0.25',
+        'pipeline_stage_latency_seconds_sum{stage="inference"} 0.25',
+        'pipeline_stage_latency_seconds_count{stage="inference"} 1',
+        "# HELP camera_frames_total Number of camera frames read",
+        "# TYPE camera_frames_total counter",
+        'camera_frames_total{camera="front \\"door\\""} 1.0']
+
+
+def test_format_prometheus_text_spells_infinities_and_nan():
+    metrics_registry = metrics.MetricsRegistry()
+    metrics_registry.set_gauge("camera_fps", math.inf, camera="a")
+    metrics_registry.set_gauge("camera_fps", -math.inf, camera="b")
+    metrics_registry.set_gauge("camera_fps", math.nan, camera="c")
+
+    assert metrics_registry.format_prometheus_text().splitlines()[2:] == [
+        'camera_fps{camera="a"} +Inf', 'camera_fps{camera="b"} -Inf', 'camera_fps{camera="c"} NaN']
+
+
+@pytest.mark.parametrize("value, formatted_value", [
+    (math.inf, "+Inf"), (-math.inf, "-Inf"), (math.nan, "NaN"), (0.5, "0.5"), (3, "3.0"), (1e-7, "1e-07")])
+def test_format_prometheus_value(value, formatted_value):
+    assert metrics.format_prometheus_value(value) == formatted_value
+
+
+def test_format_prometheus_labels():
+    assert metrics.format_prometheus_labels({}) == ""
+    assert metrics.format_prometheus_labels({"b": "x\\y", "a": 1}) == '{a="1",b="x\\\\y"}'
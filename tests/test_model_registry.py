@@ -0,0 +1,111 @@
+import os
+import shutil
+import pytest
+import model_registry
+
+BUNDLED_CONFIGURATION_FILE_PATH = os.path.join(model_registry.DETECTION_MODELS_DIRECTORY_PATH,
+                                               "yolov4-tiny-COCO-Person.cfg")
+# Stock 80 classes yolov4-tiny.weights is 24,251,276 bytes: 20 bytes header and 6,062,814 float32 parameters
+STOCK_PARAMETERS_NUMBER = 6062814
+PERSON_PARAMETERS_NUMBER = 5880324
+
+
+def create_file(file_path, size=0):
+    with open(file_path, "wb") as created_file:
+        created_file.write(b"\0" * size)
+
+    return file_path
+
+
+def get_file_name(file_path):
+    return os.path.basename(file_path) if file_path is not None else None
+
+
+@pytest.fixture
+def stock_configuration_file_path(tmp_path):
+    with open(BUNDLED_CONFIGURATION_FILE_PATH) as configuration_file:
+        configuration = configuration_file.read()
+    configuration_file_path = str(tmp_path / "yolov4-tiny.cfg")
+    with open(configuration_file_path, "w") as configuration_file:
+        configuration_file.write(configuration.replace("filters=18", "filters=255").replace("classes=1", "classes=80"))
+
+    return configuration_file_path
+
+
+def test_bundled_configuration_metadata():
+    metadata = model_registry.read_detection_model_metadata(BUNDLED_CONFIGURATION_FILE_PATH)
+
+    assert (metadata["input_size"], metadata["input_channels_number"], metadata["classes_number"]) == ((416, 416), 3, 1)
+    assert metadata["parameters_number"] == PERSON_PARAMETERS_NUMBER
+    assert [(output_layer["grid_size"], output_layer["stride"]) for output_layer in metadata["output_layers"]] == \
+           [((13, 13), 32), ((26, 26), 16)]
+    assert metadata["anchors"] == [(81, 82), (135, 169), (344, 319), (10, 14), (23, 27), (37, 58)]
+
+
+def test_stock_configuration_parameters_number_matches_stock_weights_size(stock_configuration_file_path):
+    metadata = model_registry.read_detection_model_metadata(stock_configuration_file_path)
+
+    assert (metadata["classes_number"], metadata["parameters_number"]) == (80, STOCK_PARAMETERS_NUMBER)
+    assert 20 + 4 * metadata["parameters_number"] == 24251276
+
+
+@pytest.mark.parametrize("header_size, is_matching", [(20, True), (16, True), (24, False), (0, False)])
+def test_is_weights_file_matching_configuration(tmp_path, header_size, is_matching):
+    metadata = model_registry.read_detection_model_metadata(BUNDLED_CONFIGURATION_FILE_PATH)
+    weights_file_path = create_file(str(tmp_path / "yolov4-tiny-COCO-Person.weights"),
+                                    header_size + 4 * PERSON_PARAMETERS_NUMBER)
+
+    assert model_registry.is_weights_file_matching_configuration(weights_file_path, metadata) == is_matching
+
+
+def test_detection_model_metadata_is_read_again_when_configuration_is_modified(stock_configuration_file_path):
+    assert model_registry.read_detection_model_metadata(stock_configuration_file_path)["input_size"] == (416, 416)
+
+    with open(stock_configuration_file_path) as configuration_file:
+        configuration = configuration_file.read()
+    with open(stock_configuration_file_path, "w") as configuration_file:
+        configuration_file.write(configuration.replace("width=416", "width=320").replace("height=416", "height=320")
+                                 + "\n")
+
+    metadata = model_registry.read_detection_model_metadata(stock_configuration_file_path)
+    assert metadata["input_size"] == (320, 320)
+    assert [output_layer["grid_size"] for output_layer in metadata["output_layers"]] == [(10, 10), (20, 20)]
+
+
+def test_read_person_class_id(tmp_path):
+    configuration_file_path = str(tmp_path / "model.cfg")
+    assert model_registry.read_person_class_id(configuration_file_path) == 0
+
+    with open(str(tmp_path / "model.names"), "w") as class_names_file:
+        class_names_file.write("bicycle\n\nPerson\ncar\n")
+    assert model_registry.read_person_class_id(configuration_file_path) == 1
+
+    with open(str(tmp_path / "model.names"), "w") as class_names_file:
+        class_names_file.write("bicycle\ncar\n")
+    assert model_registry.read_person_class_id(configuration_file_path) == 0
+
+
+def test_scan_detection_models_pairs_weights_and_onnx_models_with_configurations(tmp_path):
+    directory_path = str(tmp_path)
+    shutil.copy(BUNDLED_CONFIGURATION_FILE_PATH, os.path.join(directory_path, "yolo.cfg"))
+    shutil.copy(BUNDLED_CONFIGURATION_FILE_PATH, os.path.join(directory_path, "yolo-tiny.cfg"))
+    create_file(os.path.join(directory_path, "yolo-tiny.weights"))
+    create_file(os.path.join(directory_path, "yolo-tiny-INT8.onnx"))
+    create_file(os.path.join(directory_path, "other.onnx"))
+    create_file(os.path.join(directory_path, "notes.txt"))
+
+    detection_model_entries = model_registry.scan_detection_models(directory_path)
+
+    assert [(detection_model_entry["name"], get_file_name(detection_model_entry["weights_file_path"]),
+             get_file_name(detection_model_entry["configuration_file_path"]))
+            for detection_model_entry in detection_model_entries] == [
+        ("other", "other.onnx", None),
+        ("yolo", None, "yolo.cfg"),
+        ("yolo-tiny", "yolo-tiny.weights", "yolo-tiny.cfg"),
+        ("yolo-tiny-INT8", "yolo-tiny-INT8.onnx", "yolo-tiny.cfg")]
+    assert detection_model_entries[0]["parameters_number"] is None
+    assert detection_model_entries[3]["parameters_number"] == PERSON_PARAMETERS_NUMBER
+
+
+def test_scan_detection_models_of_missing_directory(tmp_path):
+    assert model_registry.scan_detection_models(str(tmp_path / "missing")) == []
@@ -0,0 +1,91 @@
+import numpy as np
+import pytest
+import detectors
+
+FRAME_RESOLUTION = (400, 200)
+
+
+def create_region_row(center_x, center_y, width, height, class_scores):
+    return [center_x, center_y, width, height, max(class_scores)] + list(class_scores)
+
+
+def test_convert_region_rows_to_bounding_boxes_clips_to_frame():
+    rows = np.float32([create_region_row(0.5, 0.5, 0.25, 0.5, [1.0]),
+                       create_region_row(0.0, 1.0, 0.5, 0.5, [1.0])])
+
+    assert detectors.convert_region_rows_to_bounding_boxes(rows, FRAME_RESOLUTION).tolist() == [
+        [150, 50, 100, 100], [0, 150, 200, 50]]
+
+
+def test_decode_region_rows_takes_best_class_and_rejects_unconfident_rows():
+    rows = np.float32([create_region_row(0.25, 0.5, 0.1, 0.2, [0.9, 0.1]),
+                       create_region_row(0.75, 0.5, 0.1, 0.2, [0.2, 0.8]),
+                       create_region_row(0.5, 0.5, 0.1, 0.2, [0.3, 0.2])])
+
+    class_ids, confidences, bounding_boxes = detectors.decode_region_rows(rows, FRAME_RESOLUTION, 0.5, 0.4)
+
+    assert class_ids[:, 0].tolist() == [0, 1]
+    assert confidences[:, 0].tolist() == pytest.approx([0.9, 0.8])
+    assert bounding_boxes.shape == (2, 4)
+
+
+def test_decode_region_rows_suppresses_overlapping_bounding_boxes_of_same_class_only():
+    rows = np.float32([create_region_row(0.5, 0.5, 0.2, 0.4, [0.9, 0.0]),
+                       create_region_row(0.51, 0.5, 0.2, 0.4, [0.8, 0.0]),
+                       create_region_row(0.5, 0.5, 0.2, 0.4, [0.0, 0.7])])
+
+    class_ids, confidences, _ = detectors.decode_region_rows(rows, FRAME_RESOLUTION, 0.5, 0.4)
+
+    assert class_ids[:, 0].tolist() == [0, 1]
+    assert confidences[:, 0].tolist() == pytest.approx([0.9, 0.7])
+
+
+def test_decode_region_rows_without_detections():
+    rows = np.float32([create_region_row(0.5, 0.5, 0.2, 0.4, [0.1, 0.1])])
+
+    class_ids, confidences, bounding_boxes = detectors.decode_region_rows(rows, FRAME_RESOLUTION, 0.5, 0.4)
+
+    assert (class_ids.shape, confidences.shape, bounding_boxes.shape) == ((0, 1), (0, 1), (0, 4))
+
+
+def test_decode_person_region_rows_rejects_rows_early():
+    projection_area_mask = detectors.create_projection_area_mask([(0, 0), (200, 0), (200, 200), (0, 200)],
+                                                                 FRAME_RESOLUTION)
+    rows = np.float32([create_region_row(0.25, 0.5, 0.1, 0.2, [0.9, 0.1]),
+                       # Bounding box bottom edge center point is outside the projection area
+                       create_region_row(0.75, 0.5, 0.1, 0.2, [0.9, 0.1]),
+                       # Person is not the best class
+                       create_region_row(0.25, 0.25, 0.1, 0.2, [0.6, 0.7]),
+                       # Person confidence is below the threshold
+                       create_region_row(0.25, 0.75, 0.1, 0.2, [0.3, 0.0])])
+
+    class_ids, confidences, bounding_boxes = detectors.decode_person_region_rows(rows, FRAME_RESOLUTION, 0, 0.5, 0.4,
+                                                                                 projection_area_mask)
+
+    assert class_ids.tolist() == [[0]]
+    assert confidences[:, 0].tolist() == pytest.approx([0.9])
+    assert bounding_boxes.tolist() == [[80, 80, 40, 40]]
+
+
+def test_decode_person_region_rows_matches_decode_region_rows_within_whole_frame():
+    random_generator = np.random.default_rng(0)
+    rows = random_generator.random((200, 8), dtype=np.float32)
+    rows[:, 2:4] *= 0.3
+    projection_area_mask = np.ones((FRAME_RESOLUTION[1], FRAME_RESOLUTION[0]), dtype=np.uint8)
+
+    class_ids, confidences, bounding_boxes = detectors.decode_region_rows(rows, FRAME_RESOLUTION, 0.5, 0.4)
+    is_person = class_ids[:, 0] == 1
+    person_class_ids, person_confidences, person_bounding_boxes = detectors.decode_person_region_rows(
+        rows, FRAME_RESOLUTION, 1, 0.5, 0.4, projection_area_mask)
+
+    assert sorted(map(tuple, person_bounding_boxes.tolist())) == sorted(map(tuple, bounding_boxes[is_person].tolist()))
+    assert sorted(person_confidences[:, 0].tolist()) == sorted(confidences[is_person, 0].tolist())
+    assert np.all(person_class_ids == 1)
+
+
+def test_create_projection_area_mask():
+    projection_area_mask = detectors.create_projection_area_mask([(10, 10), (20, 10), (20, 20), (10, 20)],
+                                                                 FRAME_RESOLUTION)
+
+    assert projection_area_mask.shape == (200, 400)
+    assert projection_area_mask[15, 15] == 1 and projection_area_mask[5, 5] == 0
@@ -0,0 +1,409 @@
+import os
+import sys
+import argparse
+import numpy as np
+import onnx
+from onnx import helper, numpy_helper, TensorProto
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                "person_location_detector"))
+
+import helpers
+
+ONNX_OPSET_VERSION = 11
+# Darknet adds epsilon to batch normalization variance before square root
+BATCH_NORMALIZATION_EPSILON = 0.00001
+DYNAMIC_BATCH_SIZE = "batch"
+
+
+def parse_arguments():
+    """
+    Parses command line arguments.
+
+    :return: parsed arguments
+    """
+    argument_parser = argparse.ArgumentParser(
+        description="Converts Darknet YOLO model into ONNX model with batch normalization folded into convolutions, "
+                    "fixed input size and YOLO outputs decoded into region rows (center x, center y, width, height, "
+                    "objectness and class scores relative to the frame) as OpenCV Darknet importer outputs them.")
+    argument_parser.add_argument("--weights", required=True, help="Darknet weights file path")
+    argument_parser.add_argument("--configuration", required=True, help="Darknet configuration file path")
+    argument_parser.add_argument("--input-size", type=int,
+                                 help="input size of the ONNX model (width and height of the configuration if omitted)")
+    argument_parser.add_argument("--batch-size", type=int,
+                                 help="fixed batch size of the ONNX model (batch size is dynamic if omitted)")
+    argument_parser.add_argument("--output", required=True, help="ONNX model file path")
+
+    return argument_parser.parse_args()
+
+
+class DarknetWeightsReader:
+    """
+    Reader of the Darknet weights file: header is skipped and weights are read sequentially layer by layer.
+    """
+
+    def __init__(self, weights_file_path):
+        """
+        Initializes reader.
+
+        :param weights_file_path: Darknet weights file path
+        """
+        with open(weights_file_path, "rb") as weights_file:
+            major_version, minor_version, _ = np.frombuffer(weights_file.read(12), dtype=np.int32)
+            # Number of seen images is 64-bit since version 0.2
+            weights_file.read(8 if major_version * 10 + minor_version >= 2 else 4)
+            self.weights = np.frombuffer(weights_file.read(), dtype=np.float32)
+        self.offset = 0
+
+    def read(self, values_number):
+        """
+        Reads the next values.
+
+        :param values_number: number of values
+        :return: array of values
+        """
+        if self.offset + values_number > len(self.weights):
+            raise Exception("You need to use weights file that matches the configuration!")
+
+        values = self.weights[self.offset:self.offset + values_number]
+        self.offset += values_number
+
+        return values
+
+    def is_read(self):
+        """
+        Returns whether all weights have been read.
+
+        :return: whether all weights have been read
+        """
+        return self.offset == len(self.weights)
+
+
+class OnnxGraphBuilder:
+    """
+    Builder of the ONNX graph: nodes and initializers get unique names.
+    """
+
+    def __init__(self):
+        """
+        Initializes builder.
+        """
+        self.nodes = []
+        self.initializers = []
+        self.__names_number = 0
+
+    def create_name(self, prefix):
+        """
+        Creates unique name.
+
+        :param prefix: name prefix
+        :return: unique name
+        """
+        self.__names_number += 1
+
+        return "%s_%d" % (prefix, self.__names_number)
+
+    def add_initializer(self, prefix, values, data_type=np.float32):
+        """
+        Adds constant tensor.
+
+        :param prefix: name prefix
+        :param values: tensor values
+        :param data_type: tensor data type
+        :return: tensor name
+        """
+        name = self.create_name(prefix)
+        self.initializers.append(numpy_helper.from_array(np.asarray(values, dtype=data_type), name))
+
+        return name
+
+    def add_node(self, operation_type, inputs, **attributes):
+        """
+        Adds node with one output.
+
+        :param operation_type: ONNX operation type
+        :param inputs: list of input names
+        :param attributes: node attributes
+        :return: output name
+        """
+        output = self.create_name(operation_type.lower())
+        self.nodes.append(helper.make_node(operation_type, inputs, [output], name=output, **attributes))
+
+        return output
+
+
+def add_activation(graph_builder, input_name, activation):
+    """
+    Adds Darknet activation.
+
+    :param graph_builder: ONNX graph builder
+    :param input_name: input name
+    :param activation: Darknet activation name
+    :return: output name
+    """
+    if activation == "linear":
+        return input_name
+    if activation == "leaky":
+        return graph_builder.add_node("LeakyRelu", [input_name], alpha=0.1)
+    if activation == "relu":
+        return graph_builder.add_node("Relu", [input_name])
+    if activation == "logistic":
+        return graph_builder.add_node("Sigmoid", [input_name])
+    if activation == "mish":
+        return graph_builder.add_node("Mul", [input_name, graph_builder.add_node(
+            "Tanh", [graph_builder.add_node("Softplus", [input_name])])])
+
+    raise Exception("You need to use one of the activations: linear, leaky, relu, logistic, mish!")
+
+
+def add_convolutional_layer(graph_builder, weights_reader, input_name, input_shape, options):
+    """
+    Adds convolutional layer: batch normalization is folded into convolution weights and bias.
+
+    :param graph_builder: ONNX graph builder
+    :param weights_reader: Darknet weights reader
+    :param input_name: input name
+    :param input_shape: input shape (channels, height, width)
+    :param options: section options
+    :return: tuple with output name and output shape
+    """
+    filters_number = int(options["filters"])
+    kernel_size = int(options.get("size", 1))
+    stride = int(options.get("stride", 1))
+    padding = kernel_size // 2 if int(options.get("pad", 0)) else int(options.get("padding", 0))
+    groups_number = int(options.get("groups", 1))
+
+    biases = weights_reader.read(filters_number)
+    if int(options.get("batch_normalize", 0)):
+        scales = weights_reader.read(filters_number)
+        means = weights_reader.read(filters_number)
+        variances = weights_reader.read(filters_number)
+    weights = weights_reader.read(filters_number * input_shape[0] // groups_number * kernel_size * kernel_size).reshape(
+        filters_number, input_shape[0] // groups_number, kernel_size, kernel_size)
+    if int(options.get("batch_normalize", 0)):
+        factors = scales / np.sqrt(variances + BATCH_NORMALIZATION_EPSILON)
+        weights = weights * factors[:, None, None, None]
+        biases = biases - means * factors
+
+    output_name = graph_builder.add_node(
+        "Conv", [input_name, graph_builder.add_initializer("weights", weights),
+                 graph_builder.add_initializer("biases", biases)],
+        kernel_shape=[kernel_size, kernel_size], strides=[stride, stride], pads=[padding] * 4, group=groups_number)
+    output_shape = (filters_number, (input_shape[1] + 2 * padding - kernel_size) // stride + 1,
+                    (input_shape[2] + 2 * padding - kernel_size) // stride + 1)
+
+    return add_activation(graph_builder, output_name, options.get("activation", "logistic")), output_shape
+
+
+def add_maxpool_layer(graph_builder, input_name, input_shape, options):
+    """
+    Adds max pooling layer. Darknet pads input with size - 1 pixels in total, padding is added only when it changes
+    output size (it does not for even sizes with equal size and stride).
+
+    :param graph_builder: ONNX graph builder
+    :param input_name: input name
+    :param input_shape: input shape (channels, height, width)
+    :param options: section options
+    :return: tuple with output name and output shape
+    """
+    kernel_size = int(options.get("size", 2))
+    stride = int(options.get("stride", 2))
+    padding = int(options.get("padding", kernel_size - 1))
+    output_shape = (input_shape[0], (input_shape[1] + padding - kernel_size) // stride + 1,
+                    (input_shape[2] + padding - kernel_size) // stride + 1)
+    if output_shape[1:] == ((input_shape[1] - kernel_size) // stride + 1, (input_shape[2] - kernel_size) // stride + 1):
+        pads = [0, 0, 0, 0]
+    else:
+        pads = [padding // 2, padding // 2, padding - padding // 2, padding - padding // 2]
+
+    return graph_builder.add_node("MaxPool", [input_name], kernel_shape=[kernel_size, kernel_size],
+                                  strides=[stride, stride], pads=pads), output_shape
+
+
+def add_route_layer(graph_builder, layers_outputs, layer_index, options):
+    """
+    Adds route layer: outputs of the layers are concatenated, only one of the channel groups is taken if groups are
+    set.
+
+    :param graph_builder: ONNX graph builder
+    :param layers_outputs: list of tuples with output name and output shape of the previous layers
+    :param layer_index: index of the layer
+    :param options: section options
+    :return: tuple with output name and output shape
+    """
+    groups_number = int(options.get("groups", 1))
+    group_index = int(options.get("group_id", 0))
+
+    routed_outputs = []
+    for routed_layer_index in [int(routed_layer_index) for routed_layer_index in options["layers"].split(",")]:
+        routed_name, routed_shape = layers_outputs[
+            routed_layer_index if routed_layer_index >= 0 else layer_index + routed_layer_index]
+        if groups_number > 1:
+            group_channels_number = routed_shape[0] // groups_number
+            routed_name = graph_builder.add_node(
+                "Slice", [routed_name,
+                          graph_builder.add_initializer("starts", [group_index * group_channels_number], np.int64),
+                          graph_builder.add_initializer("ends", [(group_index + 1) * group_channels_number], np.int64),
+                          graph_builder.add_initializer("axes", [1], np.int64)])
+            routed_shape = (group_channels_number,) + routed_shape[1:]
+        routed_outputs.append((routed_name, routed_shape))
+
+    output_shape = (sum(routed_shape[0] for _, routed_shape in routed_outputs),) + routed_outputs[0][1][1:]
+    if len(routed_outputs) == 1:
+        return routed_outputs[0][0], output_shape
+
+    return graph_builder.add_node("Concat", [routed_name for routed_name, _ in routed_outputs], axis=1), output_shape
+
+
+def add_yolo_layer(graph_builder, input_name, input_shape, input_size, options):
+    """
+    Adds YOLO layer decoding: rows of every cell and anchor get center and size relative to the frame, objectness and
+    class scores multiplied by objectness. Grid offsets and anchors are constants, as input size is fixed. Decoding runs
+    on (batch, anchors × columns, height, width) output of the convolution with constants that have no batch dimension,
+    so they are broadcast over any batch size by OpenCV too.
+
+    :param graph_builder: ONNX graph builder
+    :param input_name: input name
+    :param input_shape: input shape (channels, height, width)
+    :param input_size: input size of the model (width, height)
+    :param options: section options
+    :return: name of the rows output (batch size, rows, 5 + classes)
+    """
+    anchors = np.array([float(anchor) for anchor in options["anchors"].split(",")], dtype=np.float32).reshape(-1, 2)
+    anchors = anchors[[int(anchor_index) for anchor_index in options["mask"].split(",")]]
+    anchors_number = len(anchors)
+    columns_number = 5 + int(options["classes"])
+    grid_height, grid_width = input_shape[1], input_shape[2]
+    scale_x_y = float(options.get("scale_x_y", 1.0))
+
+    # Center = (sigmoid × scale − (scale − 1) / 2 + grid offset) / grid size, size = exp × anchor / input size,
+    # objectness and class probabilities = sigmoid
+    sigmoid_factors = np.ones((anchors_number, columns_number), dtype=np.float32)
+    sigmoid_factors[:, 0] = scale_x_y / grid_width
+    sigmoid_factors[:, 1] = scale_x_y / grid_height
+    sigmoid_factors[:, 2:4] = 0
+    exp_factors = np.zeros((anchors_number, columns_number), dtype=np.float32)
+    exp_factors[:, 2:4] = anchors / np.array(input_size, dtype=np.float32)
+    offsets = np.zeros((anchors_number, columns_number, grid_height, grid_width), dtype=np.float32)
+    offsets[:, 0] = (np.arange(grid_width)[None, :] - (scale_x_y - 1) / 2) / grid_width
+    offsets[:, 1] = (np.arange(grid_height)[:, None] - (scale_x_y - 1) / 2) / grid_height
+
+    # Exponent is taken of size columns only (the other columns are zeroed first), so it does not overflow
+    exp_input_name = graph_builder.add_node("Mul", [input_name, graph_builder.add_initializer(
+        "exp_mask", (exp_factors != 0).astype(np.float32).reshape(-1, 1, 1))])
+    decoded_name = graph_builder.add_node("Add", [
+        graph_builder.add_node("Add", [
+            graph_builder.add_node("Mul", [graph_builder.add_node("Sigmoid", [input_name]),
+                                           graph_builder.add_initializer("sigmoid_factors",
+                                                                         sigmoid_factors.reshape(-1, 1, 1))]),
+            graph_builder.add_node("Mul", [graph_builder.add_node("Exp", [exp_input_name]),
+                                           graph_builder.add_initializer("exp_factors",
+                                                                         exp_factors.reshape(-1, 1, 1))])]),
+        graph_builder.add_initializer("offsets", offsets.reshape(-1, grid_height, grid_width))])
+
+    def slice_channels(first_channel, last_channel):
+        return graph_builder.add_node("Slice", [
+            decoded_name, graph_builder.add_initializer("starts", [first_channel], np.int64),
+            graph_builder.add_initializer("ends", [last_channel], np.int64),
+            graph_builder.add_initializer("axes", [1], np.int64)])
+
+    # Class scores of every anchor are multiplied by its objectness
+    anchors_outputs = []
+    for anchor_index in range(anchors_number):
+        first_channel = anchor_index * columns_number
+        objectness_name = slice_channels(first_channel + 4, first_channel + 5)
+        anchors_outputs.append(slice_channels(first_channel, first_channel + 5))
+        anchors_outputs.append(graph_builder.add_node("Mul", [
+            slice_channels(first_channel + 5, first_channel + columns_number),
+            objectness_name if columns_number == 6 else graph_builder.add_node(
+                "Concat", [objectness_name] * (columns_number - 5), axis=1)]))
+    decoded_name = graph_builder.add_node("Concat", anchors_outputs, axis=1)
+
+    # (batch, anchors × columns, height, width) → (batch, height × width × anchors, columns) as OpenCV orders rows
+    rows_name = graph_builder.add_node("Reshape", [decoded_name, graph_builder.add_initializer(
+        "shape", [-1, anchors_number, columns_number, grid_height * grid_width], np.int64)])
+    rows_name = graph_builder.add_node("Transpose", [rows_name], perm=[0, 3, 1, 2])
+
+    return graph_builder.add_node("Reshape", [rows_name, graph_builder.add_initializer(
+        "shape", [-1, grid_height * grid_width * anchors_number, columns_number], np.int64)])
+
+
+def convert_darknet_to_onnx(weights_file_path, configuration_file_path, input_size=None, batch_size=None):
+    """
+    Converts Darknet YOLO model into ONNX model.
+
+    :param weights_file_path: Darknet weights file path
+    :param configuration_file_path: Darknet configuration file path
+    :param input_size: input size of the ONNX model (width and height of the configuration if it is None)
+    :param batch_size: fixed batch size of the ONNX model (batch size is dynamic if it is None)
+    :return: ONNX model
+    """
+    configuration_sections = helpers.parse_darknet_configuration_sections(configuration_file_path)
+    net_options = configuration_sections[0][2]
+    input_size = (input_size, input_size) if input_size is not None else (int(net_options["width"]),
+                                                                          int(net_options["height"]))
+    weights_reader = DarknetWeightsReader(weights_file_path)
+    graph_builder = OnnxGraphBuilder()
+
+    layers_outputs = []
+    yolo_outputs = []
+    output_name, output_shape = "input", (int(net_options.get("channels", 3)), input_size[1], input_size[0])
+    for layer_index, (section_type, section_line_number, options) in enumerate(configuration_sections[1:]):
+        if section_type == "convolutional":
+            output_name, output_shape = add_convolutional_layer(graph_builder, weights_reader, output_name,
+                                                                output_shape, options)
+        elif section_type == "maxpool":
+            output_name, output_shape = add_maxpool_layer(graph_builder, output_name, output_shape, options)
+        elif section_type == "route":
+            output_name, output_shape = add_route_layer(graph_builder, layers_outputs, layer_index, options)
+        elif section_type == "shortcut":
+            shortcut_index = int(options["from"])
+            output_name = add_activation(graph_builder, graph_builder.add_node("Add", [
+                output_name, layers_outputs[shortcut_index if shortcut_index >= 0 else layer_index + shortcut_index][0]
+            ]), options.get("activation", "linear"))
+        elif section_type == "upsample":
+            stride = int(options.get("stride", 2))
+            output_name = graph_builder.add_node(
+                "Resize", [output_name, graph_builder.add_initializer("roi", [], np.float32),
+                           graph_builder.add_initializer("scales", [1, 1, stride, stride])],
+                mode="nearest", coordinate_transformation_mode="asymmetric", nearest_mode="floor")
+            output_shape = (output_shape[0], output_shape[1] * stride, output_shape[2] * stride)
+        elif section_type == "yolo":
+            yolo_outputs.append(add_yolo_layer(graph_builder, output_name, output_shape, input_size, options))
+        else:
+            raise Exception("You need to use configuration with convolutional, maxpool, route, shortcut, upsample and "
+                            "yolo layers only (line %d)!" % section_line_number)
+        layers_outputs.append((output_name, output_shape))
+
+    if not weights_reader.is_read():
+        raise Exception("You need to use weights file that matches the configuration!")
+
+    rows_output = graph_builder.add_node("Concat", yolo_outputs, axis=1) if len(yolo_outputs) > 1 else yolo_outputs[0]
+    graph_builder.nodes.append(helper.make_node("Identity", [rows_output], ["rows"], name="rows"))
+    batch_dimension = batch_size if batch_size is not None else DYNAMIC_BATCH_SIZE
+    graph = helper.make_graph(
+        graph_builder.nodes, os.path.splitext(os.path.basename(configuration_file_path))[0],
+        [helper.make_tensor_value_info("input", TensorProto.FLOAT, [batch_dimension, 3, input_size[1], input_size[0]])],
+        [helper.make_tensor_value_info("rows", TensorProto.FLOAT, [batch_dimension, None, None])],
+        graph_builder.initializers)
+    onnx_model = helper.make_model(graph, producer_name="person_location_detector",
+                                   opset_imports=[helper.make_opsetid("", ONNX_OPSET_VERSION)])
+    onnx.checker.check_model(onnx_model)
+
+    return onnx_model
+
+
+def main():
+    """
+    Script entry point.
+    """
+    arguments = parse_arguments()
+
+    onnx_model = convert_darknet_to_onnx(arguments.weights, arguments.configuration, arguments.input_size,
+                                         arguments.batch_size)
+    onnx.save(onnx_model, arguments.output)
+    print("ONNX model has been written:", arguments.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+import os
+import tempfile
+import argparse
+import numpy as np
+import cv2 as cv
+import onnx
+from onnxruntime import quantization
+
+DATASET_DIRECTORY_NAME = "dataset"
+DATASET_IMAGE_FILE_EXTENSIONS = (".jpg", ".jpeg", ".png")
+CALIBRATION_METHODS = {"minmax": quantization.CalibrationMethod.MinMax,
+                       "entropy": quantization.CalibrationMethod.Entropy,
+                       "percentile": quantization.CalibrationMethod.Percentile}
+
+
+def parse_arguments():
+    """
+    Parses command line arguments.
+
+    :return: parsed arguments
+    """
+    argument_parser = argparse.ArgumentParser(
+        description="Quantizes convolutions of the ONNX model (see convert_darknet_to_onnx.py) to INT8 with static "
+                    "post-training quantization calibrated on the dataset images (see "
+                    "download_coco_single_class_images.py). YOLO decoding stays in FP32, so box coordinates are not "
+                    "quantized. Quantized model is run by ONNX Runtime.")
+    argument_parser.add_argument("--model", required=True, help="FP32 ONNX model file path")
+    argument_parser.add_argument("--images", default=DATASET_DIRECTORY_NAME, help="calibration images directory path")
+    argument_parser.add_argument("--calibration-images", type=int, default=200,
+                                 help="number of calibration images (evenly taken from the sorted images)")
+    argument_parser.add_argument("--calibration-method", choices=sorted(CALIBRATION_METHODS), default="minmax",
+                                 help="method of activations ranges calibration")
+    argument_parser.add_argument("--per-channel", action="store_true",
+                                 help="quantize convolution weights per output channel")
+    argument_parser.add_argument("--output", required=True, help="INT8 ONNX model file path")
+
+    return argument_parser.parse_args()
+
+
+def get_dataset_image_file_paths(images_directory_path, images_number=None):
+    """
+    Gets image file paths of the dataset directory.
+
+    :param images_directory_path: images directory path
+    :param images_number: number of images evenly taken from the sorted images (all images if it is None)
+    :return: list of image file paths
+    """
+    image_file_paths = sorted(os.path.join(images_directory_path, file_name)
+                              for file_name in os.listdir(images_directory_path)
+                              if file_name.lower().endswith(DATASET_IMAGE_FILE_EXTENSIONS))
+    if images_number is not None and images_number < len(image_file_paths):
+        image_file_paths = [image_file_paths[image_index] for image_index in
+                            np.linspace(0, len(image_file_paths) - 1, images_number).astype(int)]
+
+    return image_file_paths
+
+
+class DatasetCalibrationDataReader(quantization.CalibrationDataReader):
+    """
+    Calibration data reader that feeds dataset images preprocessed as batched detection model does it (scaled by 1 /
+    255 and resized to the input size without channels swap and crop).
+    """
+
+    def __init__(self, image_file_paths, input_name, input_shape):
+        """
+        Initializes reader.
+
+        :param image_file_paths: list of image file paths
+        :param input_name: name of the model input
+        :param input_shape: shape of the model input (batch size, channels, height, width), batch size is 1 if it is
+        dynamic
+        """
+        self.image_file_paths = image_file_paths
+        self.input_name = input_name
+        self.batch_size = input_shape[0] or 1
+        self.input_size = (input_shape[3], input_shape[2])
+        self.__next_image_index = 0
+
+    def get_next(self):
+        """
+        Returns input of the next calibration batch.
+
+        :return: dictionary with input blob by input name (None if images have run out)
+        """
+        images = []
+        while len(images) < self.batch_size and self.__next_image_index < len(self.image_file_paths):
+            image = cv.imread(self.image_file_paths[self.__next_image_index])
+            self.__next_image_index += 1
+            if image is not None:
+                images.append(image)
+        if len(images) < self.batch_size:
+            return None
+
+        return {self.input_name: cv.dnn.blobFromImages(images, 1.0 / 255, self.input_size)}
+
+
+def quantize_onnx_model(model_file_path, output_file_path, image_file_paths, calibration_method="minmax",
+                        is_per_channel=False):
+    """
+    Quantizes convolutions of the ONNX model to INT8 (QDQ format that ONNX Runtime fuses into integer convolutions).
+    Model is optimized and its shapes are inferred first, so quantization parameters are calibrated for the fused graph.
+
+    :param model_file_path: FP32 ONNX model file path
+    :param output_file_path: INT8 ONNX model file path
+    :param image_file_paths: list of calibration image file paths
+    :param calibration_method: method of activations ranges calibration
+    :param is_per_channel: whether convolution weights are quantized per output channel
+    """
+    onnx_model = onnx.load(model_file_path)
+    model_input = onnx_model.graph.input[0]
+    input_shape = [dimension.dim_value if dimension.HasField("dim_value") else None
+                   for dimension in model_input.type.tensor_type.shape.dim]
+    if None in input_shape[2:]:
+        raise Exception("You need to use ONNX model with fixed input size!")
+
+    with tempfile.TemporaryDirectory() as temporary_directory_path:
+        preprocessed_model_file_path = os.path.join(temporary_directory_path, "preprocessed_model.onnx")
+        quantization.quant_pre_process(model_file_path, preprocessed_model_file_path, skip_symbolic_shape=True)
+        quantization.quantize_static(
+            preprocessed_model_file_path, output_file_path,
+            DatasetCalibrationDataReader(image_file_paths, model_input.name, input_shape),
+            quant_format=quantization.QuantFormat.QDQ, op_types_to_quantize=["Conv"], per_channel=is_per_channel,
+            activation_type=quantization.QuantType.QUInt8, weight_type=quantization.QuantType.QInt8,
+            calibrate_method=CALIBRATION_METHODS[calibration_method])
+
+
+def main():
+    """
+    Script entry point.
+    """
+    arguments = parse_arguments()
+
+    image_file_paths = get_dataset_image_file_paths(arguments.images, arguments.calibration_images)
+    if len(image_file_paths) == 0:
+        raise Exception("You need to download dataset images first!")
+    print("Calibration images:", len(image_file_paths))
+
+    quantize_onnx_model(arguments.model, arguments.output, image_file_paths, arguments.calibration_method,
+                        arguments.per_channel)
+    print("INT8 ONNX model has been written:", arguments.output)
+
+
+if __name__ == "__main__":
+    main()